@@ -0,0 +1,421 @@
+import os
+import sys
+import csv
+import glob
+import heapq
+import tempfile
+from datetime import datetime
+import batchtiming
+import deadline
+
+# Konfigurasi audit coverage keyspace (interval yang benar-benar selesai discan)
+LOG_FILE = "logbatch.txt"                 # Log batch runner berbasis file (kamu.py)
+NEXT_BATCH_FILE = "nextbatch.txt"         # Sumber default START_HEX dan RANGE_BITS
+GENERATED_PREFIX = "generated_batches"    # File batch hasil genbnew/genbnext/genbsmal
+GAPS_FILE = "gaps_batches.txt"            # Gap yang belum discan (format batch_id|start_hex|end_hex)
+OVERLAP_FILE = "overlap_ranges.txt"       # Range yang discan lebih dari sekali
+CHUNK_INTERVALS = 1000000                 # Interval per chunk sebelum di-sort dan ditulis ke file sementara
+DB_FETCH_ROWS = 50000                     # Baris Tbatch per fetchmany
+GAP_MAX_BITS = 40                         # Ukuran maksimal satu batch gap (2^40 keys)
+REPORT_LIMIT = 10                         # Jumlah gap / overlap yang ditampilkan di laporan
+
+BATCH_COLUMNS = ['batch_id', 'start_hex', 'end_hex']
+
+def scanned_bits(start_int, end_int):
+    """Range bits yang dipakai runner untuk [start, end] inklusif (dibulatkan ke atas seperti calculate_range_bits)"""
+    keys_count = end_int - start_int + 1
+    if keys_count <= 1:
+        return 1
+    return (keys_count - 1).bit_length()
+
+def timing_intervals(stats):
+    """Interval dari timingbatch.txt yang mencapai 'Range Finished!' (t_scan_end terisi)"""
+    if not os.path.exists(batchtiming.TIMING_FILE):
+        return
+
+    with open(batchtiming.TIMING_FILE, 'r') as f:
+        for row in csv.DictReader(f, delimiter='|'):
+            if row.get('kind') != 'batch':
+                continue
+            stats['timing_records'] += 1
+            if not row.get('t_scan_end') or row.get('return_code') != '0':
+                continue
+            try:
+                start_int = int(row['start_hex'], 16)
+                bits = int(row['range_bits'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            stats['timing_confirmed'] += 1
+            track_batch_id(stats, row.get('batch_id'))
+            yield start_int, start_int + (1 << bits)
+
+def log_intervals(stats, trust_status):
+    """Baris logbatch.txt: hitung status, 'done' ikut coverage hanya dengan --trust-status"""
+    if not os.path.exists(LOG_FILE):
+        return
+
+    with open(LOG_FILE, 'r') as f:
+        for row in csv.DictReader(f, delimiter='|'):
+            status = (row.get('status') or '').strip() or 'pending'
+            stats['log_status'][status] = stats['log_status'].get(status, 0) + 1
+            track_batch_id(stats, row.get('batch_id'))
+            if status != 'done' or not trust_status:
+                continue
+            try:
+                start_int = int(row['start_hex'], 16)
+                bits = int(row['range_bits'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            yield start_int, start_int + (1 << bits)
+
+def db_intervals(stats, trust_status):
+    """Baris Tbatch (streaming fetchmany): hitung status, 'done' ikut coverage hanya dengan --trust-status"""
+    import kamudb
+
+    conn = kamudb.connect_db()
+    if not conn:
+        return
+
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT id, start_range, end_range, status FROM {kamudb.TABLE}")
+        while True:
+            rows = cursor.fetchmany(DB_FETCH_ROWS)
+            if not rows:
+                break
+            for batch_id, start_range, end_range, status in rows:
+                status = (status or '').strip() or 'pending'
+                stats['db_status'][status] = stats['db_status'].get(status, 0) + 1
+                track_batch_id(stats, batch_id)
+                if status != 'done' or not trust_status:
+                    continue
+                try:
+                    start_int = int(start_range, 16)
+                    end_int = int(end_range, 16)
+                except (TypeError, ValueError):
+                    continue
+                # Runner men-scan start + 2^bits (dibulatkan ke atas), bukan sampai end_range
+                yield start_int, start_int + (1 << scanned_bits(start_int, end_int))
+        cursor.close()
+    finally:
+        conn.close()
+
+def generated_bounds(stats):
+    """Batas keyspace dari semua file generated_batches*.txt (jika tidak ada nextbatch.txt)"""
+    low = None
+    high = None
+
+    for path in sorted(glob.glob(f"{GENERATED_PREFIX}*.txt")):
+        with open(path, 'r') as f:
+            for row in csv.DictReader(f, delimiter='|'):
+                try:
+                    start_int = int(row['start_hex'], 16)
+                    end_int = int(row['end_hex'], 16) + 1
+                except (KeyError, TypeError, ValueError):
+                    continue
+                stats['planned_batches'] += 1
+                track_batch_id(stats, row.get('batch_id'))
+                low = start_int if low is None else min(low, start_int)
+                high = end_int if high is None else max(high, end_int)
+
+    return low, high
+
+def track_batch_id(stats, batch_id):
+    try:
+        stats['max_batch_id'] = max(stats['max_batch_id'], int(batch_id))
+    except (TypeError, ValueError):
+        pass
+
+def load_target(start_hex=None, range_bits=None):
+    """Keyspace target [start, end): argumen CLI, nextbatch.txt, atau None"""
+    if start_hex is None and os.path.exists(NEXT_BATCH_FILE):
+        info = {}
+        with open(NEXT_BATCH_FILE, 'r') as f:
+            for line in f:
+                if '=' in line:
+                    key, value = line.strip().split('=', 1)
+                    info[key] = value
+        start_hex = info.get('original_start')
+        range_bits = info.get('original_range_bits')
+
+    if start_hex is None or range_bits is None:
+        return None
+
+    start_int = int(start_hex, 16)
+    return start_int, start_int + (1 << int(range_bits))
+
+def _spill(chunk, tmp_dir):
+    """Sort satu chunk interval dan tulis ke file sementara"""
+    chunk.sort()
+    fd, path = tempfile.mkstemp(prefix='audit_', suffix='.txt', dir=tmp_dir)
+    with os.fdopen(fd, 'w') as f:
+        for start_int, end_int in chunk:
+            f.write(f"{start_int:x} {end_int:x}\n")
+    return path
+
+def _read_spill(path):
+    with open(path, 'r') as f:
+        for line in f:
+            start_hex, end_hex = line.split()
+            yield int(start_hex, 16), int(end_hex, 16)
+
+def sorted_stream(sources, tmp_dir):
+    """External merge sort: chunk ter-sort di disk, lalu heapq.merge (memori O(CHUNK_INTERVALS))"""
+    paths = []
+    chunk = []
+
+    for source in sources:
+        for interval in source:
+            chunk.append(interval)
+            if len(chunk) >= CHUNK_INTERVALS:
+                paths.append(_spill(chunk, tmp_dir))
+                chunk = []
+
+    chunk.sort()
+    return heapq.merge(chunk, *[_read_spill(path) for path in paths]), len(paths)
+
+class CoverageSweep:
+    """Sweep interval ter-sort: gap, overlap (double scan) dan key di luar target"""
+
+    def __init__(self, target_start, target_end, gap_writer, overlap_writer):
+        self.target_start = target_start
+        self.target_end = target_end
+        self.covered_until = target_start
+        self.gap_writer = gap_writer
+        self.overlap_writer = overlap_writer
+        self.intervals = 0
+        self.scanned_keys = 0
+        self.covered_keys = 0
+        self.overlap_keys = 0
+        self.outside_keys = 0
+        self.gap_keys = 0
+        self.gap_count = 0
+        self.overlap_count = 0
+        self.largest_gaps = []
+        self.open_overlap = None
+
+    def feed(self, start_int, end_int):
+        self.intervals += 1
+        self.scanned_keys += end_int - start_int
+
+        # Bagian di luar keyspace target
+        clipped_start = max(start_int, self.target_start)
+        clipped_end = min(end_int, self.target_end)
+        if clipped_end <= clipped_start:
+            self.outside_keys += end_int - start_int
+            return
+        self.outside_keys += (clipped_start - start_int) + (end_int - clipped_end)
+
+        if clipped_start > self.covered_until:
+            self._gap(self.covered_until, clipped_start)
+        elif clipped_start < self.covered_until:
+            self._overlap(clipped_start, min(clipped_end, self.covered_until))
+
+        if clipped_end > self.covered_until:
+            self.covered_keys += clipped_end - max(clipped_start, self.covered_until)
+            self.covered_until = clipped_end
+
+    def _gap(self, start_int, end_int):
+        self.gap_count += 1
+        self.gap_keys += end_int - start_int
+        self.gap_writer(start_int, end_int)
+        heapq.heappush(self.largest_gaps, (end_int - start_int, start_int))
+        if len(self.largest_gaps) > REPORT_LIMIT:
+            heapq.heappop(self.largest_gaps)
+
+    def _overlap(self, start_int, end_int):
+        self.overlap_keys += end_int - start_int
+        # Overlap yang bersambung digabung sebelum ditulis
+        if self.open_overlap and start_int <= self.open_overlap[1]:
+            self.open_overlap[1] = max(self.open_overlap[1], end_int)
+            return
+        self._flush_overlap()
+        self.open_overlap = [start_int, end_int]
+
+    def _flush_overlap(self):
+        if self.open_overlap:
+            self.overlap_count += 1
+            self.overlap_writer(*self.open_overlap)
+            self.open_overlap = None
+
+    def finish(self):
+        if self.covered_until < self.target_end:
+            self._gap(self.covered_until, self.target_end)
+        self._flush_overlap()
+
+def run_audit(target=None, use_db=False, trust_status=False):
+    """Audit coverage dan tulis GAPS_FILE / OVERLAP_FILE, mengembalikan statistik"""
+    stats = {
+        'timing_records': 0,
+        'timing_confirmed': 0,
+        'planned_batches': 0,
+        'log_status': {},
+        'db_status': {},
+        'max_batch_id': -1,
+        'spill_files': 0
+    }
+
+    low, high = generated_bounds(stats)
+    if target is None and low is not None:
+        target = (low, high)
+    if target is None:
+        print("❌ No target keyspace: pass START_HEX RANGE_BITS or provide nextbatch.txt / generated batch files")
+        return None
+
+    sources = [timing_intervals(stats), log_intervals(stats, trust_status)]
+    if use_db:
+        sources.append(db_intervals(stats, trust_status))
+
+    next_gap_id = [None]
+    gaps_tmp = f"{GAPS_FILE}.tmp"
+    overlap_tmp = f"{OVERLAP_FILE}.tmp"
+
+    with tempfile.TemporaryDirectory(prefix='xiebo_audit_') as tmp_dir, \
+         open(gaps_tmp, 'w', newline='') as gaps_f, open(overlap_tmp, 'w') as overlap_f:
+        gaps_writer = csv.DictWriter(gaps_f, fieldnames=BATCH_COLUMNS, delimiter='|')
+        gaps_writer.writeheader()
+        overlap_f.write("start_hex|end_hex|keys\n")
+
+        def write_gap(start_int, end_int):
+            # ID gap dimulai setelah batch_id terbesar (semua sumber sudah terbaca saat merge)
+            if next_gap_id[0] is None:
+                next_gap_id[0] = stats['max_batch_id'] + 1
+            # Gap dipecah jadi blok 2^k aligned agar xiebo tidak men-scan melewati gap
+            for block_start, bits in deadline.aligned_blocks(start_int, end_int, GAP_MAX_BITS):
+                gaps_writer.writerow({
+                    'batch_id': str(next_gap_id[0]),
+                    'start_hex': format(block_start, 'x'),
+                    'end_hex': format(block_start + (1 << bits) - 1, 'x')
+                })
+                next_gap_id[0] += 1
+
+        def write_overlap(start_int, end_int):
+            overlap_f.write(f"{start_int:x}|{end_int - 1:x}|{end_int - start_int}\n")
+
+        merged, stats['spill_files'] = sorted_stream(sources, tmp_dir)
+        sweep = CoverageSweep(target[0], target[1], write_gap, write_overlap)
+        for start_int, end_int in merged:
+            sweep.feed(start_int, end_int)
+        sweep.finish()
+
+    os.replace(gaps_tmp, GAPS_FILE)
+    os.replace(overlap_tmp, OVERLAP_FILE)
+
+    stats['target'] = target
+    stats['sweep'] = sweep
+    stats['gap_batches'] = 0 if next_gap_id[0] is None else next_gap_id[0] - (stats['max_batch_id'] + 1)
+    stats['first_gap_id'] = stats['max_batch_id'] + 1
+    return stats
+
+def insert_batches_db(path=GAPS_FILE, keep_ids=False):
+    """Memasukkan file batch (batch_id|start_hex|end_hex) ke Tbatch, ID dari file atau lanjutan MAX(id)"""
+    import kamudb
+
+    conn = kamudb.connect_db()
+    if not conn:
+        return 0
+
+    inserted = 0
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT ISNULL(MAX(id), -1) FROM {kamudb.TABLE}")
+        next_id = int(cursor.fetchone()[0]) + 1
+
+        with open(path, 'r') as f:
+            for row in csv.DictReader(f, delimiter='|'):
+                batch_id = int(row['batch_id']) if keep_ids else next_id
+                cursor.execute(f"""
+                    INSERT INTO {kamudb.TABLE} (id, start_range, end_range, status, found, wif)
+                    VALUES (?, ?, ?, 'pending', '', '')
+                """, (batch_id, row['start_hex'], row['end_hex']))
+                next_id += 1
+                inserted += 1
+                if inserted % DB_FETCH_ROWS == 0:
+                    conn.commit()
+
+        conn.commit()
+        cursor.close()
+    except Exception as e:
+        print(f"❌ Error inserting {path} into {kamudb.TABLE}: {e}")
+        conn.rollback()
+    finally:
+        conn.close()
+
+    return inserted
+
+def display_report(stats):
+    sweep = stats['sweep']
+    target_start, target_end = stats['target']
+    target_keys = target_end - target_start
+    wasted_keys = sweep.overlap_keys + sweep.outside_keys
+
+    print(f"\n{'='*60}")
+    print(f"🔍 KEYSPACE COVERAGE AUDIT - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"{'='*60}")
+    print(f"Target: 0x{target_start:x} - 0x{target_end - 1:x} ({target_keys:,} keys)")
+    print(f"Timing records: {stats['timing_records']:,} ({stats['timing_confirmed']:,} with 'Range Finished!')")
+    if stats['planned_batches']:
+        print(f"Generated batches: {stats['planned_batches']:,}")
+    for label, key in (('logbatch.txt', 'log_status'), ('Tbatch', 'db_status')):
+        if stats[key]:
+            counts = ', '.join(f"{status}={count:,}" for status, count in sorted(stats[key].items()))
+            print(f"{label} status: {counts}")
+    print(f"Intervals merged: {sweep.intervals:,} ({stats['spill_files']} spill files)")
+
+    print(f"\n📊 Coverage:")
+    print(f"   Covered: {sweep.covered_keys:,} keys ({sweep.covered_keys / target_keys * 100:.4f}%)")
+    print(f"   Gaps: {sweep.gap_count:,} ranges, {sweep.gap_keys:,} keys")
+    print(f"   Double-scanned: {sweep.overlap_count:,} ranges, {sweep.overlap_keys:,} keys")
+    print(f"   Outside target: {sweep.outside_keys:,} keys")
+    print(f"   Wasted keys (double + outside): {wasted_keys:,} "
+          f"({wasted_keys / max(1, sweep.scanned_keys) * 100:.4f}% of scanned)")
+
+    if sweep.largest_gaps:
+        print(f"\n🕳️ Largest gaps:")
+        for keys, start_int in sorted(sweep.largest_gaps, reverse=True):
+            print(f"   0x{start_int:x} - 0x{start_int + keys - 1:x} ({keys:,} keys)")
+
+    if sweep.gap_count:
+        print(f"\n📝 {stats['gap_batches']:,} gap batches written to {GAPS_FILE} "
+              f"(IDs from {stats['first_gap_id']})")
+    else:
+        print(f"\n✅ Keyspace fully covered, no gaps")
+    if sweep.overlap_count:
+        print(f"📝 Double-scanned ranges written to {OVERLAP_FILE}")
+    print(f"{'='*60}")
+
+def main():
+    use_db = "--db" in sys.argv
+    enqueue_db = "--enqueue-db" in sys.argv
+    trust_status = "--trust-status" in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg not in ("--db", "--enqueue-db", "--trust-status")]
+
+    if args and args[0] in ("-h", "--help"):
+        print("Xiebo Keyspace Coverage Auditor")
+        print("Usage:")
+        print("  Audit:        python3 audit.py [START_HEX RANGE_BITS] [--db] [--trust-status] [--enqueue-db]")
+        print(f"  Default target from {NEXT_BATCH_FILE}, else bounds of {GENERATED_PREFIX}*.txt")
+        print(f"  Coverage = {batchtiming.TIMING_FILE} records with 'Range Finished!' "
+              f"(--trust-status also counts 'done' rows of {LOG_FILE} / Tbatch)")
+        print(f"  Gaps -> {GAPS_FILE} (run with kamu.py / import to Tbatch), --enqueue-db inserts them into Tbatch")
+        sys.exit(1)
+
+    if len(args) == 1:
+        print("❌ Provide both START_HEX and RANGE_BITS")
+        sys.exit(1)
+
+    target = load_target(*args[:2]) if len(args) >= 2 else load_target()
+    stats = run_audit(target, use_db=use_db, trust_status=trust_status)
+    if stats is None:
+        sys.exit(1)
+
+    display_report(stats)
+
+    if enqueue_db and stats['sweep'].gap_count:
+        inserted = insert_batches_db()
+        print(f"📥 {inserted:,} gap batches enqueued into Tbatch")
+
+    sys.exit(0 if stats['sweep'].gap_count == 0 else 2)
+
+if __name__ == "__main__":
+    main()
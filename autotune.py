@@ -0,0 +1,208 @@
+import sys
+import math
+import subprocess
+import batchtiming
+
+# Konfigurasi auto-tuning ukuran batch
+TARGET_OVERHEAD_PERCENT = 1.0      # Maksimal overhead per launch (setup + popen + bookkeeping + sleep)
+SESSION_TIME_LIMIT = 12 * 3600     # Batas waktu satu sesi (Colab ~12 jam)
+MAX_BATCH_SECONDS = 3600           # Satu batch tidak boleh lebih lama dari ini (kehilangan maksimal saat sesi putus)
+MIN_BATCH_BITS = 30                # Batas bawah ukuran batch (2^30 keys)
+MAX_BATCH_BITS = 50                # Batas atas ukuran batch (2^50 keys)
+PROFILE_WINDOW = 20                # Jumlah batch terakhir per tipe GPU yang dipakai untuk profil
+
+def detect_gpu_name(gpu_id):
+    """Mencari nama GPU dari nvidia-smi, fallback ke file timing"""
+    try:
+        result = subprocess.run(
+            ["nvidia-smi", "--query-gpu=name", "--format=csv,noheader", "-i", str(gpu_id)],
+            capture_output=True,
+            text=True,
+            timeout=10
+        )
+        if result.returncode == 0 and result.stdout.strip():
+            return result.stdout.strip().splitlines()[0].strip()
+    except Exception:
+        pass
+
+    # Fallback: nama GPU terakhir yang tercatat untuk gpu_id ini
+    gpu_name = None
+    for record in batchtiming.read_timing_records():
+        if record.get('gpu_id') == str(gpu_id) and record.get('gpu_name'):
+            gpu_name = record['gpu_name']
+    return gpu_name
+
+def build_speed_profiles(records=None):
+    """Membangun profil kecepatan dan overhead per launch untuk setiap tipe GPU"""
+    if records is None:
+        records = batchtiming.read_timing_records()
+
+    samples = {}
+    sleeps = {}
+
+    for record in records:
+        gpu_name = record.get('gpu_name') or ''
+        if not gpu_name:
+            continue
+
+        if record.get('kind') == 'sleep':
+            sleep_seconds = batchtiming._to_float(record.get('sleep_seconds')) or 0.0
+            sleeps.setdefault(gpu_name, []).append(sleep_seconds)
+            continue
+
+        # Hanya batch yang benar-benar selesai ('Range Finished!') yang dipakai
+        if record.get('return_code') != '0' or not record.get('t_scan_end'):
+            continue
+
+        speed = batchtiming._to_float(record.get('avg_speed')) or 0.0
+        if speed <= 0:
+            continue
+
+        durations = batchtiming.phase_durations(record)
+        samples.setdefault(gpu_name, []).append({
+            'speed': speed,
+            'setup': durations['setup'],
+            'overhead': durations['total'] - durations['scan']
+        })
+
+    profiles = {}
+    for gpu_name, gpu_samples in samples.items():
+        recent = gpu_samples[-PROFILE_WINDOW:]
+        recent_sleeps = sleeps.get(gpu_name, [])[-PROFILE_WINDOW:]
+        sleep_per_launch = sum(recent_sleeps) / len(recent_sleeps) if recent_sleeps else 0.0
+
+        profiles[gpu_name] = {
+            'gpu_name': gpu_name,
+            'samples': len(recent),
+            'speed_mks': sum(s['speed'] for s in recent) / len(recent),
+            'setup_seconds': sum(s['setup'] for s in recent) / len(recent),
+            'overhead_seconds': sum(s['overhead'] for s in recent) / len(recent) + sleep_per_launch
+        }
+
+    return profiles
+
+def choose_batch_bits(speed_mks, overhead_seconds, max_bits=None, target_percent=None, max_batch_seconds=None):
+    """Memilih 2^k terbesar yang muat dalam batas waktu, beserta overhead yang dihasilkan"""
+    if target_percent is None:
+        target_percent = TARGET_OVERHEAD_PERCENT
+    if max_batch_seconds is None:
+        max_batch_seconds = min(MAX_BATCH_SECONDS, SESSION_TIME_LIMIT)
+
+    keys_per_second = speed_mks * 1_000_000
+    upper_bits = MAX_BATCH_BITS if max_bits is None else min(MAX_BATCH_BITS, max_bits)
+
+    def overhead_percent(bits):
+        scan_seconds = (1 << bits) / keys_per_second
+        return overhead_seconds / (overhead_seconds + scan_seconds) * 100
+
+    # Cari 2^k terbesar yang masih muat di batas waktu per batch
+    chosen_bits = None
+    for bits in range(upper_bits, MIN_BATCH_BITS - 1, -1):
+        if (1 << bits) / keys_per_second + overhead_seconds <= max_batch_seconds:
+            chosen_bits = bits
+            break
+
+    if chosen_bits is None:
+        chosen_bits = min(MIN_BATCH_BITS, upper_bits)
+
+    percent = overhead_percent(chosen_bits)
+
+    return {
+        'bits': chosen_bits,
+        'batch_size': 1 << chosen_bits,
+        'batch_seconds': (1 << chosen_bits) / keys_per_second + overhead_seconds,
+        'overhead_percent': percent,
+        'meets_target': percent <= target_percent
+    }
+
+def tune_batch_size(gpu_ids, range_bits=None, profiles=None):
+    """Menghitung BATCH_SIZE untuk daftar GPU (ukuran terkecil antar tipe GPU), None jika belum ada profil"""
+    if profiles is None:
+        profiles = build_speed_profiles()
+
+    if isinstance(gpu_ids, (str, int)):
+        gpu_ids = [gpu_ids]
+
+    choices = []
+    for gpu_id in gpu_ids:
+        gpu_name = detect_gpu_name(gpu_id)
+        profile = profiles.get(gpu_name) if gpu_name else None
+
+        if not profile:
+            print(f"⚠️  Auto-size: no speed profile for GPU {gpu_id} ({gpu_name or 'unknown'}) in {batchtiming.TIMING_FILE}")
+            return None
+
+        choice = choose_batch_bits(profile['speed_mks'], profile['overhead_seconds'], max_bits=range_bits)
+        choice['gpu_id'] = str(gpu_id)
+        choice['gpu_name'] = gpu_name
+        choices.append(choice)
+
+        print(f"🎛️  Auto-size GPU {gpu_id} ({gpu_name}): {profile['speed_mks']:.1f} MK/s, "
+              f"setup {profile['setup_seconds']:.1f}s, overhead {profile['overhead_seconds']:.1f}s/launch "
+              f"-> 2^{choice['bits']} keys ({choice['batch_seconds']:.0f}s, overhead {choice['overhead_percent']:.2f}%)")
+
+        if not choice['meets_target']:
+            print(f"⚠️  Overhead target {TARGET_OVERHEAD_PERCENT}% cannot be met within {MAX_BATCH_SECONDS}s per batch")
+
+    if not choices:
+        return None
+
+    # Semua GPU berbagi pembagian batch yang sama, jadi pakai ukuran yang muat untuk GPU paling lambat
+    return min(choice['batch_size'] for choice in choices)
+
+def display_profiles():
+    """Menampilkan profil per tipe GPU dan ukuran batch yang direkomendasikan"""
+    profiles = build_speed_profiles()
+
+    if not profiles:
+        print(f"📭 No completed batches with speed data in {batchtiming.TIMING_FILE}")
+        return
+
+    print(f"\n{'='*100}")
+    print("🎛️  BATCH SIZE AUTO-TUNER")
+    print(f"{'='*100}")
+    print(f"Target overhead: {TARGET_OVERHEAD_PERCENT}% | Max batch time: {MAX_BATCH_SECONDS}s | Session limit: {SESSION_TIME_LIMIT}s")
+    print(f"{'-'*100}")
+    print(f"{'GPU type':<32} {'Samples':>7} {'MK/s':>10} {'Setup(s)':>9} {'Ovh(s)':>8} {'Bits':>5} {'Batch size':>20} {'Ovh%':>7}")
+    print(f"{'-'*100}")
+
+    for gpu_name, profile in sorted(profiles.items()):
+        choice = choose_batch_bits(profile['speed_mks'], profile['overhead_seconds'])
+        flag = '' if choice['meets_target'] else ' ⚠️'
+        print(f"{gpu_name[:32]:<32} {profile['samples']:>7} {profile['speed_mks']:>10.1f} "
+              f"{profile['setup_seconds']:>9.1f} {profile['overhead_seconds']:>8.1f} {choice['bits']:>5} "
+              f"{choice['batch_size']:>20,} {choice['overhead_percent']:>6.2f}%{flag}")
+
+    print(f"{'-'*100}")
+    print("Apply with: python3 bm.py --batch ... --auto-size | python3 genbnext.py --set-size BATCH_SIZE")
+    print(f"{'='*100}")
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ("--profile", "--recommend"):
+        print("Xiebo Batch Size Auto-Tuner")
+        print("Usage:")
+        print("  Show speed profiles: python3 autotune.py --profile")
+        print("  Recommend for GPUs:  python3 autotune.py --recommend GPU_IDS [RANGE_BITS]")
+        print(f"  Timing file: {batchtiming.TIMING_FILE}")
+        sys.exit(1)
+
+    if sys.argv[1] == "--profile":
+        display_profiles()
+        sys.exit(0)
+
+    if len(sys.argv) < 3:
+        print("❌ GPU_IDS required, e.g. python3 autotune.py --recommend 0,1")
+        sys.exit(1)
+
+    gpu_ids = [g for g in sys.argv[2].replace(',', ' ').split() if g]
+    range_bits = int(sys.argv[3]) if len(sys.argv) > 3 else None
+
+    batch_size = tune_batch_size(gpu_ids, range_bits)
+    if batch_size is None:
+        print("❌ Not enough timing data yet. Run some batches first.")
+        sys.exit(1)
+
+    print(f"\n✅ Recommended BATCH_SIZE: {batch_size:,} keys (2^{int(math.log2(batch_size))})")
+
+if __name__ == "__main__":
+    main()
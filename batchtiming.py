@@ -0,0 +1,311 @@
+import sys
+import os
+import re
+import csv
+import time
+import threading
+from datetime import datetime
+
+# Konfigurasi file timing (satu baris per batch / per jeda antar batch)
+TIMING_FILE = "timingbatch.txt"
+SLEEP_SCALE = float(os.environ.get("XIEBO_SLEEP_SCALE", "1"))  # Benchmark: 0 melewati jeda antar batch
+
+# Kolom-kolom untuk tabel timing
+TIMING_COLUMNS = [
+    'kind',               # 'batch' atau 'sleep'
+    'batch_id',
+    'gpu_id',
+    'gpu_name',
+    'start_hex',
+    'range_bits',
+    't_start',            # run_xiebo dipanggil (sebelum bookkeeping 'inprogress')
+    't_launch',           # tepat sebelum Popen
+    't_spawned',          # Popen kembali
+    't_first_output',     # baris output pertama dari xiebo
+    't_setup_start',      # 'Setting starting keys... [x%]' pertama
+    't_setup_end',        # 'Starting keys set in ...' atau frame MK/s pertama
+    't_scan_end',         # 'Range Finished!'
+    't_exit',             # process.wait() selesai
+    't_bookkeeping_end',  # setelah update log/DB selesai
+    'sleep_seconds',
+    'avg_speed',          # MK/s dari 'Range Finished! - Average Speed'
+    'return_code',
+    'timestamp'
+]
+
+# Pola output xiebo
+PROGRESS_PATTERN = re.compile(
+    r'([\d.]+)\s*MK/s\s*-\s*([\d.]+)\s*BKeys\s*-\s*2\^([\d.]+)\s*\[([\d.]+)%\].*?Found:\s*(\d+)', re.IGNORECASE)
+SETUP_PATTERN = re.compile(r'setting starting keys.*?\[([\d.]+)%\]', re.IGNORECASE)
+SETUP_DONE_PATTERN = re.compile(r'starting keys set in\s*([\d.]+)\s*seconds', re.IGNORECASE)
+FINISHED_PATTERN = re.compile(r'range finished!.*?average speed:\s*([\d.]+)', re.IGNORECASE)
+GPU_NAME_PATTERN = re.compile(r'GPU\s*#(\d+)\s+(.+?)\s*\(\d+x\d+ cores\)', re.IGNORECASE)
+
+# Lock agar beberapa thread GPU tidak menulis file timing bersamaan
+TIMING_LOCK = threading.Lock()
+
+def parse_progress_line(line):
+    """Parse satu frame progress xiebo (MK/s, BKeys, persen, Found)"""
+    match = PROGRESS_PATTERN.search(line)
+    if not match:
+        return None
+
+    return {
+        'speed': float(match.group(1)),
+        'bkeys': float(match.group(2)),
+        'log2_keys': float(match.group(3)),
+        'percent': float(match.group(4)),
+        'found': int(match.group(5))
+    }
+
+class BatchTimer:
+    """Mencatat timestamp setiap fase satu batch dari output xiebo secara live"""
+
+    def __init__(self, batch_id, gpu_id, start_hex, range_bits):
+        self.record = {column: '' for column in TIMING_COLUMNS}
+        self.record['kind'] = 'batch'
+        self.record['batch_id'] = '' if batch_id is None else str(batch_id)
+        self.record['gpu_id'] = str(gpu_id)
+        self.record['start_hex'] = start_hex
+        self.record['range_bits'] = str(range_bits)
+        self.speed_samples = []
+        self.last_progress = None
+        self.mark('t_start')
+
+    def mark(self, phase, when=None):
+        """Menyimpan timestamp untuk fase tertentu (hanya yang pertama)"""
+        if not self.record.get(phase):
+            self.record[phase] = f"{(when if when is not None else time.time()):.3f}"
+
+    def feed(self, line):
+        """Memproses satu baris output xiebo, mengembalikan frame progress jika ada"""
+        now = time.time()
+        stripped_line = line.strip()
+        if not stripped_line:
+            return None
+
+        self.mark('t_first_output', now)
+
+        gpu_match = GPU_NAME_PATTERN.search(stripped_line)
+        if gpu_match and not self.record['gpu_name']:
+            self.record['gpu_name'] = gpu_match.group(2).strip()
+            return None
+
+        if SETUP_PATTERN.search(stripped_line):
+            self.mark('t_setup_start', now)
+            return None
+
+        if SETUP_DONE_PATTERN.search(stripped_line):
+            self.mark('t_setup_start', now)
+            self.mark('t_setup_end', now)
+            return None
+
+        finished_match = FINISHED_PATTERN.search(stripped_line)
+        if finished_match:
+            self.mark('t_setup_end', now)
+            self.mark('t_scan_end', now)
+            self.record['avg_speed'] = finished_match.group(1)
+            return None
+
+        progress = parse_progress_line(stripped_line)
+        if progress:
+            # Frame MK/s pertama menandai akhir fase setup
+            self.mark('t_setup_end', now)
+            self.last_progress = progress
+            if progress['speed'] > 0:
+                self.speed_samples.append(progress['speed'])
+
+        return progress
+
+    def average_speed(self):
+        """Kecepatan rata-rata (MK/s) dari 'Range Finished!' atau dari sampel frame"""
+        if self.record['avg_speed']:
+            return float(self.record['avg_speed'])
+        if self.speed_samples:
+            return sum(self.speed_samples) / len(self.speed_samples)
+        return 0.0
+
+    def finish(self, return_code):
+        """Menandai akhir bookkeeping dan menyimpan record ke file timing"""
+        self.mark('t_exit')
+        self.mark('t_bookkeeping_end')
+        self.record['return_code'] = str(return_code)
+        if not self.record['avg_speed'] and self.speed_samples:
+            self.record['avg_speed'] = f"{self.average_speed():.1f}"
+        append_timing_record(self.record)
+        return self.record
+
+def append_timing_record(record):
+    """Menambahkan satu baris ke file timing (append-only)"""
+    try:
+        row = {column: record.get(column, '') for column in TIMING_COLUMNS}
+        if not row['timestamp']:
+            row['timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+        with TIMING_LOCK:
+            write_header = not os.path.exists(TIMING_FILE) or os.path.getsize(TIMING_FILE) == 0
+            with open(TIMING_FILE, 'a', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=TIMING_COLUMNS, delimiter='|')
+                if write_header:
+                    writer.writeheader()
+                writer.writerow(row)
+    except Exception as e:
+        print(f"⚠️ Error writing timing record: {e}")
+
+def timed_sleep(seconds, timing=None):
+    """Jeda antar batch yang dicatat sebagai overhead di file timing"""
+    start = time.time()
+    time.sleep(seconds * SLEEP_SCALE)
+    end = time.time()
+
+    record = {
+        'kind': 'sleep',
+        't_start': f"{start:.3f}",
+        't_bookkeeping_end': f"{end:.3f}",
+        'sleep_seconds': f"{end - start:.3f}"
+    }
+    if timing:
+        for column in ('batch_id', 'gpu_id', 'gpu_name', 'range_bits'):
+            record[column] = timing.get(column, '')
+
+    append_timing_record(record)
+
+def read_timing_records():
+    """Membaca semua record timing dari file"""
+    records = []
+
+    if not os.path.exists(TIMING_FILE):
+        return records
+
+    try:
+        with open(TIMING_FILE, 'r') as f:
+            reader = csv.DictReader(f, delimiter='|')
+            for row in reader:
+                records.append(row)
+    except Exception as e:
+        print(f"⚠️ Error reading timing file: {e}")
+
+    return records
+
+def _to_float(value):
+    """Konversi string timestamp ke float (None jika kosong)"""
+    try:
+        return float(value) if value not in (None, '') else None
+    except ValueError:
+        return None
+
+def phase_durations(record):
+    """Menghitung durasi setiap fase (detik) dari satu record batch"""
+    t = {column: _to_float(record.get(column)) for column in TIMING_COLUMNS if column.startswith('t_')}
+
+    def span(a, b):
+        if t[a] is None or t[b] is None:
+            return 0.0
+        return max(0.0, t[b] - t[a])
+
+    # Jika 'Range Finished!' tidak pernah terlihat, tidak ada waktu scan yang terkonfirmasi
+    scan = span('t_setup_end', 't_scan_end')
+    setup_end = 't_setup_end' if t['t_setup_end'] is not None else 't_exit'
+    scan_end = 't_scan_end' if t['t_scan_end'] is not None else 't_exit'
+
+    durations = {
+        'bookkeeping': span('t_start', 't_launch') + span('t_exit', 't_bookkeeping_end'),
+        'popen': span('t_launch', 't_spawned'),
+        'setup': span('t_spawned', setup_end),
+        'scan': scan,
+        'teardown': span(scan_end, 't_exit') if t['t_scan_end'] is not None else 0.0,
+        'sleep': 0.0,
+        'total': span('t_start', 't_bookkeeping_end')
+    }
+
+    # Waktu yang tidak terkonfirmasi (crash/stop sebelum 'Range Finished!')
+    if t['t_scan_end'] is None and t['t_setup_end'] is not None:
+        durations['setup'] += span('t_setup_end', 't_exit')
+
+    return durations
+
+def build_overhead_report(records=None):
+    """Mengelompokkan durasi fase per GPU dan ukuran batch (range bits)"""
+    if records is None:
+        records = read_timing_records()
+
+    groups = {}
+    gpu_names = {}
+
+    # Nama GPU diambil dari record batch, dipakai juga untuk record sleep
+    for record in records:
+        if record.get('kind') == 'batch' and record.get('gpu_name'):
+            gpu_names[record.get('gpu_id', '')] = record['gpu_name']
+
+    for record in records:
+        gpu_id = record.get('gpu_id', '')
+        gpu_label = f"{gpu_id} ({gpu_names.get(gpu_id, record.get('gpu_name') or 'unknown')})"
+        key = (gpu_label, record.get('range_bits', ''))
+
+        group = groups.setdefault(key, {
+            'batches': 0, 'bookkeeping': 0.0, 'popen': 0.0, 'setup': 0.0,
+            'scan': 0.0, 'teardown': 0.0, 'sleep': 0.0, 'total': 0.0
+        })
+
+        if record.get('kind') == 'sleep':
+            sleep_seconds = _to_float(record.get('sleep_seconds')) or 0.0
+            group['sleep'] += sleep_seconds
+            group['total'] += sleep_seconds
+            continue
+
+        group['batches'] += 1
+        for phase, value in phase_durations(record).items():
+            group[phase] += value
+
+    for group in groups.values():
+        overhead = group['total'] - group['scan']
+        group['overhead'] = overhead
+        group['overhead_fraction'] = overhead / group['total'] if group['total'] > 0 else 0.0
+
+    return groups
+
+def display_overhead_report():
+    """Menampilkan fraksi overhead per GPU dan ukuran batch"""
+    groups = build_overhead_report()
+
+    if not groups:
+        print(f"📭 No timing records found in {TIMING_FILE}")
+        return
+
+    print(f"\n{'='*100}")
+    print("⏱️  ORCHESTRATION OVERHEAD REPORT")
+    print(f"{'='*100}")
+    print(f"{'GPU':<28} {'Bits':>4} {'Batches':>7} {'Total(s)':>10} {'Scan(s)':>10} "
+          f"{'Setup':>8} {'Popen':>7} {'Tear':>7} {'Books':>7} {'Sleep':>8} {'Overhead':>9}")
+    print(f"{'-'*100}")
+
+    grand_total = 0.0
+    grand_scan = 0.0
+    for (gpu_label, bits), group in sorted(groups.items()):
+        grand_total += group['total']
+        grand_scan += group['scan']
+        print(f"{gpu_label[:28]:<28} {bits:>4} {group['batches']:>7} {group['total']:>10.1f} {group['scan']:>10.1f} "
+              f"{group['setup']:>8.1f} {group['popen']:>7.2f} {group['teardown']:>7.2f} "
+              f"{group['bookkeeping']:>7.2f} {group['sleep']:>8.1f} {group['overhead_fraction']*100:>8.2f}%")
+
+    print(f"{'-'*100}")
+    if grand_total > 0:
+        print(f"Total GPU wall time: {grand_total:,.1f}s | Real key search: {grand_scan:,.1f}s "
+              f"({grand_scan / grand_total * 100:.2f}%) | Overhead: {(grand_total - grand_scan) / grand_total * 100:.2f}%")
+    print(f"{'='*100}")
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ("--report",):
+        print("Xiebo Batch Timing Report")
+        print("Usage:")
+        print(f"  Overhead report: python3 batchtiming.py --report [TIMING_FILE]")
+        print(f"  Default timing file: {TIMING_FILE}")
+        sys.exit(1)
+
+    if len(sys.argv) > 2:
+        globals()['TIMING_FILE'] = sys.argv[2]
+
+    display_overhead_report()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+import os
+import sys
+import csv
+import json
+import time
+import shutil
+import sqlite3
+import tempfile
+import subprocess
+import statistics
+
+# Konfigurasi benchmark orkestrasi (runner asli + fake xiebo, tanpa GPU)
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_XIEBO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_xiebo.py")
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+BATCH_BITS = 20                 # Ukuran batch benchmark (2^20 keys)
+DEFAULT_BATCHES = 16            # Jumlah batch per runner (sama dengan baseline.json)
+START_HEX = "100000000"         # Awal keyspace benchmark
+ADDRESS = "1BenchFakeAddressXXXXXXXXXXXXXXXX"
+RSS_SAMPLE_SECONDS = 0.05       # Interval sampling VmRSS proses runner
+TOLERANCE = 0.25                # Regresi jika lebih buruk 25% dari baseline
+RSS_SLACK_KB = 4096             # Toleransi absolut pertumbuhan memori
+MS_SLACK = 5.0                  # Toleransi absolut metrik milidetik (jitter scheduler)
+RUN_TIMEOUT_SECONDS = 600
+
+# Metrik yang di-gate: True = makin besar makin baik
+GATED_METRICS = {
+    'batches_per_sec': True,
+    'launch_ms': False,
+    'state_ms': False,
+    'rss_growth_kb': False,
+}
+
+# Runner yang dibenchmark: argumen CLI (di-format dengan start/bits/address)
+RUNNERS = {
+    'bm':      ["--batch", "0", "{start}", "{bits}", "{address}"],
+    'kamu':    ["--batch", "0", "{start}", "{bits}", "{address}"],
+    'kamudbs': ["--batch-db", "0", "0", "{address}"],
+}
+
+def launch(runner, batches):
+    """Dijalankan di subprocess (cwd = direktori kerja): konfigurasi modul runner lalu main()"""
+    sys.path.insert(0, REPO_DIR)
+    module = __import__(runner)
+
+    if hasattr(module, 'BATCH_SIZE'):
+        module.BATCH_SIZE = 1 << BATCH_BITS
+
+    if runner == 'kamudbs':
+        # Tbatch di SQLite: 'dbo' di-attach sebagai schema agar query T-SQL sederhana tetap jalan
+        def connect_db():
+            conn = sqlite3.connect("bench.db", timeout=30)
+            conn.execute("ATTACH DATABASE 'bench_dbo.db' AS dbo")
+            return conn
+        module.connect_db = connect_db
+
+        # Klaim atomic: SQLite memakai RETURNING sebagai pengganti OUTPUT inserted.id
+        def claim_batches(batch_ids):
+            conn = connect_db()
+            placeholders = ', '.join('?' for _ in batch_ids)
+            rows = conn.execute(f"""
+                UPDATE dbo.Tbatch SET status = 'inprogress'
+                WHERE id IN ({placeholders}) AND (status IS NULL OR status NOT IN ('done', 'inprogress'))
+                RETURNING id
+            """, list(batch_ids)).fetchall()
+            conn.commit()
+            conn.close()
+            return {row[0] for row in rows}
+        module.claim_batches = claim_batches
+
+    bits = BATCH_BITS + max(0, (batches - 1).bit_length())
+    args = [arg.format(start=START_HEX, bits=bits, address=ADDRESS) for arg in RUNNERS[runner]]
+    sys.argv = [f"{runner}.py"] + args
+    module.main()
+
+def prepare_workdir(runner, batches):
+    """Direktori kerja baru dengan ./xiebo = fake xiebo (dan Tbatch SQLite untuk runner DB)"""
+    workdir = tempfile.mkdtemp(prefix=f"xiebo_bench_{runner}_")
+    wrapper = os.path.join(workdir, "xiebo")
+    with open(wrapper, 'w') as f:
+        f.write(f"#!/bin/sh\nexec \"{sys.executable}\" \"{FAKE_XIEBO}\" \"$@\"\n")
+    os.chmod(wrapper, 0o755)
+
+    if runner == 'kamudbs':
+        conn = sqlite3.connect(os.path.join(workdir, "bench_dbo.db"))
+        conn.execute("CREATE TABLE Tbatch (id INTEGER PRIMARY KEY, start_range TEXT, end_range TEXT, "
+                     "status TEXT, found TEXT, wif TEXT)")
+        size = 1 << BATCH_BITS
+        start_int = int(START_HEX, 16)
+        conn.executemany("INSERT INTO Tbatch VALUES (?, ?, ?, '', '', '')",
+                         [(i, format(start_int + i * size, 'x'), format(start_int + (i + 1) * size - 1, 'x'))
+                          for i in range(batches)])
+        conn.commit()
+        conn.close()
+
+    return workdir
+
+def read_rss_kb(pid):
+    try:
+        with open(f"/proc/{pid}/status", 'r') as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+def read_timing(workdir):
+    path = os.path.join(workdir, "timingbatch.txt")
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r') as f:
+        return [row for row in csv.DictReader(f, delimiter='|') if row.get('kind') == 'batch']
+
+def _span_ms(records, first, last):
+    values = []
+    for record in records:
+        try:
+            values.append((float(record[last]) - float(record[first])) * 1000)
+        except (KeyError, TypeError, ValueError):
+            continue
+    return statistics.mean(values) if values else 0.0
+
+def run_benchmark(runner, batches, env_overrides=None):
+    """Menjalankan satu runner dan mengembalikan metrik orkestrasi"""
+    workdir = prepare_workdir(runner, batches)
+    env = dict(os.environ)
+    env.setdefault("XIEBO_SLEEP_SCALE", "0")
+    env.update(env_overrides or {})
+
+    log_path = os.path.join(workdir, "runner_output.txt")
+    started = time.time()
+    with open(log_path, 'w') as log:
+        process = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--launch", runner, str(batches)],
+                                   cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+        samples = []
+        while process.poll() is None:
+            rss = read_rss_kb(process.pid)
+            if rss:
+                samples.append(rss)
+            if time.time() - started > RUN_TIMEOUT_SECONDS:
+                process.kill()
+                break
+            time.sleep(RSS_SAMPLE_SECONDS)
+    wall = time.time() - started
+
+    records = read_timing(workdir)
+    completed = [r for r in records if r.get('return_code') == '0' and r.get('t_scan_end')]
+    scan_ms = _span_ms(completed, 't_setup_end', 't_scan_end')
+    # Launch gabungan (coalesce) dihitung per batch 2^BATCH_BITS yang dicakupnya
+    batch_count = sum(1 << max(0, int(r['range_bits']) - BATCH_BITS) for r in completed)
+
+    # Pertumbuhan memori: sampel terakhir dibanding sampel setelah warm-up (20% awal)
+    warm = samples[len(samples) // 5:] if samples else []
+    rss_growth = (warm[-1] - min(warm)) if warm else 0
+
+    result = {
+        'runner': runner,
+        'requested': batches,
+        'batches': batch_count,
+        'launches': len(completed),
+        'return_code': process.returncode,
+        'wall_seconds': round(wall, 3),
+        'batches_per_sec': round(batch_count / wall, 3) if wall > 0 else 0.0,
+        'launch_ms': round(_span_ms(completed, 't_start', 't_first_output'), 2),
+        'popen_ms': round(_span_ms(completed, 't_launch', 't_spawned'), 2),
+        'state_ms': round(_span_ms(completed, 't_start', 't_launch') +
+                          _span_ms(completed, 't_exit', 't_bookkeeping_end'), 2),
+        'scan_ms': round(scan_ms, 2),
+        'overhead_ms': round((wall / max(1, len(completed))) * 1000 - scan_ms, 2),  # per launch
+        'rss_peak_kb': max(samples) if samples else 0,
+        'rss_growth_kb': rss_growth,
+        'workdir': workdir
+    }
+
+    if result['batches'] < batches:
+        print(f"⚠️ {runner}: only {result['batches']}/{batches} batches completed (see {log_path})")
+    return result
+
+def compare(results, baseline):
+    """Daftar regresi terhadap baseline"""
+    regressions = []
+    for result in results:
+        if result['batches'] < result['requested']:
+            regressions.append(f"{result['runner']}.batches: {result['batches']} of {result['requested']} completed")
+        reference = baseline.get(result['runner'])
+        if not reference:
+            continue
+        # Throughput bergantung pada jumlah batch (setup/teardown), hanya baseline yang sebanding di-gate
+        if reference.get('batches', result['requested']) != result['requested']:
+            continue
+        for metric, higher_is_better in GATED_METRICS.items():
+            if metric not in reference:
+                continue
+            value = result[metric]
+            expected = reference[metric]
+            if higher_is_better:
+                bad = value < expected * (1 - TOLERANCE)
+            else:
+                slack = RSS_SLACK_KB if metric == 'rss_growth_kb' else MS_SLACK
+                bad = value > expected * (1 + TOLERANCE) + slack
+            if bad:
+                regressions.append(f"{result['runner']}.{metric}: {value} vs baseline {expected}")
+    return regressions
+
+def display_results(results):
+    print(f"\n{'='*60}")
+    print(f"⏱️ ORCHESTRATION BENCHMARK (fake xiebo, 2^{BATCH_BITS} keys per batch)")
+    print(f"{'='*60}")
+    print(f"{'Runner':<9} {'Batches':>7} {'Launches':>8} {'Batch/s':>8} {'Launch ms':>10} {'State ms':>9} "
+          f"{'Overhead ms':>12} {'RSS +KB':>8}")
+    print(f"{'-'*60}")
+    for r in results:
+        print(f"{r['runner']:<9} {r['batches']:>7} {r['launches']:>8} {r['batches_per_sec']:>8.2f} "
+              f"{r['launch_ms']:>10.1f} {r['state_ms']:>9.1f} {r['overhead_ms']:>12.1f} {r['rss_growth_kb']:>8}")
+    print(f"{'='*60}")
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--launch":
+        launch(sys.argv[2], int(sys.argv[3]))
+        return
+
+    if len(sys.argv) > 1 and sys.argv[1] in ("-h", "--help"):
+        print("Xiebo Orchestration Benchmark")
+        print("Usage:")
+        print("  Run + gate:       python3 benchmarks/bench_orchestration.py [RUNNERS] [--batches N]")
+        print("  Update baseline:  python3 benchmarks/bench_orchestration.py [RUNNERS] --update-baseline")
+        print(f"  RUNNERS: comma list of {', '.join(RUNNERS)} (default all)")
+        print("  Fake xiebo: FAKE_XIEBO_SPEED_MKS, FAKE_XIEBO_SETUP_SECONDS, FAKE_XIEBO_FRAMES, FAKE_XIEBO_FOUND_RATE")
+        print("  Inter-batch sleeps: XIEBO_SLEEP_SCALE (default 0 here, 1 in production)")
+        sys.exit(1)
+
+    args = sys.argv[1:]
+    update_baseline = "--update-baseline" in args
+    keep = "--keep" in args
+    args = [a for a in args if a not in ("--update-baseline", "--keep")]
+
+    batches = DEFAULT_BATCHES
+    if "--batches" in args:
+        index = args.index("--batches")
+        batches = int(args[index + 1])
+        del args[index:index + 2]
+
+    runners = args[0].split(',') if args else list(RUNNERS)
+    results = []
+    for runner in runners:
+        print(f"🏃 Benchmarking {runner} ({batches} batches)...")
+        results.append(run_benchmark(runner, batches))
+
+    display_results(results)
+
+    if not keep:
+        for result in results:
+            shutil.rmtree(result['workdir'], ignore_errors=True)
+
+    if update_baseline:
+        baseline = {}
+        if os.path.exists(BASELINE_FILE):
+            with open(BASELINE_FILE, 'r') as f:
+                baseline = json.load(f)
+        for result in results:
+            baseline[result['runner']] = {metric: result[metric] for metric in GATED_METRICS}
+            baseline[result['runner']]['batches'] = result['requested']
+        with open(BASELINE_FILE, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"📝 Baseline updated: {BASELINE_FILE}")
+        sys.exit(0)
+
+    if not os.path.exists(BASELINE_FILE):
+        print(f"ℹ️ No baseline yet, run with --update-baseline")
+        sys.exit(0)
+
+    with open(BASELINE_FILE, 'r') as f:
+        baseline = json.load(f)
+    for result in results:
+        recorded = baseline.get(result['runner'], {}).get('batches')
+        if recorded is not None and recorded != result['requested']:
+            print(f"ℹ️ {result['runner']}: baseline recorded with {recorded} batches, not gated "
+                  f"(run with --batches {recorded} or --update-baseline)")
+    regressions = compare(results, baseline)
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s) beyond {TOLERANCE * 100:.0f}%:")
+        for regression in regressions:
+            print(f"   {regression}")
+        sys.exit(1)
+    print(f"✅ No regressions beyond {TOLERANCE * 100:.0f}% of baseline")
+
+if __name__ == "__main__":
+    main()
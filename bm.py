@@ -5,6 +5,18 @@ import time
 import math
 from datetime import datetime
 import csv
+import batchtiming
+import ledger
+import resultfile
+import procgroup
+import autotune
+import deadline
+import permute
+import progress
+import stateactor
+import statelock
+import sharedir
+import threading
 
 # Konfigurasi file log
 LOG_FILE = "logbatch.txt"
@@ -28,10 +40,14 @@ LOG_COLUMNS = [
 # Konfigurasi batch
 MAX_BATCHES_PER_RUN = 1000000  # Maksimal 1juta batch per eksekusi
 BATCH_SIZE = 2000000000000  # 2 triliun keys per batch
+SHUFFLE_KEY = None  # Kunci urutan batch acak deterministik (--shuffle), None = berurutan
 
 # Global flag untuk menghentikan pencarian
 STOP_SEARCH_FLAG = False
 
+# Pemilik tunggal logbatch.txt selama batch berjalan (stateactor.py), None = baca/tulis file langsung
+LOG_ACTOR = None
+
 def save_to_drive():
     """Menyimpan logbatch.txt ke Google Drive"""
     try:
@@ -61,6 +77,24 @@ def save_to_drive():
         print(f"⚠️ Failed to save to Google Drive: {e}")
 
 def read_log_as_dict():
+    """Tabel log berdasarkan batch_id: dari memori state actor jika aktif, selain itu dari file"""
+    if LOG_ACTOR is not None:
+        return LOG_ACTOR.snapshot()
+    return read_log_file()
+
+def write_log_from_dict(log_dict):
+    """Menulis tabel log; lewat state actor hanya baris baru yang ditambahkan (baris proses lain tidak ditimpa)"""
+    if LOG_ACTOR is not None:
+        LOG_ACTOR.put_missing(log_dict)
+    else:
+        write_log_file(log_dict)
+
+def get_log_row(batch_id):
+    if LOG_ACTOR is not None:
+        return LOG_ACTOR.get(batch_id, {})
+    return read_log_file().get(str(batch_id), {})
+
+def read_log_file():
     """Membaca log file dan mengembalikan dictionary berdasarkan batch_id"""
     log_dict = {}
     
@@ -80,22 +114,25 @@ def read_log_as_dict():
     
     return log_dict
 
-def write_log_from_dict(log_dict):
-    """Menulis log file dari dictionary"""
+def write_log_file(log_dict, sync_drive=True):
+    """Menulis log file dari dictionary (file sementara lalu os.replace, pembaca tidak melihat tabel setengah jadi)"""
     try:
-        # Konversi dictionary ke list
+        # Konversi dictionary ke list (batch numerik dulu, lalu STATE_INFO dan entri khusus lain)
         rows = []
-        for batch_id in sorted(log_dict.keys(), key=lambda x: int(x) if x.isdigit() else x):
+        for batch_id in sorted(log_dict.keys(), key=lambda x: (0, int(x)) if x.isdigit() else (1, x)):
             rows.append(log_dict[batch_id])
         
         # Tulis ke file dengan format tabel
-        with open(LOG_FILE, 'w', newline='') as f:
+        tmp_path = f"{LOG_FILE}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', newline='') as f:
             writer = csv.DictWriter(f, fieldnames=LOG_COLUMNS, delimiter='|')
             writer.writeheader()
             writer.writerows(rows)
+        os.replace(tmp_path, LOG_FILE)
         
-        # Simpan ke Google Drive (silent)
-        save_to_drive()
+        # Simpan ke Google Drive (silent), state actor melakukannya setelah melepas file lock
+        if sync_drive:
+            save_to_drive()
         
     except Exception as e:
         print(f"❌ Error writing log file: {e}")
@@ -113,18 +150,16 @@ def save_next_batch_info(start_hex, range_bits, address, next_start_hex, batches
             'next_start_hex': next_start_hex,
             'batches_completed': str(batches_completed),
             'total_batches': str(total_batches),
+            'batch_size': str(BATCH_SIZE),
+            'shuffle_key': SHUFFLE_KEY or '',
             'timestamp': timestamp
         }
         
-        # 1. Simpan ke file nextbatch.txt
-        with open(NEXT_BATCH_FILE, 'w') as f:
-            for key, value in info.items():
-                f.write(f"{key}={value}\n")
+        # 1. Simpan ke file nextbatch.txt (atomic: proses lain di direktori yang sama bisa membacanya)
+        statelock.write_text_atomic(NEXT_BATCH_FILE, ''.join(f"{key}={value}\n" for key, value in info.items()))
         
         # 2. Tambahkan ke logbatch.txt sebagai entri khusus
-        log_dict = read_log_as_dict()
-        
-        state_info = f"NEXT_BATCH|next_start={next_start_hex}|completed={batches_completed}|total={total_batches}|time={timestamp}"
+        state_info = f"NEXT_BATCH|next_start={next_start_hex}|completed={batches_completed}|total={total_batches}|batch_size={BATCH_SIZE}|shuffle_key={SHUFFLE_KEY or ''}|origin={start_hex}|time={timestamp}"
         
         # Buat entry khusus untuk next batch info
         state_entry = {
@@ -139,10 +174,7 @@ def save_next_batch_info(start_hex, range_bits, address, next_start_hex, batches
         }
         
         # Tambahkan atau update entry STATE_INFO
-        log_dict['STATE_INFO'] = state_entry
-        
-        # Tulis kembali log
-        write_log_from_dict(log_dict)
+        update_batch_log(state_entry)
         
         # Simpan ke Google Drive
         save_to_drive()
@@ -197,12 +229,18 @@ def load_next_batch_from_log():
                         info['batches_completed'] = value
                     elif key == 'total':
                         info['total_batches'] = value
+                    elif key == 'batch_size':
+                        info['batch_size'] = value
+                    elif key == 'shuffle_key':
+                        info['shuffle_key'] = value
+                    elif key == 'origin':
+                        info['origin'] = value
                     elif key == 'time':
                         info['timestamp'] = value
             
             # Ambil info lainnya dari entry
             info['address'] = log_dict['STATE_INFO'].get('address_target', '')
-            info['original_start'] = ''  # Tidak disimpan di log
+            info['original_start'] = info.pop('origin', '')  # Hanya ada di log versi baru
             info['original_range_bits'] = log_dict['STATE_INFO'].get('range_bits', '')
             
             print(f"📋 Loaded next batch info from log file")
@@ -216,20 +254,24 @@ def load_next_batch_from_log():
 def update_batch_log(batch_info):
     """Update log batch dengan informasi status terbaru"""
     try:
-        # Baca log yang sudah ada
-        log_dict = read_log_as_dict()
-        
         # Pastikan batch_info memiliki semua kolom yang diperlukan
         for column in LOG_COLUMNS:
             if column not in batch_info:
                 batch_info[column] = ''
         
-        # Update atau tambah entry
         batch_id = str(batch_info.get('batch_id', ''))
+        
+        # State actor: transisi di memori, file ditulis thread actor (key ditemukan = langsung)
+        if LOG_ACTOR is not None:
+            LOG_ACTOR.put(batch_id, batch_info, urgent=batch_info.get('found') == 'YES')
+            return
+        
+        # Baca log yang sudah ada, update atau tambah entry
+        log_dict = read_log_file()
         log_dict[batch_id] = batch_info
         
         # Tulis kembali log (silent)
-        write_log_from_dict(log_dict)
+        write_log_file(log_dict)
         
     except Exception as e:
         print(f"❌ Error updating log: {e}")
@@ -327,10 +369,18 @@ def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
     cmd = ["./xiebo", "-gpuId", str(gpu_id), "-start", start_hex, 
            "-range", str(range_bits), address]
     
+    # Key yang ditemukan ditulis xiebo ke file hasil per batch (-o), stdout hanya untuk progress
+    result_path = resultfile.result_path(batch_id, gpu_id)
+    cmd += resultfile.output_args(result_path)
+    
     print(f"\n{'='*60}")
     print(f"Running: {' '.join(cmd)}")
     print(f"{'='*60}")
     
+    # Catat timestamp setiap fase batch (Popen, setup, scan, teardown, bookkeeping)
+    timer = batchtiming.BatchTimer(batch_id, gpu_id, start_hex, range_bits)
+    process = watcher = None
+    
     try:
         # Update status menjadi inprogress jika ada batch_id
         if batch_id is not None:
@@ -351,14 +401,19 @@ def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
         print(f"{'-'*60}")
         
         # Gunakan Popen untuk mendapatkan output real-time
+        timer.mark('t_launch')
         process = subprocess.Popen(
-            cmd,
+            procgroup.command(cmd),
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
             text=True,
             bufsize=1,
-            universal_newlines=True
+            universal_newlines=True,
+            **procgroup.popen_kwargs()
         )
+        timer.mark('t_spawned')
+        procgroup.register(process, gpu_id, batch_id)
+        watcher = resultfile.ResultWatcher(result_path, batch_id, gpu_id, start_hex, range_bits).start()
         
         # Tampilkan output secara real-time
         output_lines = []
@@ -367,6 +422,7 @@ def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
             if output_line == '' and process.poll() is not None:
                 break
             if output_line:
+                timer.feed(output_line)
                 # Tampilkan output dengan format yang lebih baik
                 stripped_line = output_line.strip()
                 if stripped_line:
@@ -375,11 +431,21 @@ def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
         
         # Tunggu proses selesai
         return_code = process.wait()
+        timer.mark('t_exit')
+        result_blocks = watcher.stop()
         output_text = ''.join(output_lines)
         
+        # Key yang ditemukan langsung dicatat ke ledger (fsync) sebelum bookkeeping lain
+        ledger.record_output(batch_id, gpu_id, output_text)
+        
         # Parse output untuk mencari private key
         found_info = parse_xiebo_output(output_text)
         
+        # File hasil (-o) terverifikasi menggantikan hasil scraping stdout (fallback)
+        if resultfile.apply(found_info, result_blocks) and not STOP_SEARCH_FLAG:
+            STOP_SEARCH_FLAG = True
+            print(f"🚨 STOP_SEARCH_FLAG diaktifkan karena {len(found_info['found_keys'])} key terverifikasi di {result_path}")
+        
         # Update status berdasarkan hasil
         if batch_id is not None:
             batch_info['status'] = 'done'
@@ -400,6 +466,8 @@ def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
                 
             update_batch_log(batch_info)
         
+        found_info['timing'] = timer.finish(return_code)
+        
         # Tampilkan hasil pencarian
         print(f"\n{'='*60}")
         print(f"🔍 SEARCH RESULT")
@@ -451,6 +519,7 @@ def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
             }
             update_batch_log(batch_info)
         
+        timer.finish(130)
         return 130, {'found': False}
     except Exception as e:
         error_msg = str(e)
@@ -470,7 +539,91 @@ def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
             }
             update_batch_log(batch_info)
         
+        timer.finish(1)
         return 1, {'found': False}
+    finally:
+        # Semua jalur (termasuk exception/Ctrl+C): xiebo tidak tertinggal di lockfile, thread watcher berhenti
+        if process is not None:
+            procgroup.release(process)
+        if watcher is not None:
+            watcher.stop()
+
+def run_batch_before_deadline(gpu_id, batch_start, batch_keys, batch_bits, address, batch_id, deadline_at, last_timing=None):
+    """Menjalankan batch, atau sub-range aligned-nya yang selesai sebelum deadline sesi"""
+    batch_hex = format(batch_start, 'x')
+    
+    if deadline_at is None:
+        return_code, found_info = run_xiebo(gpu_id, batch_hex, batch_bits, address, batch_id=batch_id)
+        if return_code == 0:
+            progress.record_done([batch_id])
+        return return_code, found_info, None
+    
+    speed_mks, overhead_seconds = deadline.get_speed_estimate(gpu_id, last_timing)
+    blocks, complete = deadline.fit_batch(batch_start, batch_keys, batch_bits, deadline_at, speed_mks, overhead_seconds)
+    
+    if complete:
+        return_code, found_info = run_xiebo(gpu_id, batch_hex, batch_bits, address, batch_id=batch_id)
+        if return_code == 0:
+            progress.record_done([batch_id])
+        return return_code, found_info, None
+    
+    print(f"\n⏰ Session deadline {deadline.format_deadline(deadline_at)}")
+    print(f"   Estimated speed: {speed_mks:.1f} MK/s, running {len(blocks)} sub-range(s) of batch {batch_id}")
+    
+    return_code, found_info = 0, {'found': False}
+    next_start = batch_start
+    for block_start, bits in blocks:
+        if STOP_SEARCH_FLAG:
+            break
+        
+        return_code, found_info = run_xiebo(gpu_id, format(block_start, 'x'), bits, address, batch_id=batch_id)
+        if return_code != 0:
+            break
+        next_start = block_start + (1 << bits)
+    
+    # Tandai batch sebagai partial, sisa range dilanjutkan oleh --continue
+    if batch_id is not None and next_start > batch_start:
+        batch_info = get_log_row(batch_id)
+        batch_info.update({
+            'batch_id': str(batch_id),
+            'start_hex': batch_hex,
+            'range_bits': str(batch_bits),
+            'address_target': address,
+            'status': 'partial',
+            'state_info': f"deadline|scanned_to={format(next_start, 'x')}"
+        })
+        update_batch_log(batch_info)
+        progress.record_partial(batch_id, next_start)
+    
+    return return_code, found_info, next_start
+
+def get_batch_start(origin_int, seq, total_batches, batch_size):
+    """Start batch ke-seq: berurutan, atau acak deterministik (permute.py) jika SHUFFLE_KEY diset"""
+    return origin_int + permute.batch_index(seq, total_batches, SHUFFLE_KEY) * batch_size
+
+def save_progress_state(tracker, origin_hex, range_bits, address, timestamp=None):
+    """nextbatch.txt dan STATE_INFO menunjuk gap pertama progress tracker (None jika semua selesai)"""
+    next_batch_id = tracker.first_gap()
+    if next_batch_id is None:
+        return None
+    
+    batch_start = get_batch_start(int(origin_hex, 16), next_batch_id, tracker.total_batches, BATCH_SIZE)
+    next_start_hex = format(tracker.resume_start(next_batch_id, batch_start), 'x')
+    save_next_batch_info(origin_hex, range_bits, address, next_start_hex,
+                         next_batch_id, tracker.total_batches, timestamp)
+    return next_start_hex
+
+def parse_gpu_ids(gpu_str):
+    """Parse string GPU IDs ('0', '0,1' atau '0 1') menjadi list of integers"""
+    gpu_ids = []
+    for part in gpu_str.replace(',', ' ').split():
+        try:
+            gpu_ids.append(int(part))
+        except ValueError:
+            continue
+    
+    # Urutkan dan hapus duplikat, default GPU 0
+    return sorted(set(gpu_ids)) or [0]
 
 def calculate_range_bits(keys_count):
     """Fungsi baru: Menghitung range bits yang benar untuk jumlah keys tertentu"""
@@ -487,7 +640,7 @@ def calculate_range_bits(keys_count):
     else:
         return int(math.floor(log2_val)) + 1
 
-def initialize_batch_log(start_hex, range_bits, address, gpu_id, num_batches, batch_size, start_batch_id=0, save_state_early=True):
+def initialize_batch_log(start_hex, range_bits, address, gpu_id, num_batches, batch_size, start_batch_id=0, save_state_early=True, batch_ids=None):
     """Inisialisasi log batch dengan semua batch dalam status uncheck"""
     log_dict = read_log_as_dict()
     
@@ -497,28 +650,18 @@ def initialize_batch_log(start_hex, range_bits, address, gpu_id, num_batches, ba
     
     total_batches_needed = math.ceil(total_keys / batch_size)
     
-    # ⭐ PERUBAHAN UTAMA: Simpan state di awal sebelum menjalankan batch
-    if save_state_early and num_batches < total_batches_needed:
-        next_start_int = start_int + (num_batches * batch_size)
-        next_start_hex = format(next_start_int, 'x')
-        
-        # Simpan state info di awal
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        save_next_batch_info(
-            start_hex,
-            range_bits,
-            address,
-            next_start_hex,
-            start_batch_id,  # Belum ada yang diselesaikan
-            total_batches_needed,
-            timestamp
-        )
+    # State awal menunjuk batch pertama yang BELUM selesai, bukan posisi setelah sesi ini:
+    # crash di tengah sesi tidak melompati batch (progress per batch dicatat progress.py)
+    if save_state_early and progress.ACTIVE is not None:
+        next_start_hex = save_progress_state(progress.ACTIVE, start_hex, range_bits, address)
         print(f"💾 State saved EARLY at initialization")
-        print(f"   Next start will be: 0x{next_start_hex}")
-        print(f"   After completing {num_batches} batches")
+        print(f"   Resume point: 0x{next_start_hex} (first unfinished batch)")
+    
+    if batch_ids is None:
+        batch_ids = range(start_batch_id, min(start_batch_id + num_batches, total_batches_needed))
     
-    for i in range(start_batch_id, min(start_batch_id + num_batches, total_batches_needed)):
-        batch_start = start_int + (i * batch_size)
+    for i in batch_ids:
+        batch_start = get_batch_start(start_int, i, total_batches_needed, batch_size)
         batch_end = min(batch_start + batch_size, end_int + 1)
         batch_keys = batch_end - batch_start
         
@@ -549,6 +692,9 @@ def initialize_batch_log(start_hex, range_bits, address, gpu_id, num_batches, ba
 
 def get_log_summary():
     """Mendapatkan summary log tanpa menampilkan isi file"""
+    if LOG_ACTOR is not None:
+        LOG_ACTOR.flush()
+    
     if not os.path.exists(LOG_FILE):
         return None, None, None, None
     
@@ -625,11 +771,34 @@ def display_compact_summary():
     print(f"{'='*50}")
 
 def main():
-    global STOP_SEARCH_FLAG, BATCH_SIZE, MAX_BATCHES_PER_RUN
+    global STOP_SEARCH_FLAG, BATCH_SIZE, MAX_BATCHES_PER_RUN, SHUFFLE_KEY, LOG_ACTOR
     
     # Reset flag stop search setiap kali program dijalankan
     STOP_SEARCH_FLAG = False
     
+    # Flag opsional: ukuran batch dari profil kecepatan GPU (lihat autotune.py)
+    auto_size = "--auto-size" in sys.argv
+    if auto_size:
+        sys.argv.remove("--auto-size")
+    
+    # Flag opsional: urutan batch acak tapi deterministik dan bisa dilanjutkan (lihat permute.py)
+    shuffle_key = None
+    if "--shuffle" in sys.argv:
+        index = sys.argv.index("--shuffle")
+        if index + 1 >= len(sys.argv):
+            print("❌ --shuffle requires a KEY")
+            sys.exit(1)
+        shuffle_key = sys.argv[index + 1]
+        del sys.argv[index:index + 2]
+    
+    # Flag opsional: akhir sesi (--deadline atau env XIEBO_SESSION_END, lihat deadline.py)
+    try:
+        deadline_at = deadline.extract_deadline_arg(sys.argv)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    deadline_reached = False
+    
     # Parse arguments directly
     if len(sys.argv) < 2:
         print("Xiebo Batch Runner with Early State Saving")
@@ -637,12 +806,18 @@ def main():
         print("  Single run: python3 xiebo.py GPU_ID START_HEX RANGE_BITS ADDRESS")
         print("  Batch run:  python3 xiebo.py --batch GPU_ID START_HEX RANGE_BITS ADDRESS")
         print("  Show summary: python3 xiebo.py --summary")
-        print("  Continue from saved state: python3 xiebo.py --continue")
+        print("  Continue from saved state: python3 xiebo.py --continue [GPU_IDS]  (e.g. 0,1,2 runs GPUs in parallel)")
+        print("  Auto batch size: add --auto-size to --batch (uses timingbatch.txt)")
+        print("  Session deadline: add --deadline +3h|HH:MM to --batch/--continue")
+        print("  Shuffled order:   add --shuffle KEY to --batch (saved for --continue)")
+        print("  Shared directory: python3 xiebo.py --share DIR GPU_IDS [START_HEX RANGE_BITS ADDRESS]")
+        print("                    (several hosts split one campaign through DIR, e.g. a Drive folder)")
         print("\n⚠️  FEATURES:")
         print("  - Auto-stop ketika ditemukan Found: 1 atau lebih")
         print(f"  - Maksimal {MAX_BATCHES_PER_RUN} batch per eksekusi")
         print(f"  - Batch size: {BATCH_SIZE:,} keys")
         print("  - Simpan state DI AWAL untuk melanjutkan")
+        print(f"  - Progress per batch di {progress.PROGRESS_FILE}, --continue mulai dari gap pertama")
         print("  - State info disimpan di logbatch.txt")
         sys.exit(1)
     
@@ -662,12 +837,111 @@ def main():
             print(f"Saved at: {next_info.get('timestamp')}")
             print(f"To continue: python3 xiebo.py --continue")
         
+        # Progress per batch (gap pertama + batch yang selesai lebih dulu)
+        saved_progress = progress.load()
+        if saved_progress is not None:
+            progress.display_progress(saved_progress)
+        
+        sys.exit(0)
+    
+    # Mode yang menjalankan batch: satu thread actor memiliki logbatch.txt, thread GPU hanya mengirim transisi
+    LOG_ACTOR = stateactor.LogActor(read_log_file, lambda rows: write_log_file(rows, sync_drive=False),
+                                    shared_path=LOG_FILE, after_write=save_to_drive)
+    
+    # Shared-directory mode: beberapa host membagi satu campaign lewat folder bersama (lihat sharedir.py)
+    if sys.argv[1] == "--share":
+        if len(sys.argv) not in (4, 7):
+            print("Usage: python3 xiebo.py --share DIR GPU_IDS [START_HEX RANGE_BITS ADDRESS]")
+            sys.exit(1)
+        
+        share_dir = sys.argv[2]
+        gpu_ids = parse_gpu_ids(sys.argv[3])
+        session = None
+        if len(sys.argv) == 7:
+            # Host pertama menentukan campaign, host lain cukup DIR dan GPU
+            new_range_bits = int(sys.argv[5])
+            session = {
+                'origin': sys.argv[4].lower(),
+                'range_bits': new_range_bits,
+                'batch_size': BATCH_SIZE,
+                'total_batches': math.ceil((1 << new_range_bits) / BATCH_SIZE),
+                'shuffle_key': shuffle_key or '',
+                'address': sys.argv[6]
+            }
+        
+        try:
+            campaign = sharedir.join(share_dir, session)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        
+        origin_hex = campaign.session['origin']
+        range_bits = int(campaign.session['range_bits'])
+        address = campaign.session['address']
+        BATCH_SIZE = int(campaign.session['batch_size'])
+        SHUFFLE_KEY = campaign.session.get('shuffle_key') or None
+        total_batches = int(campaign.session['total_batches'])
+        origin_int = int(origin_hex, 16)
+        end_int = origin_int + (1 << range_bits) - 1
+        
+        sharedir.display_status(campaign)
+        print(f"GPU IDs: {gpu_ids}")
+        print(f"Address: {address}")
+        if deadline_at is not None:
+            print(f"⏰ Session deadline: {deadline.format_deadline(deadline_at)}")
+        
+        last_timing = {}
+        
+        def run_share_block(gpu_id, block_id):
+            """Semua batch dalam block yang diklaim; (selesai, key yang ditemukan)"""
+            found_keys = []
+            for batch_id in campaign.block_batches(block_id):
+                if STOP_SEARCH_FLAG or campaign.is_lost(block_id):
+                    return False, found_keys
+                
+                batch_start = get_batch_start(origin_int, batch_id, total_batches, BATCH_SIZE)
+                batch_end = min(batch_start + BATCH_SIZE, end_int + 1)
+                batch_keys = batch_end - batch_start
+                batch_bits = calculate_range_bits(batch_keys)
+                
+                print(f"\n{'='*60}")
+                print(f"▶️  BATCH {batch_id+1}/{total_batches} (Block {block_id}, GPU {gpu_id})")
+                print(f"{'='*60}")
+                print(f"Start: 0x{format(batch_start, 'x')}")
+                print(f"Bits: {batch_bits}")
+                
+                if deadline_at is not None and deadline.seconds_left(deadline_at) <= 0:
+                    return False, found_keys
+                return_code, found_info, stopped_at = run_batch_before_deadline(
+                    gpu_id, batch_start, batch_keys, batch_bits, address, batch_id, deadline_at, last_timing.get(gpu_id))
+                last_timing[gpu_id] = found_info.get('timing') or last_timing.get(gpu_id)
+                
+                # Block terpotong deadline atau gagal dilepas, host lain (atau sesi berikutnya) mengulangnya
+                if stopped_at is not None or return_code != 0:
+                    return False, found_keys
+                if found_info.get('found'):
+                    found_keys.append({
+                        'batch_id': batch_id,
+                        'address': found_info.get('address', ''),
+                        'wif': found_info.get('private_key_wif', ''),
+                        'hex': found_info.get('private_key_hex', '')
+                    })
+            return True, found_keys
+        
+        completed = sharedir.run(campaign, gpu_ids, run_share_block, should_stop=lambda: STOP_SEARCH_FLAG)
+        
+        print(f"\n✅ This host completed {completed} block(s)")
+        if STOP_SEARCH_FLAG or campaign.found():
+            print(f"🎯 SEARCH STOPPED - PRIVATE KEY FOUND! (marker {os.path.join(share_dir, sharedir.FOUND_FILE)})")
+        sharedir.display_status(campaign)
+        display_compact_summary()
         sys.exit(0)
     
     # Continue mode
     if sys.argv[1] == "--continue":
         next_info = load_next_batch_info()
-        if not next_info:
+        saved_progress = progress.load()
+        if not next_info and saved_progress is None:
             print("❌ No saved state found. Run with --batch first.")
             sys.exit(1)
         
@@ -676,24 +950,76 @@ def main():
         print(f"{'='*60}")
         print(f"Resuming from saved state...")
         
-        gpu_id = "0"  # Default GPU ID untuk continue mode
-        start_hex = next_info['next_start_hex']
-        range_bits = int(next_info['original_range_bits'])
-        address = next_info['address']
-        batches_completed = int(next_info['batches_completed'])
-        total_batches = int(next_info['total_batches'])
-        
-        print(f"Next start: 0x{start_hex}")
-        print(f"Batches completed: {batches_completed}")
+        # GPU untuk continue mode: --continue [GPU_IDS], default GPU 0
+        gpu_ids = parse_gpu_ids(' '.join(sys.argv[2:])) if len(sys.argv) > 2 else [0]
+        batches_completed = 0
+        partial = {}
+        
+        if saved_progress is not None:
+            # progress.json: low-water mark + batch yang sudah selesai di depan gap pertama
+            session = saved_progress.session
+            origin_hex = session['origin']
+            range_bits = int(session['range_bits'])
+            address = session.get('address', '')
+            BATCH_SIZE = int(session['batch_size'])
+            SHUFFLE_KEY = session.get('shuffle_key') or None
+            total_batches = saved_progress.total_batches
+        else:
+            # State lama (hanya nextbatch.txt): batches_completed dipakai sebagai low-water mark
+            range_bits = int(next_info['original_range_bits'])
+            address = next_info['address']
+            batches_completed = int(next_info['batches_completed'])
+            total_batches = int(next_info['total_batches'])
+            
+            # Pakai ukuran batch yang sama dengan sesi sebelumnya agar batch ID tetap konsisten
+            if next_info.get('batch_size'):
+                BATCH_SIZE = int(next_info['batch_size'])
+            
+            # Urutan batch mengikuti kunci shuffle sesi sebelumnya
+            SHUFFLE_KEY = next_info.get('shuffle_key') or None
+            origin_hex = next_info.get('original_start', '')
+            if not origin_hex:
+                if SHUFFLE_KEY:
+                    print("❌ Shuffled state has no original start. Cannot continue.")
+                    sys.exit(1)
+                origin_hex = format(int(next_info['next_start_hex'], 16) - batches_completed * BATCH_SIZE, 'x')
+            
+            # Checkpoint deadline di dalam batch yang belum selesai
+            next_start_int = int(next_info['next_start_hex'], 16)
+            gap_start = get_batch_start(int(origin_hex, 16), batches_completed, total_batches, BATCH_SIZE)
+            if gap_start < next_start_int < gap_start + BATCH_SIZE:
+                partial[batches_completed] = next_start_int
+        
+        if auto_size:
+            print(f"⚠️  --auto-size ignored in continue mode (keeping saved batch size)")
+        if shuffle_key and shuffle_key != SHUFFLE_KEY:
+            print(f"⚠️  --shuffle ignored in continue mode (keeping saved batch order)")
+        
+        tracker = progress.start({
+            'origin': origin_hex,
+            'range_bits': range_bits,
+            'batch_size': BATCH_SIZE,
+            'total_batches': total_batches,
+            'shuffle_key': SHUFFLE_KEY or '',
+            'address': address
+        }, low_water=batches_completed, partial=partial)
+        
+        # Semua batch yang belum selesai mulai dari gap pertama (batch gagal ikut diulang)
+        pending_ids = tracker.pending_ids(MAX_BATCHES_PER_RUN)
+        batches_to_run = len(pending_ids)
+        remaining_batches = total_batches - tracker.completed_count()
+        
+        print(f"Origin: 0x{origin_hex}")
+        print(f"First unfinished batch: {tracker.first_gap()}")
+        print(f"Batches completed: {tracker.completed_count()}")
         print(f"Total batches: {total_batches}")
+        print(f"Batch size: {BATCH_SIZE:,} keys")
+        print(f"Batch order: {'shuffled (key ' + SHUFFLE_KEY + ')' if SHUFFLE_KEY else 'sequential'}")
         print(f"Address: {address}")
-        print(f"Timestamp: {next_info.get('timestamp', 'unknown')}")
+        print(f"GPU IDs: {gpu_ids}")
+        print(f"Timestamp: {next_info.get('timestamp', 'unknown') if next_info else 'unknown'}")
         print(f"{'='*60}")
         
-        # Hitung jumlah batch yang tersisa
-        remaining_batches = total_batches - batches_completed
-        batches_to_run = min(remaining_batches, MAX_BATCHES_PER_RUN)
-        
         if batches_to_run <= 0:
             print("✅ All batches already completed!")
             sys.exit(0)
@@ -703,24 +1029,42 @@ def main():
         
         # Inisialisasi log untuk batch yang akan dijalankan
         # Tidak perlu save state early karena ini sudah continue mode
-        initialize_batch_log(start_hex, range_bits, address, gpu_id, batches_to_run, BATCH_SIZE, 
-                           start_batch_id=batches_completed, save_state_early=False)
-        
-        # Jalankan batch
-        start_int = int(start_hex, 16)
-        end_int = start_int + (1 << range_bits) - 1
-        
-        for i in range(batches_to_run):
-            if STOP_SEARCH_FLAG:
-                print(f"\n{'='*60}")
-                print(f"🚨 AUTO-STOP TRIGGERED!")
-                print(f"{'='*60}")
-                print(f"Pencarian dihentikan karena private key telah ditemukan")
-                break
+        initialize_batch_log(origin_hex, range_bits, address, gpu_ids, batches_to_run,
+                           BATCH_SIZE, save_state_early=False, batch_ids=pending_ids)
+        
+        # Jalankan batch (posisi batch selalu dihitung dari start awal)
+        origin_int = int(origin_hex, 16)
+        end_int = origin_int + (1 << range_bits) - 1
+        
+        if deadline_at is not None:
+            print(f"⏰ Session deadline: {deadline.format_deadline(deadline_at)}")
+        if len(gpu_ids) > 1:
+            print(f"🖥️  GPUs {gpu_ids}: each GPU claims the next unfinished batch")
+        
+        run_state = {'launched': 0, 'deadline_reached': False}
+        run_lock = threading.Lock()
+        last_timing = {}
+        
+        def run_continue_batch(gpu_id, batch_id):
+            """Batch yang diklaim satu GPU; False = GPU ini berhenti mengklaim (key ditemukan/deadline)"""
+            if STOP_SEARCH_FLAG or run_state['deadline_reached']:
+                return False
+            
+            # Delay antara batch pada GPU yang sama
+            if gpu_id in last_timing:
+                print(f"\n⏱️  GPU {gpu_id}: Waiting 5 seconds before next batch...")
+                batchtiming.timed_sleep(5, last_timing[gpu_id])
+                if STOP_SEARCH_FLAG or run_state['deadline_reached']:
+                    return False
+            
+            with run_lock:
+                run_state['launched'] += 1
+                i = run_state['launched']
             
-            batch_id = batches_completed + i
-            batch_start = start_int + (i * BATCH_SIZE)
+            batch_start = get_batch_start(origin_int, batch_id, total_batches, BATCH_SIZE)
             batch_end = min(batch_start + BATCH_SIZE, end_int + 1)
+            # Batch yang terpotong deadline dilanjutkan dari checkpoint
+            batch_start = tracker.resume_start(batch_id, batch_start)
             batch_keys = batch_end - batch_start
             
             batch_bits = calculate_range_bits(batch_keys)
@@ -728,13 +1072,24 @@ def main():
             
             # Run this batch
             print(f"\n{'='*60}")
-            print(f"▶️  BATCH {batch_id+1}/{total_batches} (Continue {i+1}/{batches_to_run})")
+            print(f"▶️  BATCH {batch_id+1}/{total_batches} (Continue {i}/{batches_to_run}, GPU {gpu_id})")
             print(f"{'='*60}")
             print(f"Start: 0x{batch_hex}")
             print(f"Bits: {batch_bits}")
             print(f"Keys: {batch_keys:,}")
             
-            return_code, found_info = run_xiebo(gpu_id, batch_hex, batch_bits, address, batch_id=batch_id)
+            if deadline_at is not None and deadline.seconds_left(deadline_at) <= 0:
+                stopped_at = batch_start
+            else:
+                return_code, found_info, stopped_at = run_batch_before_deadline(
+                    gpu_id, batch_start, batch_keys, batch_bits, address, batch_id, deadline_at, last_timing.get(gpu_id))
+                last_timing[gpu_id] = found_info.get('timing') or last_timing.get(gpu_id)
+            
+            # Deadline sesi: checkpoint partial sudah dicatat progress tracker, GPU berhenti mengklaim
+            if stopped_at is not None:
+                run_state['deadline_reached'] = True
+                print(f"\n⏰ GPU {gpu_id}: session deadline reached in batch {batch_id+1}")
+                return False
             
             if return_code == 0:
                 print(f"✅ Batch {batch_id+1} completed successfully")
@@ -742,43 +1097,42 @@ def main():
                 print(f"⚠️  Batch {batch_id+1} exited with code {return_code}")
             
             # Tampilkan progress
-            if (i + 1) % 10 == 0 or i == batches_to_run - 1:
-                completed_now = batches_completed + i + 1
+            if i % 10 == 0 or i == batches_to_run:
+                completed_now = tracker.completed_count()
                 percentage = (completed_now / total_batches) * 100
                 print(f"\n📈 Overall Progress: {completed_now}/{total_batches} batches ({percentage:.1f}%)")
             
-            # Delay antara batch
-            if i < batches_to_run - 1 and not STOP_SEARCH_FLAG:
-                print(f"\n⏱️  Waiting 5 seconds before next batch...")
-                time.sleep(5)
+            return not STOP_SEARCH_FLAG
         
-        # Update state untuk batch berikutnya
-        next_batch_id = batches_completed + batches_to_run
-        if next_batch_id < total_batches and not STOP_SEARCH_FLAG:
-            next_start_int = int(start_hex, 16) + (batches_to_run * BATCH_SIZE)
-            next_start_hex = format(next_start_int, 'x')
-            
-            # Update state info
+        progress.run_parallel(gpu_ids, pending_ids, run_continue_batch)
+        
+        if STOP_SEARCH_FLAG:
+            print(f"\n{'='*60}")
+            print(f"🚨 AUTO-STOP TRIGGERED!")
+            print(f"{'='*60}")
+            print(f"Pencarian dihentikan karena private key telah ditemukan")
+        
+        # Deadline sesi: simpan checkpoint bersih di gap pertama (termasuk checkpoint partial)
+        if run_state['deadline_reached']:
+            deadline_reached = True
+            next_start_hex = save_progress_state(tracker, origin_hex, range_bits, address)
+            print(f"\n⏰ SESSION DEADLINE REACHED - checkpoint saved at 0x{next_start_hex}")
+        
+        # Update state untuk batch berikutnya: gap pertama dari progress tracker
+        next_batch_id = tracker.first_gap()
+        if next_batch_id is not None and not STOP_SEARCH_FLAG and not deadline_reached:
             timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            save_next_batch_info(
-                next_info.get('original_start', start_hex),
-                range_bits,
-                address,
-                next_start_hex,
-                next_batch_id,
-                total_batches,
-                timestamp
-            )
+            next_start_hex = save_progress_state(tracker, origin_hex, range_bits, address, timestamp)
             
             print(f"\n📝 Updated state for next run.")
-            print(f"   Next start: 0x{next_start_hex}")
+            print(f"   Next start: 0x{next_start_hex} (batch {next_batch_id})")
             print(f"   To continue: python3 xiebo.py --continue")
         
         print(f"\n{'='*60}")
         if STOP_SEARCH_FLAG:
             print(f"🎯 SEARCH STOPPED - PRIVATE KEY FOUND!")
         else:
-            if next_batch_id >= total_batches:
+            if next_batch_id is None:
                 print(f"🎉 ALL BATCHES COMPLETED!")
             else:
                 print(f"⏸️  BATCHES PAUSED - READY FOR NEXT RUN")
@@ -820,6 +1174,15 @@ def main():
         total_keys = 1 << range_bits
         end_int = start_int + total_keys - 1
         
+        if auto_size:
+            tuned_size = autotune.tune_batch_size(gpu_id, range_bits)
+            if tuned_size:
+                BATCH_SIZE = tuned_size
+            else:
+                print(f"⚠️  Auto-size unavailable, using default batch size {BATCH_SIZE:,}")
+        
+        SHUFFLE_KEY = shuffle_key
+        
         print(f"\n{'='*60}")
         print(f"BATCH MODE with EARLY STATE SAVING")
         print(f"{'='*60}")
@@ -829,11 +1192,12 @@ def main():
         print(f"Total keys: {total_keys:,}")
         print(f"End: 0x{format(end_int, 'x')}")
         print(f"Batch size: {BATCH_SIZE:,} keys")
+        print(f"Batch order: {'shuffled (key ' + SHUFFLE_KEY + ')' if SHUFFLE_KEY else 'sequential'}")
         print(f"Address: {address}")
         print(f"Log file: {LOG_FILE} (with state info)")
         print(f"Next batch file: {NEXT_BATCH_FILE}")
         print(f"Max batches per run: {MAX_BATCHES_PER_RUN}")
-        print(f"State saved: EARLY (at initialization)")
+        print(f"State saved: EARLY (at initialization) + per batch ({progress.PROGRESS_FILE})")
         print(f"⚠️  AUTO-STOP: Pencarian akan berhenti otomatis jika ditemukan Found: 1 atau lebih")
         print(f"{'='*60}")
         
@@ -848,7 +1212,16 @@ def main():
         
         if batches_to_run < total_batches_needed:
             print(f"Remaining batches for next run: {total_batches_needed - batches_to_run:,}")
-            print(f"⚠️  State will be saved EARLY before running any batches")
+        
+        # Progress baru untuk sesi ini: setiap batch selesai langsung dicatat ke progress.json
+        tracker = progress.start({
+            'origin': start_hex,
+            'range_bits': range_bits,
+            'batch_size': BATCH_SIZE,
+            'total_batches': total_batches_needed,
+            'shuffle_key': SHUFFLE_KEY or '',
+            'address': address
+        }, resume=False)
         
         # ⭐ PERUBAHAN UTAMA: Inisialisasi dan simpan state DI AWAL
         # Parameter save_state_early=True akan menyimpan state saat inisialisasi
@@ -856,6 +1229,10 @@ def main():
                            start_batch_id=0, save_state_early=True)
         
         # Run each batch
+        if deadline_at is not None:
+            print(f"⏰ Session deadline: {deadline.format_deadline(deadline_at)}")
+        last_timing = None
+        
         for i in range(batches_to_run):
             if STOP_SEARCH_FLAG:
                 print(f"\n{'='*60}")
@@ -866,7 +1243,12 @@ def main():
                 print(f"{'='*60}")
                 break
             
-            batch_start = start_int + (i * BATCH_SIZE)
+            # Batch yang sedang/sudah dijalankan proses lain di direktori yang sama dilewati
+            if not progress.claim([i]):
+                print(f"\n⏭️  Batch {i+1} claimed by another process, skipping")
+                continue
+            
+            batch_start = get_batch_start(start_int, i, total_batches_needed, BATCH_SIZE)
             batch_end = min(batch_start + BATCH_SIZE, end_int + 1)
             batch_keys = batch_end - batch_start
             
@@ -881,7 +1263,20 @@ def main():
             print(f"Bits: {batch_bits}")
             print(f"Keys: {batch_keys:,}")
             
-            return_code, found_info = run_xiebo(gpu_id, batch_hex, batch_bits, address, batch_id=i)
+            if deadline_at is not None and deadline.seconds_left(deadline_at) <= 0:
+                stopped_at = batch_start
+            else:
+                return_code, found_info, stopped_at = run_batch_before_deadline(
+                    gpu_id, batch_start, batch_keys, batch_bits, address, i, deadline_at, last_timing)
+                last_timing = found_info.get('timing') or last_timing
+            
+            # Deadline sesi: simpan checkpoint bersih di key pertama yang belum di-scan
+            if stopped_at is not None:
+                deadline_reached = True
+                next_start_hex = save_progress_state(tracker, start_hex, range_bits, address)
+                print(f"\n⏰ SESSION DEADLINE REACHED - checkpoint saved at 0x{next_start_hex}")
+                print(f"   To continue: python3 xiebo.py --continue")
+                break
             
             if return_code == 0:
                 print(f"✅ Batch {i+1} completed successfully")
@@ -899,28 +1294,17 @@ def main():
             # Delay antara batch
             if i < batches_to_run - 1 and not STOP_SEARCH_FLAG:
                 print(f"\n⏱️  Waiting 5 seconds before next batch...")
-                time.sleep(5)
+                batchtiming.timed_sleep(5, found_info.get('timing'))
         
-        # Update state info jika sudah menyelesaikan semua batch yang dijadwalkan
-        if batches_to_run < total_batches_needed and not STOP_SEARCH_FLAG:
-            # State sudah disimpan di awal, tapi kita update progress-nya
-            next_start_int = start_int + (batches_to_run * BATCH_SIZE)
-            next_start_hex = format(next_start_int, 'x')
-            
+        # Update state info: gap pertama dari progress tracker (batch gagal ikut diulang)
+        next_batch_id = tracker.first_gap()
+        if next_batch_id is not None and not STOP_SEARCH_FLAG and not deadline_reached:
             timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            save_next_batch_info(
-                start_hex,
-                range_bits,
-                address,
-                next_start_hex,
-                batches_to_run,  # Sekarang sudah selesai
-                total_batches_needed,
-                timestamp
-            )
+            next_start_hex = save_progress_state(tracker, start_hex, range_bits, address, timestamp)
             
             print(f"\n📝 Updated state with completed progress.")
-            print(f"   Next start: 0x{next_start_hex}")
-            print(f"   Batches completed: {batches_to_run}")
+            print(f"   Next start: 0x{next_start_hex} (batch {next_batch_id})")
+            print(f"   Batches completed: {tracker.completed_count()}")
             print(f"   Total batches needed: {total_batches_needed}")
             print(f"   To continue: python3 xiebo.py --continue")
         
@@ -928,11 +1312,12 @@ def main():
         if STOP_SEARCH_FLAG:
             print(f"🎯 SEARCH STOPPED - PRIVATE KEY FOUND!")
         else:
-            if batches_to_run >= total_batches_needed:
+            if deadline_reached:
+                print(f"⏰ SESSION DEADLINE - READY FOR NEXT RUN")
+            elif next_batch_id is None:
                 print(f"🎉 ALL BATCHES COMPLETED!")
             else:
                 print(f"⏸️  BATCHES PAUSED - READY FOR NEXT RUN")
-                print(f"💾 State already saved at initialization")
         print(f"{'='*60}")
         
         # Tampilkan summary ringkas
@@ -949,7 +1334,7 @@ def main():
         print("Usage: python3 xiebo.py GPU_ID START_HEX RANGE_BITS ADDRESS")
         print("Or:    python3 xiebo.py --batch GPU_ID START_HEX RANGE_BITS ADDRESS")
         print("Or:    python3 xiebo.py --summary")
-        print("Or:    python3 xiebo.py --continue")
+        print("Or:    python3 xiebo.py --continue [GPU_IDS]")
         return 1
 
 if __name__ == "__main__":
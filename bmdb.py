@@ -4,7 +4,10 @@ import os
 import time
 import math
 import re
-import pyodbc
+import batchtiming
+import ledger
+import resultfile
+import procgroup
 
 # Konfigurasi database SQL Server
 SERVER = "benilapo-31088.portmap.host,31088"
@@ -22,6 +25,8 @@ MAX_BATCHES_PER_RUN = 6000000000000  # Maksimal 1juta batch per eksekusi
 def connect_db():
     """Membuat koneksi ke database SQL Server"""
     try:
+        # pyodbc di-import saat koneksi pertama (mode tanpa DB tidak butuh driver ODBC)
+        import pyodbc
         conn = pyodbc.connect(
             "DRIVER={ODBC Driver 17 for SQL Server};"
             f"SERVER={SERVER};"
@@ -214,7 +219,7 @@ def parse_xiebo_output(output_text):
     
     return found_info
 
-def display_xiebo_output_real_time(process):
+def display_xiebo_output_real_time(process, timer=None):
     """Menampilkan output xiebo secara real-time"""
     print("\n" + "─" * 80)
     print("🎯 XIEBO OUTPUT (REAL-TIME):")
@@ -226,6 +231,8 @@ def display_xiebo_output_real_time(process):
         if output_line == '' and process.poll() is not None:
             break
         if output_line:
+            if timer is not None:
+                timer.feed(output_line)
             # Tampilkan output dengan format yang lebih baik
             stripped_line = output_line.strip()
             if stripped_line:
@@ -260,6 +267,10 @@ def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
     cmd = ["./xiebo", "-gpuId", str(gpu_id), "-start", start_hex, 
            "-range", str(range_bits), address]
     
+    # Key yang ditemukan ditulis xiebo ke file hasil per batch (-o), stdout hanya untuk progress
+    result_path = resultfile.result_path(batch_id, gpu_id)
+    cmd += resultfile.output_args(result_path)
+    
     print(f"\n{'='*80}")
     print(f"🚀 STARTING XIEBO EXECUTION")
     print(f"{'='*80}")
@@ -267,6 +278,10 @@ def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
     print(f"Batch ID: {batch_id if batch_id is not None else 'N/A'}")
     print(f"{'='*80}")
     
+    # Catat timestamp setiap fase batch (Popen, setup, scan, teardown, bookkeeping)
+    timer = batchtiming.BatchTimer(batch_id, gpu_id, start_hex, range_bits)
+    process = watcher = None
+    
     try:
         # Update status menjadi inprogress jika ada batch_id
         if batch_id is not None:
@@ -276,24 +291,39 @@ def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
         print(f"\n⏳ Launching xiebo process...")
         
         # Gunakan Popen untuk mendapatkan output real-time
+        timer.mark('t_launch')
         process = subprocess.Popen(
-            cmd,
+            procgroup.command(cmd),
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
             text=True,
             bufsize=1,
-            universal_newlines=True
+            universal_newlines=True,
+            **procgroup.popen_kwargs()
         )
+        timer.mark('t_spawned')
+        procgroup.register(process, gpu_id, batch_id)
+        watcher = resultfile.ResultWatcher(result_path, batch_id, gpu_id, start_hex, range_bits).start()
         
         # Tampilkan output secara real-time
-        output_text = display_xiebo_output_real_time(process)
+        output_text = display_xiebo_output_real_time(process, timer=timer)
         
         # Tunggu proses selesai
         return_code = process.wait()
+        timer.mark('t_exit')
+        result_blocks = watcher.stop()
+        
+        # Key yang ditemukan langsung dicatat ke ledger (fsync) sebelum bookkeeping lain
+        ledger.record_output(batch_id, gpu_id, output_text)
         
         # Parse output untuk mencari private key
         found_info = parse_xiebo_output(output_text)
         
+        # File hasil (-o) terverifikasi menggantikan hasil scraping stdout (fallback)
+        if resultfile.apply(found_info, result_blocks) and not STOP_SEARCH_FLAG:
+            STOP_SEARCH_FLAG = True
+            print(f"🚨 STOP_SEARCH_FLAG diaktifkan karena {len(found_info['found_keys'])} key terverifikasi di {result_path}")
+        
         # Update status berdasarkan hasil
         if batch_id is not None:
             # Tentukan nilai 'found' berdasarkan found_count atau found status
@@ -310,6 +340,8 @@ def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
             # Update status di database
             update_batch_status(batch_id, 'done', found_status, wif_key)
         
+        found_info['timing'] = timer.finish(return_code)
+        
         # Tampilkan ringkasan hasil pencarian
         print(f"\n{'='*80}")
         print(f"📊 SEARCH RESULT SUMMARY")
@@ -362,6 +394,8 @@ def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
         if batch_id is not None:
             update_batch_status(batch_id, 'interrupted')
         
+        timer.finish(130)
+        
         return 130, {'found': False}
     except Exception as e:
         error_msg = str(e)
@@ -375,7 +409,15 @@ def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
         if batch_id is not None:
             update_batch_status(batch_id, 'error')
         
+        timer.finish(1)
+        
         return 1, {'found': False}
+    finally:
+        # Semua jalur (termasuk exception/Ctrl+C): xiebo tidak tertinggal di lockfile, thread watcher berhenti
+        if process is not None:
+            procgroup.release(process)
+        if watcher is not None:
+            watcher.stop()
 
 def main():
     global STOP_SEARCH_FLAG
@@ -383,6 +425,9 @@ def main():
     # Reset flag stop search setiap kali program dijalankan
     STOP_SEARCH_FLAG = False
     
+    # Key yang ditemukan juga dikirim ke tabel ledger di DB (lihat ledger.py)
+    ledger.register_sink('db', ledger.db_sink(connect_db))
+    
     # Parse arguments
     if len(sys.argv) < 2:
         print("Xiebo Batch Runner with SQL Server Database")
@@ -475,7 +520,7 @@ def main():
             # Delay antara batch (kecuali jika STOP_SEARCH_FLAG aktif)
             if not STOP_SEARCH_FLAG and batches_processed < MAX_BATCHES_PER_RUN:
                 print(f"\n⏱️  Waiting 3 seconds before next batch...")
-                time.sleep(3)
+                batchtiming.timed_sleep(3, found_info.get('timing'))
         
         print(f"\n{'='*80}")
         if STOP_SEARCH_FLAG:
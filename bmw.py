@@ -5,6 +5,12 @@ import time
 import math
 from datetime import datetime
 import csv
+import batchtiming
+import ledger
+import resultfile
+import procgroup
+import progress
+import stateactor
 
 # Konfigurasi file log
 LOG_FILE = "logbatch.txt"
@@ -25,6 +31,9 @@ LOG_COLUMNS = [
 # Global flag untuk menghentikan pencarian
 STOP_SEARCH_FLAG = False
 
+# Pemilik tunggal logbatch.txt selama batch berjalan (stateactor.py), None = baca/tulis file langsung
+LOG_ACTOR = None
+
 def save_to_drive():
     """Menyimpan logbatch.txt ke Google Drive"""
     try:
@@ -50,6 +59,24 @@ def save_to_drive():
         print(f"⚠️ Failed to save to Google Drive: {e}")
 
 def read_log_as_dict():
+    """Tabel log berdasarkan batch_id: dari memori state actor jika aktif, selain itu dari file"""
+    if LOG_ACTOR is not None:
+        return LOG_ACTOR.snapshot()
+    return read_log_file()
+
+def write_log_from_dict(log_dict):
+    """Menulis tabel log; lewat state actor hanya baris baru yang ditambahkan (baris proses lain tidak ditimpa)"""
+    if LOG_ACTOR is not None:
+        LOG_ACTOR.put_missing(log_dict)
+    else:
+        write_log_file(log_dict)
+
+def get_log_row(batch_id):
+    if LOG_ACTOR is not None:
+        return LOG_ACTOR.get(batch_id, {})
+    return read_log_file().get(str(batch_id), {})
+
+def read_log_file():
     """Membaca log file dan mengembalikan dictionary berdasarkan batch_id"""
     log_dict = {}
     
@@ -69,22 +96,25 @@ def read_log_as_dict():
     
     return log_dict
 
-def write_log_from_dict(log_dict):
-    """Menulis log file dari dictionary"""
+def write_log_file(log_dict, sync_drive=True):
+    """Menulis log file dari dictionary (file sementara lalu os.replace, pembaca tidak melihat tabel setengah jadi)"""
     try:
-        # Konversi dictionary ke list
+        # Konversi dictionary ke list (batch numerik dulu, lalu STATE_INFO dan entri khusus lain)
         rows = []
-        for batch_id in sorted(log_dict.keys(), key=lambda x: int(x) if x.isdigit() else x):
+        for batch_id in sorted(log_dict.keys(), key=lambda x: (0, int(x)) if x.isdigit() else (1, x)):
             rows.append(log_dict[batch_id])
         
         # Tulis ke file dengan format tabel
-        with open(LOG_FILE, 'w', newline='') as f:
+        tmp_path = f"{LOG_FILE}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', newline='') as f:
             writer = csv.DictWriter(f, fieldnames=LOG_COLUMNS, delimiter='|')
             writer.writeheader()
             writer.writerows(rows)
+        os.replace(tmp_path, LOG_FILE)
         
-        # Simpan ke Google Drive (silent)
-        save_to_drive()
+        # Simpan ke Google Drive (silent), state actor melakukannya setelah melepas file lock
+        if sync_drive:
+            save_to_drive()
         
     except Exception as e:
         print(f"❌ Error writing log file: {e}")
@@ -92,20 +122,24 @@ def write_log_from_dict(log_dict):
 def update_batch_log(batch_info):
     """Update log batch dengan informasi status terbaru"""
     try:
-        # Baca log yang sudah ada
-        log_dict = read_log_as_dict()
-        
         # Pastikan batch_info memiliki semua kolom yang diperlukan
         for column in LOG_COLUMNS:
             if column not in batch_info:
                 batch_info[column] = ''
         
-        # Update atau tambah entry
         batch_id = str(batch_info.get('batch_id', ''))
+        
+        # State actor: transisi di memori, file ditulis thread actor (key ditemukan = langsung)
+        if LOG_ACTOR is not None:
+            LOG_ACTOR.put(batch_id, batch_info, urgent=batch_info.get('found') == 'YES')
+            return
+        
+        # Baca log yang sudah ada, update atau tambah entry
+        log_dict = read_log_file()
         log_dict[batch_id] = batch_info
         
         # Tulis kembali log (silent)
-        write_log_from_dict(log_dict)
+        write_log_file(log_dict)
         
     except Exception as e:
         print(f"❌ Error updating log: {e}")
@@ -203,10 +237,18 @@ def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
     cmd = ["./xiebo", "-gpuId", str(gpu_id), "-start", start_hex, 
            "-range", str(range_bits), address]
     
+    # Key yang ditemukan ditulis xiebo ke file hasil per batch (-o), stdout hanya untuk progress
+    result_path = resultfile.result_path(batch_id, gpu_id)
+    cmd += resultfile.output_args(result_path)
+    
     print(f"\n{'='*60}")
     print(f"Running: {' '.join(cmd)}")
     print(f"{'='*60}")
     
+    # Catat timestamp setiap fase batch (Popen, setup, scan, teardown, bookkeeping)
+    timer = batchtiming.BatchTimer(batch_id, gpu_id, start_hex, range_bits)
+    process = watcher = None
+    
     try:
         # Update status menjadi inprogress jika ada batch_id
         if batch_id is not None:
@@ -226,14 +268,19 @@ def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
         print(f"{'-'*60}")
         
         # Gunakan Popen untuk mendapatkan output real-time
+        timer.mark('t_launch')
         process = subprocess.Popen(
-            cmd,
+            procgroup.command(cmd),
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
             text=True,
             bufsize=1,
-            universal_newlines=True
+            universal_newlines=True,
+            **procgroup.popen_kwargs()
         )
+        timer.mark('t_spawned')
+        procgroup.register(process, gpu_id, batch_id)
+        watcher = resultfile.ResultWatcher(result_path, batch_id, gpu_id, start_hex, range_bits).start()
         
         # Tampilkan output secara real-time
         output_lines = []
@@ -242,6 +289,7 @@ def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
             if output_line == '' and process.poll() is not None:
                 break
             if output_line:
+                timer.feed(output_line)
                 # Tampilkan output dengan format yang lebih baik
                 stripped_line = output_line.strip()
                 if stripped_line:
@@ -250,11 +298,21 @@ def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
         
         # Tunggu proses selesai
         return_code = process.wait()
+        timer.mark('t_exit')
+        result_blocks = watcher.stop()
         output_text = ''.join(output_lines)
         
+        # Key yang ditemukan langsung dicatat ke ledger (fsync) sebelum bookkeeping lain
+        ledger.record_output(batch_id, gpu_id, output_text)
+        
         # Parse output untuk mencari private key
         found_info = parse_xiebo_output(output_text)
         
+        # File hasil (-o) terverifikasi menggantikan hasil scraping stdout (fallback)
+        if resultfile.apply(found_info, result_blocks) and not STOP_SEARCH_FLAG:
+            STOP_SEARCH_FLAG = True
+            print(f"🚨 STOP_SEARCH_FLAG diaktifkan karena {len(found_info['found_keys'])} key terverifikasi di {result_path}")
+        
         # Update status berdasarkan hasil
         if batch_id is not None:
             batch_info['status'] = 'done'
@@ -275,6 +333,8 @@ def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
                 
             update_batch_log(batch_info)
         
+        found_info['timing'] = timer.finish(return_code)
+        
         # Tampilkan hasil pencarian
         print(f"\n{'='*60}")
         print(f"🔍 SEARCH RESULT")
@@ -325,6 +385,7 @@ def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
             }
             update_batch_log(batch_info)
         
+        timer.finish(130)
         return 130, {'found': False}
     except Exception as e:
         error_msg = str(e)
@@ -343,7 +404,26 @@ def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
             }
             update_batch_log(batch_info)
         
+        timer.finish(1)
         return 1, {'found': False}
+    finally:
+        # Semua jalur (termasuk exception/Ctrl+C): xiebo tidak tertinggal di lockfile, thread watcher berhenti
+        if process is not None:
+            procgroup.release(process)
+        if watcher is not None:
+            watcher.stop()
+
+def parse_gpu_ids(gpu_str):
+    """Parse string GPU IDs ('0', '0,1' atau '0 1') menjadi list of integers"""
+    gpu_ids = []
+    for part in gpu_str.replace(',', ' ').split():
+        try:
+            gpu_ids.append(int(part))
+        except ValueError:
+            continue
+    
+    # Urutkan dan hapus duplikat, default GPU 0
+    return sorted(set(gpu_ids)) or [0]
 
 def initialize_batch_log(start_hex, range_bits, address, gpu_id, num_batches, batch_size):
     """Inisialisasi log batch dengan semua batch dalam status uncheck"""
@@ -386,6 +466,9 @@ def initialize_batch_log(start_hex, range_bits, address, gpu_id, num_batches, ba
 
 def get_log_summary():
     """Mendapatkan summary log tanpa menampilkan isi file"""
+    if LOG_ACTOR is not None:
+        LOG_ACTOR.flush()
+    
     if not os.path.exists(LOG_FILE):
         return None, None, None
     
@@ -440,7 +523,7 @@ def display_compact_summary():
     print(f"{'='*50}")
 
 def main():
-    global STOP_SEARCH_FLAG
+    global STOP_SEARCH_FLAG, LOG_ACTOR
     
     # Reset flag stop search setiap kali program dijalankan
     STOP_SEARCH_FLAG = False
@@ -452,11 +535,119 @@ def main():
         print("  Single run: python3 xiebo_runner_fixed.py GPU_ID START_HEX RANGE_BITS ADDRESS")
         print("  Batch run:  python3 xiebo_runner_fixed.py --batch GPU_ID START_HEX RANGE_BITS ADDRESS")
         print("  Show summary: python3 xiebo_runner_fixed.py --summary")
+        print("  Continue:     python3 xiebo_runner_fixed.py --continue [GPU_IDS]  (e.g. 0,1 runs GPUs in parallel)")
         print("\n⚠️  FEATURE: Auto-stop ketika ditemukan Found: 1 atau lebih")
         sys.exit(1)
     
     # Show summary mode
     if sys.argv[1] == "--summary":
+        display_compact_summary()
+        saved_progress = progress.load()
+        if saved_progress is not None:
+            progress.display_progress(saved_progress)
+        sys.exit(0)
+    
+    # Mode yang menjalankan batch: satu thread actor memiliki logbatch.txt, thread GPU hanya mengirim transisi
+    LOG_ACTOR = stateactor.LogActor(read_log_file, lambda rows: write_log_file(rows, sync_drive=False),
+                                    shared_path=LOG_FILE, after_write=save_to_drive)
+    
+    # Continue mode: lanjutkan dari progress.json, semua GPU mengklaim batch secara paralel
+    if sys.argv[1] == "--continue":
+        saved_progress = progress.load()
+        if saved_progress is None:
+            print(f"❌ No saved progress ({progress.PROGRESS_FILE}). Run with --batch first.")
+            sys.exit(1)
+        
+        gpu_ids = parse_gpu_ids(' '.join(sys.argv[2:])) if len(sys.argv) > 2 else [0]
+        tracker = progress.start(saved_progress.session)
+        session = tracker.session
+        start_hex = session['origin']
+        range_bits = int(session['range_bits'])
+        address = session.get('address', '')
+        BATCH_SIZE = int(session['batch_size'])
+        num_batches = tracker.total_batches
+        
+        start_int = int(start_hex, 16)
+        end_int = start_int + (1 << range_bits) - 1
+        pending_ids = tracker.pending_ids()
+        
+        print(f"\n{'='*60}")
+        print(f"CONTINUE MODE (from {progress.PROGRESS_FILE})")
+        print(f"{'='*60}")
+        print(f"GPU IDs: {gpu_ids}")
+        print(f"Start: 0x{start_hex}")
+        print(f"Range: {range_bits} bits")
+        print(f"Batch size: {BATCH_SIZE:,} keys")
+        print(f"Address: {address}")
+        print(f"Batches completed: {tracker.completed_count()}/{num_batches}")
+        print(f"First unfinished batch: {tracker.first_gap()}")
+        print(f"{'='*60}")
+        
+        if not pending_ids:
+            print("✅ All batches already completed!")
+            sys.exit(0)
+        
+        print(f"\nRunning {len(pending_ids)} batches on {len(gpu_ids)} GPU(s), each GPU claims the next unfinished batch")
+        
+        # Baris log yang belum ada ditambahkan (silent)
+        initialize_batch_log(start_hex, range_bits, address, gpu_ids, num_batches, BATCH_SIZE)
+        
+        last_timing = {}
+        
+        def run_continue_batch(gpu_id, batch_id):
+            """Batch yang diklaim satu GPU; False = GPU ini berhenti mengklaim (key ditemukan)"""
+            if STOP_SEARCH_FLAG:
+                return False
+            
+            # Delay antara batch pada GPU yang sama
+            if gpu_id in last_timing:
+                print(f"\n⏱️  GPU {gpu_id}: Waiting 5 seconds before next batch...")
+                batchtiming.timed_sleep(5, last_timing[gpu_id])
+                if STOP_SEARCH_FLAG:
+                    return False
+            
+            batch_start = start_int + (batch_id * BATCH_SIZE)
+            batch_end = min(batch_start + BATCH_SIZE, end_int + 1)
+            batch_keys = batch_end - batch_start
+            
+            # Calculate bits
+            if batch_keys <= 1:
+                batch_bits = 1
+            else:
+                batch_bits = math.ceil(math.log2(batch_keys))
+            
+            batch_hex = format(batch_start, 'x')
+            
+            print(f"\n{'='*60}")
+            print(f"▶️  BATCH {batch_id+1}/{num_batches} (GPU {gpu_id})")
+            print(f"{'='*60}")
+            print(f"Start: 0x{batch_hex}")
+            print(f"Bits: {batch_bits}")
+            print(f"Keys: {batch_keys:,}")
+            
+            return_code, found_info = run_xiebo(gpu_id, batch_hex, batch_bits, address, batch_id=batch_id)
+            last_timing[gpu_id] = found_info.get('timing')
+            
+            if return_code == 0:
+                progress.record_done([batch_id])
+                print(f"✅ Batch {batch_id+1} completed successfully")
+            else:
+                print(f"⚠️  Batch {batch_id+1} exited with code {return_code} (left for next --continue)")
+            
+            return not STOP_SEARCH_FLAG
+        
+        progress.run_parallel(gpu_ids, pending_ids, run_continue_batch)
+        
+        print(f"\n{'='*60}")
+        if STOP_SEARCH_FLAG:
+            print(f"🎯 SEARCH STOPPED - PRIVATE KEY FOUND!")
+        elif tracker.first_gap() is None:
+            print(f"🎉 ALL BATCHES COMPLETED!")
+        else:
+            print(f"⏸️  {num_batches - tracker.completed_count()} batches left, first at batch {tracker.first_gap()}")
+            print(f"   To continue: python3 xiebo_runner_fixed.py --continue GPU_IDS")
+        print(f"{'='*60}")
+        
         display_compact_summary()
         sys.exit(0)
     
@@ -514,6 +705,16 @@ def main():
         print(f"\nNumber of batches: {num_batches}")
         print("First 3 batches:")
         
+        # Progress per batch untuk --continue (bisa dilanjutkan dengan beberapa GPU)
+        progress.start({
+            'origin': start_hex,
+            'range_bits': range_bits,
+            'batch_size': BATCH_SIZE,
+            'total_batches': num_batches,
+            'shuffle_key': '',
+            'address': address
+        }, resume=False)
+        
         # Inisialisasi log batch (silent)
         initialize_batch_log(start_hex, range_bits, address, gpu_id, num_batches, BATCH_SIZE)
         
@@ -543,6 +744,11 @@ def main():
                 print(f"{'='*60}")
                 break
             
+            # Batch yang sedang/sudah dijalankan proses lain di direktori yang sama dilewati
+            if not progress.claim([i]):
+                print(f"\n⏭️  Batch {i+1} claimed by another process, skipping")
+                continue
+            
             batch_start = start_int + (i * BATCH_SIZE)
             batch_end = min(batch_start + BATCH_SIZE, end_int + 1)
             batch_keys = batch_end - batch_start
@@ -566,6 +772,7 @@ def main():
             return_code, found_info = run_xiebo(gpu_id, batch_hex, batch_bits, address, batch_id=i)
             
             if return_code == 0:
+                progress.record_done([i])
                 print(f"✅ Batch {i+1} completed successfully")
             else:
                 print(f"⚠️  Batch {i+1} exited with code {return_code}")
@@ -579,7 +786,7 @@ def main():
             # ⭐ PERUBAHAN UTAMA: Delay antara batch hanya jika tidak ada flag stop
             if i < num_batches - 1 and not STOP_SEARCH_FLAG:
                 print(f"\n⏱️  Waiting 5 seconds before next batch...")
-                time.sleep(5)
+                batchtiming.timed_sleep(5, found_info.get('timing'))
         
         print(f"\n{'='*60}")
         if STOP_SEARCH_FLAG:
@@ -612,6 +819,7 @@ def main():
         print("Usage: python3 xiebo_runner_fixed.py GPU_ID START_HEX RANGE_BITS ADDRESS")
         print("Or:    python3 xiebo_runner_fixed.py --batch GPU_ID START_HEX RANGE_BITS ADDRESS")
         print("Or:    python3 xiebo_runner_fixed.py --summary")
+        print("Or:    python3 xiebo_runner_fixed.py --continue [GPU_IDS]")
         return 1
 
 if __name__ == "__main__":
@@ -0,0 +1,142 @@
+import sys
+
+# Konfigurasi penggabungan batch (beberapa baris Tbatch -> satu proses xiebo)
+COALESCE_MAX_BATCHES = 16     # Maksimal jumlah batch dalam satu launch (harus pangkat dua)
+COALESCE_MAX_BITS = 46        # Maksimal ukuran satu launch (2^46 keys)
+
+def batch_span(batch):
+    """Range satu batch sebagai (start_int, keys) dari start_range/end_range (end inklusif)"""
+    start_int = int(str(batch['start_range']), 16)
+    end_int = int(str(batch['end_range']), 16)
+    return start_int, end_int - start_int + 1
+
+def aligned_bits(start_int, keys):
+    """Bits jika range adalah blok 2^k yang aligned (start kelipatan 2^k), None jika tidak"""
+    if keys <= 0 or keys & (keys - 1) != 0:
+        return None
+    if start_int % keys != 0:
+        return None
+    return keys.bit_length() - 1
+
+def plan_launches(batches, max_batches=None, max_bits=None):
+    """Menggabungkan 2^m batch berurutan yang contiguous dan aligned menjadi satu launch
+
+    Mengembalikan list launch: {'start_hex', 'bits', 'batches'}. Batch yang tidak bisa
+    digabung tetap menjadi launch sendiri (bits = None, dihitung oleh runner).
+    """
+    if max_batches is None:
+        max_batches = COALESCE_MAX_BATCHES
+    if max_bits is None:
+        max_bits = COALESCE_MAX_BITS
+
+    spans = []
+    for batch in batches:
+        try:
+            spans.append(batch_span(batch))
+        except (KeyError, TypeError, ValueError):
+            spans.append((None, None))
+
+    launches = []
+    i = 0
+    while i < len(batches):
+        start_int, keys = spans[i]
+        bits = aligned_bits(start_int, keys) if start_int is not None else None
+
+        if bits is None:
+            launches.append({'start_hex': batches[i]['start_range'], 'bits': None, 'batches': [batches[i]]})
+            i += 1
+            continue
+
+        # Cari 2^m terbesar: batch berikutnya harus contiguous, ukuran sama, dan start aligned ke 2^(bits+m)
+        count = 1
+        m = 0
+        while True:
+            next_count = count * 2
+            if next_count > max_batches or bits + m + 1 > max_bits:
+                break
+            if start_int % (1 << (bits + m + 1)) != 0:
+                break
+            if i + next_count > len(batches):
+                break
+
+            contiguous = True
+            for k in range(count, next_count):
+                k_start, k_keys = spans[i + k]
+                if k_start != start_int + k * keys or k_keys != keys:
+                    contiguous = False
+                    break
+            if not contiguous:
+                break
+
+            count = next_count
+            m += 1
+
+        launches.append({
+            'start_hex': batches[i]['start_range'] if count == 1 else format(start_int, 'x'),
+            'bits': bits + m,
+            'batches': batches[i:i + count]
+        })
+        i += count
+
+    return launches
+
+def attribute_found(member_batches, found, wif, found_info=None):
+    """Membagi hasil satu launch gabungan ke setiap batch anggota: list (found, wif)
+
+    Key yang ditemukan hanya dicatat di batch yang memuat private key tersebut.
+    Jika key HEX tidak bisa dibaca, semua batch anggota ditandai found (aman).
+    """
+    if found != 'Yes':
+        return [(found, wif) for _ in member_batches]
+
+    key_hex = (found_info or {}).get('private_key_hex') or ''
+    key_hex = key_hex.strip().lower().replace('0x', '')
+    try:
+        key_int = int(key_hex, 16)
+    except ValueError:
+        return [(found, wif) for _ in member_batches]
+
+    results = []
+    matched = False
+    for batch in member_batches:
+        start_int, keys = batch_span(batch)
+        if start_int <= key_int < start_int + keys:
+            results.append(('Yes', wif))
+            matched = True
+        else:
+            results.append(('No', ''))
+
+    if not matched:
+        return [(found, wif) for _ in member_batches]
+
+    return results
+
+def describe_launch(launch):
+    """Deskripsi singkat launch untuk log"""
+    ids = [str(batch.get('id')) for batch in launch['batches']]
+    if len(ids) == 1:
+        return f"Batch {ids[0]}"
+    return f"Batches {ids[0]}-{ids[-1]} (coalesced {len(ids)} -> 2^{launch['bits']})"
+
+def main():
+    if len(sys.argv) < 2:
+        print("Xiebo Batch Coalescing Planner")
+        print("Usage:")
+        print("  Plan from file: python3 coalesce.py BATCH_FILE   (id|start_hex|end_hex per line)")
+        print(f"  Max batches per launch: {COALESCE_MAX_BATCHES}, max bits: {COALESCE_MAX_BITS}")
+        sys.exit(1)
+
+    batches = []
+    with open(sys.argv[1], 'r') as f:
+        for line in f:
+            parts = line.strip().split('|')
+            if len(parts) >= 3 and parts[0].isdigit():
+                batches.append({'id': int(parts[0]), 'start_range': parts[1], 'end_range': parts[2]})
+
+    launches = plan_launches(batches)
+    print(f"📋 {len(batches)} batches -> {len(launches)} launches")
+    for launch in launches:
+        print(f"   {describe_launch(launch)} start=0x{launch['start_hex']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,473 @@
+import os
+import sys
+import csv
+import json
+import time
+import socket
+import sqlite3
+import atexit
+import threading
+import urllib.request
+import urllib.error
+from datetime import datetime
+
+# Konfigurasi coordinator (satu daemon memiliki batch store, host GPU mengambil kerja lewat HTTP/JSON)
+COORD_DB = "coordinator.db"                 # Batch store SQLite milik daemon
+COORD_HOST = "127.0.0.1"                    # Default hanya lokal, --host 0.0.0.0 untuk host lain
+COORD_PORT = int(os.environ.get("XIEBO_COORD_PORT", "8765"))
+COORD_TOKEN = os.environ.get("XIEBO_COORD_TOKEN", "")      # Shared secret (header X-Xiebo-Token), kosong = tanpa auth
+LEASE_SECONDS = 900                         # Klaim kedaluwarsa jika tidak di-heartbeat, batch boleh diklaim host lain
+HEARTBEAT_SECONDS = 120                     # Interval heartbeat agent untuk semua batch yang dipegang
+CLAIM_BATCHES = 16                          # Batch per claim agent (satu launch gabungan), tidak menimbun di akhir campaign
+MAX_CLAIM = 1024                            # Batas batch per request claim
+REQUEST_TIMEOUT_SECONDS = 30                # Timeout HTTP agent (sama dengan connect timeout DB)
+LOAD_COMMIT_ROWS = 10000                    # Commit per N baris saat load/init
+
+# Status yang tidak melepas klaim (runner mengulang launch yang stall di host yang sama)
+HELD_STATUSES = ('inprogress', 'stalled')
+
+class BatchStore:
+    """Tabel batch di SQLite: satu koneksi, satu transaksi per request (contention terpusat di sini)"""
+
+    def __init__(self, path=COORD_DB):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS batches (
+                id INTEGER PRIMARY KEY,
+                start_range TEXT NOT NULL,
+                end_range TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                found TEXT NOT NULL DEFAULT '',
+                wif TEXT NOT NULL DEFAULT '',
+                owner TEXT,
+                lease_until REAL NOT NULL DEFAULT 0
+            )
+        """)
+        # Index parsial: claim tidak memindai baris done (mayoritas tabel di akhir campaign)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_batches_open ON batches(id) WHERE status != 'done'")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS found (
+                idem_key TEXT PRIMARY KEY,
+                batch_id TEXT,
+                worker TEXT,
+                address TEXT,
+                wif TEXT,
+                priv_hex TEXT,
+                host TEXT,
+                found_at TEXT NOT NULL
+            )
+        """)
+        self.stop = (self.conn.execute("SELECT 1 FROM found LIMIT 1").fetchone() is not None or
+                     self.conn.execute("SELECT 1 FROM batches WHERE found = 'Yes' LIMIT 1").fetchone() is not None)
+
+    def _transaction(self, func):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = func(self.conn)
+                self.conn.execute("COMMIT")
+                return result
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def claim(self, worker, count, after=0):
+        """Klaim batch terbuka terendah (pending, gagal, atau lease kedaluwarsa) untuk worker"""
+        count = max(0, min(int(count), MAX_CLAIM))
+        if self.stop or not count:
+            return []
+
+        def work(conn):
+            now = time.time()
+            rows = conn.execute("""
+                SELECT id, start_range, end_range FROM batches
+                WHERE status != 'done' AND id >= ? AND (owner IS NULL OR lease_until < ?)
+                ORDER BY id LIMIT ?
+            """, (int(after), now, count)).fetchall()
+            conn.executemany("""
+                UPDATE batches SET status = 'inprogress', owner = ?, lease_until = ? WHERE id = ?
+            """, [(worker, now + LEASE_SECONDS, row[0]) for row in rows])
+            return rows
+
+        # Status 'claimed' di sisi agent: batch milik worker ini, belum dijalankan
+        return [{'id': row[0], 'start_range': row[1], 'end_range': row[2], 'status': 'claimed', 'found': '', 'wif': ''}
+                for row in self._transaction(work)]
+
+    def heartbeat(self, worker, ids):
+        """Memperpanjang lease batch milik worker, mengembalikan ID yang sudah diambil alih host lain"""
+        def work(conn):
+            lease_until = time.time() + LEASE_SECONDS
+            lost = []
+            for batch_id in ids:
+                cursor = conn.execute("""
+                    UPDATE batches SET lease_until = ? WHERE id = ? AND owner = ?
+                """, (lease_until, int(batch_id), worker))
+                if cursor.rowcount == 0:
+                    lost.append(batch_id)
+            return lost
+
+        return self._transaction(work)
+
+    def complete(self, worker, updates, release=()):
+        """Update status (batch_id, status, found, wif) dan pelepasan klaim dalam satu transaksi
+
+        'done' selalu diterima (kerja sudah dilakukan); status lain hanya dari pemilik klaim.
+        """
+        def work(conn):
+            now = time.time()
+            applied = 0
+            for batch_id, status, found, wif in updates:
+                if status == 'done':
+                    cursor = conn.execute("""
+                        UPDATE batches SET status = ?, found = ?, wif = ?, owner = NULL, lease_until = 0 WHERE id = ?
+                    """, (status, found or '', wif or '', int(batch_id)))
+                elif status in HELD_STATUSES:
+                    cursor = conn.execute("""
+                        UPDATE batches SET status = ?, found = ?, wif = ?, owner = ?, lease_until = ?
+                        WHERE id = ? AND (owner = ? OR owner IS NULL OR lease_until < ?)
+                    """, (status, found or '', wif or '', worker, now + LEASE_SECONDS, int(batch_id), worker, now))
+                else:
+                    cursor = conn.execute("""
+                        UPDATE batches SET status = ?, found = ?, wif = ?, owner = NULL, lease_until = 0
+                        WHERE id = ? AND (owner = ? OR owner IS NULL OR lease_until < ?)
+                    """, (status, found or '', wif or '', int(batch_id), worker, now))
+                applied += cursor.rowcount
+                if found == 'Yes':
+                    self.stop = True
+
+            # Batch yang dipegang tapi tidak dijalankan kembali ke antrian
+            conn.executemany("""
+                UPDATE batches SET owner = NULL, lease_until = 0,
+                    status = CASE status WHEN 'inprogress' THEN 'pending' ELSE status END
+                WHERE id = ? AND owner = ?
+            """, [(int(batch_id), worker) for batch_id in release])
+            return applied
+
+        return self._transaction(work)
+
+    def report(self, worker, entries):
+        """Key yang ditemukan (entry ledger), idempoten per idem_key; pencarian semua host berhenti"""
+        def work(conn):
+            stored = 0
+            for entry in entries:
+                cursor = conn.execute("""
+                    INSERT OR IGNORE INTO found (idem_key, batch_id, worker, address, wif, priv_hex, host, found_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, (entry['key'], entry.get('batch_id', ''), worker, entry.get('address', ''), entry.get('wif', ''),
+                      entry.get('hex', ''), entry.get('host', ''), entry.get('timestamp') or
+                      datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+                stored += cursor.rowcount
+            return stored
+
+        stored = self._transaction(work)
+        if entries:
+            self.stop = True
+        return stored
+
+    def status(self):
+        with self.lock:
+            now = time.time()
+            counts = dict(self.conn.execute("SELECT status, COUNT(*) FROM batches GROUP BY status").fetchall())
+            workers = self.conn.execute("""
+                SELECT owner, COUNT(*) FROM batches WHERE owner IS NOT NULL AND lease_until >= ? GROUP BY owner
+            """, (now,)).fetchall()
+            found = self.conn.execute("SELECT batch_id, address, priv_hex, host, found_at FROM found").fetchall()
+        return {
+            'total': sum(counts.values()),
+            'counts': counts,
+            'workers': dict(workers),
+            'found': [dict(zip(('batch_id', 'address', 'hex', 'host', 'found_at'), row)) for row in found],
+            'stop': self.stop
+        }
+
+    def insert_rows(self, rows):
+        """rows: iterable (id, start_hex, end_hex); ID yang sudah ada dilewati"""
+        inserted = 0
+        chunk = []
+
+        def flush(conn):
+            cursor = conn.executemany("""
+                INSERT OR IGNORE INTO batches (id, start_range, end_range) VALUES (?, ?, ?)
+            """, chunk)
+            return cursor.rowcount
+
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= LOAD_COMMIT_ROWS:
+                inserted += self._transaction(flush)
+                chunk = []
+        if chunk:
+            inserted += self._transaction(flush)
+        return inserted
+
+def serve(store, host=COORD_HOST, port=COORD_PORT):
+    """HTTP/JSON: POST /claim, /heartbeat, /complete, /report; GET /status"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    def handle_claim(body):
+        return {'batches': store.claim(body['worker'], body.get('count', 1), body.get('after', 0))}
+
+    def handle_heartbeat(body):
+        return {'lost': store.heartbeat(body['worker'], body.get('ids', []))}
+
+    def handle_complete(body):
+        return {'applied': store.complete(body['worker'], body.get('updates', []), body.get('release', []))}
+
+    def handle_report(body):
+        return {'stored': store.report(body['worker'], body.get('entries', []))}
+
+    routes = {'/claim': handle_claim, '/heartbeat': handle_heartbeat,
+              '/complete': handle_complete, '/report': handle_report}
+
+    class CoordinatorHandler(BaseHTTPRequestHandler):
+        def _reply(self, code, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _authorized(self):
+            if COORD_TOKEN and self.headers.get('X-Xiebo-Token') != COORD_TOKEN:
+                self._reply(403, {'error': 'bad token'})
+                return False
+            return True
+
+        def do_GET(self):
+            if not self._authorized():
+                return
+            if self.path.startswith('/status'):
+                self._reply(200, store.status())
+            else:
+                self._reply(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if not self._authorized():
+                return
+            handler = routes.get(self.path)
+            if handler is None:
+                self._reply(404, {'error': 'not found'})
+                return
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length) or b'{}')
+                payload = handler(body)
+            except (KeyError, TypeError, ValueError) as e:
+                self._reply(400, {'error': f"bad request: {e}"})
+                return
+            except sqlite3.Error as e:
+                self._reply(500, {'error': f"store error: {e}"})
+                return
+            payload['stop'] = store.stop
+            self._reply(200, payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), CoordinatorHandler)
+    server.daemon_threads = True
+    print(f"🛰️  Coordinator on http://{host}:{port} (store {store.path}, lease {LEASE_SECONDS}s"
+          f"{', token required' if COORD_TOKEN else ''})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Coordinator stopped")
+    finally:
+        server.server_close()
+
+class CoordinatorClient:
+    """Agent di host GPU: claim/heartbeat/complete/report lewat HTTP, tanpa kredensial SQL Server
+
+    Semua batch yang diklaim di-heartbeat oleh satu thread sampai selesai; saat exit batch
+    yang belum dijalankan dilepas agar host lain bisa mengambilnya.
+    """
+
+    def __init__(self, url, worker=None):
+        self.url = url.rstrip('/')
+        self.worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+        self.after = 0
+        self.held = set()
+        self.lock = threading.Lock()
+        self.stop_requested = False
+        self.heartbeat_thread = None
+        atexit.register(self.release_all)
+
+    def _request(self, path, payload=None):
+        data = None if payload is None else json.dumps(dict(payload, worker=self.worker)).encode()
+        request = urllib.request.Request(self.url + path, data=data, headers={'Content-Type': 'application/json'})
+        if COORD_TOKEN:
+            request.add_header('X-Xiebo-Token', COORD_TOKEN)
+        with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT_SECONDS) as response:
+            result = json.loads(response.read())
+        if result.get('stop'):
+            self.stop_requested = True
+        return result
+
+    def claim(self, count):
+        """List batch (format baris Tbatch) atau None jika coordinator tidak tersedia"""
+        try:
+            rows = self._request('/claim', {'count': count, 'after': self.after})['batches']
+        except (OSError, ValueError, KeyError) as e:
+            print(f"❌ Coordinator claim error: {e}")
+            return None
+        with self.lock:
+            self.held.update(row['id'] for row in rows)
+            if self.heartbeat_thread is None:
+                self.heartbeat_thread = threading.Thread(target=self._heartbeat, daemon=True)
+                self.heartbeat_thread.start()
+        return rows
+
+    def complete(self, updates):
+        """Dipanggil thread outbox: semua update status dalam satu request, True jika diterima"""
+        try:
+            self._request('/complete', {'updates': [list(update) for update in updates]})
+        except (OSError, ValueError) as e:
+            print(f"❌ Coordinator complete error: {e}")
+            return False
+        with self.lock:
+            for batch_id, status, _, _ in updates:
+                if status not in HELD_STATUSES:
+                    self.held.discard(batch_id)
+        return True
+
+    def report_sink(self, entry):
+        """Sink ledger: key yang ditemukan dikirim ke coordinator (exception = retry oleh ledger)"""
+        self._request('/report', {'entries': [entry]})
+
+    def _heartbeat(self):
+        while True:
+            time.sleep(HEARTBEAT_SECONDS)
+            with self.lock:
+                ids = sorted(self.held)
+            if not ids:
+                continue
+            try:
+                lost = self._request('/heartbeat', {'ids': ids})['lost']
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️ Coordinator heartbeat failed: {e} (leases expire after {LEASE_SECONDS}s)")
+                continue
+            if lost:
+                print(f"⚠️ Coordinator: {len(lost)} claimed batch(es) taken over by another host")
+                with self.lock:
+                    self.held.difference_update(lost)
+
+    def release_all(self):
+        """Batch yang masih dipegang (buffer prefetch, launch terputus) dikembalikan ke antrian"""
+        with self.lock:
+            ids = sorted(self.held)
+            self.held.clear()
+        if not ids:
+            return
+        try:
+            self._request('/complete', {'updates': [], 'release': ids})
+            print(f"↩️  Released {len(ids)} unfinished batch(es) to the coordinator")
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Coordinator release failed: {e} ({len(ids)} batch(es) free again after lease expiry)")
+
+    def status(self):
+        return self._request('/status')
+
+def extract_coordinator_arg(argv):
+    """Mengambil '--coordinator URL' dari argv (dihapus dari list), mengembalikan URL atau None"""
+    if "--coordinator" not in argv:
+        return None
+    index = argv.index("--coordinator")
+    if index + 1 >= len(argv):
+        print(f"❌ --coordinator needs a URL, e.g. http://{COORD_HOST}:{COORD_PORT}")
+        sys.exit(1)
+    url = argv[index + 1]
+    del argv[index:index + 2]
+    if not url.startswith('http'):
+        url = f"http://{url}"
+    return url
+
+def extract_option(argv, name, default):
+    if name not in argv:
+        return default
+    index = argv.index(name)
+    value = argv[index + 1] if index + 1 < len(argv) else default
+    del argv[index:index + 2]
+    return value
+
+def read_batch_file(path):
+    """File batch audit/genb (batch_id|start_hex|end_hex)"""
+    with open(path, 'r') as f:
+        for row in csv.DictReader(f, delimiter='|'):
+            yield int(row['batch_id']), row['start_hex'], row['end_hex']
+
+def range_rows(start_hex, range_bits, batch_bits, first_id=0):
+    """Batch 2^batch_bits berurutan yang menutup range (end inklusif, format Tbatch)"""
+    start_int = int(start_hex, 16)
+    end_int = start_int + (1 << range_bits)
+    batch_keys = 1 << batch_bits
+    batch_id = first_id
+    for batch_start in range(start_int, end_int, batch_keys):
+        yield batch_id, format(batch_start, 'x'), format(min(batch_start + batch_keys, end_int) - 1, 'x')
+        batch_id += 1
+
+def display_status(status):
+    print(f"\n{'='*60}")
+    print(f"🛰️  COORDINATOR STATUS")
+    print(f"{'='*60}")
+    print(f"Batches: {status['total']:,}")
+    for name, count in sorted(status['counts'].items()):
+        print(f"   {name:<12} {count:,}")
+    print(f"Active workers: {len(status['workers'])}")
+    for worker, count in sorted(status['workers'].items()):
+        print(f"   {worker}: {count} batch(es) leased")
+    if status['found']:
+        print(f"🔑 Found keys: {len(status['found'])}")
+        for entry in status['found']:
+            print(f"   batch {entry['batch_id']}: {entry['address']} {entry['hex']} ({entry['host']})")
+    print(f"{'='*60}")
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ("serve", "load", "init", "status"):
+        print("Xiebo Work Coordinator")
+        print("Usage:")
+        print(f"  Serve:  python3 coordinator.py serve [--host H] [--port {COORD_PORT}] [--db {COORD_DB}]")
+        print("  Load:   python3 coordinator.py load BATCH_FILE [--db FILE]   (batch_id|start_hex|end_hex)")
+        print("  Init:   python3 coordinator.py init START_HEX RANGE_BITS BATCH_BITS [--db FILE]")
+        print(f"  Status: python3 coordinator.py status [URL]")
+        print("  Agents: python3 kamudbs.py --batch-db GPU_IDS START_ID ADDRESS --coordinator URL")
+        print("  Auth:   set XIEBO_COORD_TOKEN on daemon and agents")
+        sys.exit(1)
+
+    command = sys.argv[1]
+    args = sys.argv[2:]
+    db_path = extract_option(args, "--db", COORD_DB)
+
+    if command == "serve":
+        host = extract_option(args, "--host", COORD_HOST)
+        port = int(extract_option(args, "--port", COORD_PORT))
+        serve(BatchStore(db_path), host, port)
+
+    elif command == "load":
+        if len(args) != 1:
+            print("Usage: python3 coordinator.py load BATCH_FILE [--db FILE]")
+            sys.exit(1)
+        inserted = BatchStore(db_path).insert_rows(read_batch_file(args[0]))
+        print(f"📥 {inserted:,} batches from {args[0]} inserted into {db_path}")
+
+    elif command == "init":
+        if len(args) != 3:
+            print("Usage: python3 coordinator.py init START_HEX RANGE_BITS BATCH_BITS [--db FILE]")
+            sys.exit(1)
+        inserted = BatchStore(db_path).insert_rows(range_rows(args[0], int(args[1]), int(args[2])))
+        print(f"📥 {inserted:,} batches of 2^{args[2]} keys inserted into {db_path}")
+
+    else:
+        url = args[0] if args else f"http://{COORD_HOST}:{COORD_PORT}"
+        try:
+            display_status(CoordinatorClient(url).status())
+        except (OSError, ValueError) as e:
+            print(f"❌ Coordinator {url} unavailable: {e}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+import os
+import sys
+import time
+import atexit
+import threading
+from collections import deque
+import batchtiming
+import telemetry
+
+# Konfigurasi dashboard (tabel status per GPU, output mentah ke file log)
+REFRESH_SECONDS = 1.0            # Redraw curses / notebook
+PLAIN_REFRESH_SECONDS = 30       # Cetak tabel di output biasa (pipe, '!python3' di Colab)
+LOG_DIR = "logs"                 # logs/gpu_<id>.log dan logs/console.log
+LOG_MAX_BYTES = 5 * 1024 * 1024  # Rotasi log per 5 MB
+LOG_BACKUP_COUNT = 3             # Jumlah file rotasi yang disimpan
+EVENT_LINES = 8                  # Baris console terakhir yang ditampilkan di bawah tabel
+
+# Dashboard aktif (None jika runner memakai output per baris seperti biasa)
+ACTIVE = None
+
+def get_logger(name):
+    """Logger dengan RotatingFileHandler di LOG_DIR/<name>.log"""
+    # logging di-import saat dashboard dipakai (import runner tanpa --dashboard tetap cepat)
+    import logging
+    from logging.handlers import RotatingFileHandler
+    
+    logger = logging.getLogger(f"xiebo.{name}")
+    if not logger.handlers:
+        os.makedirs(LOG_DIR, exist_ok=True)
+        handler = RotatingFileHandler(os.path.join(LOG_DIR, f"{name}.log"),
+                                      maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT)
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+def detect_backend():
+    """'notebook' (kernel Jupyter/Colab), 'curses' (terminal) atau 'plain'"""
+    try:
+        from IPython import get_ipython
+        shell = get_ipython()
+        if shell is not None and shell.__class__.__name__ == 'ZMQInteractiveShell':
+            return 'notebook'
+    except ImportError:
+        pass
+
+    if sys.stdout.isatty():
+        try:
+            import curses
+            return 'curses'
+        except ImportError:
+            pass
+
+    return 'plain'
+
+def format_eta(seconds):
+    if seconds is None or seconds < 0:
+        return '-'
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+class ConsoleCapture:
+    """Pengganti sys.stdout: print runner masuk ke logs/console.log dan daftar event dashboard"""
+
+    def __init__(self, board):
+        self.board = board
+        self.logger = get_logger('console')
+        self.buffer = ''
+
+    def write(self, text):
+        self.buffer += text
+        while '\n' in self.buffer:
+            line, self.buffer = self.buffer.split('\n', 1)
+            line = line.strip()
+            if line and not line.strip('=─-'):
+                continue
+            if line:
+                self.logger.info(line)
+                self.board.add_event(line)
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+class Dashboard:
+    """Status per GPU (batch, speed, persen, ETA, found) yang digambar ulang dengan interval tetap"""
+
+    def __init__(self, backend=None):
+        self.backend = backend or detect_backend()
+        self.lock = threading.Lock()
+        self.gpus = {}
+        self.events = deque(maxlen=EVENT_LINES)
+        self.started_at = time.time()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.stdout = sys.stdout
+        self.handle = None
+        self.screen = None
+        self.last_plain = 0
+
+    def gpu_state(self, gpu_id):
+        gpu_id = str(gpu_id)
+        if gpu_id not in self.gpus:
+            self.gpus[gpu_id] = {'batch': '-', 'bits': None, 'status': 'idle', 'speed': 0.0,
+                                 'percent': 0.0, 'bkeys': 0.0, 'eta': None, 'found': 0, 'total_found': 0}
+        return self.gpus[gpu_id]
+
+    def begin_batch(self, gpu_id, batch_id, range_bits):
+        with self.lock:
+            state = self.gpu_state(gpu_id)
+            state.update({'batch': '-' if batch_id in (None, '') else str(batch_id), 'status': 'launch',
+                          'percent': 0.0, 'bkeys': 0.0, 'eta': None, 'found': 0})
+            try:
+                state['bits'] = int(range_bits)
+            except (TypeError, ValueError):
+                state['bits'] = None
+
+    def end_batch(self, gpu_id, return_code):
+        with self.lock:
+            state = self.gpu_state(gpu_id)
+            state['status'] = 'done' if return_code == 0 else f"exit {return_code}"
+            state['speed'] = 0.0
+            state['eta'] = None
+            state['total_found'] += state['found']
+
+    def update_line(self, gpu_id, line, progress=None):
+        """Update status GPU dari satu baris output xiebo"""
+        with self.lock:
+            state = self.gpu_state(gpu_id)
+            if progress is None:
+                progress = batchtiming.parse_progress_line(line)
+
+            if progress:
+                state['status'] = 'scan'
+                state['speed'] = progress['speed']
+                state['percent'] = progress['percent']
+                state['bkeys'] = progress['bkeys']
+                state['found'] = progress['found']
+                if state['bits'] is not None and progress['speed'] > 0:
+                    remaining = (1 << state['bits']) - progress['bkeys'] * 1_000_000_000
+                    state['eta'] = max(0.0, remaining / (progress['speed'] * 1_000_000))
+                return
+
+            setup_match = batchtiming.SETUP_PATTERN.search(line)
+            if setup_match:
+                state['status'] = f"setup {float(setup_match.group(1)):.0f}%"
+
+    def add_event(self, text):
+        with self.lock:
+            self.events.append(text[:160])
+
+    def pump(self, process, gpu_id, timer=None, monitor=None):
+        """Membaca output xiebo ke log per GPU dan dashboard (pengganti print per baris)"""
+        logger = get_logger(f"gpu_{gpu_id}")
+        if timer is not None:
+            self.begin_batch(gpu_id, timer.record.get('batch_id'), timer.record.get('range_bits'))
+
+        output_lines = []
+        while True:
+            output_line = process.stdout.readline()
+            if output_line == '' and process.poll() is not None:
+                break
+            if output_line:
+                progress = timer.feed(output_line) if timer is not None else None
+                telemetry.METRICS.observe_progress(gpu_id, progress)
+                if monitor is not None:
+                    monitor.feed(output_line)
+
+                stripped_line = output_line.strip()
+                if stripped_line:
+                    logger.info(stripped_line)
+                    self.update_line(gpu_id, stripped_line, progress)
+                    lower = stripped_line.lower()
+                    if lower.startswith('priv (') or lower.startswith('public addr'):
+                        self.add_event(f"GPU {gpu_id}: {stripped_line}")
+                output_lines.append(output_line)
+
+        self.end_batch(gpu_id, process.poll())
+        return ''.join(output_lines)
+
+    def render(self, width=100):
+        """Tabel status sebagai list baris"""
+        with self.lock:
+            gpus = sorted(self.gpus.items(), key=lambda item: (len(item[0]), item[0]))
+            events = list(self.events)
+
+        fleet_speed = sum(state['speed'] for _, state in gpus)
+        elapsed = time.time() - self.started_at
+
+        lines = [
+            f"XIEBO DASHBOARD  {time.strftime('%H:%M:%S')}  uptime {format_eta(elapsed)}  "
+            f"fleet {fleet_speed:,.1f} MK/s  logs: {LOG_DIR}/",
+            '=' * min(width, 78),
+            f"{'GPU':<5} {'Batch':<12} {'Status':<10} {'MK/s':>10} {'Progress':>9} {'ETA':>10} {'Found':>6}",
+            '-' * min(width, 78)
+        ]
+        for gpu_id, state in gpus:
+            lines.append(f"{gpu_id:<5} {state['batch'][:12]:<12} {state['status'][:10]:<10} "
+                         f"{state['speed']:>10.1f} {state['percent']:>8.1f}% {format_eta(state['eta']):>10} "
+                         f"{state['total_found'] + state['found']:>6}")
+        lines.append('-' * min(width, 78))
+        lines.extend(events)
+        return lines
+
+    def draw(self):
+        if self.backend == 'curses':
+            self._draw_curses()
+        elif self.backend == 'notebook':
+            self._draw_notebook()
+        elif time.time() - self.last_plain >= PLAIN_REFRESH_SECONDS:
+            self.last_plain = time.time()
+            self.stdout.write('\n'.join(self.render()) + '\n\n')
+            self.stdout.flush()
+
+    def _draw_curses(self):
+        import curses
+        try:
+            height, width = self.screen.getmaxyx()
+            self.screen.erase()
+            for row, line in enumerate(self.render(width)[:height - 1]):
+                self.screen.addnstr(row, 0, line, width - 1)
+            self.screen.refresh()
+        except curses.error:
+            pass
+
+    def _draw_notebook(self):
+        text = '\n'.join(self.render())
+        if self.handle is not None:
+            self.handle.update({'text/plain': text}, raw=True)
+
+    def _loop(self):
+        while not self.stop_event.wait(REFRESH_SECONDS):
+            self.draw()
+
+    def start(self):
+        """Mulai dashboard: stdout dialihkan ke log, tabel digambar ulang di thread terpisah"""
+        if self.backend == 'curses':
+            import curses
+            self.screen = curses.initscr()
+            curses.noecho()
+            curses.cbreak()
+        elif self.backend == 'notebook':
+            from IPython.display import display
+            self.handle = display({'text/plain': 'Starting dashboard...'}, raw=True, display_id=True)
+
+        sys.stdout = ConsoleCapture(self)
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+        atexit.register(self.stop)
+        return self
+
+    def stop(self):
+        """Gambar tabel terakhir dan kembalikan terminal/stdout"""
+        if self.stop_event.is_set():
+            return
+        self.stop_event.set()
+
+        if self.backend == 'curses':
+            import curses
+            try:
+                curses.nocbreak()
+                curses.echo()
+                curses.endwin()
+            except curses.error:
+                pass
+        elif self.backend == 'notebook':
+            self._draw_notebook()
+
+        sys.stdout = self.stdout
+        if self.backend != 'notebook':
+            print('\n'.join(self.render()))
+
+def start(backend=None):
+    """Mengaktifkan dashboard untuk runner ini"""
+    global ACTIVE
+    if ACTIVE is None:
+        ACTIVE = Dashboard(backend).start()
+    return ACTIVE
+
+def extract_dashboard_arg(argv):
+    """Mengambil '--dashboard' dari argv (dihapus dari list)"""
+    if "--dashboard" not in argv:
+        return False
+    argv.remove("--dashboard")
+    return True
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] != "--tail":
+        print("Xiebo Dashboard")
+        print("Usage:")
+        print("  Enable in runners: add --dashboard (curses in terminal, live table in notebook, plain otherwise)")
+        print(f"  Show GPU log tail: python3 dashboard.py --tail GPU_ID [LINES]")
+        print(f"  Backend here: {detect_backend()} | Logs: {LOG_DIR}/gpu_<id>.log, {LOG_DIR}/console.log")
+        sys.exit(1)
+
+    gpu_id = sys.argv[2] if len(sys.argv) > 2 else '0'
+    count = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    path = os.path.join(LOG_DIR, f"gpu_{gpu_id}.log")
+    if not os.path.exists(path):
+        print(f"📭 No log file {path}")
+        sys.exit(1)
+
+    with open(path, 'r') as f:
+        for line in deque(f, maxlen=count):
+            print(line.rstrip())
+
+if __name__ == "__main__":
+    main()
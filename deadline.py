@@ -0,0 +1,190 @@
+import os
+import sys
+import math
+import time
+from datetime import datetime, timedelta
+import autotune
+
+# Konfigurasi deadline sesi (Colab mematikan sesi setelah budget waktu habis)
+SESSION_END_ENV = "XIEBO_SESSION_END"   # Env var alternatif untuk --deadline
+SAFETY_MARGIN_SECONDS = 120             # Cadangan waktu untuk checkpoint + sinkronisasi Drive
+MIN_BLOCK_BITS = 30                     # Sub-range terkecil yang masih layak dijalankan
+DEFAULT_OVERHEAD_SECONDS = 30           # Overhead per launch jika belum ada profil
+
+def parse_deadline(value, now=None):
+    """Parse deadline: '+3h', '+90m', '+5400' (sisa budget), 'HH:MM' atau 'YYYY-MM-DD HH:MM[:SS]'"""
+    if now is None:
+        now = time.time()
+
+    value = str(value).strip()
+    if not value:
+        return None
+
+    # Sisa budget relatif terhadap sekarang
+    if value.startswith('+'):
+        amount = value[1:].lower()
+        multiplier = 1
+        if amount.endswith('h'):
+            multiplier, amount = 3600, amount[:-1]
+        elif amount.endswith('m'):
+            multiplier, amount = 60, amount[:-1]
+        elif amount.endswith('s'):
+            amount = amount[:-1]
+        return now + float(amount) * multiplier
+
+    # Waktu absolut
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M'):
+        try:
+            return datetime.strptime(value, fmt).timestamp()
+        except ValueError:
+            pass
+
+    for fmt in ('%H:%M:%S', '%H:%M'):
+        try:
+            clock = datetime.strptime(value, fmt).time()
+            today = datetime.fromtimestamp(now)
+            target = datetime.combine(today.date(), clock)
+            # Jam yang sudah lewat berarti besok
+            if target.timestamp() <= now:
+                target += timedelta(days=1)
+            return target.timestamp()
+        except ValueError:
+            pass
+
+    raise ValueError(f"Invalid deadline format: {value}")
+
+def extract_deadline_arg(argv):
+    """Mengambil '--deadline VALUE' dari argv (dihapus dari list) atau dari env XIEBO_SESSION_END"""
+    value = None
+
+    if "--deadline" in argv:
+        index = argv.index("--deadline")
+        if index + 1 >= len(argv):
+            raise ValueError("--deadline requires a value")
+        value = argv[index + 1]
+        del argv[index:index + 2]
+    elif os.environ.get(SESSION_END_ENV):
+        value = os.environ[SESSION_END_ENV]
+
+    if value is None:
+        return None
+
+    return parse_deadline(value)
+
+def seconds_left(deadline_at):
+    """Sisa waktu (detik) sampai deadline, dikurangi safety margin"""
+    if deadline_at is None:
+        return None
+    return deadline_at - time.time() - SAFETY_MARGIN_SECONDS
+
+def format_deadline(deadline_at):
+    """Format deadline untuk ditampilkan"""
+    remaining = deadline_at - time.time()
+    return f"{datetime.fromtimestamp(deadline_at).strftime('%Y-%m-%d %H:%M:%S')} ({remaining / 60:.1f} min left)"
+
+def aligned_blocks(start_int, end_int, max_bits):
+    """Memecah [start_int, end_int) menjadi sub-range 2^k yang aligned terhadap start_int"""
+    blocks = []
+    offset = 0
+    total = end_int - start_int
+
+    while offset < total:
+        remaining = total - offset
+        bits = min(max_bits, remaining.bit_length() - 1)
+        # Offset selalu kelipatan ukuran blok berikutnya karena ukuran blok menurun
+        while bits > 0 and offset % (1 << bits) != 0:
+            bits -= 1
+        blocks.append((start_int + offset, bits))
+        offset += 1 << bits
+
+    return blocks
+
+def get_speed_estimate(gpu_id, last_timing=None):
+    """Kecepatan (MK/s) dan overhead per launch untuk GPU, dari batch terakhir atau profil"""
+    overhead_seconds = DEFAULT_OVERHEAD_SECONDS
+    speed_mks = 0.0
+
+    gpu_name = last_timing.get('gpu_name') if last_timing else None
+    if not gpu_name:
+        gpu_name = autotune.detect_gpu_name(gpu_id)
+
+    profile = autotune.build_speed_profiles().get(gpu_name) if gpu_name else None
+    if profile:
+        speed_mks = profile['speed_mks']
+        overhead_seconds = profile['overhead_seconds']
+
+    # Kecepatan batch terakhir lebih akurat untuk kondisi GPU saat ini
+    if last_timing and last_timing.get('avg_speed'):
+        try:
+            speed_mks = float(last_timing['avg_speed']) or speed_mks
+        except ValueError:
+            pass
+
+    return speed_mks, overhead_seconds
+
+def fit_batch(batch_start, batch_keys, batch_bits, deadline_at, speed_mks, overhead_seconds):
+    """Menentukan sub-range batch yang selesai sebelum deadline: (blocks, complete)"""
+    budget = seconds_left(deadline_at)
+    if budget is None or speed_mks <= 0:
+        return [(batch_start, batch_bits)], True
+
+    keys_per_second = speed_mks * 1_000_000
+
+    # Batch penuh masih muat
+    if (1 << batch_bits) / keys_per_second + overhead_seconds <= budget:
+        return [(batch_start, batch_bits)], True
+
+    scan_budget = budget - overhead_seconds
+    if scan_budget <= 0:
+        return [], False
+
+    max_bits = int(math.floor(math.log2(scan_budget * keys_per_second)))
+    if max_bits < MIN_BLOCK_BITS:
+        return [], False
+
+    # Ambil sub-range berurutan dari awal batch selama masih muat
+    blocks = []
+    for block_start, bits in aligned_blocks(batch_start, batch_start + batch_keys, max_bits):
+        if bits < MIN_BLOCK_BITS:
+            break
+        block_seconds = (1 << bits) / keys_per_second + overhead_seconds
+        if block_seconds > budget:
+            break
+        blocks.append((block_start, bits))
+        budget -= block_seconds
+
+    return blocks, False
+
+def main():
+    if len(sys.argv) < 2:
+        print("Xiebo Session Deadline Planner")
+        print("Usage:")
+        print("  Plan a batch: python3 deadline.py DEADLINE START_HEX RANGE_BITS SPEED_MKS")
+        print("  DEADLINE: +3h | +90m | +5400 | HH:MM | 'YYYY-MM-DD HH:MM'")
+        sys.exit(1)
+
+    deadline_at = parse_deadline(sys.argv[1])
+    print(f"Deadline: {format_deadline(deadline_at)}")
+
+    if len(sys.argv) < 5:
+        sys.exit(0)
+
+    batch_start = int(sys.argv[2], 16)
+    batch_bits = int(sys.argv[3])
+    speed_mks = float(sys.argv[4])
+
+    blocks, complete = fit_batch(batch_start, 1 << batch_bits, batch_bits, deadline_at,
+                                 speed_mks, DEFAULT_OVERHEAD_SECONDS)
+
+    if complete:
+        print(f"✅ Full batch fits: 0x{format(batch_start, 'x')} [{batch_bits} bits]")
+    elif not blocks:
+        print("⏰ No time left for another launch. Checkpoint now.")
+    else:
+        for block_start, bits in blocks:
+            print(f"  Sub-range: 0x{format(block_start, 'x')} [{bits} bits]")
+        next_start = blocks[-1][0] + (1 << blocks[-1][1])
+        print(f"💾 Checkpoint next start: 0x{format(next_start, 'x')}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import sys
+import math
+import threading
+import batchtiming
+import autotune
+
+# Konfigurasi profil kecepatan per GPU
+SPEED_EWMA_ALPHA = 0.3      # Bobot sampel terbaru (MK/s) pada rata-rata bergerak
+MAX_MERGE_BITS = 4          # GPU tercepat boleh menggabungkan maksimal 2^4 batch per launch
+
+class GpuSpeedProfile:
+    """Profil kecepatan per GPU (EWMA dari sampel MK/s output xiebo)"""
+
+    def __init__(self):
+        self.speeds = {}
+        self.samples = {}
+        self.lock = threading.Lock()
+
+    def update(self, gpu_id, speed_mks):
+        """Menambahkan satu sampel kecepatan untuk GPU"""
+        if not speed_mks or speed_mks <= 0:
+            return
+
+        gpu_id = str(gpu_id)
+        with self.lock:
+            previous = self.speeds.get(gpu_id)
+            if previous is None:
+                self.speeds[gpu_id] = speed_mks
+            else:
+                self.speeds[gpu_id] = SPEED_EWMA_ALPHA * speed_mks + (1 - SPEED_EWMA_ALPHA) * previous
+            self.samples[gpu_id] = self.samples.get(gpu_id, 0) + 1
+
+    def update_from_timing(self, gpu_id, timing):
+        """Update profil dari record timing batch yang baru selesai"""
+        if timing and timing.get('avg_speed'):
+            try:
+                self.update(gpu_id, float(timing['avg_speed']))
+            except ValueError:
+                pass
+
+    def speed(self, gpu_id):
+        """Kecepatan GPU (MK/s), None jika belum ada sampel"""
+        with self.lock:
+            return self.speeds.get(str(gpu_id))
+
+    def weights(self, gpu_ids):
+        """Bobot throughput per GPU (total = 1.0), GPU tanpa sampel memakai rata-rata"""
+        known = [self.speed(g) for g in gpu_ids if self.speed(g)]
+        default_speed = sum(known) / len(known) if known else 1.0
+
+        speeds = {str(g): (self.speed(g) or default_speed) for g in gpu_ids}
+        total = sum(speeds.values())
+        return {g: s / total for g, s in speeds.items()}
+
+def load_speed_profile(gpu_ids, records=None):
+    """Membangun profil dari file timing, hanya memakai record dengan tipe GPU yang sama"""
+    if records is None:
+        records = batchtiming.read_timing_records()
+
+    profile = GpuSpeedProfile()
+    gpu_names = {str(g): autotune.detect_gpu_name(g) for g in gpu_ids}
+
+    for record in records:
+        if record.get('kind') != 'batch' or record.get('return_code') != '0':
+            continue
+
+        gpu_id = record.get('gpu_id', '')
+        if gpu_id not in gpu_names:
+            continue
+
+        # gpu_id yang sama bisa berupa kartu lain di sesi sebelumnya
+        expected_name = gpu_names[gpu_id]
+        if expected_name and record.get('gpu_name') and record['gpu_name'] != expected_name:
+            continue
+
+        profile.update_from_timing(gpu_id, record)
+
+    return profile
+
+def plan_lanes(gpu_ids, batch_infos, weights):
+    """Membagi batch berurutan menjadi lane per GPU sebanding throughput
+
+    Setiap lane berisi chunk berukuran 2^j batch (aligned dalam tranche), GPU yang
+    lebih cepat mendapat chunk lebih besar dan lebih banyak batch. Chunk yang bukan tepat
+    2^j batch contiguous (sisa lane, batch partial, re-plan leftover) dipecah per batch.
+    """
+    gpu_ids = [str(g) for g in gpu_ids]
+    total = len(batch_infos)
+    lanes = {g: [] for g in gpu_ids}
+
+    if total == 0:
+        return lanes
+
+    # Penggabungan hanya aman jika ukuran batch pangkat dua dan seragam (tanpa overlap)
+    sizes = {b['keys'] for b in batch_infos[:-1]}
+    can_merge = False
+    if len(sizes) == 1:
+        size = sizes.pop()
+        can_merge = size & (size - 1) == 0
+
+    slowest = min(weights[g] for g in gpu_ids)
+    merge_bits = {}
+    for g in gpu_ids:
+        bits = int(math.floor(math.log2(weights[g] / slowest))) if can_merge else 0
+        merge_bits[g] = max(0, min(bits, MAX_MERGE_BITS))
+
+    # GPU dengan chunk terbesar di depan agar batas lane tetap aligned
+    order = sorted(gpu_ids, key=lambda g: (-merge_bits[g], -weights[g]))
+
+    position = 0
+    for index, g in enumerate(order):
+        if index == len(order) - 1:
+            count = total - position
+        else:
+            count = int(round(total * weights[g]))
+            chunk = 1 << merge_bits[g]
+            count = (count // chunk) * chunk
+            count = min(count, total - position)
+
+        lane_batches = batch_infos[position:position + count]
+        position += count
+
+        chunk = 1 << merge_bits[g]
+        for i in range(0, len(lane_batches), chunk):
+            piece = lane_batches[i:i + chunk]
+            # Launch gabungan men-scan span 2^k: potongan sisa atau batch tidak berurutan dijalankan satu per satu
+            if len(piece) == chunk and contiguous(piece):
+                lanes[g].append(piece)
+            else:
+                lanes[g].extend([b] for b in piece)
+
+    return lanes
+
+def contiguous(batches):
+    """True jika batch berurutan (ID dan range bersambung) dengan ukuran sama"""
+    for prev, b in zip(batches, batches[1:]):
+        if (b['batch_id'] != prev['batch_id'] + 1 or b['keys'] != prev['keys']
+                or int(b['start_hex'], 16) != int(prev['start_hex'], 16) + prev['keys']):
+            return False
+    return True
+
+def display_profile(gpu_ids):
+    """Menampilkan profil kecepatan dan bobot per GPU"""
+    profile = load_speed_profile(gpu_ids)
+    weights = profile.weights(gpu_ids)
+
+    print(f"\n{'='*60}")
+    print("⚖️  GPU SPEED PROFILE")
+    print(f"{'='*60}")
+    print(f"{'GPU':<6} {'Name':<24} {'Samples':>7} {'MK/s':>10} {'Weight':>8}")
+    print(f"{'-'*60}")
+    for g in gpu_ids:
+        speed = profile.speed(g)
+        name = autotune.detect_gpu_name(g) or 'unknown'
+        speed_text = f"{speed:.1f}" if speed else 'n/a'
+        print(f"{str(g):<6} {name[:24]:<24} {profile.samples.get(str(g), 0):>7} {speed_text:>10} {weights[str(g)]*100:>7.1f}%")
+    print(f"{'='*60}")
+
+def main():
+    if len(sys.argv) < 2:
+        print("Xiebo GPU Speed Profile")
+        print("Usage:")
+        print("  Show profile: python3 gpuspeed.py GPU_IDS")
+        print(f"  Timing file: {batchtiming.TIMING_FILE}")
+        sys.exit(1)
+
+    gpu_ids = [g for g in sys.argv[1].replace(',', ' ').split() if g]
+    display_profile(gpu_ids)
+
+if __name__ == "__main__":
+    main()
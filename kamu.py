@@ -5,6 +5,20 @@ import time
 import math
 from datetime import datetime
 import csv
+import batchtiming
+import watchdog
+import telemetry
+import dashboard
+import multitarget
+import ledger
+import resultfile
+import procgroup
+import steal
+import autotune
+import gpuspeed
+import progress
+import stateactor
+import statelock
 import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
@@ -35,6 +49,9 @@ BATCH_SIZE = 2000000000000  # 2 triliun keys per batch
 # Global flag untuk menghentikan pencarian
 STOP_SEARCH_FLAG = False
 
+# Pemilik tunggal logbatch.txt selama batch berjalan (stateactor.py), None = baca/tulis file langsung
+LOG_ACTOR = None
+
 def save_to_drive():
     """Menyimpan logbatch.txt ke Google Drive"""
     try:
@@ -64,6 +81,24 @@ def save_to_drive():
         print(f"⚠️ Failed to save to Google Drive: {e}")
 
 def read_log_as_dict():
+    """Tabel log berdasarkan batch_id: dari memori state actor jika aktif, selain itu dari file"""
+    if LOG_ACTOR is not None:
+        return LOG_ACTOR.snapshot()
+    return read_log_file()
+
+def write_log_from_dict(log_dict):
+    """Menulis tabel log; lewat state actor hanya baris baru yang ditambahkan (baris proses lain tidak ditimpa)"""
+    if LOG_ACTOR is not None:
+        LOG_ACTOR.put_missing(log_dict)
+    else:
+        write_log_file(log_dict)
+
+def get_log_row(batch_id):
+    if LOG_ACTOR is not None:
+        return LOG_ACTOR.get(batch_id, {})
+    return read_log_file().get(str(batch_id), {})
+
+def read_log_file():
     """Membaca log file dan mengembalikan dictionary berdasarkan batch_id"""
     log_dict = {}
     
@@ -83,22 +118,25 @@ def read_log_as_dict():
     
     return log_dict
 
-def write_log_from_dict(log_dict):
-    """Menulis log file dari dictionary"""
+def write_log_file(log_dict, sync_drive=True):
+    """Menulis log file dari dictionary (file sementara lalu os.replace, pembaca tidak melihat tabel setengah jadi)"""
     try:
-        # Konversi dictionary ke list
+        # Konversi dictionary ke list (batch numerik dulu, lalu STATE_INFO dan entri khusus lain)
         rows = []
-        for batch_id in sorted(log_dict.keys(), key=lambda x: int(x) if x.isdigit() else x):
+        for batch_id in sorted(log_dict.keys(), key=lambda x: (0, int(x)) if x.isdigit() else (1, x)):
             rows.append(log_dict[batch_id])
         
         # Tulis ke file dengan format tabel
-        with open(LOG_FILE, 'w', newline='') as f:
+        tmp_path = f"{LOG_FILE}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', newline='') as f:
             writer = csv.DictWriter(f, fieldnames=LOG_COLUMNS, delimiter='|')
             writer.writeheader()
             writer.writerows(rows)
+        os.replace(tmp_path, LOG_FILE)
         
-        # Simpan ke Google Drive (silent)
-        save_to_drive()
+        # Simpan ke Google Drive (silent), state actor melakukannya setelah melepas file lock
+        if sync_drive:
+            save_to_drive()
         
     except Exception as e:
         print(f"❌ Error writing log file: {e}")
@@ -117,19 +155,16 @@ def save_next_batch_info(start_hex, range_bits, address, next_start_hex, batches
             'batches_completed': str(batches_completed),
             'total_batches': str(total_batches),
             'gpu_ids': ','.join(map(str, gpu_ids)) if gpu_ids else '0',
+            'batch_size': str(BATCH_SIZE),
             'timestamp': timestamp
         }
         
-        # 1. Simpan ke file nextbatch.txt
-        with open(NEXT_BATCH_FILE, 'w') as f:
-            for key, value in info.items():
-                f.write(f"{key}={value}\n")
+        # 1. Simpan ke file nextbatch.txt (atomic: proses lain di direktori yang sama bisa membacanya)
+        statelock.write_text_atomic(NEXT_BATCH_FILE, ''.join(f"{key}={value}\n" for key, value in info.items()))
         
         # 2. Tambahkan ke logbatch.txt sebagai entri khusus
-        log_dict = read_log_as_dict()
-        
         gpu_info = f"gpus={info['gpu_ids']}" if gpu_ids else ""
-        state_info = f"NEXT_BATCH|next_start={next_start_hex}|completed={batches_completed}|total={total_batches}|{gpu_info}|time={timestamp}"
+        state_info = f"NEXT_BATCH|next_start={next_start_hex}|completed={batches_completed}|total={total_batches}|{gpu_info}|batch_size={BATCH_SIZE}|time={timestamp}"
         
         # Buat entry khusus untuk next batch info
         state_entry = {
@@ -145,10 +180,7 @@ def save_next_batch_info(start_hex, range_bits, address, next_start_hex, batches
         }
         
         # Tambahkan atau update entry STATE_INFO
-        log_dict['STATE_INFO'] = state_entry
-        
-        # Tulis kembali log
-        write_log_from_dict(log_dict)
+        update_batch_log(state_entry)
         
         # Simpan ke Google Drive
         save_to_drive()
@@ -219,6 +251,8 @@ def load_next_batch_from_log():
                         info['total_batches'] = value
                     elif key == 'gpus':
                         gpu_ids = list(map(int, value.split(',')))
+                    elif key == 'batch_size':
+                        info['batch_size'] = value
                     elif key == 'time':
                         info['timestamp'] = value
             
@@ -239,20 +273,25 @@ def load_next_batch_from_log():
 def update_batch_log(batch_info):
     """Update log batch dengan informasi status terbaru"""
     try:
-        # Baca log yang sudah ada
-        log_dict = read_log_as_dict()
-        
-        # Pastikan batch_info memiliki semua kolom yang diperlukan
-        for column in LOG_COLUMNS:
-            if column not in batch_info:
-                batch_info[column] = ''
-        
-        # Update atau tambah entry
-        batch_id = str(batch_info.get('batch_id', ''))
-        log_dict[batch_id] = batch_info
-        
-        # Tulis kembali log (silent)
-        write_log_from_dict(log_dict)
+        with telemetry.timed('state'):
+            # Pastikan batch_info memiliki semua kolom yang diperlukan
+            for column in LOG_COLUMNS:
+                if column not in batch_info:
+                    batch_info[column] = ''
+            
+            batch_id = str(batch_info.get('batch_id', ''))
+            
+            # State actor: transisi di memori, file ditulis thread actor (key ditemukan = langsung)
+            if LOG_ACTOR is not None:
+                LOG_ACTOR.put(batch_id, batch_info, urgent=batch_info.get('found') == 'YES')
+                return
+            
+            # Baca log yang sudah ada, update atau tambah entry
+            log_dict = read_log_file()
+            log_dict[batch_id] = batch_info
+            
+            # Tulis kembali log (silent)
+            write_log_file(log_dict)
         
     except Exception as e:
         print(f"❌ Error updating log: {e}")
@@ -292,7 +331,7 @@ def parse_xiebo_output(output_text):
                 found_lines.append(line_stripped)
                 
                 # Set flag berhenti jika ditemukan 1 atau lebih
-                if found_count >= 1:
+                if found_count >= 1 and len(multitarget.ACTIVE_TARGETS) <= 1:
                     STOP_SEARCH_FLAG = True
                     print(f"🚨 STOP_SEARCH_FLAG diaktifkan karena Found: {found_count}")
         
@@ -341,6 +380,15 @@ def parse_xiebo_output(output_text):
         elif found_info['private_key_hex'] and not found_info['wif_key']:
             found_info['wif_key'] = found_info['private_key_hex'][:60] if len(found_info['private_key_hex']) >= 60 else found_info['private_key_hex']
     
+    # Multi-target: atribusikan setiap key ke targetnya, berhenti jika semua target ditemukan
+    found_info['found_keys'] = multitarget.parse_found_blocks(output_text)
+    if len(multitarget.ACTIVE_TARGETS) > 1 and multitarget.record_found(found_info['found_keys']):
+        if multitarget.all_targets_found():
+            STOP_SEARCH_FLAG = True
+            print(f"🚨 STOP_SEARCH_FLAG diaktifkan karena semua {len(multitarget.ACTIVE_TARGETS)} target ditemukan")
+        else:
+            print(f"🎯 Target found, {len(multitarget.remaining_targets())} target(s) remaining")
+    
     return found_info
 
 def run_xiebo_single_batch(gpu_id, start_hex, range_bits, address, batch_id=None):
@@ -348,12 +396,20 @@ def run_xiebo_single_batch(gpu_id, start_hex, range_bits, address, batch_id=None
     global STOP_SEARCH_FLAG
     
     cmd = ["./xiebo", "-gpuId", str(gpu_id), "-start", start_hex, 
-           "-range", str(range_bits), address]
+           "-range", str(range_bits)] + multitarget.target_args(address)
+    
+    # Key yang ditemukan ditulis xiebo ke file hasil per batch (-o), stdout hanya untuk progress
+    result_path = resultfile.result_path(batch_id, gpu_id)
+    cmd += resultfile.output_args(result_path)
     
     print(f"\n{'='*60}")
     print(f"GPU {gpu_id} Batch {batch_id if batch_id is not None else 'N/A'}: Running {' '.join(cmd)}")
     print(f"{'='*60}")
     
+    # Catat timestamp setiap fase batch (Popen, setup, scan, teardown, bookkeeping)
+    timer = batchtiming.BatchTimer(batch_id, gpu_id, start_hex, range_bits)
+    process = watcher = monitor = None
+    
     try:
         # Update status menjadi inprogress jika ada batch_id
         if batch_id is not None:
@@ -375,35 +431,69 @@ def run_xiebo_single_batch(gpu_id, start_hex, range_bits, address, batch_id=None
         print(f"{'-'*60}")
         
         # Gunakan Popen untuk mendapatkan output real-time
+        timer.mark('t_launch')
         process = subprocess.Popen(
-            cmd,
+            procgroup.command(cmd),
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
             text=True,
             bufsize=1,
-            universal_newlines=True
+            universal_newlines=True,
+            **procgroup.popen_kwargs()
         )
+        timer.mark('t_spawned')
+        procgroup.register(process, gpu_id, batch_id)
+        watcher = resultfile.ResultWatcher(result_path, batch_id, gpu_id, start_hex, range_bits).start()
         
-        # Tampilkan output secara real-time dengan prefiks GPU
-        output_lines = []
-        while True:
-            output_line = process.stdout.readline()
-            if output_line == '' and process.poll() is not None:
-                break
-            if output_line:
-                # Tampilkan output dengan format yang lebih baik
-                stripped_line = output_line.strip()
-                if stripped_line:
-                    print(f"   GPU {gpu_id}: {stripped_line}")
-                output_lines.append(output_line)
+        # Watchdog menghentikan xiebo jika tidak ada progress (GPU hang)
+        monitor = watchdog.ProcessWatchdog(process, gpu_id, f"Batch {batch_id}").start()
+        
+        if dashboard.ACTIVE is not None:
+            # Dashboard aktif: output mentah ke logs/gpu_<id>.log, status GPU ke tabel
+            output_text = dashboard.ACTIVE.pump(process, gpu_id, timer=timer, monitor=monitor)
+        else:
+            # Tampilkan output secara real-time dengan prefiks GPU
+            output_lines = []
+            while True:
+                output_line = process.stdout.readline()
+                if output_line == '' and process.poll() is not None:
+                    break
+                if output_line:
+                    telemetry.METRICS.observe_progress(gpu_id, timer.feed(output_line))
+                    monitor.feed(output_line)
+                    # Tampilkan output dengan format yang lebih baik
+                    stripped_line = output_line.strip()
+                    if stripped_line:
+                        print(f"   GPU {gpu_id}: {stripped_line}")
+                    output_lines.append(output_line)
+            output_text = ''.join(output_lines)
         
         # Tunggu proses selesai
         return_code = process.wait()
-        output_text = ''.join(output_lines)
+        timer.mark('t_exit')
+        result_blocks = watcher.stop()
+        monitor.stop()
+        
+        # Key yang ditemukan langsung dicatat ke ledger (fsync) sebelum bookkeeping lain
+        ledger.record_output(batch_id, gpu_id, output_text)
+        
+        # Proses dihentikan watchdog (stall): batch ditandai 'stalled' untuk relaunch
+        if monitor.stalled:
+            if batch_id is not None:
+                batch_info['status'] = 'stalled'
+                batch_info['state_info'] = f"stalled|{monitor.reason}"
+                update_batch_log(batch_info)
+            return watchdog.STALL_RETURN_CODE, {'found': False, 'stalled': True,
+                                                'timing': timer.finish(watchdog.STALL_RETURN_CODE)}
         
         # Parse output untuk mencari private key
         found_info = parse_xiebo_output(output_text)
         
+        # File hasil (-o) terverifikasi menggantikan hasil scraping stdout (fallback)
+        if resultfile.apply(found_info, result_blocks) and not STOP_SEARCH_FLAG:
+            STOP_SEARCH_FLAG = True
+            print(f"🚨 STOP_SEARCH_FLAG diaktifkan karena {len(found_info['found_keys'])} key terverifikasi di {result_path}")
+        
         # Update status berdasarkan hasil
         if batch_id is not None:
             batch_info['status'] = 'done'
@@ -424,6 +514,12 @@ def run_xiebo_single_batch(gpu_id, start_hex, range_bits, address, batch_id=None
                 
             update_batch_log(batch_info)
         
+        # Simpan setiap key beserta targetnya (multi-target bisa menemukan beberapa key)
+        if found_info.get('found_keys'):
+            multitarget.append_found_keys(batch_id, gpu_id, found_info['found_keys'])
+        
+        found_info['timing'] = timer.finish(return_code)
+        
         # Tampilkan hasil pencarian
         print(f"\n{'='*60}")
         print(f"🔍 GPU {gpu_id} Batch {batch_id if batch_id is not None else 'N/A'}: SEARCH RESULT")
@@ -476,6 +572,7 @@ def run_xiebo_single_batch(gpu_id, start_hex, range_bits, address, batch_id=None
             }
             update_batch_log(batch_info)
         
+        timer.finish(130)
         return 130, {'found': False}
     except Exception as e:
         error_msg = str(e)
@@ -496,78 +593,187 @@ def run_xiebo_single_batch(gpu_id, start_hex, range_bits, address, batch_id=None
             }
             update_batch_log(batch_info)
         
+        timer.finish(1)
         return 1, {'found': False}
+    finally:
+        # Semua jalur (termasuk exception/Ctrl+C): xiebo tidak tertinggal di lockfile, thread watcher berhenti
+        if process is not None:
+            procgroup.release(process)
+        if watcher is not None:
+            watcher.stop()
+        if monitor is not None:
+            monitor.stop()
 
-def run_parallel_batches(gpu_ids, batch_infos, address):
-    """Menjalankan multiple batch secara paralel di GPU yang berbeda"""
+def run_gpu_lane(gpu_id, chunks, address, profile, leftover=None):
+    """Menjalankan semua chunk milik satu GPU secara berurutan (satu proses xiebo per GPU)
+
+    Jika GPU ditandai unhealthy oleh watchdog, chunk yang belum selesai dimasukkan ke leftover.
+    """
     global STOP_SEARCH_FLAG
     
     results = []
+    attempts = 0
     
-    # Gunakan ThreadPoolExecutor untuk menjalankan batch secara paralel
-    with ThreadPoolExecutor(max_workers=len(gpu_ids)) as executor:
-        # Submit semua batch ke executor
-        future_to_batch = {}
+    def stopped():
+        return STOP_SEARCH_FLAG
+    
+    # --steal: chunk diambil satu per satu, lane yang habis menunggu chunk belum mulai dari lane lain
+    chunk = steal.next_chunk(gpu_id, chunks, stopped)
+    while chunk is not None:
+        if STOP_SEARCH_FLAG:
+            print(f"🚨 GPU {gpu_id}: Skipping remaining batches due to STOP_SEARCH_FLAG")
+            break
         
-        for i, batch_info in enumerate(batch_infos):
-            if STOP_SEARCH_FLAG:
-                print(f"🚨 Skipping remaining batches due to STOP_SEARCH_FLAG")
+        first = chunk[0]
+        # Span dari start batch pertama sampai akhir batch terakhir (batch partial di tengah chunk ikut di-scan penuh)
+        chunk_keys = int(chunk[-1]['start_hex'], 16) + chunk[-1]['keys'] - int(first['start_hex'], 16)
+        chunk_bits = first['bits'] if len(chunk) == 1 else calculate_range_bits(chunk_keys)
+        batch_ids = [b['batch_id'] for b in chunk]
+        
+        # Chunk yang sedang/sudah dijalankan proses lain di direktori yang sama dilewati
+        if attempts == 0 and not progress.claim(batch_ids):
+            print(f"\n⏭️  GPU {gpu_id}: Batch {batch_ids[0]} claimed by another process, skipping")
+            chunk = steal.next_chunk(gpu_id, chunks, stopped)
+            continue
+        
+        print(f"\n📋 GPU {gpu_id}: Batch {batch_ids[0]}" + (f"-{batch_ids[-1]} (merged {len(chunk)})" if len(chunk) > 1 else ""))
+        print(f"   Start: 0x{first['start_hex']}")
+        print(f"   Bits: {chunk_bits}")
+        
+        return_code, found_info = run_xiebo_single_batch(gpu_id, first['start_hex'], chunk_bits, address, first['batch_id'])
+        
+        # Watchdog menghentikan xiebo yang stall: relaunch dengan backoff, GPU unhealthy menyerahkan sisa lane
+        if return_code == watchdog.STALL_RETURN_CODE:
+            attempts += 1
+            if watchdog.GPU_HEALTH.record_stall(gpu_id):
+                rest = [chunk] + steal.drain(chunks)
+                print(f"🩺 GPU {gpu_id} marked unhealthy after {watchdog.UNHEALTHY_AFTER_STALLS} stalls. "
+                      f"Rerouting {len(rest)} remaining launches to other GPUs.")
+                if leftover is not None:
+                    leftover.extend(rest)
                 break
-                
-            gpu_id = gpu_ids[i % len(gpu_ids)]  # Round-robin assignment
-            batch_start_hex = batch_info['start_hex']
-            batch_bits = batch_info['bits']
-            batch_id = batch_info['batch_id']
             
-            print(f"\n📋 Scheduling Batch {batch_id} on GPU {gpu_id}")
-            print(f"   Start: 0x{batch_start_hex}")
-            print(f"   Bits: {batch_bits}")
+            if attempts > watchdog.MAX_RELAUNCH:
+                print(f"❌ GPU {gpu_id}: Batch {first['batch_id']} stalled {attempts} times, left as 'stalled' in log")
+                attempts = 0
+                chunk = steal.next_chunk(gpu_id, chunks, stopped)
+                continue
             
-            # Submit batch untuk dieksekusi
-            future = executor.submit(
-                run_xiebo_single_batch,
-                gpu_id, batch_start_hex, batch_bits, address, batch_id
-            )
-            future_to_batch[future] = {
-                'gpu_id': gpu_id,
-                'batch_id': batch_id,
-                'batch_info': batch_info
-            }
+            backoff = watchdog.backoff_seconds(attempts)
+            print(f"🔁 GPU {gpu_id}: Relaunching Batch {first['batch_id']} in {backoff}s (attempt {attempts}/{watchdog.MAX_RELAUNCH})")
+            batchtiming.timed_sleep(backoff, found_info.get('timing'))
+            continue
         
-        # Tunggu dan kumpulkan hasil
-        for future in as_completed(future_to_batch):
-            if STOP_SEARCH_FLAG:
-                # Batalkan semua future yang belum selesai
-                for f in future_to_batch.keys():
-                    if not f.done():
-                        f.cancel()
-                break
-                
-            batch_data = future_to_batch[future]
-            try:
-                return_code, found_info = future.result()
-                results.append({
-                    'gpu_id': batch_data['gpu_id'],
-                    'batch_id': batch_data['batch_id'],
-                    'return_code': return_code,
-                    'found_info': found_info
-                })
-                
-                # Cek jika ditemukan private key
-                if found_info.get('found_count', 0) > 0 or found_info.get('found', False):
-                    print(f"\n🚨 PRIVATE KEY FOUND in Batch {batch_data['batch_id']} on GPU {batch_data['gpu_id']}!")
-                
-            except Exception as e:
-                print(f"❌ Error in parallel execution for Batch {batch_data['batch_id']} on GPU {batch_data['gpu_id']}: {e}")
-                results.append({
-                    'gpu_id': batch_data['gpu_id'],
-                    'batch_id': batch_data['batch_id'],
-                    'return_code': 1,
-                    'found_info': {'found': False, 'error': str(e)}
+        watchdog.GPU_HEALTH.record_success(gpu_id)
+        telemetry.METRICS.observe_batch(gpu_id, len(chunk))
+        attempts = 0
+        profile.update_from_timing(gpu_id, found_info.get('timing'))
+        
+        # Batch lain dalam chunk mengikuti status batch pertama
+        if len(chunk) > 1:
+            first_row = get_log_row(first['batch_id'])
+            for b in chunk[1:]:
+                row = dict(first_row)
+                row.update({
+                    'batch_id': str(b['batch_id']),
+                    'start_hex': b['start_hex'],
+                    'range_bits': str(b['bits']),
+                    'state_info': f"merged|launch={first['batch_id']}"
                 })
+                update_batch_log(row)
+        
+        # GPU bisa selesai dalam urutan apa pun: progress mencatat batch ID, bukan posisi
+        if return_code == 0:
+            progress.record_done(batch_ids)
+        
+        for b in chunk:
+            results.append({
+                'gpu_id': gpu_id,
+                'batch_id': b['batch_id'],
+                'return_code': return_code,
+                'found_info': found_info
+            })
+        
+        # Cek jika ditemukan private key
+        if found_info.get('found_count', 0) > 0 or found_info.get('found', False):
+            print(f"\n🚨 PRIVATE KEY FOUND in Batch {first['batch_id']} on GPU {gpu_id}!")
+        
+        chunk = steal.next_chunk(gpu_id, chunks, stopped)
+        if chunk is not None and not STOP_SEARCH_FLAG:
+            batchtiming.timed_sleep(5, found_info.get('timing'))
+    
+    return results
+
+def run_parallel_batches(gpu_ids, batch_infos, address):
+    """Menjalankan batch secara paralel, tiap GPU mendapat lane sebanding kecepatannya"""
+    global STOP_SEARCH_FLAG
+    
+    results = []
+    
+    # Bobot dari profil kecepatan (MK/s) per GPU, sama rata jika belum ada data
+    profile = gpuspeed.load_speed_profile(gpu_ids)
+    weights = profile.weights(gpu_ids)
+    lanes = gpuspeed.plan_lanes(gpu_ids, batch_infos, weights)
+    
+    print(f"\n⚖️  GPU lanes (weighted by measured MK/s):")
+    for gpu_id, chunks in lanes.items():
+        lane_batches = sum(len(chunk) for chunk in chunks)
+        speed = profile.speed(gpu_id)
+        speed_text = f"{speed:.1f} MK/s" if speed else "no speed data"
+        print(f"   GPU {gpu_id}: {lane_batches} batches in {len(chunks)} launches "
+              f"(weight {weights[gpu_id]*100:.1f}%, {speed_text})")
+    
+    while True:
+        leftover = []
+        steal.share(lanes, weights)
+        
+        # Satu thread per GPU, sehingga satu GPU tidak pernah menjalankan dua proses sekaligus
+        with ThreadPoolExecutor(max_workers=len(gpu_ids)) as executor:
+            future_to_gpu = {}
+            for gpu_id, chunks in lanes.items():
+                if chunks or steal.ENABLED:
+                    future = executor.submit(run_gpu_lane, gpu_id, chunks, address, profile, leftover)
+                    future.add_done_callback(lambda _, gpu_id=gpu_id: steal.leave(gpu_id))
+                    future_to_gpu[future] = gpu_id
+            
+            # Tunggu dan kumpulkan hasil
+            for future in as_completed(future_to_gpu):
+                gpu_id = future_to_gpu[future]
+                try:
+                    results.extend(future.result())
+                except Exception as e:
+                    print(f"❌ Error in parallel execution on GPU {gpu_id}: {e}")
+        
+        if not leftover or STOP_SEARCH_FLAG:
+            break
+        
+        # Lane dari GPU unhealthy dibagi ulang ke GPU yang masih sehat
+        healthy = watchdog.GPU_HEALTH.healthy_gpus([str(g) for g in gpu_ids])
+        leftover_batches = [b for chunk in leftover for b in chunk]
+        if not healthy:
+            print(f"\n🚨 All GPUs unhealthy: {len(leftover_batches)} batches left unfinished in log")
+            break
+        
+        print(f"\n🔀 Rerouting {len(leftover_batches)} batches to healthy GPUs {healthy}")
+        weights = profile.weights(healthy)
+        lanes = gpuspeed.plan_lanes(healthy, leftover_batches, weights)
+    
+    watchdog.display_health(gpu_ids)
     
     return results
 
+def save_progress_state(tracker, origin_hex, range_bits, address, gpu_ids, timestamp=None):
+    """nextbatch.txt dan STATE_INFO menunjuk gap pertama progress tracker (None jika semua selesai)"""
+    next_batch_id = tracker.first_gap()
+    if next_batch_id is None:
+        return None
+    
+    batch_start = int(origin_hex, 16) + (next_batch_id * BATCH_SIZE)
+    next_start_hex = format(tracker.resume_start(next_batch_id, batch_start), 'x')
+    save_next_batch_info(origin_hex, range_bits, address, next_start_hex,
+                         next_batch_id, tracker.total_batches, gpu_ids, timestamp)
+    return next_start_hex
+
 def calculate_range_bits(keys_count):
     """Fungsi baru: Menghitung range bits yang benar untuk jumlah keys tertentu"""
     if keys_count <= 1:
@@ -583,7 +789,7 @@ def calculate_range_bits(keys_count):
     else:
         return int(math.floor(log2_val)) + 1
 
-def initialize_batch_log(start_hex, range_bits, address, gpu_ids, num_batches, batch_size, start_batch_id=0, save_state_early=True):
+def initialize_batch_log(start_hex, range_bits, address, gpu_ids, num_batches, batch_size, start_batch_id=0, save_state_early=True, batch_ids=None):
     """Inisialisasi log batch dengan semua batch dalam status uncheck"""
     log_dict = read_log_as_dict()
     
@@ -593,30 +799,19 @@ def initialize_batch_log(start_hex, range_bits, address, gpu_ids, num_batches, b
     
     total_batches_needed = math.ceil(total_keys / batch_size)
     
-    # ⭐ PERUBAHAN UTAMA: Simpan state di awal sebelum menjalankan batch
-    if save_state_early and num_batches < total_batches_needed:
-        next_start_int = start_int + (num_batches * batch_size)
-        next_start_hex = format(next_start_int, 'x')
-        
-        # Simpan state info di awal
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        save_next_batch_info(
-            start_hex,
-            range_bits,
-            address,
-            next_start_hex,
-            start_batch_id,  # Belum ada yang diselesaikan
-            total_batches_needed,
-            gpu_ids,
-            timestamp
-        )
+    # State awal menunjuk batch pertama yang BELUM selesai, bukan posisi setelah sesi ini:
+    # crash di tengah sesi tidak melompati batch (progress per batch dicatat progress.py)
+    if save_state_early and progress.ACTIVE is not None:
+        next_start_hex = save_progress_state(progress.ACTIVE, start_hex, range_bits, address, gpu_ids)
         print(f"💾 State saved EARLY at initialization")
-        print(f"   Next start will be: 0x{next_start_hex}")
-        print(f"   After completing {num_batches} batches")
+        print(f"   Resume point: 0x{next_start_hex} (first unfinished batch)")
         if gpu_ids:
             print(f"   GPU IDs: {gpu_ids}")
     
-    for i in range(start_batch_id, min(start_batch_id + num_batches, total_batches_needed)):
+    if batch_ids is None:
+        batch_ids = range(start_batch_id, min(start_batch_id + num_batches, total_batches_needed))
+    
+    for i in batch_ids:
         batch_start = start_int + (i * batch_size)
         batch_end = min(batch_start + batch_size, end_int + 1)
         batch_keys = batch_end - batch_start
@@ -649,6 +844,9 @@ def initialize_batch_log(start_hex, range_bits, address, gpu_ids, num_batches, b
 
 def get_log_summary():
     """Mendapatkan summary log tanpa menampilkan isi file"""
+    if LOG_ACTOR is not None:
+        LOG_ACTOR.flush()
+    
     if not os.path.exists(LOG_FILE):
         return None, None, None, None
     
@@ -749,7 +947,7 @@ def parse_gpu_ids(gpu_str):
     
     return gpu_ids
 
-def run_xiebo_parallel_mode(gpu_ids, start_hex, range_bits, address, num_batches_to_run, start_batch_id=0):
+def run_xiebo_parallel_mode(gpu_ids, start_hex, range_bits, address, num_batches_to_run, start_batch_id=0, batch_ids=None):
     """Mode paralel: Setiap GPU memproses batch yang berbeda"""
     global STOP_SEARCH_FLAG, BATCH_SIZE
     
@@ -769,18 +967,22 @@ def run_xiebo_parallel_mode(gpu_ids, start_hex, range_bits, address, num_batches
     print(f"Parallel execution: YES (each GPU processes separate batches)")
     print(f"{'='*60}")
     
-    # Siapkan batch untuk dieksekusi
+    # Siapkan batch untuk dieksekusi (start_hex = start awal range, batch_ids = batch yang belum selesai)
+    if batch_ids is None:
+        batch_ids = range(start_batch_id, start_batch_id + num_batches_to_run)
+    
     batch_infos = []
-    for i in range(num_batches_to_run):
+    for batch_id in batch_ids:
         if STOP_SEARCH_FLAG:
             break
             
-        batch_id = start_batch_id + i
         if batch_id >= total_batches_needed:
             break
             
         batch_start = start_int + (batch_id * BATCH_SIZE)
         batch_end = min(batch_start + BATCH_SIZE, end_int + 1)
+        # Batch partial (checkpoint nextbatch.txt/progress.json) dilanjutkan dari key yang belum di-scan
+        batch_start = progress.resume_start(batch_id, batch_start)
         batch_keys = batch_end - batch_start
         
         batch_bits = calculate_range_bits(batch_keys)
@@ -804,7 +1006,7 @@ def run_xiebo_parallel_mode(gpu_ids, start_hex, range_bits, address, num_batches
     
     return results
 
-def run_xiebo_sequential_mode(gpu_ids, start_hex, range_bits, address, num_batches_to_run, start_batch_id=0):
+def run_xiebo_sequential_mode(gpu_ids, start_hex, range_bits, address, num_batches_to_run, start_batch_id=0, batch_ids=None):
     """Mode sequential: Batch dijalankan satu per satu (untuk single GPU atau debugging)"""
     global STOP_SEARCH_FLAG, BATCH_SIZE
     
@@ -824,18 +1026,26 @@ def run_xiebo_sequential_mode(gpu_ids, start_hex, range_bits, address, num_batch
     print(f"{'='*60}")
     
     results = []
+    if batch_ids is None:
+        batch_ids = range(start_batch_id, start_batch_id + num_batches_to_run)
     
-    for i in range(num_batches_to_run):
+    for i, batch_id in enumerate(batch_ids):
         if STOP_SEARCH_FLAG:
             print(f"\n🚨 AUTO-STOP TRIGGERED! Stopping remaining batches")
             break
             
-        batch_id = start_batch_id + i
         if batch_id >= total_batches_needed:
             break
+        
+        # Batch yang sedang/sudah dijalankan proses lain di direktori yang sama dilewati
+        if not progress.claim([batch_id]):
+            print(f"\n⏭️  Batch {batch_id} claimed by another process, skipping")
+            continue
             
         batch_start = start_int + (batch_id * BATCH_SIZE)
         batch_end = min(batch_start + BATCH_SIZE, end_int + 1)
+        # Batch partial (checkpoint nextbatch.txt/progress.json) dilanjutkan dari key yang belum di-scan
+        batch_start = progress.resume_start(batch_id, batch_start)
         batch_keys = batch_end - batch_start
         
         batch_bits = calculate_range_bits(batch_keys)
@@ -862,29 +1072,49 @@ def run_xiebo_sequential_mode(gpu_ids, start_hex, range_bits, address, num_batch
         })
         
         if return_code == 0:
+            telemetry.METRICS.observe_batch(gpu_id)
+            progress.record_done([batch_id])
             print(f"✅ Batch {batch_id+1} completed successfully")
         else:
             print(f"⚠️  Batch {batch_id+1} exited with code {return_code}")
         
         # Tampilkan progress
         if (i + 1) % 10 == 0 or i == num_batches_to_run - 1:
-            completed_now = start_batch_id + i + 1
+            completed_now = progress.ACTIVE.completed_count() if progress.ACTIVE else start_batch_id + i + 1
             percentage = (completed_now / total_batches_needed) * 100
             print(f"\n📈 Overall Progress: {completed_now}/{total_batches_needed} batches ({percentage:.1f}%)")
         
         # Delay antara batch
         if i < num_batches_to_run - 1 and not STOP_SEARCH_FLAG:
             print(f"\n⏱️  Waiting 5 seconds before next batch...")
-            time.sleep(5)
+            batchtiming.timed_sleep(5, found_info.get('timing'))
     
     return results
 
 def main():
-    global STOP_SEARCH_FLAG, BATCH_SIZE, MAX_BATCHES_PER_RUN
+    global STOP_SEARCH_FLAG, BATCH_SIZE, MAX_BATCHES_PER_RUN, LOG_ACTOR
     
     # Reset flag stop search setiap kali program dijalankan
     STOP_SEARCH_FLAG = False
     
+    # Flag opsional: endpoint metrics lokal (lihat telemetry.py)
+    metrics_port = telemetry.extract_metrics_arg(sys.argv)
+    if metrics_port:
+        telemetry.start_server(metrics_port)
+    
+    # Flag opsional: tabel status per GPU, output mentah xiebo ke logs/ (lihat dashboard.py)
+    if dashboard.extract_dashboard_arg(sys.argv):
+        dashboard.start()
+    
+    # Flag opsional: GPU idle mengambil launch yang belum mulai dari lane GPU lain (lihat steal.py)
+    if steal.extract_steal_arg(sys.argv):
+        steal.enable()
+    
+    # Flag opsional: ukuran batch dari profil kecepatan GPU (lihat autotune.py)
+    auto_size = "--auto-size" in sys.argv
+    if auto_size:
+        sys.argv.remove("--auto-size")
+    
     # Parse arguments directly
     if len(sys.argv) < 2:
         print("Xiebo Batch Runner with Multi-GPU Parallel Support")
@@ -894,13 +1124,19 @@ def main():
         print("  Batch parallel: python3 xiebo.py --parallel GPU_IDS START_HEX RANGE_BITS ADDRESS BATCH_COUNT")
         print("  Batch sequential: python3 xiebo.py --batch GPU_IDS START_HEX RANGE_BITS ADDRESS")
         print("  Show summary:    python3 xiebo.py --summary")
-        print("  Continue:        python3 xiebo.py --continue")
+        print("  Continue:        python3 xiebo.py --continue [GPU_IDS]  (e.g. '2 3' runs only those GPUs, no prompt)")
+        print("  Auto batch size: add --auto-size to --parallel/--batch (uses timingbatch.txt)")
+        print("  Multi-target:    ADDRESS = ADDR1,ADDR2,... or @address_file (xiebo -i)")
+        print("  Metrics:         add --metrics [PORT] for http://127.0.0.1:PORT/metrics")
+        print("  Dashboard:       add --dashboard (per-GPU table, raw xiebo output in logs/)")
+        print("  Tail stealing:   add --steal to --parallel (idle GPUs take unstarted launches from other lanes)")
         print("\n⚠️  FEATURES:")
         print("  - Multi-GPU parallel: each GPU processes separate batches")
         print("  - Auto-stop ketika ditemukan Found: 1 atau lebih")
         print(f"  - Maksimal {MAX_BATCHES_PER_RUN} batch per eksekusi")
         print(f"  - Batch size: {BATCH_SIZE:,} keys")
         print("  - Simpan state DI AWAL untuk melanjutkan")
+        print(f"  - Progress per batch di {progress.PROGRESS_FILE}, --continue mulai dari gap pertama")
         print("  - State info disimpan di logbatch.txt")
         sys.exit(1)
     
@@ -921,12 +1157,22 @@ def main():
             print(f"Saved at: {next_info.get('timestamp')}")
             print(f"To continue: python3 xiebo.py --continue")
         
+        # Progress per batch (gap pertama + batch yang selesai lebih dulu)
+        saved_progress = progress.load()
+        if saved_progress is not None:
+            progress.display_progress(saved_progress)
+        
         sys.exit(0)
     
+    # Mode yang menjalankan batch: satu thread actor memiliki logbatch.txt, thread GPU hanya mengirim transisi
+    LOG_ACTOR = stateactor.LogActor(read_log_file, lambda rows: write_log_file(rows, sync_drive=False),
+                                    shared_path=LOG_FILE, after_write=save_to_drive)
+    
     # Continue mode
     if sys.argv[1] == "--continue":
         next_info = load_next_batch_info()
-        if not next_info:
+        saved_progress = progress.load()
+        if not next_info and saved_progress is None:
             print("❌ No saved state found. Run with --batch first.")
             sys.exit(1)
         
@@ -935,25 +1181,73 @@ def main():
         print(f"{'='*60}")
         print(f"Resuming from saved state...")
         
-        gpu_ids = next_info['gpu_ids']
-        start_hex = next_info['next_start_hex']
-        range_bits = int(next_info['original_range_bits'])
-        address = next_info['address']
-        batches_completed = int(next_info['batches_completed'])
-        total_batches = int(next_info['total_batches'])
+        # --continue [GPU_IDS]: GPU proses ini (proses lain di direktori yang sama memakai GPU lain)
+        gpu_override = parse_gpu_ids(' '.join(sys.argv[2:])) if len(sys.argv) > 2 else None
+        batches_completed = 0
+        partial = {}
+        
+        if saved_progress is not None:
+            # progress.json: low-water mark + batch yang sudah selesai di depan gap pertama
+            session = saved_progress.session
+            origin_hex = session['origin']
+            range_bits = int(session['range_bits'])
+            address = session.get('address', '')
+            gpu_ids = session.get('gpu_ids') or (next_info['gpu_ids'] if next_info else [0])
+            BATCH_SIZE = int(session['batch_size'])
+            total_batches = saved_progress.total_batches
+        else:
+            # State lama (hanya nextbatch.txt): batches_completed dipakai sebagai low-water mark
+            gpu_ids = next_info['gpu_ids']
+            range_bits = int(next_info['original_range_bits'])
+            address = next_info['address']
+            batches_completed = int(next_info['batches_completed'])
+            total_batches = int(next_info['total_batches'])
+            
+            # Pakai ukuran batch yang sama dengan sesi sebelumnya agar batch ID tetap konsisten
+            if next_info.get('batch_size'):
+                BATCH_SIZE = int(next_info['batch_size'])
+            
+            # Posisi batch dihitung dari start awal range (next_start sudah termasuk batch selesai)
+            next_start_int = int(next_info['next_start_hex'], 16)
+            origin_hex = next_info.get('original_start') or format(next_start_int - batches_completed * BATCH_SIZE, 'x')
+            gap_start = int(origin_hex, 16) + batches_completed * BATCH_SIZE
+            if gap_start < next_start_int < gap_start + BATCH_SIZE:
+                partial[batches_completed] = next_start_int
+        
+        multitarget.activate(address)
+        if auto_size:
+            print(f"⚠️  --auto-size ignored in continue mode (keeping saved batch size)")
+        
+        # GPU dari sesi tetap tersimpan di progress.json, override hanya berlaku untuk proses ini
+        session_gpu_ids = gpu_ids
+        if gpu_override is not None:
+            gpu_ids = gpu_override
+        
+        tracker = progress.start({
+            'origin': origin_hex,
+            'range_bits': range_bits,
+            'batch_size': BATCH_SIZE,
+            'total_batches': total_batches,
+            'shuffle_key': '',
+            'address': address,
+            'gpu_ids': session_gpu_ids
+        }, low_water=batches_completed, partial=partial)
+        
+        # Semua batch yang belum selesai mulai dari gap pertama (batch gagal ikut diulang)
+        pending_ids = tracker.pending_ids(MAX_BATCHES_PER_RUN)
+        batches_to_run = len(pending_ids)
+        remaining_batches = total_batches - tracker.completed_count()
         
-        print(f"Next start: 0x{start_hex}")
+        print(f"Origin: 0x{origin_hex}")
+        print(f"First unfinished batch: {tracker.first_gap()}")
         print(f"GPU IDs: {gpu_ids}")
-        print(f"Batches completed: {batches_completed}")
+        print(f"Batches completed: {tracker.completed_count()}")
         print(f"Total batches: {total_batches}")
+        print(f"Batch size: {BATCH_SIZE:,} keys")
         print(f"Address: {address}")
-        print(f"Timestamp: {next_info.get('timestamp', 'unknown')}")
+        print(f"Timestamp: {next_info.get('timestamp', 'unknown') if next_info else 'unknown'}")
         print(f"{'='*60}")
         
-        # Hitung jumlah batch yang tersisa
-        remaining_batches = total_batches - batches_completed
-        batches_to_run = min(remaining_batches, MAX_BATCHES_PER_RUN)
-        
         if batches_to_run <= 0:
             print("✅ All batches already completed!")
             sys.exit(0)
@@ -961,67 +1255,48 @@ def main():
         print(f"\nRunning {batches_to_run} batches (max {MAX_BATCHES_PER_RUN} per run)")
         print(f"{remaining_batches} batches remaining in total")
         
-        # Tanya user mau mode apa
-        print(f"\n{'='*60}")
-        print("SELECT EXECUTION MODE:")
-        print(f"{'='*60}")
-        print("1. Sequential (one batch at a time)")
-        print("2. Parallel (multiple batches simultaneously)")
-        print(f"{'='*60}")
+        if gpu_override is not None:
+            # GPU diberikan di argumen: tanpa prompt (bisa dijalankan sebagai proses tambahan di background)
+            choice = "2"
+        else:
+            # Tanya user mau mode apa
+            print(f"\n{'='*60}")
+            print("SELECT EXECUTION MODE:")
+            print(f"{'='*60}")
+            print("1. Sequential (one batch at a time)")
+            print("2. Parallel (multiple batches simultaneously)")
+            print(f"{'='*60}")
+            
+            choice = input("Enter choice (1 or 2, default: 2): ").strip()
         
-        choice = input("Enter choice (1 or 2, default: 2): ").strip()
+        # Inisialisasi log untuk batch yang akan dijalankan
+        initialize_batch_log(origin_hex, range_bits, address, gpu_ids, batches_to_run, BATCH_SIZE,
+                           save_state_early=False, batch_ids=pending_ids)
         
         if choice == "1" or len(gpu_ids) == 1:
-            # Sequential mode
-            # Inisialisasi log untuk batch yang akan dijalankan
-            initialize_batch_log(start_hex, range_bits, address, gpu_ids, batches_to_run, BATCH_SIZE, 
-                               start_batch_id=batches_completed, save_state_early=False)
-            
             # Jalankan secara sequential
-            results = run_xiebo_sequential_mode(gpu_ids, start_hex, range_bits, address, 
-                                               batches_to_run, batches_completed)
+            results = run_xiebo_sequential_mode(gpu_ids, origin_hex, range_bits, address,
+                                               batches_to_run, batch_ids=pending_ids)
         else:
-            # Parallel mode
-            # Inisialisasi log untuk batch yang akan dijalankan
-            initialize_batch_log(start_hex, range_bits, address, gpu_ids, batches_to_run, BATCH_SIZE, 
-                               start_batch_id=batches_completed, save_state_early=False)
-            
             # Jalankan secara parallel
-            results = run_xiebo_parallel_mode(gpu_ids, start_hex, range_bits, address, 
-                                             batches_to_run, batches_completed)
-        
-        # Hitung berapa batch yang berhasil diselesaikan
-        successful_batches = sum(1 for r in results if r['return_code'] == 0)
-        batches_actually_completed = batches_completed + successful_batches
-        
-        # Update state untuk batch berikutnya
-        if batches_actually_completed < total_batches and not STOP_SEARCH_FLAG:
-            next_batch_id = batches_actually_completed
-            next_start_int = int(start_hex, 16) + (successful_batches * BATCH_SIZE)
-            next_start_hex = format(next_start_int, 'x')
-            
-            # Update state info
+            results = run_xiebo_parallel_mode(gpu_ids, origin_hex, range_bits, address,
+                                             batches_to_run, batch_ids=pending_ids)
+        
+        # Update state untuk batch berikutnya: gap pertama dari progress tracker
+        next_batch_id = tracker.first_gap()
+        if next_batch_id is not None and not STOP_SEARCH_FLAG:
             timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            save_next_batch_info(
-                next_info.get('original_start', start_hex),
-                range_bits,
-                address,
-                next_start_hex,
-                next_batch_id,
-                total_batches,
-                gpu_ids,
-                timestamp
-            )
+            next_start_hex = save_progress_state(tracker, origin_hex, range_bits, address, gpu_ids, timestamp)
             
             print(f"\n📝 Updated state for next run.")
-            print(f"   Next start: 0x{next_start_hex}")
+            print(f"   Next start: 0x{next_start_hex} (batch {next_batch_id})")
             print(f"   To continue: python3 xiebo.py --continue")
         
         print(f"\n{'='*60}")
         if STOP_SEARCH_FLAG:
             print(f"🎯 SEARCH STOPPED - PRIVATE KEY FOUND!")
         else:
-            if batches_actually_completed >= total_batches:
+            if next_batch_id is None:
                 print(f"🎉 ALL BATCHES COMPLETED!")
             else:
                 print(f"⏸️  BATCHES PAUSED - READY FOR NEXT RUN")
@@ -1037,6 +1312,7 @@ def main():
         start_hex = sys.argv[2]
         range_bits = int(sys.argv[3])
         address = sys.argv[4]
+        multitarget.activate(address)
         
         gpu_ids = parse_gpu_ids(gpu_ids_str)
         
@@ -1064,6 +1340,7 @@ def main():
         start_hex = sys.argv[3]
         range_bits = int(sys.argv[4])
         address = sys.argv[5]
+        multitarget.activate(address)
         try:
             num_batches_to_run = int(sys.argv[6])
         except ValueError:
@@ -1077,6 +1354,13 @@ def main():
         total_keys = 1 << range_bits
         end_int = start_int + total_keys - 1
         
+        if auto_size:
+            tuned_size = autotune.tune_batch_size(gpu_ids, range_bits)
+            if tuned_size:
+                BATCH_SIZE = tuned_size
+            else:
+                print(f"⚠️  Auto-size unavailable, using default batch size {BATCH_SIZE:,}")
+        
         total_batches_needed = math.ceil(total_keys / BATCH_SIZE)
         
         # Limit to MAX_BATCHES_PER_RUN
@@ -1098,7 +1382,7 @@ def main():
         print(f"Next batch file: {NEXT_BATCH_FILE}")
         print(f"Max batches per run: {MAX_BATCHES_PER_RUN}")
         print(f"Parallel execution: YES (each GPU processes separate batches)")
-        print(f"State saved: EARLY (at initialization)")
+        print(f"State saved: EARLY (at initialization) + per batch ({progress.PROGRESS_FILE})")
         print(f"⚠️  AUTO-STOP: Pencarian akan berhenti otomatis jika ditemukan Found: 1 atau lebih")
         print(f"{'='*60}")
         
@@ -1110,7 +1394,17 @@ def main():
         
         if num_batches_to_run < total_batches_needed:
             print(f"Remaining batches for next run: {total_batches_needed - num_batches_to_run:,}")
-            print(f"⚠️  State will be saved EARLY before running any batches")
+        
+        # Progress baru untuk sesi ini: setiap batch selesai langsung dicatat ke progress.json
+        progress.start({
+            'origin': start_hex,
+            'range_bits': range_bits,
+            'batch_size': BATCH_SIZE,
+            'total_batches': total_batches_needed,
+            'shuffle_key': '',
+            'address': address,
+            'gpu_ids': gpu_ids
+        }, resume=False)
         
         # ⭐ PERUBAHAN UTAMA: Inisialisasi dan simpan state DI AWAL
         initialize_batch_log(start_hex, range_bits, address, gpu_ids, num_batches_to_run, BATCH_SIZE, 
@@ -1119,27 +1413,15 @@ def main():
         # Jalankan batch secara parallel
         results = run_xiebo_parallel_mode(gpu_ids, start_hex, range_bits, address, num_batches_to_run)
         
-        # Update state info jika sudah menyelesaikan semua batch yang dijadwalkan
-        if num_batches_to_run < total_batches_needed and not STOP_SEARCH_FLAG:
-            # State sudah disimpan di awal, tapi kita update progress-nya
-            next_start_int = start_int + (num_batches_to_run * BATCH_SIZE)
-            next_start_hex = format(next_start_int, 'x')
-            
+        # Update state info: gap pertama dari progress tracker (batch gagal ikut diulang)
+        next_batch_id = progress.ACTIVE.first_gap()
+        if next_batch_id is not None and not STOP_SEARCH_FLAG:
             timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            save_next_batch_info(
-                start_hex,
-                range_bits,
-                address,
-                next_start_hex,
-                num_batches_to_run,  # Sekarang sudah selesai
-                total_batches_needed,
-                gpu_ids,
-                timestamp
-            )
+            next_start_hex = save_progress_state(progress.ACTIVE, start_hex, range_bits, address, gpu_ids, timestamp)
             
             print(f"\n📝 Updated state with completed progress.")
-            print(f"   Next start: 0x{next_start_hex}")
-            print(f"   Batches completed: {num_batches_to_run}")
+            print(f"   Next start: 0x{next_start_hex} (batch {next_batch_id})")
+            print(f"   Batches completed: {progress.ACTIVE.completed_count()}")
             print(f"   Total batches needed: {total_batches_needed}")
             print(f"   GPU IDs: {gpu_ids}")
             print(f"   To continue: python3 xiebo.py --continue")
@@ -1148,11 +1430,10 @@ def main():
         if STOP_SEARCH_FLAG:
             print(f"🎯 SEARCH STOPPED - PRIVATE KEY FOUND!")
         else:
-            if num_batches_to_run >= total_batches_needed:
+            if next_batch_id is None:
                 print(f"🎉 ALL BATCHES COMPLETED!")
             else:
                 print(f"⏸️  BATCHES PAUSED - READY FOR NEXT RUN")
-                print(f"💾 State already saved at initialization")
         print(f"{'='*60}")
         
         # Tampilkan summary ringkas
@@ -1170,6 +1451,7 @@ def main():
         start_hex = sys.argv[3]
         range_bits = int(sys.argv[4])
         address = sys.argv[5]
+        multitarget.activate(address)
         
         gpu_ids = parse_gpu_ids(gpu_ids_str)
         
@@ -1178,6 +1460,13 @@ def main():
         total_keys = 1 << range_bits
         end_int = start_int + total_keys - 1
         
+        if auto_size:
+            tuned_size = autotune.tune_batch_size(gpu_ids, range_bits)
+            if tuned_size:
+                BATCH_SIZE = tuned_size
+            else:
+                print(f"⚠️  Auto-size unavailable, using default batch size {BATCH_SIZE:,}")
+        
         total_batches_needed = math.ceil(total_keys / BATCH_SIZE)
         
         # Limit to MAX_BATCHES_PER_RUN
@@ -1200,7 +1489,7 @@ def main():
         print(f"Next batch file: {NEXT_BATCH_FILE}")
         print(f"Max batches per run: {MAX_BATCHES_PER_RUN}")
         print(f"Parallel execution: NO (batches run one by one)")
-        print(f"State saved: EARLY (at initialization)")
+        print(f"State saved: EARLY (at initialization) + per batch ({progress.PROGRESS_FILE})")
         print(f"⚠️  AUTO-STOP: Pencarian akan berhenti otomatis jika ditemukan Found: 1 atau lebih")
         print(f"{'='*60}")
         
@@ -1209,7 +1498,17 @@ def main():
         
         if batches_to_run < total_batches_needed:
             print(f"Remaining batches for next run: {total_batches_needed - batches_to_run:,}")
-            print(f"⚠️  State will be saved EARLY before running any batches")
+        
+        # Progress baru untuk sesi ini: setiap batch selesai langsung dicatat ke progress.json
+        progress.start({
+            'origin': start_hex,
+            'range_bits': range_bits,
+            'batch_size': BATCH_SIZE,
+            'total_batches': total_batches_needed,
+            'shuffle_key': '',
+            'address': address,
+            'gpu_ids': gpu_ids
+        }, resume=False)
         
         # ⭐ PERUBAHAN UTAMA: Inisialisasi dan simpan state DI AWAL
         initialize_batch_log(start_hex, range_bits, address, gpu_ids, batches_to_run, BATCH_SIZE, 
@@ -1218,27 +1517,15 @@ def main():
         # Jalankan batch secara sequential
         results = run_xiebo_sequential_mode(gpu_ids, start_hex, range_bits, address, batches_to_run)
         
-        # Update state info jika sudah menyelesaikan semua batch yang dijadwalkan
-        if batches_to_run < total_batches_needed and not STOP_SEARCH_FLAG:
-            # State sudah disimpan di awal, tapi kita update progress-nya
-            next_start_int = start_int + (batches_to_run * BATCH_SIZE)
-            next_start_hex = format(next_start_int, 'x')
-            
+        # Update state info: gap pertama dari progress tracker (batch gagal ikut diulang)
+        next_batch_id = progress.ACTIVE.first_gap()
+        if next_batch_id is not None and not STOP_SEARCH_FLAG:
             timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            save_next_batch_info(
-                start_hex,
-                range_bits,
-                address,
-                next_start_hex,
-                batches_to_run,  # Sekarang sudah selesai
-                total_batches_needed,
-                gpu_ids,
-                timestamp
-            )
+            next_start_hex = save_progress_state(progress.ACTIVE, start_hex, range_bits, address, gpu_ids, timestamp)
             
             print(f"\n📝 Updated state with completed progress.")
-            print(f"   Next start: 0x{next_start_hex}")
-            print(f"   Batches completed: {batches_to_run}")
+            print(f"   Next start: 0x{next_start_hex} (batch {next_batch_id})")
+            print(f"   Batches completed: {progress.ACTIVE.completed_count()}")
             print(f"   Total batches needed: {total_batches_needed}")
             print(f"   GPU IDs: {gpu_ids}")
             print(f"   To continue: python3 xiebo.py --continue")
@@ -1247,11 +1534,10 @@ def main():
         if STOP_SEARCH_FLAG:
             print(f"🎯 SEARCH STOPPED - PRIVATE KEY FOUND!")
         else:
-            if batches_to_run >= total_batches_needed:
+            if next_batch_id is None:
                 print(f"🎉 ALL BATCHES COMPLETED!")
             else:
                 print(f"⏸️  BATCHES PAUSED - READY FOR NEXT RUN")
-                print(f"💾 State already saved at initialization")
         print(f"{'='*60}")
         
         # Tampilkan summary ringkas
@@ -1270,7 +1556,7 @@ def main():
         print("Or:    python3 xiebo.py --batch GPU_IDS START_HEX RANGE_BITS ADDRESS (sequential)")
         print("Or:    python3 xiebo.py --parallel GPU_IDS START_HEX RANGE_BITS ADDRESS BATCH_COUNT")
         print("Or:    python3 xiebo.py --summary")
-        print("Or:    python3 xiebo.py --continue")
+        print("Or:    python3 xiebo.py --continue [GPU_IDS]")
         return 1
 
 if __name__ == "__main__":
@@ -4,8 +4,19 @@ import os
 import time
 import math
 import re
-import pyodbc
+import batchtiming
+import watchdog
+import telemetry
+import dashboard
+import multitarget
+import ledger
+import resultfile
+import procgroup
+import outbox
+import gpuspeed
+import coalesce
 import threading
+import queue
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
@@ -15,10 +26,15 @@ DATABASE = "puckok"
 USERNAME = "sa"
 PASSWORD = "LEtoy_89"
 TABLE = "dbo.Tbatch"
+TARGET_TABLE = "dbo.Ttarget"   # Daftar target untuk multi-target (ADDRESS = @db)
+FOUND_TABLE = "dbo.Tfound"     # Semua key yang ditemukan, satu baris per target
 
 # Global flag untuk menghentikan pencarian
 STOP_SEARCH_FLAG = False
 
+# Outbox update status (dibuat di main, lihat outbox.py)
+STATUS_OUTBOX = None
+
 # Konfigurasi batch
 MAX_BATCHES_PER_RUN = 10  # Maksimal 1juta batch per eksekusi
 BATCH_SIZE = 4000000000000  # 2 triliun keys per batch
@@ -26,6 +42,8 @@ BATCH_SIZE = 4000000000000  # 2 triliun keys per batch
 def connect_db():
     """Membuat koneksi ke database SQL Server"""
     try:
+        # pyodbc di-import saat koneksi pertama (mode tanpa DB tidak butuh driver ODBC)
+        import pyodbc
         conn = pyodbc.connect(
             "DRIVER={ODBC Driver 17 for SQL Server};"
             f"SERVER={SERVER};"
@@ -144,6 +162,158 @@ def update_batch_status(batch_id, status, found='', wif=''):
             conn.close()
         return False
 
+def update_batch_status_many(updates):
+    """Update status beberapa batch sekaligus dalam satu koneksi: list (batch_id, status, found, wif)"""
+    conn = connect_db()
+    if not conn:
+        return False
+    
+    try:
+        cursor = conn.cursor()
+        
+        cursor.executemany(f"""
+            UPDATE {TABLE} 
+            SET status = ?, found = ?, wif = ?
+            WHERE id = ?
+        """, [(status, found, wif, batch_id) for batch_id, status, found, wif in updates])
+        
+        conn.commit()
+        cursor.close()
+        conn.close()
+        
+        print(f"📝 Updated {len(updates)} batches: status={updates[0][1] if updates else ''}")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error updating batch status: {e}")
+        if conn:
+            conn.rollback()
+            conn.close()
+        return False
+
+def apply_status_updates(updates):
+    """Dipanggil thread outbox: kirim update status ke DB dalam satu koneksi"""
+    with telemetry.timed('db'):
+        return update_batch_status_many(updates)
+
+def update_launch_status(batch_id, member_batches, status, found='', wif='', found_info=None):
+    """Update status satu launch, untuk launch gabungan diteruskan ke setiap batch anggota"""
+    if not member_batches:
+        updates = [(batch_id, status, found, wif)]
+    else:
+        attributed = coalesce.attribute_found(member_batches, found, wif, found_info)
+        updates = [(batch['id'], status, row_found, row_wif)
+                   for batch, (row_found, row_wif) in zip(member_batches, attributed)]
+    
+    # Lewat outbox lokal agar update tidak hilang saat DB tidak tersedia
+    if STATUS_OUTBOX is not None:
+        return STATUS_OUTBOX.put(updates)
+    return apply_status_updates(updates)
+
+def ensure_multitarget_schema():
+    """Membuat tabel target dan found jika belum ada"""
+    conn = connect_db()
+    if not conn:
+        return False
+    
+    try:
+        cursor = conn.cursor()
+        
+        cursor.execute(f"""
+            IF OBJECT_ID('{TARGET_TABLE}', 'U') IS NULL
+            CREATE TABLE {TARGET_TABLE} (
+                address VARCHAR(100) NOT NULL PRIMARY KEY,
+                status VARCHAR(20) NOT NULL DEFAULT 'open',
+                found_batch BIGINT NULL
+            )
+        """)
+        cursor.execute(f"""
+            IF OBJECT_ID('{FOUND_TABLE}', 'U') IS NULL
+            CREATE TABLE {FOUND_TABLE} (
+                id BIGINT IDENTITY(1,1) PRIMARY KEY,
+                batch_id BIGINT NULL,
+                address VARCHAR(100) NOT NULL,
+                wif VARCHAR(100) NULL,
+                priv_hex VARCHAR(80) NULL,
+                found_at DATETIME NOT NULL DEFAULT GETDATE()
+            )
+        """)
+        
+        conn.commit()
+        cursor.close()
+        conn.close()
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error creating multi-target tables: {e}")
+        if conn:
+            conn.rollback()
+            conn.close()
+        return False
+
+def load_db_targets():
+    """Mengambil target yang belum ditemukan dari tabel target, dipisah koma"""
+    if not ensure_multitarget_schema():
+        return ''
+    
+    conn = connect_db()
+    if not conn:
+        return ''
+    
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT address FROM {TARGET_TABLE} WHERE status = 'open' ORDER BY address")
+        addresses = [row[0].strip() for row in cursor.fetchall() if row[0]]
+        cursor.close()
+        conn.close()
+        
+        print(f"🎯 Loaded {len(addresses)} open targets from {TARGET_TABLE}")
+        return ','.join(addresses)
+        
+    except Exception as e:
+        print(f"❌ Error loading targets: {e}")
+        if conn:
+            conn.close()
+        return ''
+
+def save_found_keys(batch_id, found_keys):
+    """Menyimpan setiap key yang ditemukan ke tabel found dan menandai targetnya"""
+    if not ensure_multitarget_schema():
+        return False
+    
+    conn = connect_db()
+    if not conn:
+        return False
+    
+    try:
+        cursor = conn.cursor()
+        
+        for block in found_keys:
+            target = block.get('target') or block.get('address') or ''
+            cursor.execute(f"""
+                INSERT INTO {FOUND_TABLE} (batch_id, address, wif, priv_hex)
+                VALUES (?, ?, ?, ?)
+            """, (batch_id, target, block.get('wif_plain', ''), block.get('hex', '')))
+            cursor.execute(f"""
+                UPDATE {TARGET_TABLE}
+                SET status = 'found', found_batch = ?
+                WHERE address = ?
+            """, (batch_id, target))
+        
+        conn.commit()
+        cursor.close()
+        conn.close()
+        
+        print(f"📝 Saved {len(found_keys)} found key(s) to {FOUND_TABLE}")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error saving found keys: {e}")
+        if conn:
+            conn.rollback()
+            conn.close()
+        return False
+
 def calculate_range_bits(start_hex, end_hex):
     """Menghitung range bits dari start dan end hex"""
     try:
@@ -219,7 +389,7 @@ def parse_xiebo_output(output_text):
                 found_lines.append(line_stripped)
                 
                 # Set flag berhenti jika ditemukan 1 atau lebih
-                if found_count >= 1:
+                if found_count >= 1 and len(multitarget.ACTIVE_TARGETS) <= 1:
                     STOP_SEARCH_FLAG = True
                     print(f"🚨 STOP_SEARCH_FLAG diaktifkan karena Found: {found_count}")
         
@@ -268,10 +438,23 @@ def parse_xiebo_output(output_text):
         elif found_info['private_key_hex'] and not found_info['wif_key']:
             found_info['wif_key'] = found_info['private_key_hex'][:60] if len(found_info['private_key_hex']) >= 60 else found_info['private_key_hex']
     
+    # Multi-target: atribusikan setiap key ke targetnya, berhenti jika semua target ditemukan
+    found_info['found_keys'] = multitarget.parse_found_blocks(output_text)
+    if len(multitarget.ACTIVE_TARGETS) > 1 and multitarget.record_found(found_info['found_keys']):
+        if multitarget.all_targets_found():
+            STOP_SEARCH_FLAG = True
+            print(f"🚨 STOP_SEARCH_FLAG diaktifkan karena semua {len(multitarget.ACTIVE_TARGETS)} target ditemukan")
+        else:
+            print(f"🎯 Target found, {len(multitarget.remaining_targets())} target(s) remaining")
+    
     return found_info
 
-def display_xiebo_output_real_time(process, gpu_id=None):
+def display_xiebo_output_real_time(process, gpu_id=None, timer=None, monitor=None):
     """Menampilkan output xiebo secara real-time"""
+    # Dashboard aktif: output mentah ke logs/gpu_<id>.log, status GPU ke tabel
+    if dashboard.ACTIVE is not None:
+        return dashboard.ACTIVE.pump(process, gpu_id, timer=timer, monitor=monitor)
+    
     prefix = f"GPU {gpu_id}: " if gpu_id is not None else ""
     
     print(f"\n{'─' * 80}")
@@ -284,6 +467,10 @@ def display_xiebo_output_real_time(process, gpu_id=None):
         if output_line == '' and process.poll() is not None:
             break
         if output_line:
+            if timer is not None:
+                telemetry.METRICS.observe_progress(gpu_id, timer.feed(output_line))
+            if monitor is not None:
+                monitor.feed(output_line)
             # Tampilkan output dengan format yang lebih baik
             stripped_line = output_line.strip()
             if stripped_line:
@@ -311,12 +498,16 @@ def display_xiebo_output_real_time(process, gpu_id=None):
     
     return output_text
 
-def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
-    """Run xiebo binary untuk single GPU dengan batch tertentu"""
+def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None, member_batches=None):
+    """Run xiebo binary untuk single GPU dengan batch tertentu (member_batches: launch gabungan)"""
     global STOP_SEARCH_FLAG
     
     cmd = ["./xiebo", "-gpuId", str(gpu_id), "-start", start_hex, 
-           "-range", str(range_bits), address]
+           "-range", str(range_bits)] + multitarget.target_args(address)
+    
+    # Key yang ditemukan ditulis xiebo ke file hasil per batch (-o), stdout hanya untuk progress
+    result_path = resultfile.result_path(batch_id, gpu_id)
+    cmd += resultfile.output_args(result_path)
     
     print(f"\n{'='*80}")
     print(f"🚀 STARTING XIEBO EXECUTION - GPU {gpu_id}")
@@ -325,33 +516,63 @@ def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
     print(f"Batch ID: {batch_id if batch_id is not None else 'N/A'}")
     print(f"{'='*80}")
     
+    # Catat timestamp setiap fase batch (Popen, setup, scan, teardown, bookkeeping)
+    timer = batchtiming.BatchTimer(batch_id, gpu_id, start_hex, range_bits)
+    process = watcher = monitor = None
+    
     try:
         # Update status menjadi inprogress jika ada batch_id
         if batch_id is not None:
-            update_batch_status(batch_id, 'inprogress')
+            update_launch_status(batch_id, member_batches, 'inprogress')
         
         # Jalankan xiebo dan tampilkan output secara real-time
         print(f"\n⏳ Launching xiebo process for GPU {gpu_id}...")
         
         # Gunakan Popen untuk mendapatkan output real-time
+        timer.mark('t_launch')
         process = subprocess.Popen(
-            cmd,
+            procgroup.command(cmd),
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
             text=True,
             bufsize=1,
-            universal_newlines=True
+            universal_newlines=True,
+            **procgroup.popen_kwargs()
         )
+        timer.mark('t_spawned')
+        procgroup.register(process, gpu_id, batch_id)
+        watcher = resultfile.ResultWatcher(result_path, batch_id, gpu_id, start_hex, range_bits).start()
+        
+        # Watchdog menghentikan xiebo jika tidak ada progress (GPU hang)
+        monitor = watchdog.ProcessWatchdog(process, gpu_id, f"Batch {batch_id}").start()
         
         # Tampilkan output secara real-time
-        output_text = display_xiebo_output_real_time(process, gpu_id)
+        output_text = display_xiebo_output_real_time(process, gpu_id, timer=timer, monitor=monitor)
         
         # Tunggu proses selesai
         return_code = process.wait()
+        timer.mark('t_exit')
+        result_blocks = watcher.stop()
+        monitor.stop()
+        
+        # Key yang ditemukan langsung dicatat ke ledger (fsync) sebelum bookkeeping lain
+        ledger.record_output(batch_id, gpu_id, output_text)
+        
+        # Proses dihentikan watchdog (stall): batch ditandai 'stalled' untuk relaunch
+        if monitor.stalled:
+            if batch_id is not None:
+                update_launch_status(batch_id, member_batches, 'stalled')
+            return watchdog.STALL_RETURN_CODE, {'found': False, 'stalled': True,
+                                                'timing': timer.finish(watchdog.STALL_RETURN_CODE)}
         
         # Parse output untuk mencari private key
         found_info = parse_xiebo_output(output_text)
         
+        # File hasil (-o) terverifikasi menggantikan hasil scraping stdout (fallback)
+        if resultfile.apply(found_info, result_blocks) and not STOP_SEARCH_FLAG:
+            STOP_SEARCH_FLAG = True
+            print(f"🚨 STOP_SEARCH_FLAG diaktifkan karena {len(found_info['found_keys'])} key terverifikasi di {result_path}")
+        
         # Update status berdasarkan hasil
         if batch_id is not None:
             # Tentukan nilai 'found' berdasarkan found_count atau found status
@@ -366,7 +587,14 @@ def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
             wif_key = found_info['wif_key'] if found_info['wif_key'] else ''
             
             # Update status di database
-            update_batch_status(batch_id, 'done', found_status, wif_key)
+            update_launch_status(batch_id, member_batches, 'done', found_status, wif_key, found_info)
+        
+        # Simpan setiap key beserta targetnya (multi-target bisa menemukan beberapa key)
+        if found_info.get('found_keys'):
+            multitarget.append_found_keys(batch_id, gpu_id, found_info['found_keys'])
+            save_found_keys(batch_id, found_info['found_keys'])
+        
+        found_info['timing'] = timer.finish(return_code)
         
         # Tampilkan ringkasan hasil pencarian
         print(f"\n{'='*80}")
@@ -418,7 +646,9 @@ def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
         
         # Update status jika batch diinterupsi
         if batch_id is not None:
-            update_batch_status(batch_id, 'interrupted')
+            update_launch_status(batch_id, member_batches, 'interrupted')
+        
+        timer.finish(130)
         
         return 130, {'found': False}
     except Exception as e:
@@ -431,9 +661,19 @@ def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
         
         # Update status error jika ada batch_id
         if batch_id is not None:
-            update_batch_status(batch_id, 'error')
+            update_launch_status(batch_id, member_batches, 'error')
+        
+        timer.finish(1)
         
         return 1, {'found': False}
+    finally:
+        # Semua jalur (termasuk exception/Ctrl+C): xiebo tidak tertinggal di lockfile, thread watcher berhenti
+        if process is not None:
+            procgroup.release(process)
+        if watcher is not None:
+            watcher.stop()
+        if monitor is not None:
+            monitor.stop()
 
 def parse_gpu_ids(gpu_str):
     """Parse string GPU IDs menjadi list of integers"""
@@ -458,77 +698,128 @@ def parse_gpu_ids(gpu_str):
     
     return gpu_ids
 
-def run_parallel_batches(gpu_ids, batches, address):
-    """Menjalankan multiple batch secara paralel di GPU yang berbeda"""
+def run_gpu_worker(gpu_id, batch_queue, address, profile):
+    """Worker per GPU: mengambil batch berikutnya dari antrian begitu GPU selesai"""
     global STOP_SEARCH_FLAG
     
     results = []
     
-    # Gunakan ThreadPoolExecutor untuk menjalankan batch secara paralel
-    with ThreadPoolExecutor(max_workers=len(gpu_ids)) as executor:
-        # Submit semua batch ke executor
-        future_to_batch = {}
+    while not STOP_SEARCH_FLAG:
+        try:
+            launch = batch_queue.get_nowait()
+        except queue.Empty:
+            break
+        telemetry.METRICS.set_queue_depth(batch_queue.qsize())
         
-        for i, batch in enumerate(batches):
-            if STOP_SEARCH_FLAG:
-                print(f"🚨 Skipping remaining batches due to STOP_SEARCH_FLAG")
-                break
-                
-            gpu_id = gpu_ids[i % len(gpu_ids)]  # Round-robin assignment
-            batch_id = batch['id']
-            start_range = batch['start_range']
-            end_range = batch['end_range']
-            
-            # Hitung range bits untuk batch ini
-            range_bits = calculate_range_bits(start_range, end_range)
+        members = launch['batches']
+        batch_id = members[0]['id']
+        start_range = launch['start_hex']
+        end_range = members[-1]['end_range']
+        
+        # Hitung range bits untuk launch ini (batch tunggal atau gabungan aligned)
+        range_bits = launch['bits'] if launch['bits'] is not None else calculate_range_bits(start_range, end_range)
+        
+        print(f"\n📋 GPU {gpu_id} picked {coalesce.describe_launch(launch)}")
+        print(f"   Start: {start_range}")
+        print(f"   End: {end_range}")
+        print(f"   Bits: {range_bits}")
+        
+        try:
+            return_code, found_info = run_xiebo(gpu_id, start_range, range_bits, address, batch_id,
+                                                member_batches=members if len(members) > 1 else None)
+        except Exception as e:
+            print(f"❌ Error in parallel execution for Batch {batch_id} on GPU {gpu_id}: {e}")
+            return_code, found_info = 1, {'found': False, 'error': str(e)}
+        
+        # Watchdog menghentikan xiebo yang stall: relaunch dengan backoff atau alihkan ke GPU lain
+        if return_code == watchdog.STALL_RETURN_CODE:
+            launch['attempts'] = launch.get('attempts', 0) + 1
             
-            print(f"\n📋 Scheduling Batch {batch_id} on GPU {gpu_id}")
-            print(f"   Start: {start_range}")
-            print(f"   End: {end_range}")
-            print(f"   Bits: {range_bits}")
+            if watchdog.GPU_HEALTH.record_stall(gpu_id):
+                print(f"🩺 GPU {gpu_id} marked unhealthy after {watchdog.UNHEALTHY_AFTER_STALLS} stalls. "
+                      f"Rerouting {coalesce.describe_launch(launch)} to other GPUs.")
+                batch_queue.put(launch)
+                break
             
-            # Submit batch untuk dieksekusi
-            future = executor.submit(
-                run_xiebo,
-                gpu_id, start_range, range_bits, address, batch_id
-            )
-            future_to_batch[future] = {
+            if launch['attempts'] > watchdog.MAX_RELAUNCH:
+                print(f"❌ {coalesce.describe_launch(launch)} stalled {launch['attempts']} times, left as 'stalled' in DB")
+            else:
+                backoff = watchdog.backoff_seconds(launch['attempts'])
+                print(f"🔁 GPU {gpu_id}: relaunching {coalesce.describe_launch(launch)} in {backoff}s "
+                      f"(attempt {launch['attempts']}/{watchdog.MAX_RELAUNCH})")
+                batchtiming.timed_sleep(backoff, found_info.get('timing'))
+                batch_queue.put(launch)
+            continue
+        
+        watchdog.GPU_HEALTH.record_success(gpu_id)
+        telemetry.METRICS.observe_batch(gpu_id, len(members))
+        profile.update_from_timing(gpu_id, found_info.get('timing'))
+        for member in members:
+            results.append({
                 'gpu_id': gpu_id,
-                'batch_id': batch_id,
-                'batch': batch
+                'batch_id': member['id'],
+                'return_code': return_code,
+                'found_info': found_info
+            })
+        
+        # Cek jika ditemukan private key
+        if found_info.get('found_count', 0) > 0 or found_info.get('found', False):
+            print(f"\n🚨 PRIVATE KEY FOUND in Batch {batch_id} on GPU {gpu_id}!")
+    
+    return results
+
+def run_parallel_batches(gpu_ids, batches, address):
+    """Menjalankan batch secara paralel, GPU yang lebih cepat otomatis mengambil lebih banyak batch"""
+    global STOP_SEARCH_FLAG
+    
+    results = []
+    
+    # Antrian bersama: setiap GPU menarik batch berikutnya saat selesai (tanpa round-robin)
+    # Batch contiguous yang aligned digabung menjadi satu launch (lihat coalesce.py)
+    launches = coalesce.plan_launches(batches)
+    if len(launches) < len(batches):
+        print(f"\n🔗 Coalesced {len(batches)} batches into {len(launches)} launches")
+    
+    batch_queue = queue.Queue()
+    for launch in launches:
+        batch_queue.put(launch)
+    
+    profile = gpuspeed.load_speed_profile(gpu_ids)
+    
+    active_gpus = watchdog.GPU_HEALTH.healthy_gpus(gpu_ids)
+    while active_gpus:
+        with ThreadPoolExecutor(max_workers=len(active_gpus)) as executor:
+            future_to_gpu = {
+                executor.submit(run_gpu_worker, gpu_id, batch_queue, address, profile): gpu_id
+                for gpu_id in active_gpus
             }
+            
+            # Tunggu dan kumpulkan hasil
+            for future in as_completed(future_to_gpu):
+                gpu_id = future_to_gpu[future]
+                try:
+                    results.extend(future.result())
+                except Exception as e:
+                    print(f"❌ Error in parallel execution on GPU {gpu_id}: {e}")
+        
+        if batch_queue.empty() or STOP_SEARCH_FLAG:
+            break
         
-        # Tunggu dan kumpulkan hasil
-        for future in as_completed(future_to_batch):
-            if STOP_SEARCH_FLAG:
-                # Batalkan semua future yang belum selesai
-                for f in future_to_batch.keys():
-                    if not f.done():
-                        f.cancel()
-                break
-                
-            batch_data = future_to_batch[future]
-            try:
-                return_code, found_info = future.result()
-                results.append({
-                    'gpu_id': batch_data['gpu_id'],
-                    'batch_id': batch_data['batch_id'],
-                    'return_code': return_code,
-                    'found_info': found_info
-                })
-                
-                # Cek jika ditemukan private key
-                if found_info.get('found_count', 0) > 0 or found_info.get('found', False):
-                    print(f"\n🚨 PRIVATE KEY FOUND in Batch {batch_data['batch_id']} on GPU {batch_data['gpu_id']}!")
-                
-            except Exception as e:
-                print(f"❌ Error in parallel execution for Batch {batch_data['batch_id']} on GPU {batch_data['gpu_id']}: {e}")
-                results.append({
-                    'gpu_id': batch_data['gpu_id'],
-                    'batch_id': batch_data['batch_id'],
-                    'return_code': 1,
-                    'found_info': {'found': False, 'error': str(e)}
-                })
+        # Launch yang dialihkan dari GPU unhealthy dijalankan oleh GPU yang masih sehat
+        active_gpus = watchdog.GPU_HEALTH.healthy_gpus(gpu_ids)
+        if active_gpus:
+            print(f"\n🔀 Rerouting {batch_queue.qsize()} stalled launches to healthy GPUs {active_gpus}")
+        else:
+            print(f"\n🚨 All GPUs unhealthy: {batch_queue.qsize()} launches left as 'stalled' in DB")
+    
+    # Ringkasan pembagian batch per GPU
+    print(f"\n⚖️  Batches per GPU:")
+    for gpu_id in gpu_ids:
+        count = sum(1 for r in results if r['gpu_id'] == gpu_id)
+        speed = profile.speed(gpu_id)
+        speed_text = f"{speed:.1f} MK/s" if speed else "no speed data"
+        print(f"   GPU {gpu_id}: {count} batches ({speed_text})")
+    watchdog.display_health(gpu_ids)
     
     return results
 
@@ -538,38 +829,74 @@ def run_sequential_batches(gpu_ids, batches, address):
     
     results = []
     
-    for i, batch in enumerate(batches):
+    # Batch contiguous yang aligned digabung menjadi satu launch (lihat coalesce.py)
+    launches = coalesce.plan_launches(batches)
+    if len(launches) < len(batches):
+        print(f"\n🔗 Coalesced {len(batches)} batches into {len(launches)} launches")
+    
+    for i, launch in enumerate(launches):
         if STOP_SEARCH_FLAG:
             print(f"\n🚨 AUTO-STOP TRIGGERED! Stopping remaining batches")
             break
-            
-        batch_id = batch['id']
-        start_range = batch['start_range']
-        end_range = batch['end_range']
         
-        # Hitung range bits untuk batch ini
-        range_bits = calculate_range_bits(start_range, end_range)
+        members = launch['batches']
+        batch_id = members[0]['id']
+        start_range = launch['start_hex']
+        end_range = members[-1]['end_range']
         
-        # Round-robin GPU assignment
-        gpu_id = gpu_ids[i % len(gpu_ids)]
+        # Hitung range bits untuk launch ini (batch tunggal atau gabungan aligned)
+        range_bits = launch['bits'] if launch['bits'] is not None else calculate_range_bits(start_range, end_range)
+        
+        # Round-robin GPU assignment (hanya GPU yang sehat)
+        healthy = watchdog.GPU_HEALTH.healthy_gpus(gpu_ids)
+        if not healthy:
+            print(f"\n🚨 All GPUs unhealthy: stopping with {len(launches) - i} launches remaining")
+            break
+        gpu_id = healthy[i % len(healthy)]
         
         print(f"\n{'='*80}")
-        print(f"▶️  BATCH {i+1}/{len(batches)} (Sequential)")
+        print(f"▶️  LAUNCH {i+1}/{len(launches)} (Sequential)")
         print(f"{'='*80}")
         print(f"GPU: {gpu_id}")
-        print(f"Batch ID: {batch_id}")
+        print(f"Batch ID: {coalesce.describe_launch(launch)}")
         print(f"Start: {start_range}")
         print(f"End: {end_range}")
         print(f"Bits: {range_bits}")
         
-        return_code, found_info = run_xiebo(gpu_id, start_range, range_bits, address, batch_id=batch_id)
+        attempts = 0
+        while True:
+            return_code, found_info = run_xiebo(gpu_id, start_range, range_bits, address, batch_id=batch_id,
+                                                member_batches=members if len(members) > 1 else None)
+            if return_code != watchdog.STALL_RETURN_CODE:
+                watchdog.GPU_HEALTH.record_success(gpu_id)
+                telemetry.METRICS.observe_batch(gpu_id, len(members))
+                break
+            
+            # Watchdog menghentikan xiebo yang stall: relaunch dengan backoff, GPU unhealthy diganti
+            attempts += 1
+            if watchdog.GPU_HEALTH.record_stall(gpu_id):
+                healthy = watchdog.GPU_HEALTH.healthy_gpus(gpu_ids)
+                if not healthy:
+                    print(f"🚨 All GPUs unhealthy: Batch {batch_id} left as 'stalled' in DB")
+                    break
+                print(f"🩺 GPU {gpu_id} marked unhealthy, rerouting Batch {batch_id} to GPU {healthy[0]}")
+                gpu_id = healthy[0]
+            
+            if attempts > watchdog.MAX_RELAUNCH:
+                print(f"❌ Batch {batch_id} stalled {attempts} times, left as 'stalled' in DB")
+                break
+            
+            backoff = watchdog.backoff_seconds(attempts)
+            print(f"🔁 Relaunching Batch {batch_id} on GPU {gpu_id} in {backoff}s (attempt {attempts}/{watchdog.MAX_RELAUNCH})")
+            batchtiming.timed_sleep(backoff, found_info.get('timing'))
         
-        results.append({
-            'gpu_id': gpu_id,
-            'batch_id': batch_id,
-            'return_code': return_code,
-            'found_info': found_info
-        })
+        for member in members:
+            results.append({
+                'gpu_id': gpu_id,
+                'batch_id': member['id'],
+                'return_code': return_code,
+                'found_info': found_info
+            })
         
         if return_code == 0:
             print(f"✅ Batch {batch_id} completed successfully")
@@ -577,13 +904,13 @@ def run_sequential_batches(gpu_ids, batches, address):
             print(f"⚠️  Batch {batch_id} exited with code {return_code}")
         
         # Tampilkan progress
-        if (i + 1) % 5 == 0 or i == len(batches) - 1:
-            print(f"\n📈 Progress: {i+1}/{len(batches)} batches processed")
+        if (i + 1) % 5 == 0 or i == len(launches) - 1:
+            print(f"\n📈 Progress: {i+1}/{len(launches)} launches processed")
         
         # Delay antara batch
-        if i < len(batches) - 1 and not STOP_SEARCH_FLAG:
+        if i < len(launches) - 1 and not STOP_SEARCH_FLAG:
             print(f"\n⏱️  Waiting 3 seconds before next batch...")
-            time.sleep(3)
+            batchtiming.timed_sleep(3, found_info.get('timing'))
     
     return results
 
@@ -647,11 +974,26 @@ def process_batches_db_sequential(gpu_ids, start_id, address):
     return results
 
 def main():
-    global STOP_SEARCH_FLAG
+    global STOP_SEARCH_FLAG, STATUS_OUTBOX
     
     # Reset flag stop search setiap kali program dijalankan
     STOP_SEARCH_FLAG = False
     
+    # Flag opsional: endpoint metrics lokal (lihat telemetry.py)
+    metrics_port = telemetry.extract_metrics_arg(sys.argv)
+    if metrics_port:
+        telemetry.start_server(metrics_port)
+    
+    # Flag opsional: tabel status per GPU, output mentah xiebo ke logs/ (lihat dashboard.py)
+    if dashboard.extract_dashboard_arg(sys.argv):
+        dashboard.start()
+    
+    # Key yang ditemukan juga dikirim ke tabel ledger di DB (lihat ledger.py)
+    ledger.register_sink('db', ledger.db_sink(connect_db))
+    
+    # Update status DB lewat outbox lokal (tetap tercatat saat DB putus, dikirim ulang dengan backoff)
+    STATUS_OUTBOX = outbox.StatusOutbox(DATABASE, apply_status_updates)
+    
     # Parse arguments
     if len(sys.argv) < 2:
         print("Xiebo Batch Runner with SQL Server Database & Multi-GPU Support")
@@ -659,6 +1001,9 @@ def main():
         print("  Single run: python3 bmdb.py GPU_ID START_HEX RANGE_BITS ADDRESS")
         print("  Batch parallel from DB: python3 bmdb.py --batch-db-parallel GPU_IDS START_ID ADDRESS")
         print("  Batch sequential from DB: python3 bmdb.py --batch-db-sequential GPU_IDS START_ID ADDRESS")
+        print("  Multi-target: ADDRESS = ADDR1,ADDR2,... | @address_file | @db (open rows in dbo.Ttarget)")
+        print("  Metrics: add --metrics [PORT] for http://127.0.0.1:PORT/metrics")
+        print("  Dashboard: add --dashboard (per-GPU table, raw xiebo output in logs/)")
         print("\n⚠️  FEATURES:")
         print("  - Menggunakan database SQL Server")
         print("  - Baca range dari tabel Tbatch berdasarkan ID")
@@ -674,6 +1019,12 @@ def main():
         gpu_ids_str = sys.argv[2]
         start_id = int(sys.argv[3])
         address = sys.argv[4]
+        if address == '@db':
+            address = load_db_targets()
+            if not address:
+                print("❌ No open targets in database")
+                sys.exit(1)
+        multitarget.activate(address)
         
         gpu_ids = parse_gpu_ids(gpu_ids_str)
         
@@ -706,6 +1057,12 @@ def main():
         gpu_ids_str = sys.argv[2]
         start_id = int(sys.argv[3])
         address = sys.argv[4]
+        if address == '@db':
+            address = load_db_targets()
+            if not address:
+                print("❌ No open targets in database")
+                sys.exit(1)
+        multitarget.activate(address)
         
         gpu_ids = parse_gpu_ids(gpu_ids_str)
         
@@ -739,6 +1096,12 @@ def main():
         start_hex = sys.argv[2]
         range_bits = int(sys.argv[3])
         address = sys.argv[4]
+        if address == '@db':
+            address = load_db_targets()
+            if not address:
+                print("❌ No open targets in database")
+                sys.exit(1)
+        multitarget.activate(address)
         
         print(f"\n{'='*80}")
         print(f"🚀 SINGLE RUN MODE")
@@ -4,8 +4,19 @@ import os
 import time
 import math
 import re
-import pyodbc
+import batchtiming
+import watchdog
+import telemetry
+import dashboard
+import ledger
+import resultfile
+import procgroup
+import outbox
+import coalesce
+import coordinator
 import threading
+import queue
+from collections import deque
 from datetime import datetime
 
 # Konfigurasi database SQL Server
@@ -22,13 +33,24 @@ STOP_SEARCH_FLAG = False
 PRINT_LOCK = threading.Lock()
 BATCH_ID_LOCK = threading.Lock()
 CURRENT_GLOBAL_BATCH_ID = 0
+RETRY_QUEUE = queue.Queue()  # Launch yang stall, diambil ulang oleh GPU yang sehat
+PREFETCH_BUFFER = deque()    # Batch yang sudah diambil dari DB, dipakai worker saat DB putus
+PREFETCH_FAILURES = 0        # Query prefetch gagal berturut-turut
+PREFETCH_RETRY_AT = 0        # Prefetch berikutnya tidak dicoba sebelum waktu ini (backoff)
+STATUS_OUTBOX = None         # Outbox update status (dibuat di main, lihat outbox.py)
+COORDINATOR = None           # Agent coordinator HTTP (--coordinator URL) menggantikan akses SQL langsung
 
 # Konfigurasi batch
 MAX_BATCHES_PER_RUN = 4000000000000  # Maksimal batch per eksekusi
+PREFETCH_BATCHES = 256              # Batch yang diambil per query prefetch
+PREFETCH_LOW_WATER = 64             # Buffer diisi ulang jika tersisa kurang dari ini (SQL langsung, bukan coordinator)
+DB_UNAVAILABLE = 'db_unavailable'   # Hasil claim_next_launch saat DB putus dan buffer kosong
 
 def connect_db():
     """Membuat koneksi ke database SQL Server"""
     try:
+        # pyodbc di-import saat koneksi pertama (mode tanpa DB tidak butuh driver ODBC)
+        import pyodbc
         conn = pyodbc.connect(
             "DRIVER={ODBC Driver 17 for SQL Server};"
             f"SERVER={SERVER};"
@@ -85,6 +107,41 @@ def get_batch_by_id(batch_id):
             conn.close()
         return None
 
+def get_batches_from(start_id, limit):
+    """Mengambil beberapa batch berurutan mulai dari ID tertentu"""
+    conn = connect_db()
+    if not conn:
+        return None
+    
+    try:
+        cursor = conn.cursor()
+        
+        cursor.execute(f"""
+            SELECT id, start_range, end_range, status, found, wif
+            FROM {TABLE} 
+            WHERE id >= ? AND id < ?
+            ORDER BY id
+        """, (start_id, start_id + limit))
+        
+        rows = cursor.fetchall()
+        batches = []
+        
+        if rows:
+            columns = [column[0] for column in cursor.description]
+            for row in rows:
+                batches.append(dict(zip(columns, row)))
+        
+        cursor.close()
+        conn.close()
+        
+        return batches
+        
+    except Exception as e:
+        safe_print(f"❌ Error getting batches: {e}")
+        if conn:
+            conn.close()
+        return None
+
 def update_batch_status(batch_id, status, found='', wif=''):
     """Update status batch di database"""
     conn = connect_db()
@@ -115,6 +172,94 @@ def update_batch_status(batch_id, status, found='', wif=''):
             conn.close()
         return False
 
+def update_batch_status_many(updates):
+    """Update status beberapa batch sekaligus dalam satu koneksi: list (batch_id, status, found, wif)"""
+    conn = connect_db()
+    if not conn:
+        return False
+    
+    try:
+        cursor = conn.cursor()
+        
+        cursor.executemany(f"""
+            UPDATE {TABLE} 
+            SET status = ?, found = ?, wif = ?
+            WHERE id = ?
+        """, [(status, found, wif, batch_id) for batch_id, status, found, wif in updates])
+        
+        conn.commit()
+        cursor.close()
+        conn.close()
+        
+        return True
+        
+    except Exception as e:
+        safe_print(f"❌ Error updating batch status: {e}")
+        if conn:
+            conn.rollback()
+            conn.close()
+        return False
+
+def claim_batches(batch_ids):
+    """Menandai batch 'inprogress' secara atomic, mengembalikan set ID yang berhasil diklaim (None jika DB gagal)
+
+    Baris yang sudah done/inprogress (diklaim host lain setelah prefetch) tidak ikut, sehingga host
+    dengan START_ID yang sama tidak pernah menjalankan batch yang sama.
+    """
+    conn = connect_db()
+    if not conn:
+        return None
+    
+    try:
+        cursor = conn.cursor()
+        
+        placeholders = ', '.join('?' for _ in batch_ids)
+        cursor.execute(f"""
+            UPDATE {TABLE} 
+            SET status = 'inprogress'
+            OUTPUT inserted.id
+            WHERE id IN ({placeholders}) AND (status IS NULL OR status NOT IN ('done', 'inprogress'))
+        """, list(batch_ids))
+        
+        claimed = {row[0] for row in cursor.fetchall()}
+        conn.commit()
+        cursor.close()
+        conn.close()
+        
+        return claimed
+        
+    except Exception as e:
+        safe_print(f"❌ Error claiming batches: {e}")
+        if conn:
+            conn.rollback()
+            conn.close()
+        return None
+
+def apply_status_updates(updates):
+    """Dipanggil thread outbox: kirim update status ke DB dalam satu koneksi (atau satu request coordinator)"""
+    with telemetry.timed('db'):
+        if COORDINATOR is not None:
+            return COORDINATOR.complete(updates)
+        return update_batch_status_many(updates)
+
+def update_launch_status(batch_id, member_batches, status, found='', wif='', found_info=None):
+    """Update status satu launch, untuk launch gabungan diteruskan ke setiap batch anggota"""
+    # Claim di coordinator sudah menandai 'inprogress': satu request per batch (hasil akhir saja)
+    if COORDINATOR is not None and status == 'inprogress':
+        return True
+    
+    if not member_batches:
+        updates = [(batch_id, status, found, wif)]
+    else:
+        attributed = coalesce.attribute_found(member_batches, found, wif, found_info)
+        updates = [(batch['id'], status, row_found, row_wif)
+                   for batch, (row_found, row_wif) in zip(member_batches, attributed)]
+    
+    # Lewat outbox lokal agar update tidak hilang saat DB tidak tersedia
+    if STATUS_OUTBOX is not None:
+        return STATUS_OUTBOX.put(updates)
+    return apply_status_updates(updates)
+
 def calculate_range_bits(start_hex, end_hex):
     """Menghitung range bits dari start dan end hex"""
     try:
@@ -212,8 +357,12 @@ def parse_xiebo_output(output_text, gpu_prefix=""):
     
     return found_info
 
-def display_xiebo_output_real_time(process, gpu_id):
+def display_xiebo_output_real_time(process, gpu_id, timer=None, monitor=None):
     """Menampilkan output xiebo secara real-time dengan prefix GPU ID"""
+    # Dashboard aktif: output mentah ke logs/gpu_<id>.log, status GPU ke tabel
+    if dashboard.ACTIVE is not None:
+        return dashboard.ACTIVE.pump(process, gpu_id, timer=timer, monitor=monitor)
+    
     gpu_prefix = f"\033[96m[GPU {gpu_id}]\033[0m"
     
     output_lines = []
@@ -222,6 +371,10 @@ def display_xiebo_output_real_time(process, gpu_id):
         if output_line == '' and process.poll() is not None:
             break
         if output_line:
+            if timer is not None:
+                telemetry.METRICS.observe_progress(gpu_id, timer.feed(output_line))
+            if monitor is not None:
+                monitor.feed(output_line)
             stripped_line = output_line.strip()
             if stripped_line:
                 line_lower = stripped_line.lower()
@@ -253,13 +406,20 @@ def display_xiebo_output_real_time(process, gpu_id):
     output_text = ''.join(output_lines)
     return output_text
 
-def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
-    """Run xiebo binary langsung"""
+def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None, member_batches=None, claimed=False):
+    """Run xiebo binary langsung (member_batches: daftar batch jika launch gabungan)
+
+    claimed: batch sudah ditandai 'inprogress' oleh claim_batches/coordinator, tidak ditulis ulang.
+    """
     global STOP_SEARCH_FLAG
     
     cmd = ["./xiebo", "-gpuId", str(gpu_id), "-start", start_hex, 
            "-range", str(range_bits), address]
     
+    # Key yang ditemukan ditulis xiebo ke file hasil per batch (-o), stdout hanya untuk progress
+    result_path = resultfile.result_path(batch_id, gpu_id)
+    cmd += resultfile.output_args(result_path)
+    
     gpu_prefix = f"[GPU {gpu_id}]"
     
     # Gunakan lock hanya untuk print block besar ini agar rapi
@@ -269,29 +429,61 @@ def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
         print(f"{gpu_prefix} Command: {' '.join(cmd)}")
         print(f"{gpu_prefix} {'='*60}")
     
+    # Catat timestamp setiap fase batch (Popen, setup, scan, teardown, bookkeeping)
+    timer = batchtiming.BatchTimer(batch_id, gpu_id, start_hex, range_bits)
+    process = watcher = monitor = None
+    
     try:
-        if batch_id is not None:
-            update_batch_status(batch_id, 'inprogress')
+        if batch_id is not None and not claimed:
+            update_launch_status(batch_id, member_batches, 'inprogress')
         
+        timer.mark('t_launch')
         process = subprocess.Popen(
-            cmd,
+            procgroup.command(cmd),
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
             text=True,
             bufsize=1,
-            universal_newlines=True
+            universal_newlines=True,
+            **procgroup.popen_kwargs()
         )
+        timer.mark('t_spawned')
+        procgroup.register(process, gpu_id, batch_id)
+        watcher = resultfile.ResultWatcher(result_path, batch_id, gpu_id, start_hex, range_bits).start()
+        
+        # Watchdog menghentikan xiebo jika tidak ada progress (GPU hang)
+        monitor = watchdog.ProcessWatchdog(process, gpu_id, f"Batch {batch_id}").start()
         
         # Pass gpu_id ke display function
-        output_text = display_xiebo_output_real_time(process, gpu_id)
+        output_text = display_xiebo_output_real_time(process, gpu_id, timer=timer, monitor=monitor)
         
         return_code = process.wait()
+        timer.mark('t_exit')
+        result_blocks = watcher.stop()
+        monitor.stop()
+        
+        # Key yang ditemukan langsung dicatat ke ledger (fsync) sebelum bookkeeping lain
+        ledger.record_output(batch_id, gpu_id, output_text)
+        
+        # Proses dihentikan watchdog (stall): batch ditandai 'stalled' untuk relaunch
+        if monitor.stalled:
+            if batch_id is not None:
+                update_launch_status(batch_id, member_batches, 'stalled')
+            return watchdog.STALL_RETURN_CODE, {'found': False, 'stalled': True,
+                                                'timing': timer.finish(watchdog.STALL_RETURN_CODE)}
         found_info = parse_xiebo_output(output_text, gpu_prefix)
         
+        # File hasil (-o) terverifikasi menggantikan hasil scraping stdout (fallback)
+        if resultfile.apply(found_info, result_blocks) and not STOP_SEARCH_FLAG:
+            STOP_SEARCH_FLAG = True
+            safe_print(f"{gpu_prefix} 🚨 STOP_SEARCH_FLAG diaktifkan karena {len(found_info['found_keys'])} key terverifikasi di {result_path}")
+        
         if batch_id is not None:
             found_status = 'Yes' if (found_info['found_count'] > 0 or found_info['found']) else 'No'
             wif_key = found_info['wif_key'] if found_info['wif_key'] else ''
-            update_batch_status(batch_id, 'done', found_status, wif_key)
+            update_launch_status(batch_id, member_batches, 'done', found_status, wif_key, found_info)
+        
+        found_info['timing'] = timer.finish(return_code)
         
         # Summary Print
         with PRINT_LOCK:
@@ -311,75 +503,270 @@ def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
     except KeyboardInterrupt:
         safe_print(f"\n{gpu_prefix} ⚠️ Process Interrupted")
         if batch_id is not None:
-            update_batch_status(batch_id, 'interrupted')
+            update_launch_status(batch_id, member_batches, 'interrupted')
+        timer.finish(130)
         return 130, {'found': False}
     except Exception as e:
         safe_print(f"\n{gpu_prefix} ❌ Error: {e}")
         if batch_id is not None:
-            update_batch_status(batch_id, 'error')
+            update_launch_status(batch_id, member_batches, 'error')
+        timer.finish(1)
         return 1, {'found': False}
+    finally:
+        # Semua jalur (termasuk exception/Ctrl+C): xiebo tidak tertinggal di lockfile, thread watcher berhenti
+        if process is not None:
+            procgroup.release(process)
+        if watcher is not None:
+            watcher.stop()
+        if monitor is not None:
+            monitor.stop()
+
+def claim_next_launch():
+    """Mengambil launch berikutnya secara thread safe: batch tunggal atau gabungan batch aligned
+
+    Mengembalikan None jika batch ID berikutnya tidak ada di DB, [] jika semua batch
+    di jendela ini sudah done/inprogress, DB_UNAVAILABLE jika DB putus dan buffer kosong.
+    Selama DB tersedia batch launch diklaim atomic (claim_batches); status baris di buffer
+    hanya dipakai apa adanya saat DB putus.
+    """
+    global CURRENT_GLOBAL_BATCH_ID, PREFETCH_FAILURES
+    
+    with BATCH_ID_LOCK:
+        # Selama backoff tidak mencoba DB (connect timeout 30s memblokir semua worker)
+        db_available = time.time() >= PREFETCH_RETRY_AT
+        # Coordinator: klaim = lease yang di-heartbeat sepanjang run, isi ulang hanya saat buffer habis
+        low_water = 1 if COORDINATOR is not None else PREFETCH_LOW_WATER
+        if len(PREFETCH_BUFFER) < low_water:
+            if not db_available or refill_prefetch() is None:
+                db_available = False
+                if not PREFETCH_BUFFER:
+                    return DB_UNAVAILABLE
+        
+        if not PREFETCH_BUFFER:
+            return None
+        
+        # Ambil batch pending berurutan (ID tanpa celah) dari awal buffer
+        pending = []
+        while PREFETCH_BUFFER and len(pending) < coalesce.COALESCE_MAX_BATCHES:
+            row = PREFETCH_BUFFER[0]
+            status = (row.get('status') or '').strip()
+            if (status == 'done' or status == 'inprogress') and not row.get('claimed'):
+                if pending:
+                    break
+                PREFETCH_BUFFER.popleft()
+                CURRENT_GLOBAL_BATCH_ID = row['id'] + 1
+                continue
+            # Batch yang sudah diklaim host ini tidak dicampur dengan batch yang belum (klaim tidak melebar)
+            if pending and bool(row.get('claimed')) != bool(pending[0].get('claimed')):
+                break
+            pending.append(PREFETCH_BUFFER.popleft())
+        
+        if not pending:
+            return []
+        
+        # Coordinator sudah mengklaim batch untuk worker ini
+        if COORDINATOR is not None:
+            for row in pending:
+                row['claimed'] = True
+        
+        # DB tersedia: hanya batch yang menang klaim atomic yang dijalankan (host lain bisa sudah mengambilnya)
+        unclaimed = [row['id'] for row in pending if not row.get('claimed')]
+        if unclaimed and db_available:
+            with telemetry.timed('db'):
+                won = claim_batches(unclaimed)
+            if won is None:
+                # DB putus setelah prefetch: batch buffer dijalankan, status 'inprogress' lewat outbox
+                prefetch_failed()
+            else:
+                PREFETCH_FAILURES = 0
+                lost = [row for row in pending if not row.get('claimed') and row['id'] not in won]
+                for row in pending:
+                    if row['id'] in won:
+                        row['claimed'] = True
+                if lost:
+                    safe_print(f"⏭️  {len(lost)} batch(es) from {lost[0]['id']} already taken by another host, skipping")
+                pending = [row for row in pending if row.get('claimed')]
+                if not pending:
+                    CURRENT_GLOBAL_BATCH_ID = lost[-1]['id'] + 1
+                    return []
+        
+        launch = coalesce.plan_launches(pending)[0]
+        launch['claimed'] = all(row.get('claimed') for row in launch['batches'])
+        # Batch yang tidak masuk launch ini dikembalikan ke depan buffer
+        for row in reversed(pending[len(launch['batches']):]):
+            PREFETCH_BUFFER.appendleft(row)
+        CURRENT_GLOBAL_BATCH_ID = launch['batches'][-1]['id'] + 1
+        return launch
+
+def refill_prefetch():
+    """Menambah buffer dengan batch berikutnya dari DB (dipanggil dengan BATCH_ID_LOCK)
+
+    Mengembalikan jumlah batch yang ditambahkan, atau None jika DB tidak tersedia.
+    """
+    global PREFETCH_FAILURES
+    
+    next_id = PREFETCH_BUFFER[-1]['id'] + 1 if PREFETCH_BUFFER else CURRENT_GLOBAL_BATCH_ID
+    with telemetry.timed('db'):
+        if COORDINATOR is not None:
+            rows = COORDINATOR.claim(coordinator.CLAIM_BATCHES)
+        else:
+            rows = get_batches_from(next_id, PREFETCH_BATCHES)
+    
+    if rows is None:
+        prefetch_failed()
+        return None
+    
+    PREFETCH_FAILURES = 0
+    
+    # Coordinator memberi batch terbuka terendah milik worker ini, celah ID bukan akhir tabel
+    if COORDINATOR is not None:
+        PREFETCH_BUFFER.extend(rows)
+        return len(rows)
+    
+    added = 0
+    for row in rows:
+        # Celah ID dianggap akhir tabel, sama seperti sebelumnya
+        if row['id'] != next_id + added:
+            break
+        PREFETCH_BUFFER.append(row)
+        added += 1
+    return added
+
+def prefetch_failed():
+    """DB tidak tersedia: query berikutnya ditunda dengan backoff, worker memakai buffer"""
+    global PREFETCH_FAILURES, PREFETCH_RETRY_AT
+    
+    PREFETCH_FAILURES += 1
+    PREFETCH_RETRY_AT = time.time() + outbox.backoff_seconds(PREFETCH_FAILURES)
+    safe_print(f"📴 DB request failed, {len(PREFETCH_BUFFER)} batches buffered, "
+               f"next DB attempt in {outbox.backoff_seconds(PREFETCH_FAILURES)}s")
 
 def gpu_worker(gpu_id, address):
     """Worker function untuk setiap thread GPU"""
     global CURRENT_GLOBAL_BATCH_ID, STOP_SEARCH_FLAG
     
     batches_processed = 0
+    outage_attempts = 0
     
     while not STOP_SEARCH_FLAG:
-        # 1. Ambil Batch ID berikutnya secara aman (Thread Safe)
-        batch_id_to_process = -1
-        with BATCH_ID_LOCK:
-            batch_id_to_process = CURRENT_GLOBAL_BATCH_ID
-            CURRENT_GLOBAL_BATCH_ID += 1
-            
-        # Cek batas maksimal batch per run (global check bisa ditambahkan jika perlu)
-        # Disini kita loop terus sampai flag stop
-        
-        # 2. Ambil Data Batch dari DB
-        batch = get_batch_by_id(batch_id_to_process)
+        # Host lain melaporkan key ke coordinator: semua host berhenti
+        if COORDINATOR is not None and COORDINATOR.stop_requested:
+            STOP_SEARCH_FLAG = True
+            safe_print(f"[GPU {gpu_id}] 🚨 Coordinator reports a found key, stopping.")
+            break
         
-        if not batch:
-            safe_print(f"[GPU {gpu_id}] ❌ Batch ID {batch_id_to_process} not found in DB. Worker stopping.")
+        # 1. Launch yang stall didahulukan, lalu launch berikutnya secara aman (Thread Safe)
+        try:
+            launch = RETRY_QUEUE.get_nowait()
+        except queue.Empty:
+            launch = claim_next_launch()
+        telemetry.METRICS.set_queue_depth(RETRY_QUEUE.qsize())
+        
+        if launch is None:
+            if COORDINATOR is not None:
+                safe_print(f"[GPU {gpu_id}] ❌ No open batches left at the coordinator. Worker stopping.")
+            else:
+                safe_print(f"[GPU {gpu_id}] ❌ Batch ID {CURRENT_GLOBAL_BATCH_ID} not found in DB. Worker stopping.")
             break
-            
-        status = batch.get('status', '').strip()
         
-        # Skip jika sudah selesai atau sedang dikerjakan
-        if status == 'done' or status == 'inprogress':
-            # Jangan print skip terlalu banyak agar log bersih
-            if batch_id_to_process % 100 == 0: 
-                safe_print(f"[GPU {gpu_id}] Skipping ID {batch_id_to_process} (Status: {status})")
+        # DB putus dan buffer prefetch habis: tunggu dengan backoff, jangan hentikan GPU
+        if launch == DB_UNAVAILABLE:
+            outage_attempts += 1
+            wait_seconds = outbox.backoff_seconds(outage_attempts)
+            safe_print(f"[GPU {gpu_id}] 📴 DB unavailable and prefetch buffer empty, retrying in {wait_seconds}s")
+            time.sleep(wait_seconds)
             continue
-            
-        start_range = batch['start_range']
-        end_range = batch['end_range']
-        range_bits = calculate_range_bits(start_range, end_range)
+        outage_attempts = 0
         
-        # 3. Jalankan Xiebo
-        return_code, found_info = run_xiebo(gpu_id, start_range, range_bits, address, batch_id=batch_id_to_process)
+        # Semua batch di jendela ini sudah done/inprogress
+        if not launch:
+            continue
         
-        batches_processed += 1
+        members = launch['batches']
+        batch_id = members[0]['id']
+        start_range = launch['start_hex']
+        end_range = members[-1]['end_range']
+        range_bits = launch['bits'] if launch['bits'] is not None else calculate_range_bits(start_range, end_range)
+        
+        if len(members) > 1:
+            safe_print(f"[GPU {gpu_id}] 🔗 {coalesce.describe_launch(launch)}")
+        
+        # 2. Jalankan Xiebo
+        return_code, found_info = run_xiebo(gpu_id, start_range, range_bits, address, batch_id=batch_id,
+                                            member_batches=members if len(members) > 1 else None,
+                                            claimed=launch.get('claimed', False))
+        
+        # Watchdog menghentikan xiebo yang stall: relaunch dengan backoff atau alihkan ke GPU lain
+        if return_code == watchdog.STALL_RETURN_CODE:
+            launch['attempts'] = launch.get('attempts', 0) + 1
+            
+            if watchdog.GPU_HEALTH.record_stall(gpu_id):
+                safe_print(f"[GPU {gpu_id}] 🩺 GPU marked unhealthy after {watchdog.UNHEALTHY_AFTER_STALLS} stalls. "
+                           f"Rerouting {coalesce.describe_launch(launch)} to other GPUs.")
+                RETRY_QUEUE.put(launch)
+                break
+            
+            if launch['attempts'] > watchdog.MAX_RELAUNCH:
+                safe_print(f"[GPU {gpu_id}] ❌ {coalesce.describe_launch(launch)} stalled {launch['attempts']} times, "
+                           f"left as 'stalled' in DB")
+                continue
+            
+            backoff = watchdog.backoff_seconds(launch['attempts'])
+            safe_print(f"[GPU {gpu_id}] 🔁 Relaunching {coalesce.describe_launch(launch)} in {backoff}s "
+                       f"(attempt {launch['attempts']}/{watchdog.MAX_RELAUNCH})")
+            batchtiming.timed_sleep(backoff, found_info.get('timing'))
+            RETRY_QUEUE.put(launch)
+            continue
+        
+        watchdog.GPU_HEALTH.record_success(gpu_id)
+        telemetry.METRICS.observe_batch(gpu_id, len(members))
+        batches_processed += len(members)
         
         # Stop jika error fatal atau user stop
         if STOP_SEARCH_FLAG:
             break
             
         # Delay sedikit antar batch per GPU agar tidak terlalu spam request ke DB/Screen
-        time.sleep(1)
+        batchtiming.timed_sleep(1, found_info.get('timing'))
 
     safe_print(f"[GPU {gpu_id}] 🛑 Worker stopped. Processed {batches_processed} batches.")
 
 def main():
-    global STOP_SEARCH_FLAG, CURRENT_GLOBAL_BATCH_ID
+    global STOP_SEARCH_FLAG, CURRENT_GLOBAL_BATCH_ID, STATUS_OUTBOX, COORDINATOR
     
     STOP_SEARCH_FLAG = False
     
+    # Flag opsional: endpoint metrics lokal (lihat telemetry.py)
+    metrics_port = telemetry.extract_metrics_arg(sys.argv)
+    if metrics_port:
+        telemetry.start_server(metrics_port)
+    
+    # Flag opsional: tabel status per GPU, output mentah xiebo ke logs/ (lihat dashboard.py)
+    if dashboard.extract_dashboard_arg(sys.argv):
+        dashboard.start()
+    
+    # Flag opsional: batch diambil lewat coordinator HTTP, host tidak membuka koneksi SQL (lihat coordinator.py)
+    coordinator_url = coordinator.extract_coordinator_arg(sys.argv)
+    if coordinator_url:
+        COORDINATOR = coordinator.CoordinatorClient(coordinator_url)
+        ledger.register_sink('coordinator', COORDINATOR.report_sink)
+    else:
+        # Key yang ditemukan juga dikirim ke tabel ledger di DB (lihat ledger.py)
+        ledger.register_sink('db', ledger.db_sink(connect_db))
+    
+    # Update status DB lewat outbox lokal (tetap tercatat saat DB putus, dikirim ulang dengan backoff)
+    STATUS_OUTBOX = outbox.StatusOutbox('coordinator' if COORDINATOR is not None else DATABASE, apply_status_updates)
+    
     if len(sys.argv) < 2:
         print("Xiebo Multi-GPU Batch Runner")
         print("Usage:")
         print("  Multi-GPU DB: python3 bm.py --batch-db GPU_IDS START_ID ADDRESS")
         print("  Example:      python3 bm.py --batch-db 0,1,2,3 1000 13zpGr...")
         print("  Single Run:   python3 bm.py GPU_ID START_HEX RANGE_BITS ADDRESS")
+        print("  Metrics:      add --metrics [PORT] for http://127.0.0.1:PORT/metrics")
+        print("  Dashboard:    add --dashboard (per-GPU table, raw xiebo output in logs/)")
+        print(f"  DB outage:    workers run from a {PREFETCH_BATCHES}-batch prefetch buffer, status updates queue in {outbox.OUTBOX_PREFIX}_{DATABASE}.jsonl")
+        print("  Coordinator:  add --coordinator URL to --batch-db (no SQL access on this host, see coordinator.py)")
         sys.exit(1)
     
     # Mode Multi-GPU Database
@@ -393,6 +780,8 @@ def main():
         
         # Set Global Start ID
         CURRENT_GLOBAL_BATCH_ID = start_id
+        if COORDINATOR is not None:
+            COORDINATOR.after = start_id
         
         print(f"\n{'='*80}")
         print(f"🚀 MULTI-GPU BATCH MODE STARTED")
@@ -400,6 +789,8 @@ def main():
         print(f"GPUs Active : {gpu_ids}")
         print(f"Start ID    : {start_id}")
         print(f"Address     : {address}")
+        if COORDINATOR is not None:
+            print(f"Coordinator : {COORDINATOR.url} (worker {COORDINATOR.worker})")
         print(f"{'='*80}\n")
         
         threads = []
@@ -418,7 +809,23 @@ def main():
                 # Cek apakah semua thread masih hidup
                 alive_threads = [t for t in threads if t.is_alive()]
                 if not alive_threads:
+                    # Launch yang dialihkan dari GPU unhealthy dijalankan oleh GPU yang masih sehat
+                    healthy = watchdog.GPU_HEALTH.healthy_gpus(gpu_ids)
+                    if not RETRY_QUEUE.empty() and healthy and not STOP_SEARCH_FLAG:
+                        print(f"\n🔀 Rerouting {RETRY_QUEUE.qsize()} stalled launches to healthy GPUs {healthy}")
+                        threads = []
+                        for gpu in healthy:
+                            t = threading.Thread(target=gpu_worker, args=(gpu, address))
+                            t.daemon = True
+                            threads.append(t)
+                            t.start()
+                        continue
+                    
+                    if not RETRY_QUEUE.empty():
+                        print(f"\n🚨 All GPUs unhealthy: {RETRY_QUEUE.qsize()} launches left as 'stalled' in DB")
+                    
                     print("\nAll workers have finished.")
+                    watchdog.display_health(gpu_ids)
                     break
                 
                 if STOP_SEARCH_FLAG:
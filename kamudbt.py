@@ -4,23 +4,27 @@ import os
 import time
 import math
 import re
-import pyodbc
+import importlib.util
+import batchtiming
+import dashboard
+import ledger
+import resultfile
+import procgroup
 import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
-# Import untuk clear_output notebook
-try:
-    from IPython.display import clear_output, display, HTML
-    IN_NOTEBOOK = True
+# clear_output notebook: IPython hanya dicari (find_spec), di-import saat pertama kali clear
+IN_NOTEBOOK = importlib.util.find_spec("IPython") is not None
+if IN_NOTEBOOK:
     print("✅ Running in notebook environment - clear_output enabled")
-    # Inisialisasi tracking untuk output notebook
-    notebook_output_lines = 0
-    MAX_NOTEBOOK_LINES = 100  # Maksimal baris sebelum clear
-except ImportError:
-    IN_NOTEBOOK = False
+else:
     print("⚠️  Running in terminal environment - clear_output disabled")
 
+# Inisialisasi tracking untuk output notebook
+notebook_output_lines = 0
+MAX_NOTEBOOK_LINES = 100  # Maksimal baris sebelum clear
+
 # Konfigurasi database SQL Server
 SERVER = "benilapo-31088.portmap.host,31088"
 DATABASE = "puzzleB53"
@@ -43,7 +47,8 @@ def clear_notebook_output():
     """Membersihkan output notebook dengan cara yang lebih efektif"""
     global LAST_CLEAR_TIME, notebook_output_lines
     
-    if not IN_NOTEBOOK:
+    # Dashboard memperbarui satu tabel di tempat, clear_output akan menghapusnya
+    if not IN_NOTEBOOK or dashboard.ACTIVE is not None:
         return False
     
     current_time = time.time()
@@ -51,6 +56,7 @@ def clear_notebook_output():
     # Clear berdasarkan interval waktu ATAU jika terlalu banyak baris
     if current_time - LAST_CLEAR_TIME >= CLEAR_INTERVAL or notebook_output_lines >= MAX_NOTEBOOK_LINES:
         try:
+            from IPython.display import clear_output
             clear_output(wait=True)
             print(f"🧹 Output cleared at {time.strftime('%H:%M:%S')} | Interval: {CLEAR_INTERVAL}s")
             LAST_CLEAR_TIME = current_time
@@ -81,6 +87,8 @@ def print_notebook(text, end="\n"):
 def connect_db():
     """Membuat koneksi ke database SQL Server"""
     try:
+        # pyodbc di-import saat koneksi pertama (mode tanpa DB tidak butuh driver ODBC)
+        import pyodbc
         conn = pyodbc.connect(
             "DRIVER={ODBC Driver 17 for SQL Server};"
             f"SERVER={SERVER};"
@@ -315,8 +323,12 @@ def parse_xiebo_output(output_text):
     
     return found_info
 
-def display_xiebo_output_real_time(process, gpu_id=None):
+def display_xiebo_output_real_time(process, gpu_id=None, timer=None):
     """Menampilkan output xiebo secara real-time dengan manajemen output notebook"""
+    # Dashboard aktif: output mentah ke logs/gpu_<id>.log, status GPU ke tabel
+    if dashboard.ACTIVE is not None:
+        return dashboard.ACTIVE.pump(process, gpu_id, timer=timer)
+    
     prefix = f"GPU {gpu_id}: " if gpu_id is not None else ""
     
     # Bersihkan output sebelum menampilkan header
@@ -336,6 +348,8 @@ def display_xiebo_output_real_time(process, gpu_id=None):
         if output_line == '' and process.poll() is not None:
             break
         if output_line:
+            if timer is not None:
+                timer.feed(output_line)
             # Cek apakah perlu membersihkan output
             if IN_NOTEBOOK:
                 current_time = time.time()
@@ -417,6 +431,10 @@ def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
     cmd = ["./xiebo", "-gpuId", str(gpu_id), "-start", start_hex, 
            "-range", str(range_bits), address]
     
+    # Key yang ditemukan ditulis xiebo ke file hasil per batch (-o), stdout hanya untuk progress
+    result_path = resultfile.result_path(batch_id, gpu_id)
+    cmd += resultfile.output_args(result_path)
+    
     # Bersihkan output sebelum menampilkan header
     clear_notebook_output()
     
@@ -427,6 +445,10 @@ def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
     print_notebook(f"Batch ID: {batch_id if batch_id is not None else 'N/A'}")
     print_notebook(f"{'='*80}")
     
+    # Catat timestamp setiap fase batch (Popen, setup, scan, teardown, bookkeeping)
+    timer = batchtiming.BatchTimer(batch_id, gpu_id, start_hex, range_bits)
+    process = watcher = None
+    
     try:
         # Update status menjadi inprogress jika ada batch_id
         if batch_id is not None:
@@ -436,24 +458,39 @@ def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
         print_notebook(f"\n⏳ Launching xiebo process for GPU {gpu_id}...")
         
         # Gunakan Popen untuk mendapatkan output real-time
+        timer.mark('t_launch')
         process = subprocess.Popen(
-            cmd,
+            procgroup.command(cmd),
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
             text=True,
             bufsize=1,
-            universal_newlines=True
+            universal_newlines=True,
+            **procgroup.popen_kwargs()
         )
+        timer.mark('t_spawned')
+        procgroup.register(process, gpu_id, batch_id)
+        watcher = resultfile.ResultWatcher(result_path, batch_id, gpu_id, start_hex, range_bits).start()
         
         # Tampilkan output secara real-time
-        output_text = display_xiebo_output_real_time(process, gpu_id)
+        output_text = display_xiebo_output_real_time(process, gpu_id, timer=timer)
         
         # Tunggu proses selesai
         return_code = process.wait()
+        timer.mark('t_exit')
+        result_blocks = watcher.stop()
+        
+        # Key yang ditemukan langsung dicatat ke ledger (fsync) sebelum bookkeeping lain
+        ledger.record_output(batch_id, gpu_id, output_text)
         
         # Parse output untuk mencari private key
         found_info = parse_xiebo_output(output_text)
         
+        # File hasil (-o) terverifikasi menggantikan hasil scraping stdout (fallback)
+        if resultfile.apply(found_info, result_blocks) and not STOP_SEARCH_FLAG:
+            STOP_SEARCH_FLAG = True
+            print_notebook(f"🚨 STOP_SEARCH_FLAG diaktifkan karena {len(found_info['found_keys'])} key terverifikasi di {result_path}")
+        
         # Update status berdasarkan hasil
         if batch_id is not None:
             # Tentukan nilai 'found' berdasarkan found_count atau found status
@@ -470,6 +507,8 @@ def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
             # Update status di database
             update_batch_status(batch_id, 'done', found_status, wif_key)
         
+        found_info['timing'] = timer.finish(return_code)
+        
         # Tampilkan ringkasan hasil pencarian
         clear_notebook_output()
         print_notebook(f"\n{'='*80}")
@@ -524,6 +563,8 @@ def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
         if batch_id is not None:
             update_batch_status(batch_id, 'interrupted')
         
+        timer.finish(130)
+        
         return 130, {'found': False}
     except Exception as e:
         error_msg = str(e)
@@ -538,7 +579,15 @@ def run_xiebo(gpu_id, start_hex, range_bits, address, batch_id=None):
         if batch_id is not None:
             update_batch_status(batch_id, 'error')
         
+        timer.finish(1)
+        
         return 1, {'found': False}
+    finally:
+        # Semua jalur (termasuk exception/Ctrl+C): xiebo tidak tertinggal di lockfile, thread watcher berhenti
+        if process is not None:
+            procgroup.release(process)
+        if watcher is not None:
+            watcher.stop()
 
 # [Fungsi-fungsi lainnya tetap sama dengan penyesuaian print -> print_notebook]
 
@@ -549,6 +598,13 @@ def main():
     STOP_SEARCH_FLAG = False
     LAST_CLEAR_TIME = time.time()
     
+    # Flag opsional: satu tabel yang diperbarui di tempat, tanpa clear_output (lihat dashboard.py)
+    if dashboard.extract_dashboard_arg(sys.argv):
+        dashboard.start()
+    
+    # Key yang ditemukan juga dikirim ke tabel ledger di DB (lihat ledger.py)
+    ledger.register_sink('db', ledger.db_sink(connect_db))
+    
     # Parse arguments
     if len(sys.argv) < 2:
         clear_notebook_output()
@@ -560,6 +616,7 @@ def main():
         print_notebook("  Single run: python3 bmdb.py GPU_ID START_HEX RANGE_BITS ADDRESS")
         print_notebook("  Batch parallel from DB: python3 bmdb.py --batch-db-parallel GPU_IDS START_ID ADDRESS")
         print_notebook("  Batch sequential from DB: python3 bmdb.py --batch-db-sequential GPU_IDS START_ID ADDRESS")
+        print_notebook("  Dashboard: add --dashboard (per-GPU table, raw xiebo output in logs/)")
         print_notebook("\n⚠️  FEATURES:")
         print_notebook("  - Menggunakan database SQL Server")
         print_notebook("  - Baca range dari tabel Tbatch berdasarkan ID")
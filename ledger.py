@@ -0,0 +1,320 @@
+import os
+import sys
+import json
+import time
+import heapq
+import socket
+import atexit
+import hashlib
+import threading
+from datetime import datetime
+import multitarget
+
+# Konfigurasi ledger hasil (append-only + fsync, ditulis sebelum bookkeeping lain)
+LEDGER_FILE = "found_ledger.jsonl"          # Satu baris JSON per key yang ditemukan
+ACK_FILE = "found_ledger.acks"              # 'sink|key' per pengiriman yang berhasil
+SPOOL_DIR = "found_spool"                   # Salinan lokal: satu file per key
+DRIVE_MOUNT_PATH = "/content/drive"
+DRIVE_LEDGER_PATH = "/content/drive/MyDrive/found_ledger.jsonl"
+DB_TABLE = "dbo.Tledger"                    # Tabel ledger di SQL Server (idem_key unik)
+RETRY_BASE_SECONDS = 2                      # Backoff retry sink: 2s, 4s, 8s, ...
+RETRY_MAX_SECONDS = 300                     # Batas atas backoff
+FLUSH_TIMEOUT_SECONDS = 15                  # Waktu tunggu pengiriman tertunda saat exit
+
+LEDGER_LOCK = threading.Lock()
+
+def idempotency_key(block):
+    """Key stabil per private key: key yang sama dari batch/relaunch lain tidak dicatat dua kali"""
+    secret = block.get('hex') or block.get('wif_plain') or block.get('wif') or ''
+    return hashlib.sha256(f"{block.get('address', '')}|{secret}".encode()).hexdigest()[:32]
+
+def _fsync_append(path, lines):
+    """Append baris ke file lalu fsync (file dan direktori saat file baru dibuat)"""
+    created = not os.path.exists(path)
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+    try:
+        os.write(fd, ''.join(lines).encode())
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+    if created:
+        dir_fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+def read_entries(path=LEDGER_FILE):
+    """Semua entry ledger (baris rusak di akhir file diabaikan)"""
+    entries = []
+    if not os.path.exists(path):
+        return entries
+
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+    return entries
+
+def read_acks():
+    """Set (sink, key) yang sudah berhasil dikirim"""
+    acks = set()
+    if not os.path.exists(ACK_FILE):
+        return acks
+
+    with open(ACK_FILE, 'r') as f:
+        for line in f:
+            sink, _, key = line.strip().partition('|')
+            if key:
+                acks.add((sink, key))
+    return acks
+
+def spool_sink(entry):
+    """Salinan lokal per key (tmp + fsync + rename, idempotent)"""
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    path = os.path.join(SPOOL_DIR, f"{entry['key']}.json")
+    if os.path.exists(path):
+        return
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(entry, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def drive_sink(entry):
+    """Append ke ledger di Google Drive jika key belum ada"""
+    if not os.path.isdir(DRIVE_MOUNT_PATH):
+        raise OSError(f"Drive not mounted at {DRIVE_MOUNT_PATH}")
+
+    if any(existing.get('key') == entry['key'] for existing in read_entries(DRIVE_LEDGER_PATH)):
+        return
+    _fsync_append(DRIVE_LEDGER_PATH, [json.dumps(entry) + '\n'])
+
+def db_sink(connect):
+    """Sink SQL Server: INSERT ke DB_TABLE jika idem_key belum ada (connect = connect_db runner)"""
+    def sink(entry):
+        conn = connect()
+        if not conn:
+            raise ConnectionError("Database connection failed")
+
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                IF OBJECT_ID('{DB_TABLE}', 'U') IS NULL
+                CREATE TABLE {DB_TABLE} (
+                    idem_key VARCHAR(64) NOT NULL PRIMARY KEY,
+                    batch_id BIGINT NULL,
+                    gpu_id VARCHAR(20) NULL,
+                    target VARCHAR(100) NULL,
+                    address VARCHAR(100) NULL,
+                    wif VARCHAR(120) NULL,
+                    priv_hex VARCHAR(80) NULL,
+                    host VARCHAR(100) NULL,
+                    found_at DATETIME NOT NULL
+                )
+            """)
+            cursor.execute(f"""
+                IF NOT EXISTS (SELECT 1 FROM {DB_TABLE} WHERE idem_key = ?)
+                INSERT INTO {DB_TABLE} (idem_key, batch_id, gpu_id, target, address, wif, priv_hex, host, found_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (entry['key'], entry['key'], entry['batch_id'] or None, entry['gpu_id'], entry['target'],
+                  entry['address'], entry['wif'], entry['hex'], entry['host'], entry['timestamp']))
+            conn.commit()
+            cursor.close()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    return sink
+
+class FoundLedger:
+    """Ledger lokal + fan-out asinkron ke sink (spool, Drive, DB) dengan retry"""
+
+    def __init__(self):
+        self.sinks = {}
+        self.known_keys = set(entry.get('key') for entry in read_entries())
+        self.pending = []
+        self.sequence = 0
+        self.in_flight = 0
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        atexit.register(self.flush)
+
+    def register_sink(self, name, func):
+        """Menambah sink dan mengirim ulang entry yang belum ter-ack untuk sink ini"""
+        acks = read_acks()
+        with self.condition:
+            self.sinks[name] = func
+            for entry in read_entries():
+                if (name, entry.get('key')) not in acks:
+                    self._schedule(name, entry, 0, time.time())
+
+    def record(self, batch_id, gpu_id, blocks):
+        """Menulis key ke ledger (fsync) lalu menjadwalkan fan-out, mengembalikan entry baru"""
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        entries = []
+
+        with LEDGER_LOCK:
+            for block in blocks:
+                if not (block.get('wif') or block.get('hex')):
+                    continue
+                key = idempotency_key(block)
+                if key in self.known_keys:
+                    continue
+                entries.append({
+                    'key': key,
+                    'timestamp': timestamp,
+                    'batch_id': '' if batch_id is None else str(batch_id),
+                    'gpu_id': str(gpu_id),
+                    'target': block.get('target', ''),
+                    'address': block.get('address', ''),
+                    'wif': block.get('wif_plain', ''),
+                    'hex': block.get('hex', ''),
+                    'host': socket.gethostname()
+                })
+                # Blok dari file hasil (-o) membawa hasil verify_block
+                if 'verified' in block:
+                    entries[-1]['verified'] = block['verified']
+                    if block.get('problems'):
+                        entries[-1]['problems'] = block['problems']
+
+            if not entries:
+                return []
+
+            try:
+                _fsync_append(LEDGER_FILE, [json.dumps(entry) + '\n' for entry in entries])
+                self.known_keys.update(entry['key'] for entry in entries)
+                print(f"🔐 {len(entries)} found key(s) fsynced to {LEDGER_FILE}")
+            except Exception as e:
+                print(f"❌ Error writing {LEDGER_FILE}: {e} (continuing with sinks)")
+
+        with self.condition:
+            for entry in entries:
+                for name in self.sinks:
+                    self._schedule(name, entry, 0, time.time())
+
+        return entries
+
+    def _schedule(self, name, entry, attempt, due):
+        self.sequence += 1
+        self.in_flight += 1
+        heapq.heappush(self.pending, (due, self.sequence, name, entry, attempt))
+        self.condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.pending or self.pending[0][0] > time.time():
+                    timeout = self.pending[0][0] - time.time() if self.pending else None
+                    self.condition.wait(timeout)
+                _, _, name, entry, attempt = heapq.heappop(self.pending)
+                func = self.sinks.get(name)
+
+            try:
+                func(entry)
+                with LEDGER_LOCK:
+                    with open(ACK_FILE, 'a') as f:
+                        f.write(f"{name}|{entry['key']}\n")
+                with self.condition:
+                    self.in_flight -= 1
+                    self.condition.notify_all()
+            except Exception as e:
+                delay = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * (2 ** attempt))
+                print(f"⚠️ Ledger sink '{name}' failed for key {entry['key'][:8]}: {e} (retry in {delay}s)")
+                with self.condition:
+                    self.in_flight -= 1
+                    self._schedule(name, entry, attempt + 1, time.time() + delay)
+
+    def flush(self, timeout=FLUSH_TIMEOUT_SECONDS):
+        """Menunggu pengiriman yang jatuh tempo; sisanya dikirim ulang pada start berikutnya"""
+        deadline_at = time.time() + timeout
+        with self.condition:
+            while self.in_flight and time.time() < deadline_at:
+                if self.pending and self.pending[0][0] > deadline_at:
+                    break
+                self.condition.wait(max(0.0, min(1.0, deadline_at - time.time())))
+            return self.in_flight == 0
+
+# Ledger bersama untuk semua worker dalam satu proses (dibuat saat pertama dipakai)
+LEDGER = None
+
+def get_ledger():
+    """Ledger proses ini dengan sink default (spool lokal, Drive jika ter-mount)"""
+    global LEDGER
+    with LEDGER_LOCK:
+        if LEDGER is None:
+            LEDGER = FoundLedger()
+            created = True
+        else:
+            created = False
+
+    if created:
+        LEDGER.register_sink('spool', spool_sink)
+        if os.path.isdir(DRIVE_MOUNT_PATH):
+            LEDGER.register_sink('drive', drive_sink)
+    return LEDGER
+
+def register_sink(name, func):
+    get_ledger().register_sink(name, func)
+
+def record_output(batch_id, gpu_id, output_text):
+    """Parse output xiebo dan catat setiap key ke ledger (dipanggil sebelum update status)"""
+    if 'priv (' not in output_text.lower():
+        return []
+    try:
+        return get_ledger().record(batch_id, gpu_id, multitarget.parse_found_blocks(output_text))
+    except Exception as e:
+        print(f"❌ Error recording found keys in ledger: {e}")
+        return []
+
+def display_ledger():
+    entries = read_entries()
+    acks = read_acks()
+    sinks = sorted(set(sink for sink, _ in acks) | {'spool'})
+
+    print(f"\n{'='*60}")
+    print(f"🔐 FOUND LEDGER ({LEDGER_FILE}) - {len(entries)} key(s)")
+    print(f"{'='*60}")
+    for entry in entries:
+        delivered = ', '.join(sink for sink in sinks if (sink, entry.get('key')) in acks) or '-'
+        print(f"{entry.get('timestamp')} batch {entry.get('batch_id') or '-'} GPU {entry.get('gpu_id')}")
+        print(f"   Target: {entry.get('target') or entry.get('address')}")
+        print(f"   WIF: {entry.get('wif')}")
+        print(f"   HEX: {entry.get('hex')}")
+        if entry.get('verified') is False:
+            print(f"   ⚠️ Unverified: {', '.join(entry.get('problems', [])) or 'failed verification'}")
+        print(f"   Delivered: {delivered}")
+    print(f"{'='*60}")
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ("--show", "--replay"):
+        print("Xiebo Found-Results Ledger")
+        print("Usage:")
+        print("  Show ledger:   python3 ledger.py --show")
+        print("  Replay sinks:  python3 ledger.py --replay [--db]")
+        print(f"  Runners write {LEDGER_FILE} (fsync) before any status update, then fan out to "
+              f"{SPOOL_DIR}/, Drive and {DB_TABLE}")
+        sys.exit(1)
+
+    if sys.argv[1] == "--show":
+        display_ledger()
+        sys.exit(0)
+
+    ledger = get_ledger()
+    if "--db" in sys.argv:
+        import kamudb
+        ledger.register_sink('db', db_sink(kamudb.connect_db))
+    ok = ledger.flush()
+    print(f"{'✅ All ledger entries delivered' if ok else '⚠️ Some deliveries still pending (see retries above)'}")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
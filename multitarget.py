@@ -0,0 +1,190 @@
+import os
+import sys
+import csv
+import hashlib
+import threading
+from datetime import datetime
+
+# Konfigurasi multi-target (beberapa address dalam satu scan via 'xiebo -i inputfile')
+TARGET_FILE_PREFIX = "targets_"    # File input: targets_<hash>.txt (satu address per baris)
+FOUND_FILE = "foundkeys.txt"       # Semua key yang ditemukan, satu baris per target
+
+FOUND_COLUMNS = ['timestamp', 'batch_id', 'gpu_id', 'target', 'address', 'wif', 'hex']
+
+# State target untuk run yang sedang berjalan
+ACTIVE_TARGETS = []
+FOUND_TARGETS = {}
+TARGETS_LOCK = threading.Lock()
+
+def parse_targets(address_arg):
+    """Parse argumen address: 'addr', 'addr1,addr2,...' atau '@file' (satu address per baris)"""
+    address_arg = (address_arg or '').strip()
+
+    if address_arg.startswith('@'):
+        addresses = []
+        with open(address_arg[1:], 'r') as f:
+            for line in f:
+                line = line.split('#', 1)[0].strip()
+                if line:
+                    addresses.append(line)
+    else:
+        addresses = [a.strip() for a in address_arg.split(',') if a.strip()]
+
+    # Hapus duplikat tapi pertahankan urutan
+    unique = []
+    for address in addresses:
+        if address not in unique:
+            unique.append(address)
+
+    return unique
+
+def is_multi_target(address_arg):
+    """True jika argumen address berisi lebih dari satu target"""
+    return len(parse_targets(address_arg)) > 1
+
+def write_input_file(addresses):
+    """Menulis file input xiebo sekali per set target, nama file dari hash daftar address"""
+    content = ''.join(f"{address}\n" for address in addresses)
+    digest = hashlib.sha1(content.encode()).hexdigest()[:10]
+    path = f"{TARGET_FILE_PREFIX}{digest}.txt"
+
+    if not os.path.exists(path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    return path
+
+def target_args(address_arg):
+    """Argumen xiebo untuk target: address positional (1 target) atau '-i inputfile' (multi)"""
+    addresses = parse_targets(address_arg)
+    if len(addresses) <= 1:
+        return [addresses[0] if addresses else address_arg]
+    return ["-i", write_input_file(addresses)]
+
+def activate(address_arg):
+    """Menetapkan target untuk run ini, mengembalikan daftar address"""
+    global ACTIVE_TARGETS, FOUND_TARGETS
+    with TARGETS_LOCK:
+        ACTIVE_TARGETS = parse_targets(address_arg)
+        FOUND_TARGETS = {}
+    return ACTIVE_TARGETS
+
+def parse_found_blocks(output_text):
+    """Parse blok hasil xiebo (Public Addr / Priv (WIF) / Priv (HEX)) menjadi list key"""
+    blocks = []
+    current = {}
+
+    fields = (
+        ('public addr:', 'address'),
+        ('priv (wif):', 'wif'),
+        ('priv (hex):', 'hex'),
+    )
+
+    for line in output_text.split('\n'):
+        stripped = line.strip()
+        lower = stripped.lower()
+
+        for marker, field in fields:
+            if lower.startswith(marker):
+                value = stripped[len(marker):].strip()
+                # Field yang sama muncul lagi berarti blok key berikutnya
+                if field in current:
+                    blocks.append(current)
+                    current = {}
+                current[field] = value
+                break
+
+    if current:
+        blocks.append(current)
+
+    for block in blocks:
+        block.setdefault('address', '')
+        block.setdefault('wif', '')
+        block.setdefault('hex', '')
+        # WIF dari xiebo berformat 'p2pkh:<wif>'
+        block['wif_plain'] = block['wif'].split(':', 1)[-1] if block['wif'] else ''
+        block['target'] = attribute_target(block['address'])
+
+    return blocks
+
+def attribute_target(address):
+    """Mencocokkan address hasil xiebo dengan target aktif"""
+    with TARGETS_LOCK:
+        targets = list(ACTIVE_TARGETS)
+
+    if address:
+        for target in targets:
+            # Address bech32 case-insensitive, base58 case-sensitive
+            if target == address or (target.lower().startswith('bc1') and target.lower() == address.lower()):
+                return target
+
+    # Tanpa 'Public Addr' hanya bisa diatribusikan jika targetnya tunggal
+    if len(targets) == 1:
+        return targets[0]
+
+    return address or ''
+
+def append_found_keys(batch_id, gpu_id, blocks):
+    """Menyimpan setiap key yang ditemukan beserta targetnya ke file found"""
+    try:
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with TARGETS_LOCK:
+            write_header = not os.path.exists(FOUND_FILE) or os.path.getsize(FOUND_FILE) == 0
+            with open(FOUND_FILE, 'a', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=FOUND_COLUMNS, delimiter='|')
+                if write_header:
+                    writer.writeheader()
+                for block in blocks:
+                    writer.writerow({
+                        'timestamp': timestamp,
+                        'batch_id': '' if batch_id is None else str(batch_id),
+                        'gpu_id': str(gpu_id),
+                        'target': block.get('target', ''),
+                        'address': block.get('address', ''),
+                        'wif': block.get('wif_plain', ''),
+                        'hex': block.get('hex', '')
+                    })
+    except Exception as e:
+        print(f"❌ Error writing found keys: {e}")
+
+def record_found(blocks):
+    """Mencatat key yang ditemukan, mengembalikan block untuk target yang baru ditemukan"""
+    newly_found = []
+    with TARGETS_LOCK:
+        for block in blocks:
+            target = block.get('target')
+            if target and target not in FOUND_TARGETS:
+                FOUND_TARGETS[target] = block
+                newly_found.append(block)
+    return newly_found
+
+def all_targets_found():
+    """True jika semua target aktif sudah ditemukan"""
+    with TARGETS_LOCK:
+        return bool(ACTIVE_TARGETS) and all(t in FOUND_TARGETS for t in ACTIVE_TARGETS)
+
+def remaining_targets():
+    """Daftar target yang belum ditemukan"""
+    with TARGETS_LOCK:
+        return [t for t in ACTIVE_TARGETS if t not in FOUND_TARGETS]
+
+def main():
+    if len(sys.argv) < 2:
+        print("Xiebo Multi-Target Helper")
+        print("Usage:")
+        print("  Write input file: python3 multitarget.py ADDR1,ADDR2,... | @address_file")
+        sys.exit(1)
+
+    addresses = parse_targets(sys.argv[1])
+    if len(addresses) < 2:
+        print(f"Single target: {addresses[0] if addresses else '-'} (passed positionally to xiebo)")
+        sys.exit(0)
+
+    path = write_input_file(addresses)
+    print(f"✅ {len(addresses)} targets written to {path}")
+    print(f"   xiebo args: -i {path}")
+
+if __name__ == "__main__":
+    main()
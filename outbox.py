@@ -0,0 +1,183 @@
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+
+# Konfigurasi outbox status (update status DB disimpan lokal dulu, dikirim saat DB tersedia)
+OUTBOX_PREFIX = "status_outbox"    # status_outbox_<database>.jsonl + .ack
+RETRY_BASE_SECONDS = 2             # Backoff saat DB tidak tersedia: 2s, 4s, 8s, ...
+RETRY_MAX_SECONDS = 120            # Batas atas backoff
+DRAIN_BATCH = 500                  # Maksimal update per executemany
+FLUSH_TIMEOUT_SECONDS = 30         # Waktu tunggu pengiriman tertunda saat exit
+
+def backoff_seconds(attempt):
+    """Jeda sebelum percobaan ke-N (exponential backoff)"""
+    return min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * (2 ** max(0, attempt - 1)))
+
+def _fsync_append(path, lines):
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, ''.join(lines).encode())
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+class StatusOutbox:
+    """Outbox tahan crash: update status ditulis ke file (fsync), thread drain mengirim ke DB dengan backoff"""
+
+    def __init__(self, name, apply_updates):
+        self.path = f"{OUTBOX_PREFIX}_{name}.jsonl"
+        self.ack_path = f"{OUTBOX_PREFIX}_{name}.ack"
+        self.apply_updates = apply_updates
+        self.condition = threading.Condition()
+        self.acked_seq = self._read_ack()
+        self.pending = [entry for entry in self._read_entries() if entry['seq'] > self.acked_seq]
+        self.seq = max([self.acked_seq] + [entry['seq'] for entry in self.pending])
+        self.failures = 0
+        self.online = True
+        self.retry_at = 0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        atexit.register(self.flush)
+
+        if self.pending:
+            print(f"📮 {len(self.pending)} status update(s) pending in {self.path} from previous run")
+
+    def _read_ack(self):
+        try:
+            with open(self.ack_path, 'r') as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _read_entries(self):
+        entries = []
+        if not os.path.exists(self.path):
+            return entries
+
+        with open(self.path, 'r') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+        return entries
+
+    def _write_ack(self, seq):
+        tmp_path = f"{self.ack_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(str(seq))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.ack_path)
+
+    def put(self, updates):
+        """Menyimpan list (batch_id, status, found, wif) ke outbox, dikirim ke DB secara asinkron"""
+        with self.condition:
+            entries = []
+            for batch_id, status, found, wif in updates:
+                self.seq += 1
+                entries.append({'seq': self.seq, 'batch_id': batch_id, 'status': status,
+                                'found': found or '', 'wif': wif or ''})
+            try:
+                _fsync_append(self.path, [json.dumps(entry) + '\n' for entry in entries])
+            except Exception as e:
+                print(f"⚠️ Error writing {self.path}: {e} (update kept in memory)")
+            self.pending.extend(entries)
+            self.condition.notify_all()
+        return True
+
+    def depth(self):
+        with self.condition:
+            return len(self.pending)
+
+    def _run(self):
+        while True:
+            with self.condition:
+                # Saat DB tidak tersedia, update baru tidak mempercepat retry
+                while not self.pending or time.time() < self.retry_at:
+                    self.condition.wait(max(0.05, self.retry_at - time.time()) if self.pending else None)
+                batch = self.pending[:DRAIN_BATCH]
+
+            # Hanya status terakhir per batch yang dikirim (inprogress -> done cukup 'done')
+            latest = {}
+            for entry in batch:
+                latest[entry['batch_id']] = entry
+            updates = [(e['batch_id'], e['status'], e['found'], e['wif'])
+                       for e in sorted(latest.values(), key=lambda e: e['seq'])]
+
+            try:
+                ok = self.apply_updates(updates)
+            except Exception as e:
+                print(f"⚠️ Outbox apply error: {e}")
+                ok = False
+
+            if ok:
+                last_seq = batch[-1]['seq']
+                with self.condition:
+                    self.pending = self.pending[len(batch):]
+                    self.acked_seq = last_seq
+                    self._write_ack(last_seq)
+                    if not self.pending:
+                        # Semua terkirim: outbox dikosongkan, seq tetap lanjut lewat file ack
+                        open(self.path, 'w').close()
+                    if not self.online:
+                        print(f"✅ Database reachable again, status outbox drained up to #{last_seq}")
+                    self.online = True
+                    self.failures = 0
+                    self.condition.notify_all()
+                continue
+
+            with self.condition:
+                self.failures += 1
+                self.online = False
+                delay = backoff_seconds(self.failures)
+                self.retry_at = time.time() + delay
+                print(f"📴 Status outbox: DB unavailable, {len(self.pending)} update(s) queued, retry in {delay}s")
+
+    def flush(self, timeout=FLUSH_TIMEOUT_SECONDS):
+        """Menunggu outbox kosong; sisanya dikirim pada run berikutnya"""
+        deadline_at = time.time() + timeout
+        with self.condition:
+            while self.pending and time.time() < deadline_at:
+                self.condition.wait(max(0.0, min(1.0, deadline_at - time.time())))
+            if self.pending:
+                print(f"📮 {len(self.pending)} status update(s) left in {self.path}, sent on next run")
+            return not self.pending
+
+def main():
+    if len(sys.argv) < 2:
+        print("Xiebo Status Outbox")
+        print("Usage:")
+        print("  Show pending updates: python3 outbox.py DATABASE")
+        print(f"  Runners queue status updates in {OUTBOX_PREFIX}_<database>.jsonl and drain them "
+              f"with {RETRY_BASE_SECONDS}s..{RETRY_MAX_SECONDS}s backoff")
+        sys.exit(1)
+
+    name = sys.argv[1]
+    path = f"{OUTBOX_PREFIX}_{name}.jsonl"
+    ack_path = f"{OUTBOX_PREFIX}_{name}.ack"
+    acked = 0
+    if os.path.exists(ack_path):
+        with open(ack_path, 'r') as f:
+            acked = int(f.read().strip() or 0)
+
+    pending = []
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry['seq'] > acked:
+                    pending.append(entry)
+
+    print(f"📮 {path}: {len(pending)} pending update(s), acked up to #{acked}")
+    for entry in pending[-20:]:
+        print(f"   #{entry['seq']} batch {entry['batch_id']} -> {entry['status']} {entry['found']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import sys
+import hashlib
+from functools import lru_cache
+
+# Konfigurasi permutasi batch (Feistel + cycle walking, tanpa menyimpan daftar batch)
+FEISTEL_ROUNDS = 6    # Jumlah ronde Feistel
+MIN_HALF_BITS = 2     # Domain minimal 2^4
+
+class FeistelPermutation:
+    """Permutasi terkunci atas [0, size): nomor urut -> indeks batch dalam O(1)"""
+
+    def __init__(self, size, key):
+        if size <= 0:
+            raise ValueError("Permutation size must be positive")
+
+        self.size = size
+        bits = max(2 * MIN_HALF_BITS, (size - 1).bit_length())
+        # Domain Feistel seimbang 2^(2*half) >= size, cycle walking untuk nilai di luar range
+        self.half_bits = (bits + 1) // 2
+        self.half_mask = (1 << self.half_bits) - 1
+        self.round_keys = [
+            hashlib.sha256(f"{key}|{size}|{r}".encode()).digest()
+            for r in range(FEISTEL_ROUNDS)
+        ]
+
+    def _round(self, value, r):
+        digest = hashlib.blake2b(value.to_bytes(16, 'big'), key=self.round_keys[r], digest_size=16).digest()
+        return int.from_bytes(digest, 'big') & self.half_mask
+
+    def _encrypt(self, value):
+        left = value >> self.half_bits
+        right = value & self.half_mask
+        for r in range(FEISTEL_ROUNDS):
+            left, right = right, left ^ self._round(right, r)
+        return (left << self.half_bits) | right
+
+    def _decrypt(self, value):
+        left = value >> self.half_bits
+        right = value & self.half_mask
+        for r in reversed(range(FEISTEL_ROUNDS)):
+            left, right = right ^ self._round(left, r), left
+        return (left << self.half_bits) | right
+
+    def forward(self, seq):
+        """Nomor urut -> indeks batch"""
+        if not 0 <= seq < self.size:
+            raise ValueError(f"Sequence {seq} outside [0, {self.size})")
+        value = self._encrypt(seq)
+        while value >= self.size:
+            value = self._encrypt(value)
+        return value
+
+    def inverse(self, index):
+        """Indeks batch -> nomor urut (untuk audit/resume)"""
+        if not 0 <= index < self.size:
+            raise ValueError(f"Index {index} outside [0, {self.size})")
+        value = self._decrypt(index)
+        while value >= self.size:
+            value = self._decrypt(value)
+        return value
+
+@lru_cache(maxsize=8)
+def get_permutation(size, key):
+    return FeistelPermutation(size, key)
+
+def batch_index(seq, total_batches, key):
+    """Indeks batch untuk nomor urut seq (key kosong = berurutan)"""
+    if not key:
+        return seq
+    return get_permutation(total_batches, str(key)).forward(seq)
+
+def batch_sequence(index, total_batches, key):
+    """Nomor urut untuk indeks batch (kebalikan batch_index)"""
+    if not key:
+        return index
+    return get_permutation(total_batches, str(key)).inverse(index)
+
+def verify(total_batches, key):
+    """Memastikan permutasi bijektif (hanya untuk ukuran kecil)"""
+    seen = set()
+    for seq in range(total_batches):
+        index = batch_index(seq, total_batches, key)
+        if index in seen or batch_sequence(index, total_batches, key) != seq:
+            return False
+        seen.add(index)
+    return len(seen) == total_batches
+
+def main():
+    if len(sys.argv) < 3:
+        print("Xiebo Batch Order Permutation")
+        print("Usage:")
+        print("  Show order:  python3 permute.py KEY TOTAL_BATCHES [COUNT] [FROM_SEQ]")
+        print("  Verify:      python3 permute.py --verify KEY TOTAL_BATCHES")
+        print("  Use in runner: python3 bm.py --batch ... --shuffle KEY")
+        sys.exit(1)
+
+    if sys.argv[1] == "--verify":
+        key = sys.argv[2]
+        total = int(sys.argv[3])
+        ok = verify(total, key)
+        print(f"{'✅' if ok else '❌'} Permutation over {total:,} batches with key '{key}': "
+              f"{'bijective' if ok else 'NOT bijective'}")
+        sys.exit(0 if ok else 1)
+
+    key = sys.argv[1]
+    total = int(sys.argv[2])
+    count = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    first = int(sys.argv[4]) if len(sys.argv) > 4 else 0
+
+    print(f"{'Seq':>12} -> {'Batch index':>12}")
+    for seq in range(first, min(first + count, total)):
+        print(f"{seq:>12} -> {batch_index(seq, total, key):>12}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+import os
+import sys
+import json
+import time
+import ctypes
+import shutil
+import signal
+import atexit
+import subprocess
+import threading
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Konfigurasi manajemen proses xiebo (process group sendiri + parent-death signal + lockfile PID)
+CHILDREN_FILE = "xiebo_children.json"   # PID xiebo yang sedang berjalan per supervisor
+LOCK_FILE = "xiebo_children.lock"       # flock untuk read-modify-write CHILDREN_FILE
+KILL_GRACE_SECONDS = 10                 # Jeda antara SIGTERM dan SIGKILL saat reap
+PR_SET_PDEATHSIG = 1                    # prctl(2): sinyal ke child saat thread pembuatnya mati
+XIEBO_NAMES = ('xiebo', 'fake_xiebo.py')
+
+# Exec wrapper: PDEATHSIG dipasang di proses baru lalu exec xiebo (PID sama, sinyal tetap terpasang
+# setelah exec). Tidak memakai preexec_fn: kode Python di child hasil fork bisa deadlock jika thread
+# lain (actor, ledger, outbox, telemetry) sedang memegang lock saat fork. setpriv (util-linux >= 2.33)
+# dipakai jika ada (~2 ms), selain itu interpreter Python kecil di bawah (~20-100 ms per launch).
+SETPRIV_ARGS = ["--pdeathsig", "KILL", "--"]
+PDEATHSIG_WRAPPER = (
+    "import os, sys, ctypes\n"
+    f"ctypes.CDLL(None).prctl({PR_SET_PDEATHSIG}, {int(signal.SIGKILL)}, 0, 0, 0)\n"
+    "if os.getppid() != int(sys.argv[1]):\n"
+    "    os._exit(1)\n"
+    "try:\n"
+    "    os.execvp(sys.argv[2], sys.argv[2:])\n"
+    "except OSError as e:\n"
+    "    sys.stderr.write(f'cannot exec {sys.argv[2]}: {e}\\n')\n"
+    "    os._exit(127)\n"
+)
+
+IS_LINUX = sys.platform.startswith('linux')
+
+try:
+    _LIBC = ctypes.CDLL(None, use_errno=True) if IS_LINUX else None
+except OSError:
+    _LIBC = None
+
+_LOCK = threading.Lock()
+_CHILDREN = {}          # pid -> Popen milik proses ini
+_CHILD_BATCH = {}       # pid -> batch_id launch tersebut
+_REAPED = False         # Orphan dari sesi sebelumnya cukup di-reap sekali per proses
+_WRAPPER = None         # Prefix command exec wrapper (dicek sekali per proses)
+
+def proc_start_time(pid):
+    """Start time proses dari /proc (membedakan PID yang dipakai ulang), None jika tidak ada"""
+    try:
+        with open(f"/proc/{pid}/stat", 'r') as f:
+            stat = f.read()
+        # Field setelah '(comm)': state ppid ... starttime adalah field ke-22
+        return int(stat.rsplit(')', 1)[1].split()[19])
+    except (OSError, IndexError, ValueError):
+        return None
+
+def proc_ppid(pid):
+    try:
+        with open(f"/proc/{pid}/stat", 'r') as f:
+            return int(f.read().rsplit(')', 1)[1].split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+
+def proc_cmdline(pid):
+    try:
+        with open(f"/proc/{pid}/cmdline", 'rb') as f:
+            return [arg.decode(errors='replace') for arg in f.read().split(b'\0') if arg]
+    except OSError:
+        return []
+
+def is_xiebo(cmdline):
+    """xiebo langsung atau lewat interpreter (fake xiebo benchmark)"""
+    return any(os.path.basename(arg) in XIEBO_NAMES for arg in cmdline[:2]) and "-gpuId" in cmdline
+
+def is_alive(pid, start_time):
+    return start_time is not None and proc_start_time(pid) == start_time
+
+def command(cmd):
+    """Command xiebo lewat exec wrapper PDEATHSIG di Linux: xiebo ikut mati jika supervisor mati (termasuk SIGKILL)
+
+    PDEATHSIG terikat ke thread pembuat child, jadi Popen harus dipanggil dari thread yang
+    menunggu proses tersebut selesai (pola run_xiebo di semua runner). Wrapper Python keluar
+    tanpa exec jika supervisor sudah mati sebelum prctl terpasang; dengan setpriv, xiebo yang
+    lolos di jendela itu di-reap oleh runner berikutnya di direktori ini.
+    """
+    if not IS_LINUX:
+        return list(cmd)
+    return _wrapper() + list(cmd)
+
+def _wrapper():
+    global _WRAPPER
+    with _LOCK:
+        if _WRAPPER is None:
+            setpriv = shutil.which("setpriv")
+            try:
+                usable = setpriv is not None and subprocess.run(
+                    [setpriv] + SETPRIV_ARGS + ["true"], capture_output=True, timeout=10).returncode == 0
+            except (OSError, subprocess.SubprocessError):
+                usable = False
+            if usable:
+                _WRAPPER = [setpriv] + SETPRIV_ARGS
+            elif _LIBC is not None:
+                _WRAPPER = [sys.executable, "-S", "-c", PDEATHSIG_WRAPPER, str(os.getpid())]
+            else:
+                _WRAPPER = []
+        return list(_WRAPPER)
+
+def popen_kwargs():
+    """Argumen Popen tambahan untuk xiebo: session/process group sendiri (dipakai bersama command())
+
+    Panggilan pertama me-reap orphan dari sesi sebelumnya agar GPU tidak dipakai dua proses.
+    """
+    global _REAPED
+    with _LOCK:
+        reap = not _REAPED
+        _REAPED = True
+    if reap:
+        reap_orphans()
+
+    if os.name != 'posix':
+        return {}
+    return {'start_new_session': True}
+
+class _FileLock:
+    def __enter__(self):
+        self.f = open(LOCK_FILE, 'a')
+        if fcntl is not None:
+            fcntl.flock(self.f, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self.f, fcntl.LOCK_UN)
+        self.f.close()
+
+def read_children():
+    if not os.path.exists(CHILDREN_FILE):
+        return {}
+    try:
+        with open(CHILDREN_FILE, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write_children(entries):
+    tmp_path = f"{CHILDREN_FILE}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(entries, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, CHILDREN_FILE)
+
+def register(process, gpu_id, batch_id=None):
+    """Mencatat child di lockfile (dipanggil tepat setelah Popen)"""
+    with _LOCK:
+        _CHILDREN[process.pid] = process
+        _CHILD_BATCH[process.pid] = batch_id
+    try:
+        with _LOCK, _FileLock():
+            entries = read_children()
+            entries[str(process.pid)] = {
+                'start_time': proc_start_time(process.pid),
+                'gpu_id': str(gpu_id),
+                'batch_id': '' if batch_id is None else str(batch_id),
+                'owner': os.getpid(),
+                'owner_start_time': proc_start_time(os.getpid()),
+                'started': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            }
+            _write_children(entries)
+    except Exception as e:
+        print(f"⚠️ Error recording xiebo pid {process.pid} in {CHILDREN_FILE}: {e}")
+
+def unregister(process):
+    """Menghapus child dari lockfile setelah proses selesai"""
+    with _LOCK:
+        _CHILDREN.pop(process.pid, None)
+        _CHILD_BATCH.pop(process.pid, None)
+    try:
+        with _LOCK, _FileLock():
+            entries = read_children()
+            if entries.pop(str(process.pid), None) is not None:
+                _write_children(entries)
+    except Exception as e:
+        print(f"⚠️ Error removing xiebo pid {process.pid} from {CHILDREN_FILE}: {e}")
+
+def release(process):
+    """Akhir run_xiebo (normal, exception, Ctrl+C): child yang masih jalan dihentikan lalu di-unregister
+
+    Child yang tidak berhenti dalam KILL_GRACE_SECONDS tetap tercatat (dihentikan saat exit/reap).
+    """
+    if process.poll() is None:
+        try:
+            signal_group(process, signal.SIGTERM)
+            process.wait(timeout=KILL_GRACE_SECONDS)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"⚠️ xiebo pid {process.pid} still running after SIGTERM: {e}")
+            return
+    unregister(process)
+
+def children_for(batch_ids):
+    """Proses xiebo milik proses ini yang sedang menjalankan salah satu batch tersebut"""
+    batch_ids = {str(batch_id) for batch_id in batch_ids}
+    with _LOCK:
+        return [process for pid, process in _CHILDREN.items()
+                if str(_CHILD_BATCH.get(pid)) in batch_ids and process.poll() is None]
+
+def signal_group(process, sig):
+    """Sinyal ke seluruh process group child (wrapper shell + xiebo), fallback ke proses saja"""
+    if os.name == 'posix':
+        try:
+            if os.getpgid(process.pid) == process.pid:
+                os.killpg(process.pid, sig)
+                return
+        except OSError:
+            pass
+    process.send_signal(sig)
+
+def _kill_orphan(pid, start_time):
+    """SIGTERM ke process group orphan, SIGKILL jika masih hidup setelah grace"""
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        try:
+            pgid = os.getpgid(pid)
+            if pgid == pid:
+                os.killpg(pgid, sig)
+            else:
+                os.kill(pid, sig)
+        except OSError:
+            return True
+        deadline_at = time.time() + KILL_GRACE_SECONDS
+        while time.time() < deadline_at:
+            if not is_alive(pid, start_time):
+                return True
+            time.sleep(0.1)
+    return not is_alive(pid, start_time)
+
+def proc_cwd(pid):
+    try:
+        return os.path.realpath(os.readlink(f"/proc/{pid}/cwd"))
+    except OSError:
+        return None
+
+def find_orphans():
+    """xiebo tanpa supervisor: owner di lockfile sudah mati, atau tidak tercatat, parent-nya init,
+    dan berjalan di direktori kerja ini (xiebo campaign lain atau run manual dengan nohup tidak disentuh)"""
+    orphans = {}
+    entries = read_children()
+    for pid_text, entry in entries.items():
+        pid = int(pid_text)
+        if is_alive(entry.get('owner'), entry.get('owner_start_time')):
+            continue
+        if is_alive(pid, entry.get('start_time')):
+            orphans[pid] = dict(entry, source='lockfile')
+
+    if IS_LINUX:
+        cwd = os.path.realpath(os.getcwd())
+        registered = {int(pid_text) for pid_text in entries}
+        for name in os.listdir('/proc'):
+            if not name.isdigit():
+                continue
+            pid = int(name)
+            if pid in registered or pid in orphans or pid == os.getpid():
+                continue
+            if proc_ppid(pid) != 1:
+                continue
+            cmdline = proc_cmdline(pid)
+            if is_xiebo(cmdline) and proc_cwd(pid) == cwd:
+                index = cmdline.index("-gpuId") + 1
+                orphans[pid] = {'start_time': proc_start_time(pid), 'batch_id': '', 'source': 'proc',
+                                'gpu_id': cmdline[index] if index < len(cmdline) else '?'}
+    return orphans
+
+def reap_orphans():
+    """Menghentikan xiebo sisa sesi sebelumnya dan membersihkan entry mati di lockfile"""
+    try:
+        orphans = find_orphans()
+    except Exception as e:
+        print(f"⚠️ Error scanning for orphaned xiebo processes: {e}")
+        return 0
+
+    reaped = 0
+    for pid, entry in orphans.items():
+        print(f"🧹 Reaping orphaned xiebo pid {pid} (GPU {entry['gpu_id']}"
+              f"{', batch ' + entry['batch_id'] if entry.get('batch_id') else ''})")
+        if _kill_orphan(pid, entry['start_time']):
+            reaped += 1
+        else:
+            print(f"❌ Orphaned xiebo pid {pid} did not exit, GPU {entry['gpu_id']} may be oversubscribed")
+
+    # Entry yang prosesnya sudah tidak ada dihapus
+    try:
+        with _LOCK, _FileLock():
+            entries = read_children()
+            live = {pid_text: entry for pid_text, entry in entries.items()
+                    if is_alive(int(pid_text), entry.get('start_time'))}
+            if live != entries:
+                _write_children(live)
+    except Exception as e:
+        print(f"⚠️ Error cleaning {CHILDREN_FILE}: {e}")
+
+    return reaped
+
+def _kill_children_at_exit():
+    """Exit normal (atau sys.exit dari thread utama): child milik proses ini ikut dihentikan"""
+    with _LOCK:
+        children = [p for p in _CHILDREN.values() if p.poll() is None]
+    for process in children:
+        try:
+            signal_group(process, signal.SIGTERM)
+        except Exception:
+            pass
+
+atexit.register(_kill_children_at_exit)
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] in ("-h", "--help"):
+        print("Xiebo Child Processes")
+        print("Usage:")
+        print("  List:  python3 procgroup.py")
+        print("  Reap:  python3 procgroup.py --reap   (stop xiebo left behind by a dead supervisor)")
+        sys.exit(1)
+
+    if len(sys.argv) > 1 and sys.argv[1] == "--reap":
+        print(f"🧹 {reap_orphans()} orphaned xiebo process(es) reaped")
+        return
+
+    entries = read_children()
+    orphans = find_orphans()
+    print(f"\n{'='*60}")
+    print(f"🧵 XIEBO CHILD PROCESSES ({CHILDREN_FILE})")
+    print(f"{'='*60}")
+    for pid_text, entry in sorted(entries.items()):
+        state = "ORPHAN" if int(pid_text) in orphans else ("running" if is_alive(int(pid_text), entry.get('start_time')) else "gone")
+        print(f"pid {pid_text:>7}  GPU {entry.get('gpu_id', '?'):<3} batch {entry.get('batch_id') or '-':<8} "
+              f"owner {entry.get('owner')}  {state}")
+    for pid, entry in orphans.items():
+        if entry['source'] == 'proc':
+            print(f"pid {pid:>7}  GPU {entry['gpu_id']:<3} unregistered orphan (parent is init, same directory)")
+    if not entries and not orphans:
+        print("No xiebo children recorded")
+    print(f"{'='*60}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+import os
+import sys
+import json
+import shutil
+import threading
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+import statelock
+
+# Konfigurasi progress batch (low-water mark + batch yang selesai lebih dulu, urutan selesai bebas)
+PROGRESS_FILE = "progress.json"
+DRIVE_MOUNT_PATH = "/content/drive"
+DRIVE_PROGRESS_PATH = "/content/drive/MyDrive/progress.json"
+
+# Field sesi: progress lama hanya dipakai jika semua field ini sama
+SESSION_FIELDS = ('origin', 'range_bits', 'batch_size', 'total_batches', 'shuffle_key')
+
+# Tracker sesi yang sedang berjalan (diset runner lewat start())
+ACTIVE = None
+
+class ProgressTracker:
+    """Semua batch < low_water sudah selesai; batch selesai di atasnya disimpan sebagai range [awal, akhir)"""
+
+    def __init__(self, session, path=PROGRESS_FILE):
+        self.path = path
+        self.session = dict(session)
+        self.session['origin'] = str(self.session.get('origin', '')).lower()
+        self.low_water = 0
+        self.starts = []    # Awal range selesai di depan low_water (terurut)
+        self.ends = []      # Akhir (eksklusif) range yang bersesuaian
+        self.partial = {}   # batch_id -> key pertama yang belum di-scan (checkpoint deadline)
+        self.journal = None # Jurnal klaim antar proses (statelock), diset oleh load()/start()
+        self.lock = threading.Lock()
+
+    @property
+    def total_batches(self):
+        return int(self.session['total_batches'])
+
+    def matches(self, session):
+        return all(str(self.session.get(field, '')).lower() == str(session.get(field, '')).lower()
+                   for field in SESSION_FIELDS)
+
+    def is_done(self, batch_id):
+        if batch_id < self.low_water:
+            return True
+        i = bisect_right(self.starts, batch_id) - 1
+        return i >= 0 and batch_id < self.ends[i]
+
+    def _add(self, batch_id):
+        if batch_id < 0 or batch_id >= self.total_batches or self.is_done(batch_id):
+            return False
+
+        # Gabungkan dengan range tetangga agar daftar tetap ringkas
+        i = bisect_left(self.starts, batch_id)
+        join_left = i > 0 and self.ends[i - 1] == batch_id
+        join_right = i < len(self.starts) and self.starts[i] == batch_id + 1
+        if join_left and join_right:
+            self.ends[i - 1] = self.ends[i]
+            del self.starts[i]
+            del self.ends[i]
+        elif join_left:
+            self.ends[i - 1] = batch_id + 1
+        elif join_right:
+            self.starts[i] = batch_id
+        else:
+            self.starts.insert(i, batch_id)
+            self.ends.insert(i, batch_id + 1)
+
+        # Low-water mark maju selama range pertama menempel padanya
+        while self.starts and self.starts[0] == self.low_water:
+            self.low_water = self.ends[0]
+            del self.starts[0]
+            del self.ends[0]
+        return True
+
+    def mark_done(self, batch_ids):
+        """Menandai batch selesai dan langsung menyimpan progress (atomic)"""
+        with self.lock:
+            changed = False
+            batch_ids = [int(batch_id) for batch_id in batch_ids]
+            # Batch yang diselesaikan proses lain ikut masuk, progress.json selalu gabungan semua proses
+            if self.journal is not None:
+                for batch_id in self.journal.complete(batch_ids):
+                    changed = self._add(batch_id) or changed
+            for batch_id in batch_ids:
+                changed = self._add(batch_id) or changed
+                self.partial.pop(batch_id, None)
+            if changed:
+                self.save()
+            return changed
+
+    def claim(self, batch_ids):
+        """Klaim batch sebelum dijalankan: False jika sudah selesai atau sedang dijalankan proses lain"""
+        if self.journal is None:
+            return not any(self.is_done(int(batch_id)) for batch_id in batch_ids)
+        with self.lock:
+            claimed, newly_done = self.journal.claim([int(batch_id) for batch_id in batch_ids], self.is_done)
+            if any([self._add(batch_id) for batch_id in newly_done]):
+                self.save()
+            return claimed
+
+    def release(self, batch_ids):
+        if self.journal is not None:
+            with self.lock:
+                self.journal.release([int(batch_id) for batch_id in batch_ids])
+
+    def set_partial(self, batch_id, next_start_int):
+        """Checkpoint di dalam batch (deadline): --continue melanjutkan dari key ini"""
+        with self.lock:
+            self.partial[int(batch_id)] = next_start_int
+            self.save()
+
+    def resume_start(self, batch_id, batch_start):
+        """Start batch saat dilanjutkan: checkpoint partial jika ada"""
+        return max(batch_start, self.partial.get(batch_id, batch_start))
+
+    def first_gap(self):
+        """Batch pertama yang belum selesai, None jika semua selesai"""
+        return self.low_water if self.low_water < self.total_batches else None
+
+    def completed_count(self):
+        return self.low_water + sum(end - start for start, end in zip(self.starts, self.ends))
+
+    def pending_ids(self, limit=None):
+        """Batch ID yang belum selesai mulai dari gap pertama (maksimal limit)"""
+        pending = []
+        batch_id = self.low_water
+        i = 0
+        while batch_id < self.total_batches and (limit is None or len(pending) < limit):
+            if i < len(self.starts) and batch_id == self.starts[i]:
+                batch_id = self.ends[i]
+                i += 1
+                continue
+            pending.append(batch_id)
+            batch_id += 1
+        return pending
+
+    def to_dict(self):
+        return {
+            'session': self.session,
+            'low_water': self.low_water,
+            'done_ahead': [[start, end] for start, end in zip(self.starts, self.ends)],
+            'partial': {str(batch_id): format(start, 'x') for batch_id, start in self.partial.items()},
+            'completed': self.completed_count(),
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+    def save(self):
+        """Tulis ke file sementara per proses + fsync lalu os.replace (tidak pernah setengah tertulis)
+
+        Ditulis di bawah lock jurnal: batch selesai dari proses lain digabung dulu, sehingga
+        progress.json tidak pernah mundur walaupun beberapa proses menulis bergantian.
+        """
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with self.journal.lock if self.journal is not None else nullcontext():
+                if self.journal is not None:
+                    for batch_id in self.journal.sync():
+                        self._add(batch_id)
+                with open(tmp_path, 'w') as f:
+                    json.dump(self.to_dict(), f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"❌ Error saving progress {self.path}: {e}")
+            return
+
+        # Salinan ke Google Drive (silent, di luar lock)
+        if os.path.exists(DRIVE_MOUNT_PATH):
+            try:
+                shutil.copy2(self.path, DRIVE_PROGRESS_PATH)
+            except Exception:
+                pass
+
+def load(path=PROGRESS_FILE):
+    """Memuat progress dari file, None jika tidak ada atau rusak"""
+    if not os.path.exists(path):
+        return None
+
+    try:
+        # Dibaca di bawah lock yang sama dengan save() (proses lain tidak sedang mengganti file)
+        journal = statelock.ClaimJournal(path + statelock.CLAIM_SUFFIX)
+        with journal.lock:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            tracker = ProgressTracker(data['session'], path)
+            tracker.low_water = int(data.get('low_water', 0))
+            ranges = sorted((int(start), int(end)) for start, end in data.get('done_ahead', []))
+            tracker.starts = [start for start, _ in ranges]
+            tracker.ends = [end for _, end in ranges]
+            tracker.partial = {int(batch_id): int(start, 16) for batch_id, start in data.get('partial', {}).items()}
+            # Batch selesai yang baru tercatat di jurnal (progress.json proses lain belum sempat ditulis)
+            tracker.journal = journal
+            for batch_id in journal.sync():
+                tracker._add(batch_id)
+        return tracker
+    except Exception as e:
+        print(f"⚠️ Error loading progress {path}: {e}")
+        return None
+
+def start(session, resume=True, low_water=0, partial=None, path=PROGRESS_FILE):
+    """Tracker untuk sesi ini: progress lama dipakai jika sesinya sama, selain itu mulai dari low_water"""
+    global ACTIVE
+
+    tracker = load(path) if resume else None
+    if resume and tracker is None and os.path.exists(path):
+        # File ada tapi tidak terbaca: jangan mulai sesi baru (reset jurnal menghapus klaim proses lain)
+        print(f"❌ {path} exists but cannot be read. Fix or remove it before continuing.")
+        sys.exit(1)
+    if tracker is not None and tracker.matches(session):
+        tracker.session.update({k: v for k, v in session.items() if k not in SESSION_FIELDS})
+        print(f"📍 Progress loaded from {path}: first gap at batch {tracker.first_gap()}, "
+              f"{tracker.completed_count():,}/{tracker.total_batches:,} batches done")
+    else:
+        # Tidak ada progress, --batch baru (resume=False), atau sesi berbeda
+        tracker = ProgressTracker(session, path)
+        tracker.low_water = min(int(low_water), tracker.total_batches)
+        tracker.partial = dict(partial or {})
+        # Sesi baru: klaim dan batch selesai dari sesi lama tidak berlaku lagi
+        tracker.journal = statelock.ClaimJournal(path + statelock.CLAIM_SUFFIX)
+        tracker.journal.reset()
+
+    tracker.save()
+    ACTIVE = tracker
+    return tracker
+
+def record_done(batch_ids):
+    """Dipanggil runner setelah batch selesai (return code 0), aman dari banyak thread GPU"""
+    if ACTIVE is not None:
+        ACTIVE.mark_done(batch_ids)
+
+def record_partial(batch_id, next_start_int):
+    if ACTIVE is not None:
+        ACTIVE.set_partial(batch_id, next_start_int)
+
+def resume_start(batch_id, batch_start):
+    """Start batch untuk runner tanpa akses tracker (checkpoint partial jika ada)"""
+    return batch_start if ACTIVE is None else ACTIVE.resume_start(batch_id, batch_start)
+
+def claim(batch_ids):
+    """Dipanggil runner sebelum launch: beberapa proses di direktori yang sama tidak menjalankan batch yang sama"""
+    return ACTIVE is None or ACTIVE.claim(batch_ids)
+
+def release(batch_ids):
+    if ACTIVE is not None:
+        ACTIVE.release(batch_ids)
+
+def run_parallel(gpu_ids, batch_ids, run_batch):
+    """Satu thread per GPU, masing-masing mengklaim batch berikutnya dari antrean bersama
+
+    Batch ID hanya bisa diklaim sekali (juga oleh proses lain lewat jurnal klaim), sehingga tidak
+    ada range yang dijalankan dua kali; run_batch(gpu_id, batch_id) menandai selesai lewat
+    record_done dan mengembalikan False jika GPU tersebut harus berhenti mengklaim (key ditemukan,
+    deadline sesi). Mengembalikan jumlah batch yang tidak sempat diklaim.
+    """
+    queue = deque(batch_ids)
+    claim_lock = threading.Lock()
+
+    def next_batch():
+        with claim_lock:
+            while queue:
+                batch_id = queue.popleft()
+                if claim([batch_id]):
+                    return batch_id
+            return None
+
+    def worker(gpu_id):
+        while True:
+            batch_id = next_batch()
+            if batch_id is None:
+                return
+            keep_going = run_batch(gpu_id, batch_id)
+            # Batch gagal/terpotong dilepas agar proses lain bisa mengulangnya
+            if ACTIVE is not None and not ACTIVE.is_done(batch_id):
+                release([batch_id])
+            if not keep_going:
+                return
+
+    with ThreadPoolExecutor(max_workers=len(gpu_ids)) as executor:
+        future_to_gpu = {executor.submit(worker, gpu_id): gpu_id for gpu_id in gpu_ids}
+        for future in as_completed(future_to_gpu):
+            try:
+                future.result()
+            except Exception as e:
+                print(f"❌ Error in parallel execution on GPU {future_to_gpu[future]}: {e}")
+
+    return len(queue)
+
+def display_progress(tracker):
+    session = tracker.session
+    gap = tracker.first_gap()
+    print(f"\n{'='*50}")
+    print(f"📍 PROGRESS ({tracker.path})")
+    print(f"{'='*50}")
+    print(f"Origin: 0x{session.get('origin')} ({session.get('range_bits')} bits)")
+    print(f"Completed: {tracker.completed_count():,}/{tracker.total_batches:,} batches")
+    print(f"Low-water mark: batch {tracker.low_water:,}")
+    if tracker.starts:
+        ahead = sum(end - start for start, end in zip(tracker.starts, tracker.ends))
+        print(f"Done ahead of gap: {ahead:,} batches in {len(tracker.starts)} range(s)")
+    if tracker.partial:
+        print(f"Partial batches: {', '.join(str(b) for b in sorted(tracker.partial))}")
+    if tracker.journal is not None:
+        claims = tracker.journal.active_claims()
+        if claims:
+            print(f"Claimed by running processes: {', '.join(str(b) for b in sorted(claims))}")
+    print(f"Next run starts at: {'batch ' + str(gap) if gap is not None else 'nothing left'}")
+    print(f"{'='*50}")
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else PROGRESS_FILE
+    if path in ("-h", "--help"):
+        print("Xiebo Batch Progress")
+        print("Usage:")
+        print(f"  Show progress: python3 progress.py [{PROGRESS_FILE}]")
+        print("  Runners record each finished batch; --continue resumes at the first unfinished batch")
+        sys.exit(1)
+
+    tracker = load(path)
+    if tracker is None:
+        print(f"📭 No progress file: {path}")
+        sys.exit(1)
+    display_progress(tracker)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+import os
+import sys
+import hashlib
+import threading
+import ledger
+import multitarget
+
+# Konfigurasi file hasil xiebo (-o): key ditemukan dibaca dari file per batch, bukan dari stdout
+RESULT_DIR = "results"              # Satu file per launch: results/batch_<id>_gpu_<gpu>.txt
+POLL_SECONDS = 0.5                  # Interval cek ukuran file selama xiebo berjalan
+ENABLED = os.environ.get("XIEBO_RESULT_FILE", "1") != "0"   # 0 = xiebo lama tanpa -o (stdout saja)
+
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+WIF_PREFIX = 0x80
+
+# Label di file hasil yang dinormalisasi ke label stdout (parser multitarget)
+LABEL_ALIASES = (
+    ('pubaddress:', 'Public Addr:'),
+    ('address:', 'Public Addr:'),
+    ('priv (wif):', 'Priv (WIF):'),
+    ('priv (hex):', 'Priv (HEX):'),
+)
+
+def result_path(batch_id, gpu_id):
+    """Path file hasil untuk satu launch (file lama dihapus agar tidak terbaca ulang)"""
+    if not ENABLED:
+        return None
+    name = f"batch_{batch_id}_gpu_{gpu_id}.txt" if batch_id is not None else f"run_gpu_{gpu_id}.txt"
+    path = os.path.join(RESULT_DIR, name)
+    try:
+        os.makedirs(RESULT_DIR, exist_ok=True)
+        if os.path.exists(path):
+            os.remove(path)
+    except OSError as e:
+        print(f"⚠️ Result file {path} unavailable: {e} (falling back to stdout)")
+        return None
+    return path
+
+def output_args(path):
+    """Argumen xiebo untuk file hasil"""
+    return ["-o", path] if path else []
+
+def read_text(path):
+    try:
+        with open(path, 'r', errors='replace') as f:
+            return f.read()
+    except OSError:
+        return ''
+
+def parse_blocks(text):
+    """Parse isi file hasil menjadi list key (format blok sama dengan stdout xiebo)"""
+    lines = []
+    for line in text.split('\n'):
+        stripped = line.strip()
+        lower = stripped.lower()
+        for alias, label in LABEL_ALIASES:
+            if lower.startswith(alias):
+                stripped = f"{label} {stripped[len(alias):].strip()}"
+                break
+        lines.append(stripped)
+    return multitarget.parse_found_blocks('\n'.join(lines))
+
+def base58_decode(text):
+    value = 0
+    for char in text:
+        index = BASE58_ALPHABET.find(char)
+        if index < 0:
+            raise ValueError(f"invalid base58 character '{char}'")
+        value = value * 58 + index
+    raw = value.to_bytes((value.bit_length() + 7) // 8, 'big')
+    leading = len(text) - len(text.lstrip('1'))
+    return b'\x00' * leading + raw
+
+def wif_to_int(wif):
+    """Private key dari WIF (base58check, prefix 0x80, compressed atau tidak)"""
+    data = base58_decode(wif)
+    payload, checksum = data[:-4], data[-4:]
+    if hashlib.sha256(hashlib.sha256(payload).digest()).digest()[:4] != checksum:
+        raise ValueError("bad WIF checksum")
+    if not payload or payload[0] != WIF_PREFIX or len(payload) not in (33, 34):
+        raise ValueError("not a mainnet WIF")
+    return int.from_bytes(payload[1:33], 'big')
+
+def verify_block(block, start_int, range_bits):
+    """Cek struktural: HEX di dalam range batch dan WIF (jika ada) menyandikan key yang sama"""
+    problems = []
+    key_int = None
+
+    if block.get('hex'):
+        try:
+            key_int = int(block['hex'], 16)
+            if not start_int <= key_int < start_int + (1 << int(range_bits)):
+                problems.append("HEX outside batch range")
+        except ValueError:
+            problems.append("HEX not hexadecimal")
+
+    if block.get('wif_plain'):
+        try:
+            wif_int = wif_to_int(block['wif_plain'])
+            if key_int is not None and wif_int != key_int:
+                problems.append("WIF does not match HEX")
+        except ValueError as e:
+            problems.append(f"WIF invalid ({e})")
+
+    if not (block.get('hex') or block.get('wif_plain')):
+        problems.append("no private key")
+
+    block['verified'] = not problems
+    block['problems'] = problems
+    return block['verified']
+
+class ResultWatcher:
+    """Thread ringan yang mengawasi file -o selama xiebo berjalan
+
+    Key lengkap (WIF + HEX) langsung dicatat ke ledger begitu muncul di file, tanpa menunggu
+    proses xiebo selesai; stop() melakukan parse terakhir dan mengembalikan semua key.
+    """
+
+    def __init__(self, path, batch_id, gpu_id, start_hex, range_bits, poll_seconds=POLL_SECONDS):
+        self.path = path
+        self.batch_id = batch_id
+        self.gpu_id = gpu_id
+        self.start_int = int(start_hex, 16)
+        self.range_bits = range_bits
+        self.poll_seconds = poll_seconds
+        self.stop_event = threading.Event()
+        self.last_size = 0
+        self.seen = set()
+        self.blocks = []
+        self.thread = None
+
+    def start(self):
+        if self.path:
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+        return self
+
+    def _scan(self, final):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        if size == self.last_size and not final:
+            return
+        self.last_size = size
+
+        new_blocks = []
+        for block in parse_blocks(read_text(self.path)):
+            # Selama xiebo menulis, blok terakhir bisa belum lengkap
+            if not final and not (block['wif'] and block['hex']):
+                continue
+            key = ledger.idempotency_key(block)
+            if key in self.seen:
+                continue
+            self.seen.add(key)
+            if not verify_block(block, self.start_int, self.range_bits):
+                print(f"⚠️ GPU {self.gpu_id}: unverified key in {self.path}: {', '.join(block['problems'])}")
+            new_blocks.append(block)
+
+        if new_blocks:
+            self.blocks.extend(new_blocks)
+            if not final:
+                print(f"🚨 GPU {self.gpu_id} Batch {self.batch_id}: {len(new_blocks)} key(s) in result file")
+            ledger.get_ledger().record(self.batch_id, self.gpu_id, new_blocks)
+
+    def _run(self):
+        while not self.stop_event.wait(self.poll_seconds):
+            try:
+                self._scan(False)
+            except Exception as e:
+                print(f"⚠️ Result watcher error ({self.path}): {e}")
+
+    def stop(self):
+        """Dipanggil setelah xiebo keluar: parse terakhir, file kosong dihapus (panggilan kedua no-op)"""
+        if not self.path:
+            return []
+        if self.stop_event.is_set():
+            return list(self.blocks)
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+        try:
+            self._scan(True)
+        except Exception as e:
+            print(f"⚠️ Result watcher error ({self.path}): {e}")
+
+        if not self.blocks and os.path.exists(self.path) and os.path.getsize(self.path) == 0:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+        return list(self.blocks)
+
+def apply(found_info, blocks):
+    """Mengisi found_info runner dari file hasil, mengembalikan True jika pencarian harus berhenti
+
+    Hanya blok yang lolos verify_block yang dipakai. Tanpa blok terverifikasi (xiebo tanpa -o, tidak
+    ada key, atau blok rusak/di luar range) found_info hasil stdout tidak diubah; blok yang tidak
+    lolos sudah dicatat watcher di ledger dengan verified=false.
+    """
+    unverified = [b for b in blocks if not b.get('verified')]
+    blocks = [b for b in blocks if b.get('verified')]
+    if unverified:
+        print(f"⚠️ {len(unverified)} unverified key(s) in result file ignored "
+              f"({'; '.join(', '.join(b.get('problems', [])) for b in unverified)}), stdout result decides")
+    if not blocks:
+        return False
+
+    first = blocks[0]
+    wif_value = first.get('wif') or ''
+    found_info['found'] = True
+    found_info['found_count'] = max(found_info.get('found_count', 0), len(blocks))
+    found_info['private_key_hex'] = first.get('hex', '')
+    found_info['private_key_wif'] = wif_value
+    found_info['address'] = first.get('address', '') or found_info.get('address', '')
+    found_info['wif_key'] = (wif_value or first.get('hex', ''))[:60]
+    found_info['found_keys'] = blocks
+    found_info['raw_output'] = '\n'.join(
+        f"Public Addr: {b['address']}\nPriv (WIF): {b['wif']}\nPriv (HEX): {b['hex']}" for b in blocks)
+
+    # Multi-target: berhenti hanya jika semua target sudah ditemukan
+    if len(multitarget.ACTIVE_TARGETS) > 1:
+        multitarget.record_found(blocks)
+        return multitarget.all_targets_found()
+    return True
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] in ("-h", "--help"):
+        print("Xiebo Result File Check")
+        print("Usage:")
+        print("  Verify a result file: python3 resultfile.py FILE [START_HEX RANGE_BITS]")
+        print(f"  Runners pass '-o {RESULT_DIR}/batch_<id>_gpu_<gpu>.txt' to xiebo (XIEBO_RESULT_FILE=0 disables)")
+        sys.exit(1)
+
+    blocks = parse_blocks(read_text(sys.argv[1]))
+    start_int = int(sys.argv[2], 16) if len(sys.argv) > 3 else 0
+    range_bits = int(sys.argv[3]) if len(sys.argv) > 3 else 256
+    for block in blocks:
+        verify_block(block, start_int, range_bits)
+        status = "✅" if block['verified'] else f"⚠️ {', '.join(block['problems'])}"
+        print(f"{block['address'] or '-'} {block['hex'] or '-'} {status}")
+    print(f"{len(blocks)} key(s) in {sys.argv[1]}")
+
+if __name__ == "__main__":
+    main()
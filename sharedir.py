@@ -0,0 +1,435 @@
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import threading
+import procgroup
+import watchdog
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+# Konfigurasi campaign di direktori bersama (folder Drive yang di-mount, atau direktori lokal untuk tes)
+CAMPAIGN_FILE = "campaign.json"     # Parameter campaign, dibuat host pertama (O_EXCL)
+SUMMARY_FILE = "summary.json"       # Hasil compactor: range block selesai + key yang ditemukan
+FOUND_FILE = "FOUND"                # Penanda key ditemukan, semua host berhenti mengklaim
+CLAIM_DIR = "claims"                # claims/block_<id>.claim: owner + lease
+RESULT_DIR = "results"              # results/block_<id>.json: hasil block sebelum di-compact
+COMPACT_LOCK = "compact.lock"
+BLOCK_BATCHES = 1                   # Batch per block (unit klaim)
+LEASE_SECONDS = 1800                # Klaim tanpa perpanjangan lease selama ini boleh diambil host lain
+HEARTBEAT_SECONDS = 300             # Interval perpanjangan lease klaim yang sedang berjalan
+COMPACT_EVERY = 20                  # Compact setelah sejumlah file hasil menumpuk
+COMPACT_LOCK_SECONDS = 600          # Lock compactor dianggap basi setelah ini
+CLAIM_SETTLE_SECONDS = float(os.environ.get("XIEBO_SHARE_SETTLE", "0"))  # Drive: tunggu sinkronisasi lalu cek ulang klaim
+
+def owner_id():
+    """Identitas host+proses, unik juga jika hostname Colab sama"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+def read_json(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_json_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex[:6]}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def create_exclusive(path, data):
+    """Membuat file hanya jika belum ada (O_CREAT|O_EXCL), False jika sudah ada"""
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    except FileExistsError:
+        return False
+    try:
+        os.write(fd, json.dumps(data).encode())
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    return True
+
+def to_ranges(ids):
+    """Set block ID -> [[awal, akhir), ...] ringkas"""
+    ranges = []
+    for block_id in sorted(ids):
+        if ranges and ranges[-1][1] == block_id:
+            ranges[-1][1] = block_id + 1
+        else:
+            ranges.append([block_id, block_id + 1])
+    return ranges
+
+def from_ranges(ranges):
+    return {block_id for start, end in ranges for block_id in range(start, end)}
+
+class Campaign:
+    """Satu campaign di direktori bersama: host mengklaim block, menulis hasil, compactor menggabungkan"""
+
+    def __init__(self, directory, session):
+        self.directory = directory
+        self.session = session
+        self.owner = owner_id()
+        self.total_blocks = -(-int(session['total_batches']) // int(session['block_batches']))
+        self.held = {}          # block_id -> waktu klaim (untuk heartbeat)
+        self.lost = set()       # Block yang klaimnya diambil host lain selama berjalan
+        self.done = set()       # Block selesai yang sudah terlihat (summary + hasil)
+        self.cursor = 0
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.heartbeat = None
+
+    def path(self, *parts):
+        return os.path.join(self.directory, *parts)
+
+    def claim_path(self, block_id):
+        return self.path(CLAIM_DIR, f"block_{block_id}.claim")
+
+    def result_path(self, block_id):
+        return self.path(RESULT_DIR, f"block_{block_id}.json")
+
+    def block_batches(self, block_id):
+        size = int(self.session['block_batches'])
+        return list(range(block_id * size, min((block_id + 1) * size, int(self.session['total_batches']))))
+
+    def found(self):
+        return os.path.exists(self.path(FOUND_FILE))
+
+    def refresh(self):
+        """Block selesai dari summary compactor + file hasil yang belum di-compact"""
+        summary = read_json(self.path(SUMMARY_FILE)) or {}
+        done = from_ranges(summary.get('done', []))
+        try:
+            names = os.listdir(self.path(RESULT_DIR))
+        except OSError:
+            names = []
+        for name in names:
+            if name.startswith("block_") and name.endswith(".json"):
+                try:
+                    done.add(int(name[6:-5]))
+                except ValueError:
+                    pass
+        with self.lock:
+            self.done |= done
+            while self.cursor < self.total_blocks and self.cursor in self.done:
+                self.cursor += 1
+
+    def _lease(self):
+        return {'owner': self.owner, 'host': socket.gethostname(), 'pid': os.getpid(),
+                'claimed_at': time.time(), 'lease_until': time.time() + LEASE_SECONDS}
+
+    def _try_claim(self, block_id):
+        path = self.claim_path(block_id)
+        if not create_exclusive(path, self._lease()):
+            claim = read_json(path)
+            if claim is not None and claim.get('lease_until', 0) > time.time():
+                return False
+            if claim is None and not self._file_expired(path):
+                # Klaim baru yang belum terbaca lengkap (sinkronisasi Drive) dianggap hidup
+                return False
+            if os.path.exists(self.result_path(block_id)):
+                return False
+            # Lease habis (host mati / sesi Colab berakhir): file klaim lama dipindah, hanya satu host yang berhasil
+            stale_path = f"{path}.stale.{uuid.uuid4().hex[:8]}"
+            try:
+                os.rename(path, stale_path)
+            except OSError:
+                return False
+            # Di antara baca dan rename host lain bisa sudah mengklaim ulang: yang dipindah harus lease
+            # kedaluwarsa yang tadi dibaca, selain itu klaim hidup tersebut dikembalikan
+            moved = read_json(stale_path)
+            if moved != claim:
+                if moved is not None:
+                    create_exclusive(path, moved)
+                try:
+                    os.remove(stale_path)
+                except OSError:
+                    pass
+                return False
+            print(f"♻️  Block {block_id}: lease of {claim.get('host') if claim else 'unknown'} expired, reclaiming")
+            if not create_exclusive(path, self._lease()):
+                return False
+
+        # Mount yang sinkron lambat (Drive): klaim dianggap sah jika setelah settle masih milik host ini
+        if CLAIM_SETTLE_SECONDS > 0:
+            time.sleep(CLAIM_SETTLE_SECONDS)
+            claim = read_json(path)
+            if claim is None or claim.get('owner') != self.owner:
+                return False
+        return True
+
+    def _file_expired(self, path):
+        try:
+            return os.path.getmtime(path) + LEASE_SECONDS < time.time()
+        except OSError:
+            return False
+
+    def claim_next(self):
+        """Klaim block berikutnya yang belum selesai dan tidak diklaim host lain, None jika habis"""
+        self.refresh()
+        with self.lock:
+            block_id = self.cursor
+        while block_id < self.total_blocks:
+            if self.stop_event.is_set() or self.found():
+                return None
+            with self.lock:
+                skip = block_id in self.done or block_id in self.held
+            if not skip and self._try_claim(block_id):
+                with self.lock:
+                    self.held[block_id] = time.time()
+                return block_id
+            block_id += 1
+        return None
+
+    def renew(self):
+        """Perpanjang lease semua klaim yang sedang dijalankan host ini; klaim yang hilang dihentikan"""
+        with self.lock:
+            held = list(self.held)
+        for block_id in held:
+            claim = read_json(self.claim_path(block_id))
+            if claim is None:
+                # Host lain mungkin sedang mengembalikan klaim yang salah dipindah (lihat _try_claim)
+                time.sleep(1)
+                claim = read_json(self.claim_path(block_id))
+            if claim is None or claim.get('owner') != self.owner:
+                self.abandon(block_id)
+                continue
+            claim['lease_until'] = time.time() + LEASE_SECONDS
+            write_json_atomic(self.claim_path(block_id), claim)
+
+    def abandon(self, block_id):
+        """Klaim diambil host lain: launch block ini dihentikan agar range tidak di-scan dua kali"""
+        with self.lock:
+            self.held.pop(block_id, None)
+            self.lost.add(block_id)
+        processes = procgroup.children_for(self.block_batches(block_id))
+        print(f"⚠️ Block {block_id}: claim lost to another host, stopping "
+              f"{len(processes)} xiebo process(es)")
+        for process in processes:
+            watchdog.kill_process(process)
+
+    def is_lost(self, block_id):
+        with self.lock:
+            return block_id in self.lost
+
+    def _heartbeat(self):
+        while not self.stop_event.wait(HEARTBEAT_SECONDS):
+            try:
+                self.renew()
+            except Exception as e:
+                print(f"⚠️ Lease renewal error: {e}")
+
+    def complete(self, block_id, found_keys=None):
+        """Menulis file hasil block (kecil, atomic) lalu melepas klaim"""
+        result = {
+            'block_id': block_id,
+            'batches': self.block_batches(block_id),
+            'owner': self.owner,
+            'host': socket.gethostname(),
+            'completed_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'found_keys': found_keys or []
+        }
+        write_json_atomic(self.result_path(block_id), result)
+        if found_keys:
+            create_exclusive(self.path(FOUND_FILE), {'block_id': block_id, 'host': socket.gethostname()})
+        with self.lock:
+            self.held.pop(block_id, None)
+            self.done.add(block_id)
+        self._remove_claim(block_id)
+
+    def release(self, block_id):
+        """Block gagal/terpotong: klaim dihapus agar host lain bisa mengulangnya"""
+        with self.lock:
+            self.held.pop(block_id, None)
+        self._remove_claim(block_id)
+
+    def _remove_claim(self, block_id):
+        claim = read_json(self.claim_path(block_id))
+        if claim is not None and claim.get('owner') == self.owner:
+            try:
+                os.remove(self.claim_path(block_id))
+            except OSError:
+                pass
+
+    def compact(self, force=False):
+        """Menggabungkan file hasil ke summary.json (satu compactor sekaligus), mengembalikan jumlah hasil"""
+        try:
+            names = [n for n in os.listdir(self.path(RESULT_DIR)) if n.startswith("block_") and n.endswith(".json")]
+        except OSError:
+            return 0
+        if not names or (len(names) < COMPACT_EVERY and not force):
+            return 0
+
+        lock_path = self.path(COMPACT_LOCK)
+        if not create_exclusive(lock_path, {'owner': self.owner, 'until': time.time() + COMPACT_LOCK_SECONDS}):
+            lock = read_json(lock_path)
+            if lock is not None and lock.get('until', 0) > time.time():
+                return 0
+            try:
+                os.rename(lock_path, f"{lock_path}.stale.{uuid.uuid4().hex[:8]}")
+            except OSError:
+                return 0
+            if not create_exclusive(lock_path, {'owner': self.owner, 'until': time.time() + COMPACT_LOCK_SECONDS}):
+                return 0
+
+        try:
+            summary = read_json(self.path(SUMMARY_FILE)) or {'session': self.session, 'done': [], 'found_keys': []}
+            done = from_ranges(summary.get('done', []))
+            merged = []
+            for name in names:
+                result = read_json(self.path(RESULT_DIR, name))
+                if result is None:
+                    continue
+                merged.append(name)
+                # Hasil yang sudah masuk summary (compactor sebelumnya berhenti sebelum menghapus) tidak digandakan
+                if int(result['block_id']) in done:
+                    continue
+                done.add(int(result['block_id']))
+                summary['found_keys'] = summary.get('found_keys', []) + result.get('found_keys', [])
+            summary['done'] = to_ranges(done)
+            summary['completed_blocks'] = len(done)
+            summary['compacted_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            write_json_atomic(self.path(SUMMARY_FILE), summary)
+
+            # Hasil yang sudah ada di summary dihapus (juga klaim basi yang tertinggal)
+            for name in merged:
+                for path in (self.path(RESULT_DIR, name), self.path(CLAIM_DIR, name[:-5] + ".claim")):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+            for name in os.listdir(self.path(CLAIM_DIR)):
+                if ".stale." in name:
+                    try:
+                        os.remove(self.path(CLAIM_DIR, name))
+                    except OSError:
+                        pass
+            return len(merged)
+        finally:
+            try:
+                os.remove(lock_path)
+            except OSError:
+                pass
+
+    def status(self):
+        self.refresh()
+        try:
+            claims = [n for n in os.listdir(self.path(CLAIM_DIR)) if n.endswith(".claim")]
+        except OSError:
+            claims = []
+        with self.lock:
+            return {'done': len(self.done), 'total': self.total_blocks, 'claimed': len(claims),
+                    'first_gap': self.cursor if self.cursor < self.total_blocks else None}
+
+def join(directory, session=None):
+    """Membuat campaign (host pertama, session diberikan) atau bergabung ke campaign yang ada"""
+    for sub in (CLAIM_DIR, RESULT_DIR):
+        os.makedirs(os.path.join(directory, sub), exist_ok=True)
+
+    path = os.path.join(directory, CAMPAIGN_FILE)
+    if session is not None:
+        session = dict(session)
+        session.setdefault('block_batches', BLOCK_BATCHES)
+        if create_exclusive(path, session):
+            print(f"🆕 Campaign created in {directory}")
+            return Campaign(directory, session)
+
+    existing = read_json(path)
+    if existing is None:
+        raise ValueError(f"No campaign in {directory} (first host must pass START_HEX RANGE_BITS ADDRESS)")
+    if session is not None:
+        fields = ('origin', 'range_bits', 'batch_size', 'address')
+        if any(str(existing.get(f, '')).lower() != str(session.get(f, '')).lower() for f in fields):
+            raise ValueError(f"{directory} holds a different campaign (origin 0x{existing.get('origin')})")
+    print(f"🤝 Joined campaign in {directory}")
+    return Campaign(directory, existing)
+
+def run(campaign, gpu_ids, run_block, should_stop=None):
+    """Satu thread per GPU: klaim block, jalankan, tulis hasil; berhenti jika block habis atau key ditemukan
+
+    run_block(gpu_id, block_id) mengembalikan (selesai, found_keys); block yang tidak selesai dilepas.
+    Mengembalikan jumlah block yang diselesaikan host ini.
+    """
+    completed = [0]
+    count_lock = threading.Lock()
+    campaign.heartbeat = threading.Thread(target=campaign._heartbeat, daemon=True)
+    campaign.heartbeat.start()
+
+    def worker(gpu_id):
+        while not (should_stop and should_stop()):
+            block_id = campaign.claim_next()
+            if block_id is None:
+                return
+            try:
+                finished, found_keys = run_block(gpu_id, block_id)
+            except Exception:
+                campaign.release(block_id)
+                raise
+            if finished:
+                campaign.complete(block_id, found_keys)
+                with count_lock:
+                    completed[0] += 1
+                campaign.compact()
+            elif campaign.is_lost(block_id):
+                # Launch dihentikan karena block dijalankan host lain, GPU ini lanjut ke block berikutnya
+                continue
+            else:
+                campaign.release(block_id)
+                return
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(gpu_ids)) as executor:
+            future_to_gpu = {executor.submit(worker, gpu_id): gpu_id for gpu_id in gpu_ids}
+            for future in as_completed(future_to_gpu):
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"❌ Error in shared-directory worker on GPU {future_to_gpu[future]}: {e}")
+    finally:
+        campaign.stop_event.set()
+        campaign.compact(force=True)
+
+    return completed[0]
+
+def display_status(campaign):
+    status = campaign.status()
+    session = campaign.session
+    summary = read_json(campaign.path(SUMMARY_FILE)) or {}
+    print(f"\n{'='*50}")
+    print(f"🤝 SHARED CAMPAIGN ({campaign.directory})")
+    print(f"{'='*50}")
+    print(f"Origin: 0x{session.get('origin')} ({session.get('range_bits')} bits)")
+    print(f"Blocks: {status['done']:,}/{status['total']:,} done, {status['claimed']} claimed "
+          f"({session.get('block_batches')} batch(es) per block)")
+    print(f"First unfinished block: {status['first_gap'] if status['first_gap'] is not None else 'none'}")
+    if campaign.found() or summary.get('found_keys'):
+        print(f"🔑 Found keys: {len(summary.get('found_keys', []))} compacted, FOUND marker "
+              f"{'present' if campaign.found() else 'absent'}")
+    print(f"{'='*50}")
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] in ("-h", "--help"):
+        print("Xiebo Shared-Directory Campaign")
+        print("Usage:")
+        print("  Status:  python3 sharedir.py DIR")
+        print("  Compact: python3 sharedir.py DIR --compact")
+        print("  Hosts run: python3 bm.py --share DIR GPU_IDS [START_HEX RANGE_BITS ADDRESS]")
+        sys.exit(1)
+
+    try:
+        campaign = join(sys.argv[1])
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    if "--compact" in sys.argv:
+        print(f"🗜️  {campaign.compact(force=True)} result file(s) compacted")
+    display_status(campaign)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+import sys
+import math
+import heapq
+import random
+import itertools
+import gpuspeed
+import steal
+
+# Parameter simulasi (override lewat argumen key=value, beberapa nilai dipisah koma untuk dibandingkan)
+DEFAULTS = {
+    'policy': 'pull',           # pull = antrean bersama/claim DB (bm --continue, kamudbs) | lanes = kamu --parallel
+    'hosts': 2,                 # Jumlah host (Colab/rental), tiap host satu runner
+    'gpus_per_host': 2,
+    'batches': 512,             # Batch dalam campaign
+    'batch_bits': 41,           # Ukuran batch 2^N keys
+    'speed_mks': 3000.0,        # Rata-rata kecepatan GPU (MK/s)
+    'speed_spread': 0.15,       # Variasi kecepatan antar GPU (relatif, normal)
+    'speed_error': 0.10,        # Error profil kecepatan yang dipakai planner lanes (relatif)
+    'setup_seconds': 30.0,      # Fase 'Setting starting keys' per launch
+    'setup_spread': 0.2,
+    'sleep_seconds': 5.0,       # Jeda antar launch per GPU (timed_sleep runner)
+    'stall_rate': 0.0,          # Peluang launch stall (dihentikan watchdog setelah stall_timeout)
+    'stall_timeout': 300.0,
+    'preempt_hours': 0.0,       # Rata-rata jam sampai host di-preempt (0 = tidak pernah)
+    'restart_seconds': 600.0,   # Host kembali setelah preempt (runner --continue)
+    'db_latency': 0.2,          # Round trip DB/coordinator per claim (GPU menunggu)
+    'claim_batches': 1,         # Batch per claim (prefetch), policy pull
+    'flush_seconds': 0.0,       # Interval flush status done (0 = langsung), yang belum ter-flush hilang saat preempt
+    'lease_seconds': 1800.0,    # Klaim host yang mati baru bisa diambil host lain setelah lease habis
+    'steal': 0,                 # 1 = GPU idle mengambil launch belum mulai dari lane GPU lain di host yang sama (lihat steal.py)
+    'max_hours': 10000.0,       # Batas waktu simulasi
+    'seed': 1,
+    'runs': 1,                  # Ulangan dengan seed berbeda, hasil dirata-rata
+}
+
+REPORT_COLUMNS = ('coverage_h', 'throughput_mks', 'efficiency', 'idle', 'redundant', 'launches')
+
+class Simulation:
+    """Simulasi event diskrit satu campaign: GPU, host (preemption), DB, dan policy scheduling runner
+
+    Launch dimodelkan sebagai setup + scan berkecepatan tetap; preemption dan stall membuang key
+    yang sudah di-scan, done yang belum ter-flush hilang, klaim host mati tertahan sampai lease habis.
+    """
+
+    def __init__(self, config):
+        self.c = config
+        self.rng = random.Random(config['seed'])
+        self.batch_keys = 1 << int(config['batch_bits'])
+        self.now = 0.0
+        self.events = []
+        self.sequence = itertools.count()
+
+        self.gpus = []
+        for host in range(int(config['hosts'])):
+            for index in range(int(config['gpus_per_host'])):
+                speed = max(0.05, self.rng.gauss(1.0, config['speed_spread'])) * config['speed_mks'] * 1e6
+                self.gpus.append({'id': f"{host}:{index}", 'host': host, 'speed': speed, 'up': True,
+                                  'launch': None, 'busy_scan': 0.0, 'busy_overhead': 0.0, 'down': 0.0,
+                                  'lane': [], 'weight': 0.0, 'buffer': []})
+
+        self.hosts = [{'up': True, 'unflushed': [], 'epoch': 0, 'down_since': 0.0}
+                      for _ in range(int(config['hosts']))]
+        self.state = ['pending'] * int(config['batches'])
+        self.owner = [None] * int(config['batches'])
+        self.pending = list(range(int(config['batches'])))
+        self.expiring = []
+        self.done_count = 0
+        self.scanned_keys = 0
+        self.launches = 0
+        self.coverage_time = None
+        self.launch_ids = itertools.count()
+
+    def schedule(self, at, kind, *payload):
+        heapq.heappush(self.events, (at, next(self.sequence), kind, payload))
+
+    # --- Batch store ---
+
+    def mark_done(self, batch_ids):
+        for batch_id in batch_ids:
+            if self.state[batch_id] != 'done':
+                self.state[batch_id] = 'done'
+                self.done_count += 1
+        if self.done_count == len(self.state) and self.coverage_time is None:
+            self.coverage_time = self.now
+
+    def claim(self, host, count):
+        """Batch pending terendah (termasuk klaim kedaluwarsa) untuk host"""
+        while self.expiring and self.expiring[0][0] <= self.now:
+            _, batch_id = heapq.heappop(self.expiring)
+            if self.state[batch_id] == 'claimed':
+                self.state[batch_id] = 'pending'
+                heapq.heappush(self.pending, batch_id)
+
+        claimed = []
+        while self.pending and len(claimed) < count:
+            batch_id = heapq.heappop(self.pending)
+            if self.state[batch_id] != 'pending':
+                continue
+            self.state[batch_id] = 'claimed'
+            self.owner[batch_id] = host
+            claimed.append(batch_id)
+        return claimed
+
+    def complete(self, host, batch_ids):
+        # Policy lanes mencatat done di logbatch/progress lokal, tanpa flush ke DB
+        if self.c['flush_seconds'] > 0 and self.c['policy'] != 'lanes':
+            self.hosts[host]['unflushed'].extend(batch_ids)
+        else:
+            self.mark_done(batch_ids)
+
+    def release(self, batch_ids, at):
+        """Klaim dilepas (stall) atau tertahan sampai lease habis (host mati)"""
+        for batch_id in batch_ids:
+            if self.state[batch_id] == 'claimed':
+                heapq.heappush(self.expiring, (at, batch_id))
+
+    # --- Launch ---
+
+    def start_launch(self, gpu, batch_ids, keys):
+        setup = max(0.0, self.rng.gauss(self.c['setup_seconds'], self.c['setup_seconds'] * self.c['setup_spread']))
+        launch = {'id': next(self.launch_ids), 'gpu': gpu, 'batches': batch_ids, 'keys': keys,
+                  'start': self.now, 'scan_start': self.now + setup, 'limit': keys, 'stall_at': None}
+        launch['end'] = launch['scan_start'] + keys / gpu['speed']
+        if self.rng.random() < self.c['stall_rate']:
+            launch['stall_at'] = launch['scan_start'] + self.rng.random() * keys / gpu['speed']
+            launch['end'] = launch['stall_at'] + self.c['stall_timeout']
+        gpu['launch'] = launch
+        self.launches += 1
+        self.schedule(launch['end'], 'finish', gpu['id'], launch['id'])
+
+    def scanned(self, launch, at=None):
+        at = self.now if at is None else at
+        if launch['stall_at'] is not None:
+            at = min(at, launch['stall_at'])
+        return max(0.0, min(launch['limit'], (at - launch['scan_start']) * launch['gpu']['speed']))
+
+    def account(self, launch, scanned_keys):
+        gpu = launch['gpu']
+        scan_seconds = scanned_keys / gpu['speed']
+        self.scanned_keys += scanned_keys
+        gpu['busy_scan'] += scan_seconds
+        gpu['busy_overhead'] += max(0.0, min(self.now, launch['scan_start']) - launch['start'])
+
+    def try_steal(self, gpu):
+        """Aturan steal.py: launch belum mulai dari lane GPU lain di host yang sama (policy lanes)"""
+        if self.c['policy'] != 'lanes':
+            return False
+        peers = [other for other in self.gpus if other['host'] == gpu['host'] and other['up']]
+        lanes = {other['id']: other['lane'] for other in peers}
+        weights = {other['id']: other['weight'] for other in peers}
+        picked = steal.choose(gpu['id'], lanes, weights, size=len)
+        if picked is None:
+            return False
+        _, chunk = picked
+        self.start_launch(gpu, chunk, len(chunk) * self.batch_keys)
+        return True
+
+    # --- Event handler ---
+
+    def gpu_free(self, gpu):
+        if not gpu['up'] or gpu['launch'] is not None:
+            return
+        host = gpu['host']
+
+        if self.c['policy'] == 'lanes':
+            if gpu['lane']:
+                chunk = gpu['lane'].pop(0)
+                self.start_launch(gpu, chunk, len(chunk) * self.batch_keys)
+                return
+        else:
+            if not gpu['buffer']:
+                gpu['buffer'] = self.claim(host, int(self.c['claim_batches']))
+                if gpu['buffer']:
+                    # GPU menunggu round trip claim sebelum launch
+                    gpu['busy_overhead'] += self.c['db_latency']
+                    self.schedule(self.now + self.c['db_latency'], 'free', gpu['id'])
+                    return
+            if gpu['buffer']:
+                batch_id = gpu['buffer'].pop(0)
+                self.start_launch(gpu, [batch_id], self.batch_keys)
+                return
+
+        if self.c['steal'] and self.try_steal(gpu):
+            return
+
+        # Tidak ada kerja: cek lagi nanti (klaim host lain bisa kedaluwarsa)
+        if self.coverage_time is None:
+            self.schedule(self.now + 60.0, 'free', gpu['id'])
+
+    def finish(self, gpu, launch_id):
+        launch = gpu['launch']
+        if launch is None or launch['id'] != launch_id or abs(launch['end'] - self.now) > 1e-6:
+            return
+        gpu['launch'] = None
+
+        if launch['stall_at'] is not None:
+            # Watchdog membunuh launch: ulangi di GPU yang sama
+            self.account(launch, self.scanned(launch))
+            gpu['busy_overhead'] += self.c['stall_timeout']
+            if self.c['policy'] == 'lanes':
+                gpu['lane'].insert(0, launch['batches'])
+            else:
+                gpu['buffer'] = launch['batches'] + gpu['buffer']
+        else:
+            self.account(launch, launch['limit'])
+            self.complete(gpu['host'], launch['batches'])
+
+        self.after_launch(gpu)
+
+    def after_launch(self, gpu):
+        gpu['busy_overhead'] += self.c['sleep_seconds']
+        self.schedule(self.now + self.c['sleep_seconds'], 'free', gpu['id'])
+
+    def preempt(self, host_id):
+        host = self.hosts[host_id]
+        if not host['up']:
+            return
+        host['up'] = False
+        host['epoch'] += 1
+        host['down_since'] = self.now
+        lost = list(host['unflushed'])
+        host['unflushed'] = []
+
+        for gpu in self.gpus:
+            if gpu['host'] != host_id:
+                continue
+            gpu['up'] = False
+            launch = gpu['launch']
+            if launch is not None:
+                self.account(launch, self.scanned(launch))
+                if self.c['policy'] == 'lanes':
+                    gpu['lane'].insert(0, launch['batches'])
+                else:
+                    lost.extend(launch['batches'])
+            gpu['launch'] = None
+            lost.extend(gpu['buffer'])
+            gpu['buffer'] = []
+
+        # Klaim host mati (termasuk done yang belum ter-flush) tertahan sampai lease habis
+        if self.c['policy'] != 'lanes':
+            self.release(lost, self.now + self.c['lease_seconds'])
+        self.schedule(self.now + self.c['restart_seconds'], 'restart', host_id)
+
+    def restart(self, host_id):
+        host = self.hosts[host_id]
+        host['up'] = True
+        for gpu in self.gpus:
+            if gpu['host'] == host_id:
+                gpu['up'] = True
+                gpu['down'] += self.now - host['down_since']
+                self.schedule(self.now, 'free', gpu['id'])
+        self.schedule_preempt(host_id)
+
+    def schedule_preempt(self, host_id):
+        if self.c['preempt_hours'] > 0:
+            self.schedule(self.now + self.rng.expovariate(1.0 / (self.c['preempt_hours'] * 3600)), 'preempt', host_id)
+
+    def flush(self, host_id):
+        host = self.hosts[host_id]
+        if host['up']:
+            self.mark_done(host['unflushed'])
+            host['unflushed'] = []
+        self.schedule(self.now + self.c['flush_seconds'], 'flush', host_id)
+
+    def plan(self):
+        """Policy lanes: batch dibagi rata per host, lalu gpuspeed.plan_lanes dengan profil kecepatan berisik"""
+        per_host = math.ceil(len(self.state) / len(self.hosts))
+        for host_id in range(len(self.hosts)):
+            batch_ids = list(range(host_id * per_host, min(len(self.state), (host_id + 1) * per_host)))
+            gpus = [gpu for gpu in self.gpus if gpu['host'] == host_id]
+            estimates = {gpu['id']: gpu['speed'] * max(0.05, self.rng.gauss(1.0, self.c['speed_error'])) for gpu in gpus}
+            total = sum(estimates.values())
+            weights = {gpu_id: speed / total for gpu_id, speed in estimates.items()}
+            infos = [{'batch_id': batch_id, 'keys': self.batch_keys} for batch_id in batch_ids]
+            lanes = gpuspeed.plan_lanes(list(weights), infos, weights)
+            for gpu in gpus:
+                gpu['lane'] = [[info['batch_id'] for info in chunk] for chunk in lanes[gpu['id']]]
+                gpu['weight'] = weights[gpu['id']]
+
+    def run(self):
+        if self.c['policy'] == 'lanes':
+            self.plan()
+        gpus_by_id = {gpu['id']: gpu for gpu in self.gpus}
+        for gpu in self.gpus:
+            self.schedule(0.0, 'free', gpu['id'])
+        for host_id in range(len(self.hosts)):
+            self.schedule_preempt(host_id)
+            if self.c['flush_seconds'] > 0 and self.c['policy'] != 'lanes':
+                self.schedule(self.c['flush_seconds'], 'flush', host_id)
+
+        limit = self.c['max_hours'] * 3600
+        while self.events and self.coverage_time is None:
+            at, _, kind, payload = heapq.heappop(self.events)
+            if at > limit:
+                break
+            self.now = at
+            if kind == 'free':
+                self.gpu_free(gpus_by_id[payload[0]])
+            elif kind == 'finish':
+                self.finish(gpus_by_id[payload[0]], payload[1])
+            elif kind == 'preempt':
+                self.preempt(payload[0])
+            elif kind == 'restart':
+                self.restart(payload[0])
+            elif kind == 'flush':
+                self.flush(payload[0])
+        return self.report()
+
+    def report(self):
+        elapsed = self.coverage_time if self.coverage_time is not None else self.now
+        unique_keys = self.done_count * self.batch_keys
+        capacity = sum(gpu['speed'] for gpu in self.gpus)
+        up_time = sum(max(0.0, elapsed - gpu['down']) for gpu in self.gpus)
+        busy = sum(gpu['busy_scan'] + gpu['busy_overhead'] for gpu in self.gpus)
+        return {
+            'coverage_h': elapsed / 3600 if self.coverage_time is not None else float('inf'),
+            'throughput_mks': unique_keys / elapsed / 1e6 if elapsed else 0.0,
+            'efficiency': unique_keys / elapsed / capacity if elapsed else 0.0,
+            'idle': max(0.0, 1 - busy / up_time) if up_time else 0.0,
+            'redundant': max(0.0, self.scanned_keys - unique_keys) / unique_keys if unique_keys else 0.0,
+            'launches': self.launches,
+        }
+
+def parse_value(key, text):
+    default = DEFAULTS[key]
+    if isinstance(default, str):
+        return text
+    if isinstance(default, int):
+        return int(text)
+    return float(text)
+
+def parse_args(argv):
+    """key=v1,v2 -> grid; --from-timing mengisi speed/setup dari timingbatch.txt (autotune)"""
+    base = dict(DEFAULTS)
+    grid = {}
+    for arg in argv:
+        if arg == "--from-timing":
+            import autotune
+            profiles = list(autotune.build_speed_profiles().values())
+            if profiles:
+                base['speed_mks'] = sum(p['speed_mks'] for p in profiles) / len(profiles)
+                base['setup_seconds'] = sum(p['setup_seconds'] for p in profiles) / len(profiles)
+                print(f"📈 Calibrated from {len(profiles)} GPU profile(s): {base['speed_mks']:.0f} MK/s, "
+                      f"setup {base['setup_seconds']:.1f}s")
+            else:
+                print("⚠️ No timing records, using default GPU model")
+            continue
+        key, _, values = arg.partition('=')
+        if key not in DEFAULTS or not values:
+            raise ValueError(f"unknown parameter '{arg}' (use key=value, keys: {', '.join(DEFAULTS)})")
+        grid[key] = [parse_value(key, value) for value in values.split(',')]
+    return base, grid
+
+def simulate(config):
+    """Rata-rata report dari config['runs'] seed berturut-turut"""
+    reports = []
+    for run in range(int(config['runs'])):
+        reports.append(Simulation(dict(config, seed=config['seed'] + run)).run())
+    return {column: sum(r[column] for r in reports) / len(reports) for column in REPORT_COLUMNS}
+
+def display_results(rows, keys):
+    header = ' '.join(f"{key:>14}" for key in keys)
+    print(f"\n{'='*(len(header) + 70)}")
+    print(f"{header} {'coverage':>10} {'MK/s':>12} {'effic.':>8} {'idle':>7} {'redund.':>8} {'launches':>9}")
+    print(f"{'-'*(len(header) + 70)}")
+    for config, result in rows:
+        values = ' '.join(f"{str(config[key]):>14}" for key in keys)
+        print(f"{values} {result['coverage_h']:>9.2f}h {result['throughput_mks']:>12,.0f} "
+              f"{result['efficiency']*100:>7.1f}% {result['idle']*100:>6.1f}% "
+              f"{result['redundant']*100:>7.2f}% {result['launches']:>9.0f}")
+    print(f"{'='*(len(header) + 70)}")
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] in ("-h", "--help"):
+        print("Xiebo Fleet Simulator")
+        print("Usage: python3 simulate.py [--from-timing] [key=value[,value...]] ...")
+        print("  Example: python3 simulate.py policy=lanes steal=0,1 batches=64 preempt_hours=0,6")
+        print("  Parameters:")
+        for key, value in DEFAULTS.items():
+            print(f"    {key}={value}")
+        sys.exit(1)
+
+    try:
+        base, grid = parse_args(sys.argv[1:])
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    keys = list(grid) or ['policy']
+    rows = []
+    for values in itertools.product(*(grid.get(key, [base[key]]) for key in keys)):
+        config = dict(base, **dict(zip(keys, values)))
+        rows.append((config, simulate(config)))
+
+    fixed = [f"{key}={base[key]}" for key in ('hosts', 'gpus_per_host', 'batches', 'batch_bits') if key not in grid]
+    print(f"🧪 {len(rows)} configuration(s){', ' + ', '.join(fixed) if fixed else ''}")
+    display_results(rows, keys)
+
+if __name__ == "__main__":
+    main()
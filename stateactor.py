@@ -0,0 +1,166 @@
+import os
+import time
+import atexit
+import threading
+from contextlib import nullcontext
+import statelock
+
+# Konfigurasi state actor (satu thread pemilik file log, worker GPU hanya mengirim transisi)
+FLUSH_INTERVAL_SECONDS = 2.0       # Maksimal satu penulisan file per interval
+FLUSH_TIMEOUT_SECONDS = 60         # Waktu tunggu flush terakhir saat exit
+
+class LogActor:
+    """Tabel log di memori + satu thread penulis: banyak transisi digabung menjadi satu flush per interval
+
+    load_rows() dipanggil sekali saat mulai, write_rows(dict) hanya dipanggil dari thread actor,
+    sehingga file log tidak pernah ditulis bersamaan oleh beberapa thread GPU.
+    Dengan shared_path, flush memegang flock file tersebut dan menggabungkan baris yang diubah
+    proses lain (file berubah sejak flush terakhir) dengan baris yang diubah proses ini.
+    after_write (salinan ke Drive) dipanggil setelah flock dilepas.
+    """
+
+    def __init__(self, load_rows, write_rows, flush_interval=FLUSH_INTERVAL_SECONDS, shared_path=None,
+                 after_write=None):
+        self.load_rows = load_rows
+        self.write_rows = write_rows
+        self.after_write = after_write
+        self.flush_interval = flush_interval
+        self.shared_path = shared_path
+        self.file_lock = statelock.FileLock(shared_path) if shared_path else None
+        with self.file_lock if self.file_lock is not None else nullcontext():
+            self.rows = load_rows()
+            self.disk_stamp = self._stamp()
+        self.dirty = set()        # Baris yang diubah proses ini sejak flush terakhir
+        self.replaced = False     # replace(): seluruh tabel milik proses ini, tanpa merge
+        self.condition = threading.Condition()
+        self.version = 0          # Naik setiap transisi
+        self.flushed_version = 0  # Versi terakhir yang sudah ada di file
+        self.urgent = False
+        self.writes = 0
+        self.transitions = 0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        atexit.register(self.flush)
+
+    def put(self, batch_id, row, urgent=False):
+        """Transisi satu baris (mengganti baris lama); urgent = tulis tanpa menunggu interval"""
+        with self.condition:
+            self.rows[str(batch_id)] = dict(row)
+            self.dirty.add(str(batch_id))
+            self._changed(urgent)
+
+    def put_missing(self, rows):
+        """Menambah baris yang belum ada (inisialisasi batch), baris yang sudah ada tidak diubah"""
+        with self.condition:
+            added = 0
+            for batch_id, row in rows.items():
+                if batch_id not in self.rows:
+                    self.rows[batch_id] = dict(row)
+                    self.dirty.add(batch_id)
+                    added += 1
+            if added:
+                self._changed(False)
+
+    def replace(self, rows):
+        with self.condition:
+            self.rows = {batch_id: dict(row) for batch_id, row in rows.items()}
+            self.replaced = True
+            self._changed(False)
+
+    def _changed(self, urgent):
+        self.version += 1
+        self.transitions += 1
+        if urgent:
+            self.urgent = True
+            self.condition.notify_all()
+
+    def get(self, batch_id, default=None):
+        with self.condition:
+            row = self.rows.get(str(batch_id))
+            return dict(row) if row is not None else default
+
+    def snapshot(self):
+        """Salinan tabel dari memori (baris tidak pernah diubah di tempat, cukup salinan dangkal)"""
+        with self.condition:
+            return dict(self.rows)
+
+    def _run(self):
+        while True:
+            with self.condition:
+                deadline_at = time.time() + self.flush_interval
+                while not self.urgent and time.time() < deadline_at:
+                    self.condition.wait(max(0.0, deadline_at - time.time()))
+                self.urgent = False
+                if self.version == self.flushed_version:
+                    continue
+                version = self.version
+                rows = dict(self.rows)
+                dirty, self.dirty = self.dirty, set()
+                replaced, self.replaced = self.replaced, False
+
+            # Tulis di luar lock: worker tetap bisa mengirim transisi selama file ditulis
+            try:
+                adopted = self._write(rows, dirty, replaced)
+            except Exception as e:
+                print(f"❌ State actor write error: {e}")
+                with self.condition:
+                    self.dirty |= dirty
+                    self.replaced = self.replaced or replaced
+                continue
+
+            with self.condition:
+                # Baris dari proses lain masuk ke memori kecuali sudah diubah lagi sejak snapshot
+                for batch_id, row in adopted.items():
+                    if batch_id not in self.dirty:
+                        self.rows[batch_id] = row
+                self.flushed_version = version
+                self.writes += 1
+                self.condition.notify_all()
+
+    def _stamp(self):
+        if not self.shared_path:
+            return None
+        try:
+            st = os.stat(self.shared_path)
+            return (st.st_ino, st.st_size, st.st_mtime_ns)
+        except OSError:
+            return None
+
+    def _write(self, rows, dirty, replaced):
+        """Menulis tabel; file bersama digabung dengan isi disk jika proses lain menulis sejak flush terakhir"""
+        if self.file_lock is None:
+            self.write_rows(rows)
+            if self.after_write is not None:
+                self.after_write()
+            return {}
+
+        adopted = {}
+        with self.file_lock:
+            if not replaced and self._stamp() != self.disk_stamp:
+                disk = self.load_rows()
+                adopted = {batch_id: row for batch_id, row in disk.items() if batch_id not in dirty}
+                merged = dict(disk)
+                merged.update({batch_id: rows[batch_id] for batch_id in dirty if batch_id in rows})
+                rows = merged
+            self.write_rows(rows)
+            self.disk_stamp = self._stamp()
+
+        # Salinan lambat (Drive) tidak menahan proses lain
+        if self.after_write is not None:
+            self.after_write()
+        return adopted
+
+    def flush(self, timeout=FLUSH_TIMEOUT_SECONDS):
+        """Menunggu sampai semua transisi sudah tertulis ke file"""
+        deadline_at = time.time() + timeout
+        with self.condition:
+            target = self.version
+            while self.flushed_version < target and time.time() < deadline_at:
+                self.urgent = True
+                self.condition.notify_all()
+                self.condition.wait(max(0.0, min(1.0, deadline_at - time.time())))
+            return self.flushed_version >= target
+
+    def stats(self):
+        with self.condition:
+            return {'transitions': self.transitions, 'writes': self.writes, 'rows': len(self.rows)}
@@ -0,0 +1,223 @@
+import os
+import sys
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+import procgroup
+
+# Konfigurasi state bersama antar proses (beberapa runner di direktori yang sama, misal satu per GPU)
+LOCK_SUFFIX = ".lock"           # flock advisory di file terpisah (file data boleh di-replace)
+CLAIM_SUFFIX = ".claims"        # Jurnal klaim batch di samping file progress
+
+class FileLock:
+    """flock advisory antar proses + lock thread dalam proses (fd dibuka sekali, lock cukup satu syscall)
+
+    flock berlaku per open file description, sehingga thread dalam satu proses juga harus
+    saling menunggu lewat threading.Lock sebelum mengambil flock.
+    """
+
+    def __init__(self, path):
+        self.path = path + LOCK_SUFFIX
+        self.thread_lock = threading.RLock()
+        self.fd = None
+        self.depth = 0
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        self.depth += 1
+        if self.depth == 1 and fcntl is not None:
+            try:
+                if self.fd is None:
+                    self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(self.fd, fcntl.LOCK_EX)
+            except OSError as e:
+                print(f"⚠️ Lock {self.path} unavailable: {e} (continuing without cross-process lock)")
+        return self
+
+    def __exit__(self, *exc):
+        self.depth -= 1
+        if self.depth == 0 and fcntl is not None and self.fd is not None:
+            try:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+            except OSError:
+                pass
+        self.thread_lock.release()
+
+def write_text_atomic(path, text):
+    """File kecil (nextbatch.txt): tmp unik per proses lalu os.replace, pembaca tidak melihat file setengah jadi"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def owner_token():
+    return f"{os.getpid()}:{procgroup.proc_start_time(os.getpid()) or ''}"
+
+def owner_alive(token):
+    """Proses pemilik klaim masih hidup (start time dari /proc mencegah salah baca PID yang dipakai ulang)"""
+    pid_text, _, start_text = token.partition(':')
+    try:
+        pid = int(pid_text)
+    except ValueError:
+        return False
+    if start_text:
+        return str(procgroup.proc_start_time(pid)) == start_text
+    try:
+        os.kill(pid, 0)
+        return True
+    except OSError:
+        return False
+
+class ClaimJournal:
+    """Jurnal append-only klaim batch antar proses: 'C|batch|owner', 'D|batch', 'R|batch'
+
+    Setiap operasi memegang flock hanya untuk membaca byte baru sejak offset terakhir dan
+    menambahkan satu baris (tanpa fsync), sehingga waktu tahan lock dalam orde mikrodetik.
+    Klaim milik proses yang sudah mati dianggap kedaluwarsa dan boleh diklaim ulang.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = FileLock(path)
+        self.owner = owner_token()
+        self.claims = {}        # batch_id -> owner token
+        self.done = set()
+        self.fd = None
+        self.inode = None
+        self.offset = 0
+        self.buffer = b''
+        self.alive_cache = {}
+
+    def _open(self):
+        self.fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        self.inode = os.fstat(self.fd).st_ino
+        self.offset = 0
+        self.buffer = b''
+        self.claims = {}
+        self.done = set()
+
+    def _tail(self):
+        """Membaca baris baru dari proses lain, mengembalikan batch yang baru selesai"""
+        try:
+            inode = os.stat(self.path).st_ino
+        except OSError:
+            inode = None
+        if self.fd is None or inode != self.inode:
+            # Jurnal di-reset (sesi baru) oleh proses lain: mulai dari awal file baru
+            if self.fd is not None:
+                os.close(self.fd)
+            self._open()
+
+        data = os.pread(self.fd, 1 << 20, self.offset)
+        newly_done = []
+        while data:
+            self.offset += len(data)
+            lines = (self.buffer + data).split(b'\n')
+            self.buffer = lines.pop()
+            for line in lines:
+                kind, _, rest = line.decode(errors='replace').partition('|')
+                batch_text, _, owner = rest.partition('|')
+                if not batch_text.isdigit():
+                    continue
+                batch_id = int(batch_text)
+                if kind == 'C':
+                    self.claims[batch_id] = owner
+                elif kind == 'D':
+                    self.claims.pop(batch_id, None)
+                    if batch_id not in self.done:
+                        self.done.add(batch_id)
+                        newly_done.append(batch_id)
+                elif kind == 'R':
+                    self.claims.pop(batch_id, None)
+            data = os.pread(self.fd, 1 << 20, self.offset)
+        return newly_done
+
+    def _append(self, lines):
+        os.write(self.fd, ''.join(lines).encode())
+
+    def _claimed_elsewhere(self, batch_id):
+        owner = self.claims.get(batch_id)
+        if owner is None or owner == self.owner:
+            return False
+        if owner not in self.alive_cache:
+            self.alive_cache[owner] = owner_alive(owner)
+        return self.alive_cache[owner]
+
+    def sync(self):
+        with self.lock:
+            return self._tail()
+
+    def claim(self, batch_ids, is_done=None):
+        """Klaim semua batch atau tidak sama sekali; (berhasil, batch selesai yang baru terlihat)"""
+        with self.lock:
+            newly_done = self._tail()
+            self.alive_cache = {}
+            for batch_id in batch_ids:
+                if batch_id in self.done or (is_done is not None and is_done(batch_id)):
+                    return False, newly_done
+                if self._claimed_elsewhere(batch_id):
+                    return False, newly_done
+            lines = [f"C|{batch_id}|{self.owner}\n" for batch_id in batch_ids if self.claims.get(batch_id) != self.owner]
+            if lines:
+                self._append(lines)
+                for batch_id in batch_ids:
+                    self.claims[batch_id] = self.owner
+            return True, newly_done
+
+    def complete(self, batch_ids):
+        with self.lock:
+            newly_done = self._tail()
+            self._append([f"D|{batch_id}\n" for batch_id in batch_ids])
+            for batch_id in batch_ids:
+                self.claims.pop(batch_id, None)
+                self.done.add(batch_id)
+            return newly_done
+
+    def release(self, batch_ids):
+        """Batch gagal dilepas agar proses lain (atau --continue berikutnya) bisa mengulangnya"""
+        with self.lock:
+            self._tail()
+            lines = [f"R|{batch_id}\n" for batch_id in batch_ids if self.claims.get(batch_id) == self.owner]
+            if lines:
+                self._append(lines)
+                for batch_id in batch_ids:
+                    self.claims.pop(batch_id, None)
+
+    def reset(self):
+        """Sesi baru: jurnal lama diganti file kosong (inode baru, proses lain ikut reset)"""
+        with self.lock:
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            open(tmp_path, 'w').close()
+            os.replace(tmp_path, self.path)
+            if self.fd is not None:
+                os.close(self.fd)
+            self._open()
+
+    def active_claims(self):
+        """Klaim proses hidup (termasuk proses ini): batch_id -> owner"""
+        with self.lock:
+            self._tail()
+            self.alive_cache = {}
+            return {batch_id: owner for batch_id, owner in self.claims.items()
+                    if owner == self.owner or self._claimed_elsewhere(batch_id)}
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] in ("-h", "--help"):
+        print("Xiebo Shared State")
+        print("Usage:")
+        print(f"  Show claims: python3 statelock.py progress.json{CLAIM_SUFFIX}")
+        print("  Several runners in one directory claim batches through this journal (--continue per GPU)")
+        sys.exit(1)
+
+    journal = ClaimJournal(sys.argv[1])
+    claims = journal.active_claims()
+    print(f"{len(journal.done):,} batches done, {len(claims)} claimed by running processes")
+    for batch_id, owner in sorted(claims.items()):
+        print(f"   batch {batch_id}: pid {owner.split(':')[0]}")
+
+if __name__ == "__main__":
+    main()
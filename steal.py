@@ -0,0 +1,134 @@
+import sys
+import time
+import threading
+
+# Konfigurasi work stealing di akhir campaign (GPU idle mengambil launch yang belum mulai dari lane GPU lain)
+STEAL_FLAG = "--steal"
+
+ENABLED = False
+
+_LOCK = threading.Lock()
+_LANES = {}                     # gpu_id -> list chunk yang belum mulai (list yang sama dengan milik thread lane)
+_WEIGHTS = {}                   # gpu_id -> bobot kecepatan (gpuspeed), dipakai memperkirakan sisa waktu lane
+_BUSY = set()                   # gpu_id yang sedang menjalankan chunk (lane masih bisa berubah selama ada)
+POLL_SECONDS = 1                # Jeda awal GPU idle sebelum mencoba mencuri lagi
+POLL_MAX_SECONDS = 10           # Batas backoff polling (launch biasanya berjalan menit)
+
+# Launch yang sedang berjalan tidak pernah dipotong. xiebo (VanitySearch::getGPUStartingKeys) membagi
+# range launch rata ke semua thread GPU dan tiap thread men-scan potongannya sendiri, sehingga persen
+# progress bukan prefix range: menghentikan proses di titik mana pun meninggalkan lubang di setiap
+# potongan thread. Yang dicuri hanya chunk yang belum mulai, satuan yang sama dengan planner lane.
+
+def extract_steal_arg(argv):
+    """Mengambil '--steal' dari argv (dihapus dari list)"""
+    if STEAL_FLAG not in argv:
+        return False
+    argv.remove(STEAL_FLAG)
+    return True
+
+def enable():
+    global ENABLED
+    ENABLED = True
+
+def chunk_keys(chunk):
+    return sum(b['keys'] for b in chunk)
+
+def choose(thief_id, lanes, weights, size=chunk_keys):
+    """Chunk yang diambil GPU idle dari lane lain: (victim_id, chunk) atau None
+
+    Korban adalah lane dengan perkiraan sisa waktu terbesar (size / bobot). Yang diambil chunk terakhir
+    lane itu; jika tinggal satu chunk berisi beberapa batch, bagian atasnya dipisah (batas 2^k batch).
+    Chunk hanya diambil jika GPU idle menyelesaikannya sebelum korban sampai di akhir lane-nya.
+    lanes diubah di tempat (chunk dihapus dari lane korban).
+    """
+    best = None
+    for gpu_id, chunks in lanes.items():
+        if gpu_id == thief_id or not chunks or weights.get(gpu_id, 0) <= 0:
+            continue
+        queued = sum(size(chunk) for chunk in chunks) / weights[gpu_id]
+        if best is None or queued > best[0]:
+            best = (queued, gpu_id)
+
+    if best is None or weights.get(thief_id, 0) <= 0:
+        return None
+
+    queued, victim_id = best
+    chunks = lanes[victim_id]
+    last = chunks[-1]
+    split = 0
+    if len(chunks) == 1 and len(last) > 1:
+        split = 1 << ((len(last) - 1).bit_length() - 1)
+    piece = last[split:]
+    if size(piece) / weights[thief_id] > queued:
+        return None
+
+    if split:
+        chunks[-1] = last[:split]
+    else:
+        chunks.pop()
+    return victim_id, piece
+
+def share(lanes, weights):
+    """Mendaftarkan lane semua GPU sebelum thread lane mulai (hanya jika --steal aktif)"""
+    if not ENABLED:
+        return
+    with _LOCK:
+        _LANES.clear()
+        _LANES.update(lanes)
+        _WEIGHTS.clear()
+        _WEIGHTS.update(weights)
+        _BUSY.clear()
+
+def next_chunk(gpu_id, chunks, stopped=None):
+    """Chunk berikutnya untuk GPU ini: dari depan lane sendiri, lalu (--steal) dari lane GPU lain
+
+    Dipanggil setelah chunk sebelumnya selesai. Selama lane lain masih punya chunk antri atau
+    sedang berjalan, GPU idle menunggu (backoff) dan mencoba lagi; None jika tidak ada kerja
+    tersisa di lane mana pun atau stopped() bernilai True.
+    """
+    delay = POLL_SECONDS
+    while True:
+        with _LOCK:
+            _BUSY.discard(gpu_id)
+            if chunks:
+                _BUSY.add(gpu_id)
+                return chunks.pop(0)
+            if not ENABLED or _LANES.get(gpu_id) is not chunks:
+                return None
+            picked = choose(gpu_id, _LANES, _WEIGHTS)
+            if picked is not None:
+                _BUSY.add(gpu_id)
+                break
+            pending = any(lane for other, lane in _LANES.items() if other != gpu_id) or _BUSY
+        if not pending or (stopped is not None and stopped()):
+            return None
+        time.sleep(delay)
+        delay = min(delay * 2, POLL_MAX_SECONDS)
+
+    victim_id, chunk = picked
+    batch_text = f"{chunk[0]['batch_id']}" + (f"-{chunk[-1]['batch_id']}" if len(chunk) > 1 else "")
+    print(f"\n🦝 GPU {gpu_id}: taking Batch {batch_text} from GPU {victim_id}'s lane (not started yet)")
+    return chunk
+
+def leave(gpu_id):
+    """Thread lane selesai (termasuk exception/GPU unhealthy): GPU lain tidak menunggunya lagi"""
+    with _LOCK:
+        _BUSY.discard(gpu_id)
+
+def drain(chunks):
+    """Semua chunk lane yang belum mulai (GPU unhealthy menyerahkan sisa lane)"""
+    with _LOCK:
+        rest = list(chunks)
+        chunks.clear()
+    return rest
+
+def main():
+    print("Xiebo Tail Work Stealing")
+    print("Usage:")
+    print(f"  python3 kamu.py --parallel GPU_IDS START_HEX RANGE_BITS ADDRESS BATCH_COUNT {STEAL_FLAG}")
+    print("  A GPU whose lane is empty takes the last unstarted launch of the lane with the most")
+    print("  estimated time left (splitting a lone multi-batch launch); running xiebo processes are never cut")
+    sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+# Konfigurasi telemetry (endpoint lokal format Prometheus + snapshot JSON)
+METRICS_PORT = int(os.environ.get("XIEBO_METRICS_PORT", "9109"))  # http://127.0.0.1:9109/metrics
+METRICS_HOST = "127.0.0.1"          # Hanya localhost
+SNAPSHOT_FILE = "metrics.json"      # Snapshot JSON periodik
+SNAPSHOT_INTERVAL_SECONDS = 30      # Interval penulisan snapshot
+WINDOW_SECONDS = 300                # Rolling window untuk rata-rata dan rate
+GPU_IDLE_SECONDS = 60               # GPU tanpa frame MK/s selama ini tidak dihitung di fleet speed
+
+class RollingWindow:
+    """Sampel (timestamp, value) dalam jendela waktu terakhir"""
+
+    def __init__(self, window_seconds=None):
+        self.window_seconds = window_seconds or WINDOW_SECONDS
+        self.samples = deque()
+
+    def add(self, value, now=None):
+        now = time.time() if now is None else now
+        self.samples.append((now, value))
+        self._trim(now)
+
+    def _trim(self, now):
+        while self.samples and self.samples[0][0] < now - self.window_seconds:
+            self.samples.popleft()
+
+    def values(self, now=None):
+        self._trim(time.time() if now is None else now)
+        return [value for _, value in self.samples]
+
+    def average(self):
+        values = self.values()
+        return sum(values) / len(values) if values else 0.0
+
+    def maximum(self):
+        values = self.values()
+        return max(values) if values else 0.0
+
+    def total(self):
+        return sum(self.values())
+
+    def rate(self):
+        """Jumlah value per detik dalam jendela"""
+        return self.total() / self.window_seconds
+
+    def last(self):
+        return self.samples[-1] if self.samples else None
+
+class Metrics:
+    """Agregasi throughput per GPU, batch, antrian dan latency untuk satu proses runner"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.gpu_speed = {}          # gpu -> RollingWindow MK/s
+        self.gpu_last_bkeys = {}     # gpu -> BKeys frame terakhir (kumulatif per batch)
+        self.keys_scanned = {}       # gpu -> total keys
+        self.batches_done = {}       # gpu -> total batch selesai
+        self.batches_window = RollingWindow()
+        self.db_latency = RollingWindow()
+        self.state_write_latency = RollingWindow()
+        self.queue_depth = 0
+
+    def observe_progress(self, gpu_id, progress):
+        """Frame progress xiebo (dari batchtiming.parse_progress_line)"""
+        if not progress:
+            return
+
+        gpu_id = str(gpu_id)
+        with self.lock:
+            self.gpu_speed.setdefault(gpu_id, RollingWindow()).add(progress['speed'])
+
+            # BKeys kumulatif per batch: selisih frame = keys yang baru discan
+            previous = self.gpu_last_bkeys.get(gpu_id)
+            current = progress['bkeys']
+            delta = current if previous is None or current < previous else current - previous
+            self.gpu_last_bkeys[gpu_id] = current
+            self.keys_scanned[gpu_id] = self.keys_scanned.get(gpu_id, 0) + int(delta * 1_000_000_000)
+
+    def observe_batch(self, gpu_id, count=1):
+        """Batch selesai (launch gabungan dihitung per batch anggota)"""
+        gpu_id = str(gpu_id)
+        with self.lock:
+            self.batches_done[gpu_id] = self.batches_done.get(gpu_id, 0) + count
+            self.batches_window.add(count)
+            # Batch berikutnya mulai dari BKeys 0
+            self.gpu_last_bkeys.pop(gpu_id, None)
+
+    def observe_db(self, seconds):
+        with self.lock:
+            self.db_latency.add(seconds)
+
+    def observe_state_write(self, seconds):
+        with self.lock:
+            self.state_write_latency.add(seconds)
+
+    def set_queue_depth(self, depth):
+        with self.lock:
+            self.queue_depth = depth
+
+    def snapshot(self):
+        """Semua metric sebagai dict (untuk JSON)"""
+        now = time.time()
+        with self.lock:
+            gpus = {}
+            fleet_speed = 0.0
+            for gpu_id in sorted(set(self.gpu_speed) | set(self.batches_done)):
+                window = self.gpu_speed.get(gpu_id)
+                last = window.last() if window else None
+                active = last is not None and now - last[0] <= GPU_IDLE_SECONDS
+                current_speed = last[1] if active else 0.0
+                fleet_speed += current_speed
+                gpus[gpu_id] = {
+                    'speed_mks': current_speed,
+                    'speed_mks_avg': window.average() if window else 0.0,
+                    'keys_scanned': self.keys_scanned.get(gpu_id, 0),
+                    'batches_done': self.batches_done.get(gpu_id, 0)
+                }
+
+            return {
+                'timestamp': now,
+                'uptime_seconds': now - self.started_at,
+                'window_seconds': WINDOW_SECONDS,
+                'fleet_speed_mks': fleet_speed,
+                'keys_scanned': sum(self.keys_scanned.values()),
+                'batches_done': sum(self.batches_done.values()),
+                'batches_per_second': self.batches_window.rate(),
+                'queue_depth': self.queue_depth,
+                'db_latency_avg': self.db_latency.average(),
+                'db_latency_max': self.db_latency.maximum(),
+                'state_write_latency_avg': self.state_write_latency.average(),
+                'state_write_latency_max': self.state_write_latency.maximum(),
+                'gpus': gpus
+            }
+
+    def prometheus_text(self):
+        """Semua metric dalam format teks Prometheus"""
+        snap = self.snapshot()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ','.join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        gpus = snap['gpus']
+        metric("xiebo_gpu_speed_mks", "gauge", "Latest speed per GPU (MK/s)",
+               [({'gpu': g}, info['speed_mks']) for g, info in gpus.items()])
+        metric("xiebo_gpu_speed_mks_avg", "gauge", f"Average speed per GPU over {WINDOW_SECONDS}s (MK/s)",
+               [({'gpu': g}, info['speed_mks_avg']) for g, info in gpus.items()])
+        metric("xiebo_keys_scanned_total", "counter", "Keys scanned per GPU",
+               [({'gpu': g}, info['keys_scanned']) for g, info in gpus.items()])
+        metric("xiebo_batches_done_total", "counter", "Batches completed per GPU",
+               [({'gpu': g}, info['batches_done']) for g, info in gpus.items()])
+        metric("xiebo_fleet_speed_mks", "gauge", "Sum of latest speed of active GPUs (MK/s)",
+               [({}, snap['fleet_speed_mks'])])
+        metric("xiebo_batches_per_second", "gauge", f"Batches completed per second over {WINDOW_SECONDS}s",
+               [({}, snap['batches_per_second'])])
+        metric("xiebo_queue_depth", "gauge", "Launches waiting in the work queue",
+               [({}, snap['queue_depth'])])
+        metric("xiebo_db_latency_seconds", "gauge", f"Database call latency over {WINDOW_SECONDS}s",
+               [({'stat': 'avg'}, snap['db_latency_avg']), ({'stat': 'max'}, snap['db_latency_max'])])
+        metric("xiebo_state_write_latency_seconds", "gauge", f"State/log write latency over {WINDOW_SECONDS}s",
+               [({'stat': 'avg'}, snap['state_write_latency_avg']), ({'stat': 'max'}, snap['state_write_latency_max'])])
+        metric("xiebo_uptime_seconds", "gauge", "Seconds since the runner started",
+               [({}, snap['uptime_seconds'])])
+
+        return '\n'.join(lines) + '\n'
+
+# Metric bersama untuk semua thread GPU dalam satu proses
+METRICS = Metrics()
+
+@contextmanager
+def timed(kind):
+    """Mengukur latency satu operasi: 'db' atau 'state'"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        if kind == 'db':
+            METRICS.observe_db(elapsed)
+        else:
+            METRICS.observe_state_write(elapsed)
+
+def write_snapshot(path=None):
+    """Menulis snapshot JSON secara atomik"""
+    path = path or SNAPSHOT_FILE
+    try:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(METRICS.snapshot(), f, indent=2)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"❌ Error writing metrics snapshot: {e}")
+
+def _snapshot_loop():
+    while True:
+        time.sleep(SNAPSHOT_INTERVAL_SECONDS)
+        write_snapshot()
+
+def start_server(port=None):
+    """Menjalankan endpoint /metrics (Prometheus) dan /metrics.json di thread daemon"""
+    # Import lazy: runner tanpa --metrics tidak membutuhkan http.server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    port = METRICS_PORT if port is None else port
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith('/metrics.json'):
+                body = json.dumps(METRICS.snapshot(), indent=2).encode()
+                content_type = 'application/json'
+            elif self.path.startswith('/metrics'):
+                body = METRICS.prometheus_text().encode()
+                content_type = 'text/plain; version=0.0.4'
+            else:
+                self.send_response(404)
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Jangan campur log HTTP dengan output xiebo
+            pass
+
+    try:
+        server = ThreadingHTTPServer((METRICS_HOST, port), MetricsHandler)
+    except OSError as e:
+        print(f"❌ Cannot start metrics endpoint on port {port}: {e}")
+        return None
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    threading.Thread(target=_snapshot_loop, daemon=True).start()
+    atexit.register(write_snapshot)
+    print(f"📈 Metrics: http://{METRICS_HOST}:{port}/metrics (JSON: /metrics.json, snapshot: {SNAPSHOT_FILE})")
+    return server
+
+def extract_metrics_arg(argv):
+    """Mengambil '--metrics [PORT]' dari argv (dihapus dari list), mengembalikan port atau None"""
+    if "--metrics" not in argv:
+        return None
+
+    index = argv.index("--metrics")
+    port = METRICS_PORT
+    if index + 1 < len(argv) and argv[index + 1].isdigit() and len(argv[index + 1]) <= 5:
+        port = int(argv[index + 1])
+        del argv[index:index + 2]
+    else:
+        del argv[index]
+    return port
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ("--show", "--prometheus"):
+        print("Xiebo Throughput Telemetry")
+        print("Usage:")
+        print(f"  Show last snapshot:    python3 telemetry.py --show [{SNAPSHOT_FILE}]")
+        print(f"  Show as Prometheus:    python3 telemetry.py --prometheus")
+        print(f"  Enable in runners:     add --metrics [PORT] (default {METRICS_PORT}, env XIEBO_METRICS_PORT)")
+        sys.exit(1)
+
+    if sys.argv[1] == "--prometheus":
+        import urllib.request
+        with urllib.request.urlopen(f"http://{METRICS_HOST}:{METRICS_PORT}/metrics", timeout=5) as response:
+            print(response.read().decode())
+        sys.exit(0)
+
+    path = sys.argv[2] if len(sys.argv) > 2 else SNAPSHOT_FILE
+    if not os.path.exists(path):
+        print(f"📭 No snapshot file {path}")
+        sys.exit(1)
+
+    with open(path, 'r') as f:
+        snap = json.load(f)
+
+    print(f"\n{'='*60}")
+    print("📈 XIEBO THROUGHPUT")
+    print(f"{'='*60}")
+    print(f"Fleet speed     : {snap['fleet_speed_mks']:.1f} MK/s")
+    print(f"Keys scanned    : {snap['keys_scanned']:,}")
+    print(f"Batches done    : {snap['batches_done']} ({snap['batches_per_second']*3600:.1f}/hour)")
+    print(f"Queue depth     : {snap['queue_depth']}")
+    print(f"DB latency      : avg {snap['db_latency_avg']*1000:.1f} ms, max {snap['db_latency_max']*1000:.1f} ms")
+    print(f"State latency   : avg {snap['state_write_latency_avg']*1000:.1f} ms, max {snap['state_write_latency_max']*1000:.1f} ms")
+    print(f"{'-'*60}")
+    for gpu_id, info in snap['gpus'].items():
+        print(f"GPU {gpu_id}: {info['speed_mks']:.1f} MK/s (avg {info['speed_mks_avg']:.1f}), "
+              f"{info['keys_scanned']:,} keys, {info['batches_done']} batches")
+    print(f"{'='*60}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modul runner berupa skrip datar di root repo
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,62 @@
+import audit
+
+def sweep(target, intervals):
+    gaps, overlaps = [], []
+    coverage = audit.CoverageSweep(target[0], target[1], lambda s, e: gaps.append((s, e)),
+                                   lambda s, e: overlaps.append((s, e)))
+    for start_int, end_int in sorted(intervals):
+        coverage.feed(start_int, end_int)
+    coverage.finish()
+    return coverage, gaps, overlaps
+
+def test_sweep_finds_gaps_overlaps_and_outside_keys():
+    coverage, gaps, overlaps = sweep((100, 200), [(90, 120), (110, 130), (125, 140), (150, 160), (210, 220)])
+    assert gaps == [(140, 150), (160, 200)]
+    assert overlaps == [(110, 120), (125, 130)]
+    assert coverage.covered_keys == 50
+    assert coverage.overlap_keys == 15
+    assert coverage.outside_keys == 20
+    assert coverage.gap_keys == 50
+
+def test_adjacent_overlaps_are_joined():
+    _, _, overlaps = sweep((0, 20), [(0, 10), (5, 20), (10, 15)])
+    assert overlaps == [(5, 15)]
+
+def test_full_coverage_has_no_gaps():
+    coverage, gaps, overlaps = sweep((0, 64), [(0, 32), (32, 64)])
+    assert gaps == [] and overlaps == []
+    assert coverage.covered_keys == 64
+
+def test_sorted_stream_merges_spilled_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(audit, 'CHUNK_INTERVALS', 3)
+    source = [(9, 10), (1, 2), (5, 6), (3, 4), (7, 8), (0, 1), (2, 3)]
+    merged, spills = audit.sorted_stream([iter(source)], str(tmp_path))
+    assert list(merged) == sorted(source)
+    assert spills == 2
+
+def test_scanned_bits_rounds_up():
+    assert audit.scanned_bits(0, (1 << 20) - 1) == 20
+    assert audit.scanned_bits(0, 1 << 20) == 21
+    assert audit.scanned_bits(5, 5) == 1
+
+def test_run_audit_writes_aligned_gap_batches(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "timingbatch.txt").write_text(
+        "kind|batch_id|start_hex|range_bits|t_scan_end|return_code\n"
+        "batch|0|100000|20|1.0|0\n"
+        "batch|2|300000|20||1\n"
+        "batch|3|400000|20|2.0|0\n")
+    (tmp_path / "logbatch.txt").write_text(
+        "batch_id|start_hex|range_bits|status\n"
+        "1|200000|20|done\n")
+
+    stats = audit.run_audit(target=(0x100000, 0x500000))
+    assert stats['timing_confirmed'] == 2
+    assert stats['log_status'] == {'done': 1}
+    # Status 'done' tanpa --trust-status tidak dihitung sebagai coverage
+    assert (tmp_path / "gaps_batches.txt").read_text().splitlines() == [
+        "batch_id|start_hex|end_hex", "4|200000|3fffff"]
+
+    audit.run_audit(target=(0x100000, 0x500000), trust_status=True)
+    assert (tmp_path / "gaps_batches.txt").read_text().splitlines() == [
+        "batch_id|start_hex|end_hex", "4|300000|3fffff"]
@@ -0,0 +1,49 @@
+import os
+import json
+import sys
+import subprocess
+import pytest
+
+BENCH_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks")
+sys.path.insert(0, BENCH_DIR)
+
+import bench_orchestration
+
+# Gate wall-clock hanya berarti di mesin tempat baseline.json direkam: opt-in lewat XIEBO_BENCH=1
+BENCH_ENABLED = os.environ.get("XIEBO_BENCH", "") == "1"
+
+def result(runner, **metrics):
+    row = {'runner': runner, 'requested': 16, 'batches': 16, 'batches_per_sec': 10.0, 'launch_ms': 20.0, 'state_ms': 1.0, 'rss_growth_kb': 0}
+    row.update(metrics)
+    return row
+
+def test_compare_flags_only_regressions_beyond_tolerance():
+    baseline = {'bm': {'batches_per_sec': 10.0, 'launch_ms': 20.0, 'state_ms': 1.0, 'rss_growth_kb': 0}}
+    assert bench_orchestration.compare([result('bm', batches_per_sec=8.0, launch_ms=29.0)], baseline) == []
+    regressions = bench_orchestration.compare([result('bm', batches_per_sec=7.0, launch_ms=31.0)], baseline)
+    assert [r.split(':')[0] for r in regressions] == ['bm.batches_per_sec', 'bm.launch_ms']
+    assert bench_orchestration.compare([result('kamu', batches_per_sec=1.0)], baseline) == []
+
+def test_compare_gates_only_same_batch_count():
+    baseline = {'bm': {'batches': 32, 'batches_per_sec': 10.0}}
+    assert bench_orchestration.compare([result('bm', batches_per_sec=1.0)], baseline) == []
+    baseline['bm']['batches'] = 16
+    assert len(bench_orchestration.compare([result('bm', batches_per_sec=1.0)], baseline)) == 1
+
+def test_incomplete_run_is_a_regression():
+    regressions = bench_orchestration.compare([result('bm', batches=12)], {})
+    assert regressions == ['bm.batches: 12 of 16 completed']
+
+def test_baseline_matches_default_batch_count():
+    with open(bench_orchestration.BASELINE_FILE, 'r') as f:
+        baseline = json.load(f)
+    assert {entry['batches'] for entry in baseline.values()} == {bench_orchestration.DEFAULT_BATCHES}
+
+@pytest.mark.skipif(not BENCH_ENABLED, reason="wall-clock gate, set XIEBO_BENCH=1 on the baseline machine")
+def test_file_runners_stay_within_baseline():
+    # Gate regresi orkestrasi: runner asli + fake xiebo, gagal jika lebih buruk dari baseline.json
+    run = subprocess.run([sys.executable, os.path.join(BENCH_DIR, "bench_orchestration.py"), "bm,kamu"],
+                         capture_output=True, text=True,
+                         timeout=bench_orchestration.RUN_TIMEOUT_SECONDS)
+    assert run.returncode == 0, run.stdout[-2000:] + run.stderr[-2000:]
+    assert "No regressions" in run.stdout
@@ -0,0 +1,47 @@
+import coalesce
+
+def make_batches(start, count, keys, first_id=1):
+    return [{'id': first_id + i, 'start_range': format(start + i * keys, 'x'),
+             'end_range': format(start + (i + 1) * keys - 1, 'x')} for i in range(count)]
+
+def test_aligned_run_merges_into_power_of_two_launches():
+    batches = make_batches(1 << 30, 6, 1 << 20)
+    launches = coalesce.plan_launches(batches)
+    assert [len(launch['batches']) for launch in launches] == [4, 2]
+    assert launches[0]['start_hex'] == format(1 << 30, 'x')
+    assert launches[0]['bits'] == 22
+    assert launches[1]['bits'] == 21
+
+def test_misaligned_start_limits_merge():
+    # Batch pertama di offset ganjil: tidak bisa digabung dengan batch berikutnya
+    batches = make_batches((1 << 30) + (1 << 20), 3, 1 << 20)
+    launches = coalesce.plan_launches(batches)
+    assert [len(launch['batches']) for launch in launches] == [1, 2]
+
+def test_gap_and_unaligned_batches_stay_single():
+    batches = make_batches(0, 2, 1 << 20)
+    batches += make_batches(4 << 20, 1, 1 << 20, first_id=3)
+    batches.append({'id': 4, 'start_range': '500001', 'end_range': '5fffff'})
+    batches.append({'id': 5, 'start_range': 'zz', 'end_range': '1'})
+    launches = coalesce.plan_launches(batches)
+    assert [len(launch['batches']) for launch in launches] == [2, 1, 1, 1]
+    assert launches[2]['bits'] is None
+    assert launches[3]['bits'] is None
+
+def test_limits_respected():
+    batches = make_batches(0, 8, 1 << 20)
+    assert [len(l['batches']) for l in coalesce.plan_launches(batches, max_batches=2)] == [2, 2, 2, 2]
+    assert [len(l['batches']) for l in coalesce.plan_launches(batches, max_bits=21)] == [2, 2, 2, 2]
+
+def test_attribute_found_to_member_holding_key():
+    batches = make_batches(0, 4, 1 << 20)
+    key = (2 << 20) + 5
+    results = coalesce.attribute_found(batches, 'Yes', 'WIF', {'private_key_hex': format(key, 'x')})
+    assert results == [('No', ''), ('No', ''), ('Yes', 'WIF'), ('No', '')]
+
+def test_attribute_found_unreadable_key_marks_all():
+    batches = make_batches(0, 2, 1 << 20)
+    assert coalesce.attribute_found(batches, 'Yes', 'WIF', {'private_key_hex': ''}) == [('Yes', 'WIF')] * 2
+    outside = {'private_key_hex': format(10 << 20, 'x')}
+    assert coalesce.attribute_found(batches, 'Yes', 'WIF', outside) == [('Yes', 'WIF')] * 2
+    assert coalesce.attribute_found(batches, 'No', '', None) == [('No', '')] * 2
@@ -0,0 +1,79 @@
+import time
+import socket
+import threading
+import pytest
+import coordinator
+
+@pytest.fixture
+def store(tmp_path):
+    store = coordinator.BatchStore(str(tmp_path / "coordinator.db"))
+    store.insert_rows(coordinator.range_rows('100000', 23, 20))
+    return store
+
+def expire_leases(store):
+    with store.lock:
+        store.conn.execute("UPDATE batches SET lease_until = ? WHERE owner IS NOT NULL", (time.time() - 1,))
+
+def test_range_rows_cover_range():
+    rows = list(coordinator.range_rows('100000', 21, 20, first_id=5))
+    assert rows == [(5, '100000', '1fffff'), (6, '200000', '2fffff')]
+
+def test_claims_are_exclusive_and_ordered(store):
+    first = [row['id'] for row in store.claim('a', 3)]
+    second = [row['id'] for row in store.claim('b', 3)]
+    assert first == [0, 1, 2]
+    assert second == [3, 4, 5]
+    assert store.insert_rows(coordinator.range_rows('100000', 23, 20)) == 0
+
+def test_expired_lease_moves_to_other_worker(store):
+    store.claim('a', 2)
+    assert store.heartbeat('a', [0, 1]) == []
+    expire_leases(store)
+    assert [row['id'] for row in store.claim('b', 2)] == [0, 1]
+    assert store.heartbeat('a', [0, 1]) == [0, 1]
+
+def test_complete_rules(store):
+    store.claim('a', 3)
+    # Status selain done hanya dari pemilik klaim, done selalu diterima
+    assert store.complete('b', [(0, 'error', '', '')]) == 0
+    assert store.complete('b', [(0, 'done', 'No', '')]) == 1
+    assert store.complete('a', [(1, 'stalled', '', '')], release=[2]) == 1
+    assert store.status()['counts'] == {'done': 1, 'stalled': 1, 'pending': 6}
+    assert [row['id'] for row in store.claim('b', 1)] == [2]
+
+def test_found_stops_claims(store, tmp_path):
+    store.claim('a', 1)
+    store.complete('a', [(0, 'done', 'Yes', 'WIF')])
+    assert store.claim('a', 1) == []
+    # Flag stop bertahan setelah daemon restart
+    assert coordinator.BatchStore(store.path).stop
+
+def test_report_is_idempotent(store):
+    entry = {'key': 'k1', 'batch_id': '3', 'address': '1Addr', 'hex': 'abc'}
+    assert store.report('a', [entry]) == 1
+    assert store.report('b', [entry]) == 0
+    assert store.stop
+    assert len(store.status()['found']) == 1
+
+def test_client_round_trip_over_http(store, monkeypatch):
+    monkeypatch.setenv("no_proxy", "*")
+    with socket.socket() as probe:
+        probe.bind((coordinator.COORD_HOST, 0))
+        port = probe.getsockname()[1]
+    threading.Thread(target=coordinator.serve, args=(store, coordinator.COORD_HOST, port), daemon=True).start()
+
+    client = coordinator.CoordinatorClient(f"http://{coordinator.COORD_HOST}:{port}", worker="host-a")
+    for _ in range(50):
+        try:
+            rows = client.claim(2)
+        except Exception:
+            rows = None
+        if rows is not None:
+            break
+        time.sleep(0.1)
+    assert [row['id'] for row in rows] == [0, 1]
+
+    assert client.complete([(0, 'done', 'No', '')])
+    assert client.held == {1}
+    client.release_all()
+    assert client.status()['counts'] == {'done': 1, 'pending': 7}
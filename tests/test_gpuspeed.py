@@ -0,0 +1,25 @@
+import gpuspeed
+
+BATCH_KEYS = 1 << 20
+
+def batches(*batch_ids, keys=BATCH_KEYS):
+    return [{'batch_id': i, 'start_hex': format(i * BATCH_KEYS, 'x'), 'bits': 20, 'keys': keys} for i in batch_ids]
+
+def lane_ids(lane):
+    return [[b['batch_id'] for b in chunk] for chunk in lane]
+
+def test_fast_gpu_gets_merged_power_of_two_chunks():
+    lanes = gpuspeed.plan_lanes([0, 1], batches(*range(10)), {'0': 0.8, '1': 0.2})
+    assert lane_ids(lanes['0']) == [[0, 1, 2, 3], [4, 5, 6, 7]]
+    assert lane_ids(lanes['1']) == [[8], [9]]
+
+def test_non_contiguous_leftover_is_not_merged():
+    # Re-plan leftover dari GPU unhealthy: chunk 4 batch [0, 1, 4, 5] akan men-scan batch 2-3 milik lane lain
+    lanes = gpuspeed.plan_lanes([0, 1], batches(0, 1, 4, 5, 6), {'0': 0.8, '1': 0.2})
+    assert lane_ids(lanes['0']) == [[0], [1], [4], [5]]
+    assert lane_ids(lanes['1']) == [[6]]
+
+def test_contiguous_requires_adjacent_ranges_of_equal_size():
+    assert gpuspeed.contiguous(batches(4, 5, 6, 7))
+    assert not gpuspeed.contiguous(batches(4, 6))
+    assert not gpuspeed.contiguous(batches(4) + batches(5, keys=BATCH_KEYS // 2))
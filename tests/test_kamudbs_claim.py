@@ -0,0 +1,99 @@
+from collections import deque
+import pytest
+import kamudbs
+import coordinator
+
+BATCH_KEYS = 1 << 20
+
+class FakeTable:
+    """Tbatch bersama beberapa host: prefetch membaca snapshot, claim atomic seperti UPDATE ... OUTPUT"""
+
+    def __init__(self, count):
+        self.rows = {i: {'id': i, 'start_range': format(i * BATCH_KEYS, 'x'),
+                         'end_range': format((i + 1) * BATCH_KEYS - 1, 'x'),
+                         'status': '', 'found': '', 'wif': ''} for i in range(count)}
+        self.claims = []
+        self.available = True
+
+    def get_batches_from(self, start_id, limit):
+        if not self.available:
+            return None
+        return [dict(self.rows[i]) for i in range(start_id, start_id + limit) if i in self.rows]
+
+    def claim_batches(self, batch_ids):
+        if not self.available:
+            return None
+        won = {i for i in batch_ids if self.rows[i]['status'] not in ('done', 'inprogress')}
+        for i in won:
+            self.rows[i]['status'] = 'inprogress'
+        self.claims.append(sorted(batch_ids))
+        return won
+
+@pytest.fixture
+def table(monkeypatch):
+    table = FakeTable(64)
+    monkeypatch.setattr(kamudbs, 'get_batches_from', table.get_batches_from)
+    monkeypatch.setattr(kamudbs, 'claim_batches', table.claim_batches)
+    monkeypatch.setattr(kamudbs, 'PREFETCH_BUFFER', deque())
+    monkeypatch.setattr(kamudbs, 'CURRENT_GLOBAL_BATCH_ID', 0)
+    monkeypatch.setattr(kamudbs, 'PREFETCH_FAILURES', 0)
+    monkeypatch.setattr(kamudbs, 'PREFETCH_RETRY_AT', 0)
+    monkeypatch.setattr(kamudbs, 'COORDINATOR', None)
+    return table
+
+def launch_ids(launch):
+    return [row['id'] for row in launch['batches']]
+
+def test_rows_taken_after_prefetch_are_not_launched(table):
+    kamudbs.refill_prefetch()
+    # Host lain dengan START_ID sama mengklaim batch setelah prefetch host ini
+    table.claim_batches([0, 1, 2, 3])
+
+    launch = kamudbs.claim_next_launch()
+    assert launch['claimed']
+    assert launch_ids(launch) == [4, 5, 6, 7]
+    assert table.rows[4]['status'] == 'inprogress'
+
+    # Batch yang sudah dimenangkan tidak diklaim ulang
+    claims_before = len(table.claims)
+    assert launch_ids(kamudbs.claim_next_launch()) == [8, 9, 10, 11, 12, 13, 14, 15]
+    assert len(table.claims) == claims_before
+
+def test_fully_lost_window_is_skipped(table):
+    kamudbs.refill_prefetch()
+    table.claim_batches(list(range(16)))
+    assert kamudbs.claim_next_launch() == []
+    assert launch_ids(kamudbs.claim_next_launch())[0] == 16
+
+def test_outage_runs_buffered_rows_without_claim(table):
+    kamudbs.refill_prefetch()
+    table.available = False
+    launch = kamudbs.claim_next_launch()
+    assert launch_ids(launch) == list(range(16))
+    assert not launch['claimed']
+    assert kamudbs.PREFETCH_FAILURES == 1
+
+class StoreAgent:
+    """CoordinatorClient tanpa HTTP: claim langsung ke BatchStore"""
+
+    def __init__(self, store, worker):
+        self.store = store
+        self.worker = worker
+        self.after = 0
+        self.stop_requested = False
+
+    def claim(self, count):
+        return self.store.claim(self.worker, count, self.after)
+
+def test_coordinator_agent_holds_at_most_one_claim(table, tmp_path, monkeypatch):
+    store = coordinator.BatchStore(str(tmp_path / "coordinator.db"))
+    # Range tidak sejajar 2^k batch: setiap launch hanya satu batch, buffer tersisa lebih lama
+    store.insert_rows(coordinator.range_rows('100000', 27, 20))
+    monkeypatch.setattr(kamudbs, 'COORDINATOR', StoreAgent(store, 'host-a'))
+
+    for _ in range(2 * coordinator.CLAIM_BATCHES):
+        launch = kamudbs.claim_next_launch()
+        assert launch['claimed']
+        # Lease yang dipegang: launch yang sedang jalan + sisa buffer, tidak lebih dari satu claim
+        assert store.status()['workers']['host-a'] <= coordinator.CLAIM_BATCHES
+        store.complete('host-a', [(row['id'], 'done', 'No', '') for row in launch['batches']])
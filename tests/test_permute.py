@@ -0,0 +1,34 @@
+import pytest
+import permute
+
+@pytest.mark.parametrize("total", [1, 2, 7, 16, 17, 1000])
+def test_permutation_is_bijective(total):
+    assert permute.verify(total, "campaign-key")
+
+def test_inverse_round_trip():
+    total = 5000
+    for seq in range(0, total, 37):
+        index = permute.batch_index(seq, total, "k")
+        assert 0 <= index < total
+        assert permute.batch_sequence(index, total, "k") == seq
+
+def test_empty_key_keeps_order():
+    assert [permute.batch_index(seq, 10, "") for seq in range(10)] == list(range(10))
+    assert permute.batch_sequence(7, 10, "") == 7
+
+def test_order_depends_on_key_and_is_deterministic():
+    first = [permute.batch_index(seq, 256, "a") for seq in range(256)]
+    again = [permute.FeistelPermutation(256, "a").forward(seq) for seq in range(256)]
+    other = [permute.batch_index(seq, 256, "b") for seq in range(256)]
+    assert first == again
+    assert first != other
+    assert first != list(range(256))
+
+def test_out_of_range_rejected():
+    perm = permute.FeistelPermutation(10, "k")
+    with pytest.raises(ValueError):
+        perm.forward(10)
+    with pytest.raises(ValueError):
+        perm.inverse(-1)
+    with pytest.raises(ValueError):
+        permute.FeistelPermutation(0, "k")
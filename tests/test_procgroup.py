@@ -0,0 +1,41 @@
+import subprocess
+import sys
+import pytest
+import bm
+import procgroup
+import resultfile
+
+POPEN = subprocess.Popen
+
+def sleeper():
+    return POPEN([sys.executable, "-c", "import time; time.sleep(60)"], start_new_session=True)
+
+@pytest.fixture(autouse=True)
+def children_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+def test_release_stops_running_child_and_unregisters():
+    process = sleeper()
+    procgroup.register(process, 0, 7)
+    assert procgroup.children_for([7]) == [process]
+
+    procgroup.release(process)
+    assert process.poll() is not None
+    assert procgroup.read_children() == {}
+    assert procgroup.children_for([7]) == []
+
+def test_run_xiebo_error_path_releases_child(monkeypatch):
+    started = []
+    def popen(*args, **kwargs):
+        started.append(sleeper())
+        return started[-1]
+    def broken_watcher(*args, **kwargs):
+        raise RuntimeError("watcher failed")
+    monkeypatch.setattr(procgroup, 'command', lambda cmd: cmd)
+    monkeypatch.setattr(bm.subprocess, 'Popen', popen)
+    monkeypatch.setattr(resultfile, 'ResultWatcher', broken_watcher)
+
+    assert bm.run_xiebo(0, '100000', 20, '1Addr')[0] == 1
+    # Exception setelah Popen: xiebo tidak tertinggal berjalan atau tercatat di lockfile
+    assert started[0].poll() is not None
+    assert procgroup.read_children() == {}
@@ -0,0 +1,81 @@
+import json
+import pytest
+import progress
+
+SESSION = {'origin': '100000', 'range_bits': 24, 'batch_size': 1 << 20, 'total_batches': 16,
+           'shuffle_key': '', 'address': '1Addr', 'gpu_ids': [0]}
+
+@pytest.fixture(autouse=True)
+def no_active_tracker(monkeypatch):
+    monkeypatch.setattr(progress, 'ACTIVE', None)
+
+def test_low_water_and_done_ahead(tmp_path):
+    tracker = progress.ProgressTracker(SESSION, str(tmp_path / "progress.json"))
+    tracker.mark_done([3, 5, 4, 9])
+    assert tracker.low_water == 0
+    assert list(zip(tracker.starts, tracker.ends)) == [(3, 6), (9, 10)]
+    assert tracker.pending_ids(5) == [0, 1, 2, 6, 7]
+
+    tracker.mark_done([1, 0])
+    assert tracker.low_water == 2
+    tracker.mark_done([2])
+    assert tracker.low_water == 6
+    assert list(zip(tracker.starts, tracker.ends)) == [(9, 10)]
+    assert tracker.first_gap() == 6
+    assert tracker.completed_count() == 7
+
+def test_repeated_and_out_of_range_ids_ignored(tmp_path):
+    tracker = progress.ProgressTracker(SESSION, str(tmp_path / "progress.json"))
+    assert tracker.mark_done([0])
+    assert not tracker.mark_done([0, -1, 16])
+    tracker.mark_done(range(16))
+    assert tracker.first_gap() is None
+    assert tracker.pending_ids() == []
+
+def test_partial_resume_and_clear(tmp_path):
+    tracker = progress.ProgressTracker(SESSION, str(tmp_path / "progress.json"))
+    tracker.set_partial(2, 0x380000)
+    assert tracker.resume_start(2, 0x300000) == 0x380000
+    assert tracker.resume_start(3, 0x400000) == 0x400000
+    tracker.mark_done([2])
+    assert tracker.resume_start(2, 0x300000) == 0x300000
+
+def test_save_load_round_trip(tmp_path):
+    path = str(tmp_path / "progress.json")
+    tracker = progress.start(SESSION, path=path)
+    tracker.mark_done([0, 1, 4])
+    tracker.set_partial(2, 0x380000)
+
+    data = json.loads((tmp_path / "progress.json").read_text())
+    assert data['low_water'] == 2
+    assert data['done_ahead'] == [[4, 5]]
+    assert data['partial'] == {'2': '380000'}
+
+    loaded = progress.load(path)
+    assert loaded.low_water == 2
+    assert loaded.is_done(4) and not loaded.is_done(3)
+    assert loaded.resume_start(2, 0x300000) == 0x380000
+
+def test_start_resumes_same_session_only(tmp_path):
+    path = str(tmp_path / "progress.json")
+    progress.start(SESSION, path=path).mark_done([0, 1])
+
+    assert progress.start(SESSION, path=path).low_water == 2
+    other = dict(SESSION, origin='200000')
+    assert progress.start(other, path=path, low_water=1).low_water == 1
+
+def test_unreadable_file_stops_resume(tmp_path):
+    path = tmp_path / "progress.json"
+    path.write_text("{not json")
+    with pytest.raises(SystemExit):
+        progress.start(SESSION, path=str(path))
+
+def test_module_helpers_follow_active_tracker(tmp_path):
+    assert progress.resume_start(2, 0x300000) == 0x300000
+    assert progress.claim([0])
+    tracker = progress.start(SESSION, path=str(tmp_path / "progress.json"))
+    progress.record_partial(2, 0x380000)
+    progress.record_done([0])
+    assert progress.resume_start(2, 0x300000) == 0x380000
+    assert tracker.is_done(0)
+    assert not progress.claim([0])
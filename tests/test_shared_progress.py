@@ -0,0 +1,41 @@
+import multiprocessing
+import progress
+
+SESSION = {'origin': '100000', 'range_bits': 30, 'batch_size': 1 << 20, 'total_batches': 1024,
+           'shuffle_key': '', 'address': '1Addr', 'gpu_ids': [0, 1, 2, 3]}
+WORKERS = 4
+
+def worker(path, results):
+    """Satu runner --continue: klaim batch dari antrean yang sama, tandai selesai satu per satu"""
+    tracker = progress.start(SESSION, path=path)
+    claimed = []
+    for batch_id in range(SESSION['total_batches']):
+        if tracker.claim([batch_id]):
+            claimed.append(batch_id)
+            tracker.mark_done([batch_id])
+            # progress.json harus selalu utuh saat dibaca di tengah penulisan proses lain
+            assert progress.load(path) is not None
+    results.put(claimed)
+
+def test_processes_share_progress_without_loss_or_overlap(tmp_path):
+    path = str(tmp_path / "progress.json")
+    progress.start(SESSION, path=path)
+
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(path, results)) for _ in range(WORKERS)]
+    for process in processes:
+        process.start()
+    claimed = [results.get(timeout=120) for _ in processes]
+    for process in processes:
+        process.join(timeout=120)
+        assert process.exitcode == 0
+
+    # Setiap batch dijalankan tepat satu proses
+    all_claimed = [batch_id for batch_ids in claimed for batch_id in batch_ids]
+    assert sorted(all_claimed) == list(range(SESSION['total_batches']))
+
+    # progress.json gabungan semua proses, tidak mundur oleh penulis terakhir
+    tracker = progress.load(path)
+    assert tracker.low_water == SESSION['total_batches']
+    assert tracker.starts == []
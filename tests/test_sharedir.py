@@ -0,0 +1,84 @@
+import time
+import pytest
+import sharedir
+
+SESSION = {'origin': '100000', 'range_bits': 23, 'batch_size': 1 << 20, 'total_batches': 8,
+           'address': '1Addr', 'block_batches': 2}
+
+def hosts(tmp_path, count=2):
+    directory = str(tmp_path / "campaign")
+    first = sharedir.join(directory, SESSION)
+    return [first] + [sharedir.join(directory) for _ in range(count - 1)]
+
+def test_join_creates_then_joins(tmp_path):
+    first, second = hosts(tmp_path)
+    assert first.total_blocks == 4
+    assert second.session == first.session
+    assert first.owner != second.owner
+    with pytest.raises(ValueError):
+        sharedir.join(str(tmp_path / "campaign"), dict(SESSION, origin='200000'))
+    with pytest.raises(ValueError):
+        sharedir.join(str(tmp_path / "empty"))
+
+def test_hosts_claim_different_blocks(tmp_path):
+    first, second = hosts(tmp_path)
+    assert first.claim_next() == 0
+    assert second.claim_next() == 1
+    assert first.claim_next() == 2
+    assert first.block_batches(3) == [6, 7]
+
+def test_expired_lease_is_reclaimed_once(tmp_path):
+    first, second, third = hosts(tmp_path, 3)
+    assert first.claim_next() == 0
+    claim = sharedir.read_json(first.claim_path(0))
+    claim['lease_until'] = time.time() - 1
+    sharedir.write_json_atomic(first.claim_path(0), claim)
+
+    assert second._try_claim(0)
+    assert not third._try_claim(0)
+    assert sharedir.read_json(first.claim_path(0))['owner'] == second.owner
+
+def test_renew_abandons_lost_claim(tmp_path):
+    first, second = hosts(tmp_path)
+    first.claim_next()
+    claim = sharedir.read_json(first.claim_path(0))
+    claim['owner'] = second.owner
+    sharedir.write_json_atomic(first.claim_path(0), claim)
+
+    first.renew()
+    assert first.is_lost(0)
+    assert 0 not in first.held
+
+def test_complete_compact_and_found(tmp_path):
+    first, second = hosts(tmp_path)
+    for _ in range(3):
+        first.complete(first.claim_next())
+    second.refresh()
+    assert second.cursor == 3
+
+    assert first.compact(force=True) == 3
+    summary = sharedir.read_json(first.path(sharedir.SUMMARY_FILE))
+    assert summary['done'] == [[0, 3]]
+
+    block_id = second.claim_next()
+    second.complete(block_id, found_keys=[{'private_key_hex': 'abc'}])
+    assert first.found()
+    assert first.claim_next() is None
+
+def test_run_completes_every_block_once(tmp_path):
+    first, second = hosts(tmp_path)
+    seen = []
+
+    def run_block(gpu_id, block_id):
+        seen.append(block_id)
+        return True, []
+
+    total = sharedir.run(first, [0, 1], run_block) + sharedir.run(second, [0], run_block)
+    assert total == 4
+    assert sorted(seen) == [0, 1, 2, 3]
+    assert second.status()['first_gap'] is None
+
+def test_ranges_round_trip():
+    ids = {0, 1, 2, 5, 7, 8}
+    assert sharedir.to_ranges(ids) == [[0, 3], [5, 6], [7, 9]]
+    assert sharedir.from_ranges(sharedir.to_ranges(ids)) == ids
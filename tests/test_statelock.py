@@ -0,0 +1,63 @@
+import os
+import procgroup
+import statelock
+
+def live_other_owner():
+    # Proses induk pytest: hidup dan bukan proses ini
+    ppid = os.getppid()
+    return f"{ppid}:{procgroup.proc_start_time(ppid) or ''}"
+
+def journals(tmp_path):
+    path = str(tmp_path / "progress.json.claims")
+    mine = statelock.ClaimJournal(path)
+    other = statelock.ClaimJournal(path)
+    other.owner = live_other_owner()
+    return mine, other
+
+def test_claim_is_exclusive_and_all_or_nothing(tmp_path):
+    mine, other = journals(tmp_path)
+    assert mine.claim([1, 2]) == (True, [])
+    assert other.claim([2, 3]) == (False, [])
+    assert other.claim([3]) == (True, [])
+    assert set(mine.active_claims()) == {1, 2, 3}
+
+def test_completed_batches_propagate(tmp_path):
+    mine, other = journals(tmp_path)
+    mine.claim([4])
+    mine.complete([4])
+    assert other.sync() == [4]
+    assert other.claim([4]) == (False, [])
+
+def test_release_lets_others_claim(tmp_path):
+    mine, other = journals(tmp_path)
+    mine.claim([5])
+    mine.release([5])
+    assert other.claim([5])[0]
+
+def test_dead_owner_claims_expire(tmp_path):
+    mine, other = journals(tmp_path)
+    other.owner = "999999999:1"
+    other.claim([6])
+    assert mine.claim([6])[0]
+
+def test_is_done_callback_blocks_claim(tmp_path):
+    mine, _ = journals(tmp_path)
+    assert mine.claim([7], is_done=lambda batch_id: batch_id == 7) == (False, [])
+
+def test_reset_is_seen_by_other_journal(tmp_path):
+    mine, other = journals(tmp_path)
+    other.claim([8])
+    other.complete([9])
+    mine.sync()
+    assert 9 in mine.done
+    other.reset()
+    mine.sync()
+    assert mine.done == set()
+    assert mine.claim([8])[0]
+
+def test_write_text_atomic(tmp_path):
+    path = tmp_path / "nextbatch.txt"
+    statelock.write_text_atomic(str(path), "a=1\n")
+    statelock.write_text_atomic(str(path), "a=2\n")
+    assert path.read_text() == "a=2\n"
+    assert [p.name for p in tmp_path.iterdir()] == ["nextbatch.txt"]
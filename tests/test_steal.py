@@ -0,0 +1,80 @@
+import steal
+
+def chunk(*batch_ids):
+    return [{'batch_id': batch_id, 'keys': 1} for batch_id in batch_ids]
+
+def ids(chunks):
+    return [[b['batch_id'] for b in c] for c in chunks]
+
+def test_takes_last_chunk_of_longest_lane():
+    lanes = {0: [], 1: [chunk(1), chunk(2)], 2: [chunk(3), chunk(4), chunk(5)]}
+    victim, piece = steal.choose(0, lanes, {0: 1, 1: 1, 2: 1})
+    assert victim == 2
+    assert ids([piece]) == [[5]]
+    assert ids(lanes[2]) == [[3], [4]]
+
+def test_splits_lone_multi_batch_chunk():
+    lanes = {0: [], 1: [chunk(8, 9, 10)]}
+    victim, piece = steal.choose(0, lanes, {0: 1, 1: 1})
+    assert ids([piece]) == [[10]]
+    assert ids(lanes[1]) == [[8, 9]]
+
+    lanes = {0: [], 1: [chunk(0, 1, 2, 3)]}
+    _, piece = steal.choose(0, lanes, {0: 1, 1: 1})
+    assert ids([piece]) == [[2, 3]] and ids(lanes[1]) == [[0, 1]]
+
+def test_slow_gpu_does_not_take_work_it_would_finish_later():
+    lanes = {0: [], 1: [chunk(1)]}
+    assert steal.choose(0, lanes, {0: 0.1, 1: 0.9}) is None
+    assert ids(lanes[1]) == [[1]]
+
+def test_nothing_to_take():
+    assert steal.choose(0, {0: [], 1: []}, {0: 1, 1: 1}) is None
+
+def test_next_chunk_prefers_own_lane_and_steals_when_enabled(monkeypatch):
+    mine, other = [chunk(0)], [chunk(1), chunk(2)]
+    monkeypatch.setattr(steal, 'ENABLED', True)
+    steal.share({0: mine, 1: other}, {0: 1, 1: 1})
+    assert ids([steal.next_chunk(0, mine)]) == [[0]]
+    assert ids([steal.next_chunk(0, mine)]) == [[2]]
+    assert ids([steal.next_chunk(1, other)]) == [[1]]
+    # GPU 0 dan lane 1 selesai: tidak ada kerja tersisa di lane mana pun
+    steal.leave(0)
+    assert steal.next_chunk(1, other) is None
+    assert steal.next_chunk(0, mine) is None
+
+    monkeypatch.setattr(steal, 'ENABLED', False)
+    assert steal.next_chunk(0, []) is None
+    assert steal.drain(other) == [] and other == []
+
+def test_idle_gpu_keeps_polling_until_work_can_be_taken(monkeypatch):
+    mine, other = [], [chunk(1), chunk(2)]
+    monkeypatch.setattr(steal, 'ENABLED', True)
+    steal.share({0: mine, 1: other}, {0: 1, 1: 1})
+    sleeps = []
+    monkeypatch.setattr(steal.time, 'sleep', sleeps.append)
+
+    # Pencurian pertama ditolak (mis. GPU idle terlalu lambat), percobaan berikutnya berhasil
+    real_choose = steal.choose
+    calls = []
+    def choose_once_declined(*args):
+        calls.append(args)
+        return None if len(calls) == 1 else real_choose(*args)
+    monkeypatch.setattr(steal, 'choose', choose_once_declined)
+    assert ids([steal.next_chunk(0, mine)]) == [[2]]
+    assert sleeps == [steal.POLL_SECONDS]
+
+def test_idle_gpu_waits_for_running_lane_and_stops(monkeypatch):
+    mine, other = [], [chunk(1)]
+    monkeypatch.setattr(steal, 'ENABLED', True)
+    steal.share({0: mine, 1: other}, {0: 1, 1: 1})
+    assert ids([steal.next_chunk(1, other)]) == [[1]]
+
+    # Lane 1 masih berjalan: GPU 0 menunggu dengan backoff, keluar saat stop atau lane 1 selesai
+    sleeps = []
+    monkeypatch.setattr(steal.time, 'sleep', sleeps.append)
+    assert steal.next_chunk(0, mine, stopped=lambda: len(sleeps) >= 5) is None
+    assert sleeps == [1, 2, 4, 8, 10]
+
+    steal.leave(1)
+    assert steal.next_chunk(0, mine) is None
@@ -0,0 +1,152 @@
+import sys
+import time
+import signal
+import threading
+import batchtiming
+import procgroup
+
+# Konfigurasi watchdog proses xiebo (GPU hang / xiebo berhenti mencetak progress)
+STALL_TIMEOUT_SECONDS = 300     # Maksimal tanpa frame MK/s baru (atau BKeys tidak bertambah)
+SETUP_TIMEOUT_SECONDS = 1800    # Maksimal fase 'Setting starting keys' sebelum frame MK/s pertama
+CHECK_INTERVAL_SECONDS = 5      # Interval pengecekan watchdog
+KILL_GRACE_SECONDS = 10         # Jeda antara terminate dan kill
+MAX_RELAUNCH = 3                # Maksimal relaunch satu batch setelah stall
+BACKOFF_BASE_SECONDS = 15       # Backoff relaunch: 15s, 30s, 60s, ...
+BACKOFF_MAX_SECONDS = 300       # Batas atas backoff
+UNHEALTHY_AFTER_STALLS = 3      # Stall berturut-turut sebelum GPU ditandai unhealthy
+STALL_RETURN_CODE = 124         # Return code run_xiebo jika proses dihentikan watchdog
+
+class ProcessWatchdog:
+    """Memantau satu proses xiebo dan menghentikannya jika progress berhenti"""
+
+    def __init__(self, process, gpu_id, label=''):
+        self.process = process
+        self.gpu_id = gpu_id
+        self.label = label
+        self.started_at = time.time()
+        self.last_activity = self.started_at
+        self.last_bkeys = None
+        self.seen_progress = False
+        self.stalled = False
+        self.reason = ''
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        """Mulai memantau proses di thread terpisah"""
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Berhenti memantau (proses sudah selesai)"""
+        self.stop_event.set()
+
+    def feed(self, line):
+        """Memproses satu baris output xiebo untuk mendeteksi progress"""
+        now = time.time()
+        progress = batchtiming.parse_progress_line(line)
+
+        with self.lock:
+            if progress:
+                # Frame baru hanya dihitung progress jika jumlah key bertambah
+                if not self.seen_progress or self.last_bkeys is None or progress['bkeys'] > self.last_bkeys:
+                    self.last_activity = now
+                self.last_bkeys = progress['bkeys']
+                self.seen_progress = True
+            elif not self.seen_progress and line.strip():
+                # Selama setup, setiap baris output dianggap tanda hidup
+                self.last_activity = now
+
+    def idle_seconds(self):
+        """Lama (detik) sejak progress terakhir"""
+        with self.lock:
+            return time.time() - self.last_activity
+
+    def _run(self):
+        while not self.stop_event.wait(CHECK_INTERVAL_SECONDS):
+            if self.process.poll() is not None:
+                return
+
+            with self.lock:
+                limit = STALL_TIMEOUT_SECONDS if self.seen_progress else SETUP_TIMEOUT_SECONDS
+                phase = 'scan' if self.seen_progress else 'setup'
+                idle = time.time() - self.last_activity
+
+            if idle > limit:
+                self.stalled = True
+                self.reason = f"no progress for {idle:.0f}s during {phase}"
+                print(f"\n🐕 Watchdog GPU {self.gpu_id}{f' {self.label}' if self.label else ''}: "
+                      f"{self.reason}, killing xiebo (pid {self.process.pid})")
+                kill_process(self.process)
+                return
+
+def kill_process(process):
+    """Menghentikan proses beserta process group-nya: terminate, lalu kill jika tidak berhenti"""
+    try:
+        procgroup.signal_group(process, signal.SIGTERM)
+        process.wait(timeout=KILL_GRACE_SECONDS)
+    except Exception:
+        try:
+            procgroup.signal_group(process, signal.SIGKILL)
+            process.wait(timeout=KILL_GRACE_SECONDS)
+        except Exception as e:
+            print(f"❌ Error killing xiebo process: {e}")
+
+class GpuHealth:
+    """Mencatat stall per GPU, GPU dengan stall berturut-turut ditandai unhealthy"""
+
+    def __init__(self):
+        self.stalls = {}
+        self.total_stalls = {}
+        self.unhealthy = set()
+        self.lock = threading.Lock()
+
+    def record_stall(self, gpu_id):
+        """Mencatat satu stall, mengembalikan True jika GPU sekarang unhealthy"""
+        gpu_id = str(gpu_id)
+        with self.lock:
+            self.stalls[gpu_id] = self.stalls.get(gpu_id, 0) + 1
+            self.total_stalls[gpu_id] = self.total_stalls.get(gpu_id, 0) + 1
+            if self.stalls[gpu_id] >= UNHEALTHY_AFTER_STALLS:
+                self.unhealthy.add(gpu_id)
+            return gpu_id in self.unhealthy
+
+    def record_success(self, gpu_id):
+        """Batch selesai normal, reset hitungan stall berturut-turut"""
+        with self.lock:
+            self.stalls[str(gpu_id)] = 0
+
+    def is_healthy(self, gpu_id):
+        with self.lock:
+            return str(gpu_id) not in self.unhealthy
+
+    def healthy_gpus(self, gpu_ids):
+        """Daftar GPU yang masih sehat (urutan dipertahankan)"""
+        return [g for g in gpu_ids if self.is_healthy(g)]
+
+# Status kesehatan GPU bersama untuk semua worker dalam satu proses
+GPU_HEALTH = GpuHealth()
+
+def backoff_seconds(attempt):
+    """Jeda sebelum relaunch ke-N (exponential backoff)"""
+    return min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** max(0, attempt - 1)))
+
+def display_health(gpu_ids):
+    """Menampilkan ringkasan stall dan status kesehatan per GPU"""
+    print(f"\n🩺 GPU health:")
+    for gpu_id in gpu_ids:
+        state = 'healthy' if GPU_HEALTH.is_healthy(gpu_id) else 'UNHEALTHY'
+        print(f"   GPU {gpu_id}: {state} ({GPU_HEALTH.total_stalls.get(str(gpu_id), 0)} stalls)")
+
+def main():
+    print("Xiebo Stall Watchdog")
+    print(f"  Stall timeout: {STALL_TIMEOUT_SECONDS}s without new MK/s frame (BKeys must increase)")
+    print(f"  Setup timeout: {SETUP_TIMEOUT_SECONDS}s before first MK/s frame")
+    print(f"  Relaunch: max {MAX_RELAUNCH}x, backoff " +
+          ', '.join(f"{backoff_seconds(n)}s" for n in range(1, MAX_RELAUNCH + 1)))
+    print(f"  GPU unhealthy after {UNHEALTHY_AFTER_STALLS} consecutive stalls (work rerouted to healthy GPUs)")
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
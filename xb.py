@@ -0,0 +1,104 @@
+import os
+import sys
+import importlib
+
+# Satu entry point untuk semua runner: backend di-import hanya saat subcommand dipakai
+XIEBO_BINARY = "./xiebo"
+
+# Backend default dan backend yang boleh dipilih per subcommand (--via NAME)
+COMMANDS = {
+    'run':      ('kamu', ('kamu', 'bm', 'bmw', 'kamudb', 'kamudbs', 'bmdb', 'bmdbs'),
+                 "GPU_ID(S) START_HEX RANGE_BITS ADDRESS"),
+    'batch':    ('kamu', ('kamu', 'bm', 'bmw', 'kamudb', 'kamudbs', 'bmdb', 'bmdbs'),
+                 "GPU_IDS START_HEX RANGE_BITS ADDRESS (DB backends: GPU_IDS START_ID ADDRESS)"),
+    'continue': ('kamu', ('kamu', 'bm', 'bmw', 'genbnew', 'genbnext', 'genbsmal'), "[GPU_IDS]  (bm/bmw: GPUs claim batches in parallel)"),
+    'share':    ('bm', ('bm',), "DIR GPU_IDS [START_HEX RANGE_BITS ADDRESS]  (hosts split one campaign via DIR)"),
+    'summary':  ('kamu', ('kamu', 'bm', 'bmw', 'genbnew', 'genbnext', 'genbsmal'), ""),
+    'generate': ('genbnext', ('genbnew', 'genbnext', 'genbsmal'), "START_HEX RANGE_BITS [ADDRESS]"),
+    'load':     ('audit', ('audit',), "BATCH_FILE  (generated_batches_NNN.txt -> Tbatch, IDs from file)"),
+    'audit':    ('audit', ('audit',), "[START_HEX RANGE_BITS] [--db] [--trust-status] [--enqueue-db]"),
+}
+
+# Flag yang diteruskan ke main() backend untuk setiap subcommand
+BACKEND_FLAGS = {
+    'batch': {
+        'kamu': ['--batch'], 'bm': ['--batch'], 'bmw': ['--batch'],
+        'kamudb': ['--batch-db-parallel'],
+        'kamudbs': ['--batch-db'], 'bmdb': ['--batch-db'], 'bmdbs': ['--batch-db'],
+    },
+    'continue': {'kamu': ['--continue'], 'bm': ['--continue'], 'bmw': ['--continue'], 'genbnew': ['--continue'],
+                 'genbnext': ['--continue'], 'genbsmal': ['--continue']},
+    'share': {'bm': ['--share']},
+    'summary': {name: ['--summary'] for name in ('kamu', 'bm', 'bmw', 'genbnew', 'genbnext', 'genbsmal')},
+    'generate': {name: ['--generate'] for name in ('genbnew', 'genbnext', 'genbsmal')},
+}
+
+# Subcommand yang menjalankan xiebo (cek binary seperti blok __main__ runner)
+NEEDS_XIEBO = ('run', 'batch', 'continue', 'share')
+
+def print_usage():
+    print("Xiebo Unified CLI")
+    print("Usage: python3 xb.py SUBCOMMAND [--via BACKEND] ARGS...")
+    for name, (default, allowed, args) in COMMANDS.items():
+        print(f"  {name:<9} {args}")
+        if len(allowed) > 1:
+            print(f"  {'':<9} backend: {default} (default), --via {'|'.join(a for a in allowed if a != default)}")
+    print("  Runner flags (--metrics, --dashboard, --shuffle, --deadline, ...) are passed through unchanged")
+
+def check_xiebo():
+    """Sama seperti blok __main__ runner: binary harus ada dan executable"""
+    if not os.path.exists(XIEBO_BINARY):
+        print("❌ Error: xiebo binary not found")
+        sys.exit(1)
+    if not os.access(XIEBO_BINARY, os.X_OK):
+        os.chmod(XIEBO_BINARY, 0o755)
+    if os.name == 'posix':
+        os.system('')
+
+def extract_via(argv, default, allowed):
+    """Mengambil '--via NAME' dari argv (dihapus dari list)"""
+    if "--via" not in argv:
+        return default
+    index = argv.index("--via")
+    if index + 1 >= len(argv):
+        print(f"❌ --via needs a backend: {', '.join(allowed)}")
+        sys.exit(1)
+    backend = argv[index + 1]
+    del argv[index:index + 2]
+    if backend not in allowed:
+        print(f"❌ Backend '{backend}' does not support this subcommand (use: {', '.join(allowed)})")
+        sys.exit(1)
+    return backend
+
+def run_load(args):
+    if len(args) != 1:
+        print(f"Usage: python3 xb.py load {COMMANDS['load'][2]}")
+        sys.exit(1)
+    audit = importlib.import_module('audit')
+    inserted = audit.insert_batches_db(args[0], keep_ids=True)
+    print(f"📥 {inserted:,} batches from {args[0]} inserted into Tbatch")
+    sys.exit(0 if inserted else 1)
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in COMMANDS:
+        print_usage()
+        sys.exit(1)
+
+    command = sys.argv[1]
+    args = sys.argv[2:]
+    default, allowed, _ = COMMANDS[command]
+    backend = extract_via(args, default, allowed)
+
+    if command == 'load':
+        run_load(args)
+
+    if command in NEEDS_XIEBO:
+        check_xiebo()
+
+    # Backend di-import di sini, subcommand lain tidak membayar biaya import-nya
+    module = importlib.import_module(backend)
+    sys.argv = [f"{backend}.py"] + BACKEND_FLAGS.get(command, {}).get(backend, []) + args
+    module.main()
+
+if __name__ == "__main__":
+    main()